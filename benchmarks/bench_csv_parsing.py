@@ -0,0 +1,117 @@
+"""
+CSV 解析基準測試
+
+比較內附的台灣市場匯出檔（19940513-20251111.csv）及其放大 N 倍的合成副本，
+以預設 pd.read_csv（推斷型別，逐值推斷日期格式）與解析設定檔（明確型別、固定日期格式，
+c 與 pyarrow 引擎）讀取的耗時，並確認各方式得到相同的資料。
+
+用法:
+    python benchmarks/bench_csv_parsing.py --scales 1 100 --repeat 3
+"""
+
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+# 專案根目錄
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.data.parser_profiles import DEFAULT_ENGINE, TW_MARKET_PROFILE  # noqa: E402
+
+BUNDLED_CSV = os.path.join(ROOT_DIR, '19940513-20251111.csv')
+
+
+def write_scaled_copy(source: str, path: str, scale: int):
+    """
+    將原始檔的資料列重複 scale 次（標頭只寫一次），保留 BOM、N/A 與列尾逗號等格式特徵。
+    """
+    with open(source, 'rb') as f:
+        header = f.readline()
+        body = f.read()
+    if not body.endswith(b'\n'):
+        body += b'\n'
+    with open(path, 'wb') as f:
+        f.write(header)
+        for _ in range(scale):
+            f.write(body)
+
+
+def parse_default(path: str) -> pd.DataFrame:
+    # 改版前 DataLoader 的讀取方式，日期在使用時才以推斷格式轉換
+    df = pd.read_csv(path)
+    df = df.drop(columns=[col for col in df.columns if col.startswith('Unnamed')])
+    df['時間'] = pd.to_datetime(df['時間'])
+    return df
+
+
+def profile_parser(engine: str):
+    profile = copy.copy(TW_MARKET_PROFILE)
+    profile.engine = engine
+    return profile.read
+
+
+def time_parser(parser, path: str, repeat: int) -> dict:
+    timings = []
+    df = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = parser(path)
+        timings.append(time.perf_counter() - start)
+    return {'best_s': min(timings), 'median_s': statistics.median(timings), 'rows': len(df), 'frame': df}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比較預設 read_csv 與解析設定檔的 CSV 讀取耗時')
+    parser.add_argument('--source', default=BUNDLED_CSV, help='台灣市場格式的 CSV 檔案')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 100], help='資料列重複倍數（1 為原始檔）')
+    parser.add_argument('--repeat', type=int, default=3, help='每種方式重複次數（取最佳值）')
+    parser.add_argument('--json', dest='json_path', help='將結果寫入 JSON 檔案')
+    args = parser.parse_args()
+
+    modes = {'default': parse_default, 'profile-c': profile_parser('c')}
+    if DEFAULT_ENGINE == 'pyarrow':
+        modes['profile-pyarrow'] = profile_parser('pyarrow')
+
+    results = []
+    with tempfile.TemporaryDirectory() as workspace:
+        for scale in args.scales:
+            path = args.source
+            if scale > 1:
+                path = os.path.join(workspace, f'scaled_{scale}.csv')
+                write_scaled_copy(args.source, path, scale)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+
+            reference = None
+            for mode, parse in modes.items():
+                result = time_parser(parse, path, args.repeat)
+                frame = result.pop('frame')
+                if reference is None:
+                    reference = frame
+                else:
+                    pd.testing.assert_frame_equal(frame, reference)
+                result.update({'mode': mode, 'scale': scale, 'csv_mb': round(size_mb, 1),
+                               'rows_per_s': round(result['rows'] / result['best_s'])})
+                results.append(result)
+
+    baseline = {r['scale']: r['best_s'] for r in results if r['mode'] == 'default'}
+    print(f"{'模式':<18}{'倍數':>6}{'CSV (MB)':>10}{'列數':>10}{'最佳 (s)':>10}{'中位數 (s)':>12}{'列/秒':>12}{'加速':>8}")
+    for r in results:
+        r['speedup'] = round(baseline[r['scale']] / r['best_s'], 2)
+        print(f"{r['mode']:<18}{r['scale']:>6}{r['csv_mb']:>10.1f}{r['rows']:>10}{r['best_s']:>10.3f}"
+              f"{r['median_s']:>12.3f}{r['rows_per_s']:>12}{r['speedup']:>8.2f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == '__main__':
+    main()
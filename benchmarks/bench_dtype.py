@@ -0,0 +1,129 @@
+"""
+float64 與 float32 數值管線的記憶體與吞吐量基準測試
+
+使用內附的 19940513-20251111.csv（可放大為 N 倍）執行完整預處理、
+一個訓練 epoch 與批次推論，比較兩種型別的耗時與陣列記憶體用量。
+
+用法:
+    python benchmarks/bench_dtype.py --scale 10 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+# 將專案根目錄加入 Python 路徑
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.data.preprocessor import DataPreprocessor
+
+DEFAULT_CSV = os.path.join(ROOT_DIR, '19940513-20251111.csv')
+DTYPES = ('float64', 'float32')
+
+
+def load_source(csv_path: str, scale: int) -> pd.DataFrame:
+    """
+    載入基準資料並依 scale 倍數串接放大（日期不影響數值管線）。
+    :param csv_path: CSV 檔案路徑
+    :param scale: 放大倍數
+    :return: 原始 DataFrame
+    """
+    df = pd.read_csv(csv_path)
+    df = df.rename(columns={'時間': 'date', '收盤價': 'close'})
+    if scale > 1:
+        df = pd.concat([df] * scale, ignore_index=True)
+    return df
+
+
+def best_of(func, repeat: int) -> tuple[float, object]:
+    """
+    重複執行 repeat 次並回傳最短耗時（秒）與最後一次的結果。
+    """
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_dtype(raw_df: pd.DataFrame, dtype: str, look_back: int, n_days: int,
+                repeat: int, train: bool) -> dict:
+    """
+    針對單一型別執行預處理、訓練與推論基準測試。
+    :return: 測量結果字典
+    """
+    preprocessor = DataPreprocessor(dtype=dtype)
+    preprocess_s, (X, y, _) = best_of(
+        lambda: preprocessor.preprocess(raw_df, look_back, n_days, 'close'), repeat
+    )
+
+    result = {
+        'dtype': dtype,
+        'samples': int(X.shape[0]),
+        'preprocess_s': round(preprocess_s, 4),
+        'preprocess_rows_per_s': round(len(raw_df) / preprocess_s, 1),
+        'X_mb': round(X.nbytes / 1024 ** 2, 3),
+        'y_mb': round(y.nbytes / 1024 ** 2, 3),
+    }
+
+    if train:
+        from src.models.trainer import ModelTrainer
+
+        trainer = ModelTrainer(dtype=dtype)
+        hyperparameters = {'lstm_units': 32, 'epochs': 1, 'batch_size': 64}
+        trainer.build_model(X.shape[1:], y.shape[1], hyperparameters)
+        # 先執行一次以排除 tf.function 追蹤成本
+        trainer.model.fit(X[:64], y[:64], epochs=1, batch_size=64, verbose=0)
+
+        start = time.perf_counter()
+        trainer.model.fit(X, y, epochs=1, batch_size=64, verbose=0)
+        epoch_s = time.perf_counter() - start
+
+        infer_s, _ = best_of(lambda: trainer.model.predict(X, batch_size=256, verbose=0), repeat)
+
+        result.update({
+            'train_epoch_s': round(epoch_s, 4),
+            'train_samples_per_s': round(len(X) / epoch_s, 1),
+            'inference_s': round(infer_s, 4),
+            'inference_samples_per_s': round(len(X) / infer_s, 1),
+        })
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比較 float64 與 float32 數值管線')
+    parser.add_argument('--csv', default=DEFAULT_CSV, help='來源 CSV 檔案')
+    parser.add_argument('--scale', type=int, default=1, help='資料放大倍數')
+    parser.add_argument('--look-back', type=int, default=5)
+    parser.add_argument('--n-days', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-train', action='store_true', help='只測量預處理')
+    parser.add_argument('--json', dest='json_path', help='將結果寫入 JSON 檔案')
+    args = parser.parse_args()
+
+    raw_df = load_source(args.csv, args.scale)
+    results = [
+        bench_dtype(raw_df, dtype, args.look_back, args.n_days, args.repeat, not args.no_train)
+        for dtype in DTYPES
+    ]
+
+    keys = [key for key in results[0] if key != 'dtype']
+    print(f"資料列數: {len(raw_df)}")
+    print(f"{'指標':<26}" + ''.join(f"{r['dtype']:>14}" for r in results))
+    for key in keys:
+        print(f"{key:<26}" + ''.join(f"{r[key]:>14}" for r in results))
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'rows': len(raw_df), 'results': results}, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+CSV 匯入記憶體基準測試
+
+產生不同大小的合成 CSV，分別在乾淨的子程序中以串流匯入（CsvIngestor）
+與舊版流程（整個檔案 read_csv 後改名再寫回 CSV）處理，比較耗時與峰值常駐記憶體（RSS）。
+串流匯入的峰值記憶體應只與區塊大小有關，不隨檔案大小成長。
+
+用法:
+    python benchmarks/bench_ingest.py --rows 100000 400000 --chunksize 50000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# 專案根目錄
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUN_SCRIPT = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+import pandas as pd
+import pyarrow.parquet
+from src.data.ingest import CsvIngestor
+baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {mode!r} == 'streaming':
+    CsvIngestor({chunksize}).ingest({csv_path!r}, {output_path!r}, 'bench.csv')
+else:
+    df = pd.read_csv({csv_path!r})
+    df.rename(columns={{'時間': 'date', '收盤價': 'close'}}, inplace=True)
+    df.to_csv({output_path!r}, index=False)
+elapsed = time.perf_counter() - start
+peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'elapsed_s': elapsed, 'peak_mb': peak_kb / 1024,
+                  'delta_mb': (peak_kb - baseline_kb) / 1024}}))
+"""
+
+
+def write_csv(path: str, rows: int, seed: int = 0):
+    """
+    以區塊寫出與內附資料相同欄位的合成 CSV（中文欄位，每列間隔一分鐘的日期時間）。
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2000-01-01')
+    block = 100_000
+    close = 100.0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('時間,開盤價,最高價,最低價,收盤價,成交量,SMA5,SMA20\n')
+        for offset in range(0, rows, block):
+            n = min(block, rows - offset)
+            dates = start + pd.to_timedelta(np.arange(offset, offset + n), unit='min')
+            prices = close * np.exp(np.cumsum(rng.normal(0, 0.001, size=n)))
+            close = float(prices[-1])
+            frame = pd.DataFrame({
+                '時間': dates.strftime('%Y/%m/%d %H:%M:%S'),
+                '開盤價': prices, '最高價': prices * 1.01, '最低價': prices * 0.99, '收盤價': prices,
+                '成交量': rng.integers(1000, 100000, size=n), 'SMA5': prices, 'SMA20': prices
+            })
+            frame.to_csv(f, header=False, index=False, float_format='%.4f')
+
+
+def run(mode: str, csv_path: str, output_path: str, chunksize: int) -> dict:
+    result = subprocess.run(
+        [sys.executable, '-c', RUN_SCRIPT.format(root=ROOT_DIR, mode=mode, csv_path=csv_path,
+                                                 output_path=output_path, chunksize=chunksize)],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='比較串流匯入與整檔讀取的耗時與峰值記憶體')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 400_000],
+                        help='合成 CSV 的列數')
+    parser.add_argument('--chunksize', type=int, default=50_000, help='串流匯入的區塊列數')
+    parser.add_argument('--json', dest='json_path', help='將結果寫入 JSON 檔案')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as workspace:
+        for rows in args.rows:
+            csv_path = os.path.join(workspace, f'bench_{rows}.csv')
+            write_csv(csv_path, rows)
+            size_mb = os.path.getsize(csv_path) / (1024 * 1024)
+            for mode in ('streaming', 'legacy'):
+                output_path = os.path.join(workspace, f'out_{rows}_{mode}')
+                result = run(mode, csv_path, output_path, args.chunksize)
+                result.update({'mode': mode, 'rows': rows, 'csv_mb': round(size_mb, 1)})
+                results.append(result)
+
+    print(f"{'模式':<12}{'列數':>10}{'CSV (MB)':>10}{'耗時 (s)':>10}{'峰值 RSS (MB)':>16}{'增量 (MB)':>12}")
+    for r in results:
+        print(f"{r['mode']:<12}{r['rows']:>10}{r['csv_mb']:>10.1f}{r['elapsed_s']:>10.2f}"
+              f"{r['peak_mb']:>16.1f}{r['delta_mb']:>12.1f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == '__main__':
+    main()
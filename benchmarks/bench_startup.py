@@ -0,0 +1,154 @@
+"""
+Flask API 啟動時間基準測試
+
+在乾淨的子程序中以 `python -X importtime` 匯入 src.app，依頂層套件彙總匯入耗時，
+並測量 create_app() 到第一個 /api/status 回應的時間。
+啟動路徑匯入了禁止的重型模組（預設 tensorflow、keras、sklearn）或超過時間上限時以非零狀態結束，
+可用於 CI 攔截啟動時間退化。
+
+用法:
+    python benchmarks/bench_startup.py --repeat 3 --max-import-s 1.5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+# 專案根目錄
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_FORBIDDEN = ('tensorflow', 'keras', 'sklearn')
+
+# 在暫存工作目錄中建立應用程式並送出第一個請求（create_app 以 cwd 決定資料與模型目錄）
+FIRST_REQUEST_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+from src.app import create_app
+imported = time.perf_counter()
+app = create_app(preload_ml=False)
+created = time.perf_counter()
+response = app.test_client().get('/api/status')
+assert response.status_code == 200, response.status_code
+done = time.perf_counter()
+print(json.dumps({{
+    'import_s': imported - start,
+    'create_app_s': created - imported,
+    'first_request_s': done - created,
+    'total_s': done - start,
+    'modules': sorted(sys.modules)
+}}))
+"""
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """
+    解析 -X importtime 的輸出。
+    :return: [{'module', 'self_us', 'cumulative_us', 'depth'}]
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # 格式: "import time:  <self> | <cumulative> | <縮排><模組名稱>"
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        stripped = name.lstrip()
+        entries.append({
+            'module': stripped,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(name) - len(stripped) - 1) // 2
+        })
+    return entries
+
+
+def measure_importtime(module: str) -> list[dict]:
+    """
+    在新的直譯器中匯入模組並收集 importtime 資料。
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    return parse_importtime(result.stderr)
+
+
+def breakdown_by_package(entries: list[dict], top: int) -> list[tuple[str, float]]:
+    """
+    依頂層套件加總各模組的自身耗時（秒），由大到小排序。
+    """
+    totals = defaultdict(int)
+    for entry in entries:
+        totals[entry['module'].split('.')[0]] += entry['self_us']
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]
+    return [(package, round(us / 1e6, 4)) for package, us in ranked]
+
+
+def measure_first_request() -> dict:
+    """
+    測量 匯入 -> create_app -> 第一個 /api/status 回應 的耗時。
+    """
+    with tempfile.TemporaryDirectory() as workspace:
+        result = subprocess.run(
+            [sys.executable, '-c', FIRST_REQUEST_SCRIPT.format(root=ROOT_DIR)],
+            cwd=workspace, capture_output=True, text=True, check=True
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='測量 Flask API 啟動時間與匯入耗時分佈')
+    parser.add_argument('--module', default='src.app', help='要測量的模組')
+    parser.add_argument('--repeat', type=int, default=3, help='重複次數（取最短耗時）')
+    parser.add_argument('--top', type=int, default=15, help='顯示耗時最多的前 N 個套件')
+    parser.add_argument('--forbid', nargs='*', default=list(DEFAULT_FORBIDDEN),
+                        help='啟動路徑不得匯入的套件')
+    parser.add_argument('--max-import-s', type=float, help='匯入時間上限（秒），超過時以非零狀態結束')
+    parser.add_argument('--json', dest='json_path', help='將結果寫入 JSON 檔案')
+    args = parser.parse_args()
+
+    runs = [measure_first_request() for _ in range(args.repeat)]
+    best = min(runs, key=lambda run: run['total_s'])
+    entries = measure_importtime(args.module)
+    breakdown = breakdown_by_package(entries, args.top)
+
+    loaded_packages = {name.split('.')[0] for name in best['modules']}
+    forbidden_loaded = sorted(set(args.forbid) & loaded_packages)
+
+    print(f"匯入 {args.module}: {best['import_s']:.3f}s")
+    print(f"create_app():   {best['create_app_s']:.3f}s")
+    print(f"第一個請求:     {best['first_request_s']:.3f}s")
+    print(f"合計:           {best['total_s']:.3f}s（{args.repeat} 次中最短）")
+    print(f"\n{'套件':<28}{'自身匯入耗時 (s)':>18}")
+    for package, seconds in breakdown:
+        print(f"{package:<28}{seconds:>18.4f}")
+
+    failures = []
+    if forbidden_loaded:
+        failures.append(f"啟動路徑匯入了禁止的套件: {forbidden_loaded}")
+    if args.max_import_s is not None and best['import_s'] > args.max_import_s:
+        failures.append(f"匯入耗時 {best['import_s']:.3f}s 超過上限 {args.max_import_s}s")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'module': args.module,
+                'import_s': best['import_s'],
+                'create_app_s': best['create_app_s'],
+                'first_request_s': best['first_request_s'],
+                'total_s': best['total_s'],
+                'breakdown': breakdown,
+                'forbidden_loaded': forbidden_loaded
+            }, f, ensure_ascii=False, indent=4)
+
+    for failure in failures:
+        print(f"\n失敗: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+基準測試結果歷史與退化比較
+
+將 benchmarks/suite.py 的 JSON 結果依機器指紋與 git 版本存入歷史目錄
+（benchmarks/history/<機器指紋>/<時間>_<commit>.json），並比較兩次執行：
+每個項目以重複測量的樣本做 bootstrap，估計中位數比值（新 / 基準）的信賴區間，
+只有信賴區間整段高於 1 且比值超過門檻時才判定為退化，避免把測量雜訊當成退化。
+有退化時以非零狀態結束，可放在 CI 中攔截效能退化。
+
+只比較相同機器指紋（CPU、可用核心數、記憶體、Python 與套件版本）的結果，
+不同機器的耗時沒有可比性。
+
+用法:
+    python benchmarks/history.py record benchmarks/results/suite_20250101_120000.json
+    python benchmarks/history.py list
+    python benchmarks/history.py compare --threshold 0.1
+    python benchmarks/history.py compare --baseline 1a2b3c4 --candidate results.json --groups preprocess api
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HISTORY_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'history')
+
+# 預設比較的群組；訓練 epoch 重複次數少、變異大，需要時以 --groups 指定
+DEFAULT_GROUPS = ('preprocess', 'inference', 'api')
+# 計算信賴區間所需的最少樣本數
+MIN_SAMPLES = 3
+
+EXIT_REGRESSION = 1
+
+
+def machine_fingerprint(environment: Dict[str, Any]) -> str:
+    """
+    以影響耗時的硬體與軟體資訊計算機器指紋（不含主機名稱，同規格的 CI 機器可共用歷史）。
+    """
+    identity = {
+        'cpu_model': environment.get('cpu_model'),
+        'usable_cpus': environment.get('usable_cpus'),
+        'memory_total_bytes': environment.get('memory_total_bytes'),
+        'platform': environment.get('platform'),
+        'python': environment.get('python'),
+        'packages': environment.get('packages', {}),
+        'thread_env': environment.get('thread_env', {}),
+    }
+    encoded = json.dumps(identity, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:12]
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    if 'results' not in report or 'environment' not in report:
+        raise ValueError(f"不是基準測試結果檔: {path}")
+    return report
+
+
+class ResultsHistory:
+    """
+    以檔案目錄儲存的基準測試歷史，每次執行一個 JSON 檔。
+    """
+
+    def __init__(self, history_dir: str = DEFAULT_HISTORY_DIR):
+        self.history_dir = history_dir
+
+    def record(self, report: Dict[str, Any]) -> str:
+        """
+        存入一次執行結果。
+        :return: 歷史檔案路徑。
+        """
+        environment = report['environment']
+        fingerprint = machine_fingerprint(environment)
+        git = environment.get('git') or {}
+        commit = (git.get('commit') or 'unknown')[:12]
+        if git.get('dirty'):
+            commit += '-dirty'
+        stamp = environment['timestamp'].replace(':', '').replace('-', '').split('+')[0]
+
+        run_dir = os.path.join(self.history_dir, fingerprint)
+        os.makedirs(run_dir, exist_ok=True)
+        path = os.path.join(run_dir, f'{stamp}_{commit}.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        return path
+
+    def runs(self, fingerprint: str = None) -> List[Dict[str, Any]]:
+        """
+        :return: [{'path', 'fingerprint', 'commit', 'dirty', 'timestamp'}]，依時間排序（最舊在前）。
+        """
+        if not os.path.isdir(self.history_dir):
+            return []
+        fingerprints = [fingerprint] if fingerprint else sorted(os.listdir(self.history_dir))
+        runs = []
+        for machine in fingerprints:
+            run_dir = os.path.join(self.history_dir, machine)
+            if not os.path.isdir(run_dir):
+                continue
+            for name in os.listdir(run_dir):
+                if not name.endswith('.json'):
+                    continue
+                environment = load_report(os.path.join(run_dir, name))['environment']
+                git = environment.get('git') or {}
+                runs.append({
+                    'path': os.path.join(run_dir, name),
+                    'fingerprint': machine,
+                    'commit': git.get('commit'),
+                    'dirty': git.get('dirty'),
+                    'timestamp': environment['timestamp'],
+                })
+        return sorted(runs, key=lambda run: run['timestamp'])
+
+    def resolve(self, ref: str, fingerprint: str = None) -> str:
+        """
+        將結果檔路徑或 git commit（可為前綴）解析為歷史檔案路徑；同一 commit 有多次執行時取最新的一次。
+        """
+        if os.path.isfile(ref):
+            return ref
+        matches = [run for run in self.runs(fingerprint) if run['commit'] and run['commit'].startswith(ref)]
+        if not matches:
+            raise FileNotFoundError(f"歷史中找不到 {ref} 的執行結果")
+        return matches[-1]['path']
+
+
+def bootstrap_ratio(baseline: List[float], candidate: List[float], iterations: int = 2000,
+                    confidence: float = 0.95, seed: int = 0) -> Tuple[float, float, float]:
+    """
+    以 bootstrap 估計中位數比值（candidate / baseline）與其信賴區間。
+    :return: (比值, 下界, 上界)。
+    """
+    rng = np.random.default_rng(seed)
+    baseline = np.asarray(baseline, dtype=float)
+    candidate = np.asarray(candidate, dtype=float)
+    baseline_medians = np.median(rng.choice(baseline, (iterations, len(baseline))), axis=1)
+    candidate_medians = np.median(rng.choice(candidate, (iterations, len(candidate))), axis=1)
+    ratios = candidate_medians / baseline_medians
+    alpha = (1.0 - confidence) / 2
+    low, high = np.quantile(ratios, [alpha, 1.0 - alpha])
+    return float(np.median(candidate) / np.median(baseline)), float(low), float(high)
+
+
+def compare_reports(baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float = 0.1,
+                    groups=DEFAULT_GROUPS, confidence: float = 0.95) -> List[Dict[str, Any]]:
+    """
+    比較兩次執行中共同的項目（名稱與規模相同）。
+    status 為 regression（信賴區間整段高於 1 且變慢超過門檻）、improvement（反之）、
+    unchanged 或 insufficient（樣本數不足 MIN_SAMPLES）。
+    """
+    baseline_results = {(r['name'], r['scale']): r for r in baseline['results']}
+    rows = []
+    for result in candidate['results']:
+        if result['group'] not in groups:
+            continue
+        base = baseline_results.get((result['name'], result['scale']))
+        if base is None:
+            continue
+        row = {
+            'name': result['name'],
+            'scale': result['scale'],
+            'baseline_median_s': base['median_s'],
+            'candidate_median_s': result['median_s'],
+        }
+        if min(len(base['samples_s']), len(result['samples_s'])) < MIN_SAMPLES:
+            row.update(ratio=result['median_s'] / base['median_s'], ci_low=None, ci_high=None, status='insufficient')
+        else:
+            ratio, low, high = bootstrap_ratio(base['samples_s'], result['samples_s'], confidence=confidence)
+            if low > 1.0 and ratio > 1.0 + threshold:
+                status = 'regression'
+            elif high < 1.0 and ratio < 1.0 / (1.0 + threshold):
+                status = 'improvement'
+            else:
+                status = 'unchanged'
+            row.update(ratio=ratio, ci_low=low, ci_high=high, status=status)
+        rows.append(row)
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]]):
+    print(f"{'項目':<30}{'倍數':>6}{'基準 (ms)':>12}{'新 (ms)':>12}{'變化':>9}{'信賴區間':>20}  狀態")
+    for row in rows:
+        change = f"{(row['ratio'] - 1) * 100:+.1f}%"
+        interval = '-' if row['ci_low'] is None else f"[{(row['ci_low'] - 1) * 100:+.1f}%, {(row['ci_high'] - 1) * 100:+.1f}%]"
+        print(f"{row['name']:<30}{row['scale']:>6}{row['baseline_median_s'] * 1000:>12.2f}"
+              f"{row['candidate_median_s'] * 1000:>12.2f}{change:>9}{interval:>20}  {row['status']}")
+
+
+def command_record(history: ResultsHistory, args) -> int:
+    for path in args.reports:
+        print(f"{path} -> {history.record(load_report(path))}")
+    return 0
+
+
+def command_list(history: ResultsHistory, args) -> int:
+    for run in history.runs(args.fingerprint):
+        commit = (run['commit'] or 'unknown')[:12] + ('-dirty' if run['dirty'] else '')
+        print(f"{run['timestamp']}  {run['fingerprint']}  {commit:<18}  {os.path.relpath(run['path'], ROOT_DIR)}")
+    return 0
+
+
+def command_compare(history: ResultsHistory, args) -> int:
+    if args.candidate:
+        candidate_path = history.resolve(args.candidate)
+    else:
+        runs = history.runs()
+        if not runs:
+            print("歷史中沒有執行結果")
+            return 2
+        candidate_path = runs[-1]['path']
+    candidate = load_report(candidate_path)
+    fingerprint = machine_fingerprint(candidate['environment'])
+    candidate_commit = (candidate['environment'].get('git') or {}).get('commit')
+
+    if args.baseline:
+        baseline_path = history.resolve(args.baseline, fingerprint)
+    else:
+        # 預設以同一台機器上、不同 commit 的最近一次執行作為基準
+        previous = [run for run in history.runs(fingerprint)
+                    if run['commit'] != candidate_commit and os.path.abspath(run['path']) != os.path.abspath(candidate_path)]
+        if not previous:
+            print(f"機器 {fingerprint} 沒有其他版本的執行結果可作為基準")
+            return 2
+        baseline_path = previous[-1]['path']
+    baseline = load_report(baseline_path)
+
+    baseline_fingerprint = machine_fingerprint(baseline['environment'])
+    if baseline_fingerprint != fingerprint and not args.allow_cross_machine:
+        print(f"基準（{baseline_fingerprint}）與新結果（{fingerprint}）來自不同機器，"
+              f"耗時不可比較；確定要比較請加上 --allow-cross-machine")
+        return 2
+
+    print(f"基準: {os.path.relpath(baseline_path, ROOT_DIR)}")
+    print(f"新:   {os.path.relpath(candidate_path, ROOT_DIR)}")
+    rows = compare_reports(baseline, candidate, args.threshold, args.groups, args.confidence)
+    print_comparison(rows)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'baseline': baseline_path, 'candidate': candidate_path, 'threshold': args.threshold,
+                       'rows': rows}, f, ensure_ascii=False, indent=4)
+
+    regressions = [row for row in rows if row['status'] == 'regression']
+    if regressions:
+        print(f"\n{len(regressions)} 個項目變慢超過 {args.threshold:.0%}（{args.confidence:.0%} 信賴區間）")
+        return EXIT_REGRESSION
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='基準測試結果歷史與退化比較')
+    parser.add_argument('--history-dir', default=DEFAULT_HISTORY_DIR, help='歷史目錄')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='將結果檔存入歷史')
+    record_parser.add_argument('reports', nargs='+', help='benchmarks/suite.py 的 JSON 結果')
+
+    list_parser = subparsers.add_parser('list', help='列出歷史中的執行結果')
+    list_parser.add_argument('--fingerprint', help='只列出指定機器指紋')
+
+    compare_parser = subparsers.add_parser('compare', help='比較兩次執行，有退化時以非零狀態結束')
+    compare_parser.add_argument('--baseline', help='基準的結果檔或 commit，預設為同機器上其他 commit 的最近一次執行')
+    compare_parser.add_argument('--candidate', help='新結果檔或 commit，預設為歷史中最新的執行')
+    compare_parser.add_argument('--threshold', type=float, default=0.1, help='判定退化的變慢比例（預設 0.1 = 10%%）')
+    compare_parser.add_argument('--confidence', type=float, default=0.95, help='信賴水準')
+    compare_parser.add_argument('--groups', nargs='+', default=list(DEFAULT_GROUPS), help='要比較的群組')
+    compare_parser.add_argument('--allow-cross-machine', action='store_true', help='允許比較不同機器的結果')
+    compare_parser.add_argument('--json', dest='json_path', help='將比較結果寫入 JSON 檔案')
+
+    args = parser.parse_args()
+    history = ResultsHistory(args.history_dir)
+    commands = {'record': command_record, 'list': command_list, 'compare': command_compare}
+    return commands[args.command](history, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,483 @@
+"""
+API 負載測試
+
+以合成資料集與小型模型在暫存工作目錄啟動本機 API 伺服器（或指定 --url 對既有伺服器），
+依情境的端點比例重播 /api/data/history、/api/model/predict、/api/model/list 與批次訓練提交，
+回報每個端點的吞吐量、延遲百分位數與錯誤率，用於在上線前決定工作程序數與快取大小。
+全程離線執行，不需要外部資料。
+
+兩種負載模式：
+- 開放模式（--rate）：請求依 Poisson 過程在排定的時間送出，延遲從排定時間起算，
+  伺服器跟不上時排隊的時間也會計入（避免 coordinated omission 低估延遲）。
+- 封閉模式（--closed）：--concurrency 個使用者各自送出請求、等待回應、思考 --think-time 秒後再送下一個。
+
+請求序列由情境與 seed 決定，可用 --save-schedule 存成 JSONL，之後以 --replay 重播完全相同的序列；
+序列中只記錄資料集與模型的索引，重播時對應到目標伺服器上的實際資料集與模型。
+
+用法:
+    python benchmarks/loadtest.py --scenario dashboard --rate 20 --duration 30
+    python benchmarks/loadtest.py --scenario mixed --closed --concurrency 8 --duration 60
+    python benchmarks/loadtest.py --url http://127.0.0.1:5000 --scenario predict-heavy --rate 50
+    python benchmarks/loadtest.py --scenario-file scenario.json --save-schedule schedule.jsonl
+    python benchmarks/loadtest.py --replay schedule.jsonl --output loadtest.json
+    python benchmarks/loadtest.py --server asgi --scenario dashboard --closed --concurrency 64
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+import requests
+
+# 專案根目錄
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from suite import environment_info, register_model  # noqa: E402
+
+# 情境中的端點：{dataset}、{model_id}、{model_n_days} 在送出時依索引對應到目標伺服器的資料集與模型
+ENDPOINTS: Dict[str, Dict[str, Any]] = {
+    'history': {'method': 'GET', 'path': '/api/data/history?dataset_name={dataset}'},
+    'predict': {'method': 'GET', 'path': '/api/model/predict?model_id={model_id}&n_days={model_n_days}'},
+    'model_list': {'method': 'GET', 'path': '/api/model/list'},
+    'model_list_page': {'method': 'GET', 'path': '/api/model/list?dataset_name={dataset}&limit=20'},
+    # 同步的 /api/model/train 會在請求中完成整個訓練，以非同步的批次訓練提交代表訓練負載
+    'train_submit': {
+        'method': 'POST',
+        'path': '/api/model/train/bulk',
+        'body': {'dataset_names': ['{dataset}'], 'n_days': [5], 'look_back': 10, 'target_column': 'close',
+                 'hyperparameters': {'epochs': 1, 'lstm_units': 8, 'batch_size': 64}, 'max_workers': 1},
+    },
+}
+
+# 內建情境：端點名稱 -> 權重
+SCENARIOS: Dict[str, Dict[str, int]] = {
+    # 儀表板：選擇資料集與模型後載入歷史資料與預測
+    'dashboard': {'history': 30, 'predict': 50, 'model_list': 20},
+    'predict-heavy': {'predict': 85, 'model_list': 10, 'history': 5},
+    'mixed': {'history': 28, 'predict': 45, 'model_list': 15, 'model_list_page': 10, 'train_submit': 2},
+}
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def load_scenario(name: str = None, path: str = None) -> Dict[str, Any]:
+    """
+    取得情境：內建名稱，或 JSON 檔案 {"name": ..., "mix": {"端點": 權重}, "endpoints": {自訂端點}}。
+    :return: {'name', 'mix', 'endpoints'}。
+    """
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            scenario = json.load(f)
+        endpoints = {**ENDPOINTS, **scenario.get('endpoints', {})}
+        mix = scenario['mix']
+        name = scenario.get('name', os.path.splitext(os.path.basename(path))[0])
+    else:
+        if name not in SCENARIOS:
+            raise ValueError(f"未知的情境: {name}（可用: {', '.join(SCENARIOS)}）")
+        endpoints, mix = ENDPOINTS, SCENARIOS[name]
+    unknown = [endpoint for endpoint in mix if endpoint not in endpoints]
+    if unknown:
+        raise ValueError(f"情境 {name} 使用了未定義的端點: {unknown}")
+    return {'name': name, 'mix': mix, 'endpoints': {endpoint: endpoints[endpoint] for endpoint in mix}}
+
+
+def build_schedule(scenario: Dict[str, Any], n_requests: int, rate: float = None, seed: int = 0,
+                   n_slots: int = 1024) -> List[Dict[str, Any]]:
+    """
+    依情境權重產生請求序列。rate 提供時以 Poisson 過程排定送出時間（秒）。
+    資料集與模型只記錄索引（0 到 n_slots - 1），送出時再對應到實際的名稱與 ID。
+    """
+    rng = random.Random(seed)
+    names = list(scenario['mix'])
+    weights = [scenario['mix'][name] for name in names]
+    schedule = []
+    at = 0.0
+    for _ in range(n_requests):
+        if rate:
+            at += rng.expovariate(rate)
+        name = rng.choices(names, weights)[0]
+        endpoint = scenario['endpoints'][name]
+        schedule.append({
+            'at': round(at, 6) if rate else None,
+            'name': name,
+            'method': endpoint['method'],
+            'path': endpoint['path'],
+            'body': endpoint.get('body'),
+            'dataset': rng.randrange(n_slots),
+            'model': rng.randrange(n_slots),
+        })
+    return schedule
+
+
+def save_schedule(schedule: List[Dict[str, Any]], path: str):
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in schedule:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def load_schedule(path: str) -> List[Dict[str, Any]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _fill(value: Any, replacements: Dict[str, str]) -> Any:
+    if isinstance(value, str):
+        return value.format(**replacements)
+    if isinstance(value, list):
+        return [_fill(item, replacements) for item in value]
+    if isinstance(value, dict):
+        return {key: _fill(item, replacements) for key, item in value.items()}
+    return value
+
+
+class Targets:
+    """
+    目標伺服器上的資料集與模型，透過 /api/data/list 與 /api/model/list 取得。
+    """
+
+    def __init__(self, base_url: str):
+        datasets = requests.get(f'{base_url}/api/data/list', timeout=60).json()
+        models = requests.get(f'{base_url}/api/model/list', timeout=60).json()
+        self.datasets = sorted(entry['dataset_name'] for entry in datasets)
+        # 面板模型需要額外的 dataset_name，負載測試只使用單一資料集模型
+        self.models = sorted(((model['model_id'], model['n_days']) for model in models if not model.get('panel')))
+        if not self.datasets or not self.models:
+            raise RuntimeError("目標伺服器沒有資料集或模型，請先匯入資料並訓練模型，或不指定 --url 以使用合成資料")
+
+    def resolve(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        model_id, model_n_days = self.models[entry['model'] % len(self.models)]
+        replacements = {
+            'dataset': self.datasets[entry['dataset'] % len(self.datasets)],
+            'model_id': model_id,
+            'model_n_days': str(model_n_days),
+        }
+        return {'method': entry['method'], 'path': _fill(entry['path'], replacements),
+                'body': _fill(entry.get('body'), replacements)}
+
+
+class LoadRunner:
+    """
+    送出請求並記錄每個請求的結果；每個執行緒使用自己的 HTTP 連線（keep-alive）。
+    """
+
+    def __init__(self, base_url: str, targets: Targets, timeout: float = 60.0):
+        self.base_url = base_url
+        self.targets = targets
+        self.timeout = timeout
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def send(self, entry: Dict[str, Any], scheduled: float = None):
+        """
+        :param scheduled: 排定送出的時間（perf_counter），提供時延遲從排定時間起算。
+        """
+        request = self.targets.resolve(entry)
+        start = time.perf_counter()
+        status, error = None, None
+        try:
+            response = self._session().request(request['method'], self.base_url + request['path'],
+                                               json=request['body'], timeout=self.timeout)
+            response.content  # 讀完回應本體再停止計時
+            status = response.status_code
+            if status >= 400:
+                error = f'HTTP {status}'
+        except requests.RequestException as e:
+            error = type(e).__name__
+        end = time.perf_counter()
+        record = {
+            'name': entry['name'],
+            'status': status,
+            'error': error,
+            'latency_s': end - (scheduled if scheduled is not None else start),
+            'service_s': end - start,
+            'end': end,
+        }
+        with self._lock:
+            self.records.append(record)
+
+    def run_open(self, schedule: List[Dict[str, Any]], duration: float, concurrency: int) -> float:
+        """
+        依排定時間送出請求，同時進行中的請求最多 concurrency 個（其餘在用戶端排隊並計入延遲）。
+        :return: 實際耗時（秒）。
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for entry in schedule:
+                if entry['at'] > duration:
+                    break
+                scheduled = start + entry['at']
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self.send, entry, scheduled)
+        return time.perf_counter() - start
+
+    def run_closed(self, schedule: List[Dict[str, Any]], duration: float, concurrency: int,
+                   think_time: float = 0.0) -> float:
+        """
+        concurrency 個使用者依序取出請求，收到回應後等待 think_time 秒再送出下一個，直到 duration 秒。
+        :return: 實際耗時（秒）。
+        """
+        entries: Iterator[Dict[str, Any]] = itertools.cycle(schedule)
+        entries_lock = threading.Lock()
+        start = time.perf_counter()
+        deadline = start + duration
+
+        def user():
+            while time.perf_counter() < deadline:
+                with entries_lock:
+                    entry = next(entries)
+                self.send(entry)
+                if think_time:
+                    time.sleep(think_time)
+
+        threads = [threading.Thread(target=user, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - start
+
+
+def summarize(records: List[Dict[str, Any]], elapsed: float) -> Dict[str, Dict[str, Any]]:
+    """
+    :return: {端點: {requests, errors, error_rate, throughput_rps, p50_ms ... max_ms, status_codes}}，另含 'all'。
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        groups.setdefault(record['name'], []).append(record)
+    groups['all'] = records
+
+    summary = {}
+    for name, group in groups.items():
+        if not group:
+            continue
+        latencies = np.array([record['latency_s'] for record in group]) * 1000
+        errors = sum(1 for record in group if record['error'])
+        status_codes: Dict[str, int] = {}
+        for record in group:
+            key = str(record['status'] or record['error'])
+            status_codes[key] = status_codes.get(key, 0) + 1
+        summary[name] = {
+            'requests': len(group),
+            'errors': errors,
+            'error_rate': round(errors / len(group), 4),
+            'throughput_rps': round(len(group) / elapsed, 2),
+            'mean_ms': round(float(latencies.mean()), 2),
+            **{f'p{p}_ms': round(float(np.percentile(latencies, p)), 2) for p in PERCENTILES},
+            'max_ms': round(float(latencies.max()), 2),
+            'status_codes': status_codes,
+        }
+    return summary
+
+
+def print_summary(summary: Dict[str, Dict[str, Any]]):
+    print(f"\n{'端點':<18}{'請求數':>8}{'錯誤率':>9}{'吞吐量/s':>11}"
+          + ''.join(f"{f'p{p} (ms)':>12}" for p in PERCENTILES) + f"{'最大 (ms)':>12}")
+    for name, row in summary.items():
+        print(f"{name:<18}{row['requests']:>8}{row['error_rate']:>9.2%}{row['throughput_rps']:>11.2f}"
+              + ''.join(f"{row[f'p{p}_ms']:>12.2f}" for p in PERCENTILES) + f"{row['max_ms']:>12.2f}")
+
+
+def prepare_workspace(workspace: str, n_datasets: int, rows: int, seed: int = 0, look_back: int = 10,
+                      n_days: int = 5):
+    """
+    在工作目錄中產生合成資料集並匯入，為每個資料集訓練一個小型模型（1 個 epoch）。
+    目錄結構與 create_app 在該目錄下使用的相同。
+    """
+    from src.data.preprocessor import DataPreprocessor
+    from src.data.synthetic import SyntheticMarketGenerator, write_universe
+    from src.models.trainer import ModelTrainer
+    from src.services.data_service import DataService
+    from src.utils.data_loader import DataLoader
+
+    data_service = DataService(DataLoader(data_dir=os.path.join(workspace, 'data', 'processed_data')))
+    csv_dir = os.path.join(workspace, 'synthetic')
+    for path in write_universe(csv_dir, n_datasets, rows, SyntheticMarketGenerator(seed=seed), prefix='LOAD'):
+        dataset_name = os.path.splitext(os.path.basename(path))[0]
+        data_service.ingest_csv(path, dataset_name, overwrite=True)
+
+        preprocessor = DataPreprocessor()
+        X, y, scaler = preprocessor.preprocess(data_service.get_dataset(dataset_name, dtype=preprocessor.dtype),
+                                               look_back, n_days, 'close')
+        model = ModelTrainer().build_model(X.shape[1:], n_days, {'lstm_units': 8, 'dropout_rate': 0.2})
+        model.fit(X, y, epochs=1, batch_size=128, verbose=0)
+        register_model(workspace, model, scaler, preprocessor.feature_columns, dataset_name, look_back, n_days)
+        print(f"已準備資料集 {dataset_name}（{len(X)} 個樣本）與模型")
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# 在工作目錄中啟動 Flask 伺服器（create_app 以 cwd 決定資料與模型目錄）
+SERVER_SCRIPTS = {
+    # Flask 開發伺服器（每個連線一個執行緒）
+    'flask': """
+import sys
+sys.path.insert(0, {root!r})
+from src.app import create_app
+create_app().run(host='127.0.0.1', port={port}, threaded=True, use_reloader=False)
+""",
+    # 非同步 API（src/asgi.py，以 uvicorn 執行）
+    'asgi': """
+import sys
+sys.path.insert(0, {root!r})
+import uvicorn
+from src.asgi import create_asgi_app
+uvicorn.run(create_asgi_app(), host='127.0.0.1', port={port}, lifespan='on', log_level='warning')
+""",
+}
+
+
+def start_server(workspace: str, port: int, server: str = 'flask',
+                 startup_timeout: float = 180.0) -> subprocess.Popen:
+    """
+    啟動本機伺服器並等待 /api/status 回應；伺服器輸出寫入工作目錄的 server.log。
+    :param server: 'flask' 或 'asgi'。
+    """
+    log = open(os.path.join(workspace, 'server.log'), 'w', encoding='utf-8')
+    script = SERVER_SCRIPTS[server].format(root=ROOT_DIR, port=port)
+    process = subprocess.Popen([sys.executable, '-c', script],
+                               cwd=workspace, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"伺服器啟動失敗，詳見 {log.name}")
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/api/status', timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"伺服器在 {startup_timeout} 秒內沒有回應")
+
+
+def warm_up(runner: LoadRunner, scenario: Dict[str, Any]):
+    """
+    每個資料集與模型各請求一次，讓資料集與模型快取先載入（結果不計入統計）。
+    """
+    targets = runner.targets
+    entries = []
+    for name in scenario['mix']:
+        if name == 'train_submit':
+            continue
+        endpoint = scenario['endpoints'][name]
+        count = max(len(targets.datasets), len(targets.models))
+        entries.extend({'name': name, 'method': endpoint['method'], 'path': endpoint['path'],
+                        'body': endpoint.get('body'), 'dataset': i, 'model': i} for i in range(count))
+    for entry in entries:
+        runner.send(entry)
+    runner.records.clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API 負載測試')
+    parser.add_argument('--url', help='既有伺服器的網址，未指定時以合成資料在暫存目錄啟動本機伺服器')
+    parser.add_argument('--scenario', default='dashboard', choices=sorted(SCENARIOS), help='內建情境')
+    parser.add_argument('--scenario-file', help='自訂情境的 JSON 檔案')
+    parser.add_argument('--replay', help='重播以 --save-schedule 儲存的請求序列')
+    parser.add_argument('--save-schedule', help='將請求序列存成 JSONL')
+    parser.add_argument('--duration', type=float, default=30.0, help='測試秒數')
+    parser.add_argument('--rate', type=float, default=10.0, help='開放模式的平均到達率（請求/秒）')
+    parser.add_argument('--closed', action='store_true', help='改用封閉模式（固定使用者數）')
+    parser.add_argument('--concurrency', type=int, default=8, help='同時進行的請求數（封閉模式為使用者數）')
+    parser.add_argument('--think-time', type=float, default=0.0, help='封閉模式中每個使用者兩次請求間的等待秒數')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--server', default='flask', choices=sorted(SERVER_SCRIPTS),
+                        help='本機伺服器的類型')
+    parser.add_argument('--datasets', type=int, default=4, help='本機伺服器的合成資料集數')
+    parser.add_argument('--rows', type=int, default=2500, help='每個合成資料集的列數')
+    parser.add_argument('--no-warmup', action='store_true', help='不預先載入快取')
+    parser.add_argument('--timeout', type=float, default=60.0, help='單一請求的逾時秒數')
+    parser.add_argument('--output', help='將結果寫入 JSON 檔案')
+    args = parser.parse_args()
+
+    if args.replay:
+        schedule = load_schedule(args.replay)
+        scenario_name = f'replay:{os.path.basename(args.replay)}'
+        names = sorted({entry['name'] for entry in schedule})
+        scenario = {'name': scenario_name, 'mix': {name: 1 for name in names},
+                    'endpoints': {entry['name']: entry for entry in schedule}}
+    else:
+        scenario = load_scenario(args.scenario, args.scenario_file)
+        rate = None if args.closed else args.rate
+        # 開放模式依到達率估計所需的請求數；封閉模式的序列會循環使用
+        n_requests = int(args.rate * args.duration * 1.5) + 100 if rate else 10_000
+        schedule = build_schedule(scenario, n_requests, rate, args.seed)
+    if args.save_schedule:
+        save_schedule(schedule, args.save_schedule)
+        print(f"請求序列已寫入 {args.save_schedule}")
+    if not args.closed and any(entry['at'] is None for entry in schedule):
+        parser.error("此請求序列沒有排定時間（以封閉模式產生），請加上 --closed")
+
+    server = None
+    workspace = None
+    try:
+        base_url = args.url
+        if not base_url:
+            workspace = tempfile.TemporaryDirectory()
+            prepare_workspace(workspace.name, args.datasets, args.rows, args.seed)
+            port = free_port()
+            server = start_server(workspace.name, port, args.server)
+            base_url = f'http://127.0.0.1:{port}'
+        base_url = base_url.rstrip('/')
+
+        runner = LoadRunner(base_url, Targets(base_url), timeout=args.timeout)
+        if not args.no_warmup:
+            warm_up(runner, scenario)
+
+        mode = f"封閉模式 {args.concurrency} 個使用者" if args.closed else \
+            f"開放模式 {args.rate} 請求/秒（最多 {args.concurrency} 個同時請求）"
+        print(f"情境 {scenario['name']}，{mode}，{args.duration} 秒，目標 {base_url}")
+        if args.closed:
+            elapsed = runner.run_closed(schedule, args.duration, args.concurrency, args.think_time)
+        else:
+            elapsed = runner.run_open(schedule, args.duration, args.concurrency)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if workspace is not None:
+            workspace.cleanup()
+
+    summary = summarize(runner.records, elapsed)
+    print_summary(summary)
+
+    if args.output:
+        report = {
+            'environment': environment_info(),
+            'config': {key: value for key, value in vars(args).items() if key != 'output'},
+            'scenario': scenario['name'],
+            'elapsed_s': round(elapsed, 3),
+            'summary': summary,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"\n結果已寫入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
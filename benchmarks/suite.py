@@ -0,0 +1,455 @@
+"""
+效能基準測試套件
+
+在不同資料規模下測量整條預測管線的耗時：
+- preprocess: DataPreprocessor 各階段（特徵工程、正規化、建立序列）與完整 preprocess
+- train: ModelTrainer 建構的模型訓練一個 epoch
+- inference: 單筆與批次推論（Keras 與 NumPy 執行環境）
+- charts: ChartGenerator 各圖表的建構與序列化
+- api: 以 Flask test client 呼叫主要端點
+
+資料來源為內附的 19940513-20251111.csv（或以 --synthetic-rows 產生的合成資料），依倍數串接放大並重新編排交易日期。
+每個項目先暖身再重複測量，JSON 結果保留每次的耗時與執行環境資訊（CPU、套件版本、git 版本），
+供同一台機器上的不同版本互相比較。
+
+用法:
+    python benchmarks/suite.py --scales 1 10 --repeat 5
+    python benchmarks/suite.py --groups preprocess charts --output results.json
+"""
+
+import argparse
+import datetime
+import gc
+import importlib.metadata
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+# 專案根目錄
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.data.preprocessor import DataPreprocessor  # noqa: E402
+from src.services.data_service import DataService  # noqa: E402
+from src.utils.data_loader import DataLoader  # noqa: E402
+
+BUNDLED_CSV = os.path.join(ROOT_DIR, '19940513-20251111.csv')
+DEFAULT_OUTPUT_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+GROUPS = ('preprocess', 'train', 'inference', 'charts', 'api')
+RESULT_FORMAT_VERSION = 1
+
+# 記錄版本的套件（影響數值運算與序列化效能）
+PACKAGES = ('numpy', 'pandas', 'pyarrow', 'scikit-learn', 'tensorflow', 'tensorflow-cpu', 'keras',
+            'flask', 'plotly', 'dash')
+# 影響執行緒數的環境變數
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                   'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS')
+
+
+def _cpu_model() -> str:
+    try:
+        with open('/proc/cpuinfo', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def _memory_total_bytes() -> int | None:
+    try:
+        with open('/proc/meminfo', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _git_revision() -> Dict[str, Any]:
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=ROOT_DIR, capture_output=True, text=True, timeout=30)
+
+    try:
+        commit = git('rev-parse', 'HEAD')
+        if commit.returncode != 0:
+            return {'commit': None, 'dirty': None}
+        status = git('status', '--porcelain', '--untracked-files=no')
+        return {'commit': commit.stdout.strip(), 'dirty': bool(status.stdout.strip())}
+    except (OSError, subprocess.SubprocessError):
+        return {'commit': None, 'dirty': None}
+
+
+def environment_info() -> Dict[str, Any]:
+    """
+    收集比較結果時需要一致的執行環境資訊。
+    """
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            continue
+
+    try:
+        usable_cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        usable_cpus = os.cpu_count()
+
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'hostname': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'python_implementation': platform.python_implementation(),
+        'cpu_model': _cpu_model(),
+        'cpu_count': os.cpu_count(),
+        'usable_cpus': usable_cpus,
+        'memory_total_bytes': _memory_total_bytes(),
+        'packages': versions,
+        'thread_env': {name: os.environ[name] for name in THREAD_ENV_VARS if name in os.environ},
+        'git': _git_revision(),
+    }
+
+
+def measure(func: Callable[[], Any], repeat: int, warmup: int = 1) -> List[float]:
+    """
+    先執行 warmup 次（不計時），再重複 repeat 次並回傳每次的耗時（秒）。
+    測量期間暫停垃圾回收，避免回收時機造成的離群值。
+    """
+    for _ in range(warmup):
+        func()
+    gc.collect()
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return timings
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def summarize(timings: List[float], items: int = None) -> Dict[str, Any]:
+    """
+    :param items: 每次處理的項目數（列數、樣本數），提供時另計算每秒處理量。
+    """
+    summary = {
+        'samples_s': [round(t, 6) for t in timings],
+        'min_s': round(min(timings), 6),
+        'median_s': round(statistics.median(timings), 6),
+        'mean_s': round(statistics.fmean(timings), 6),
+        'stdev_s': round(statistics.stdev(timings), 6) if len(timings) > 1 else 0.0,
+    }
+    if items:
+        summary['items'] = items
+        summary['items_per_s'] = round(items / statistics.median(timings), 1)
+    return summary
+
+
+def load_source(data_service: DataService, source_csv: str = BUNDLED_CSV) -> pd.DataFrame:
+    """
+    以上傳 API 相同的匯入流程讀取來源 CSV（欄位名稱與型別與實際資料集一致）。
+    """
+    result = data_service.ingest_csv(source_csv, 'bench_source', overwrite=True)
+    print(f"來源資料: {result['rows']} 列")
+    return data_service.get_dataset('bench_source')
+
+
+def scale_frame(df: pd.DataFrame, scale: int) -> pd.DataFrame:
+    """
+    將資料串接 scale 次，並以連續的交易日重新編排日期（保持時間序列遞增）。
+    """
+    if scale == 1:
+        return df.reset_index(drop=True)
+    scaled = pd.concat([df] * scale, ignore_index=True)
+    scaled['date'] = pd.bdate_range(end=df['date'].iloc[-1], periods=len(scaled))
+    return scaled
+
+
+def register_model(workspace: str, model: Any, scaler: Any, feature_columns: List[str], dataset_name: str,
+                   look_back: int, n_days: int, target_column: str = 'close') -> str:
+    """
+    將模型存入工作目錄的模型與元資料目錄（與 create_app 在該目錄下使用的位置相同），供預測端點使用。
+    :return: 模型 ID。
+    """
+    from src.services.model_service import ModelService
+    from src.utils.metadata_manager import MetadataManager
+    from src.utils.model_manager import ModelManager
+
+    model_manager = ModelManager(os.path.join(workspace, 'models', 'saved_models'))
+    metadata_manager = MetadataManager(metadata_dir=os.path.join(workspace, 'models', 'metadata'))
+    model_id = str(uuid.uuid4())
+    model_path = model_manager.save_model(model, model_id)
+    model_manager.save_scaler(scaler, model_id)
+
+    model_config = {
+        'look_back': look_back,
+        'target_column': target_column,
+        'input_shape': tuple(int(dim) for dim in model.inputs[0].shape[1:]),
+        'output_units': n_days,
+        'feature_columns': feature_columns,
+    }
+    history = type('History', (), {'history': {}, 'epoch': []})()
+    metadata = ModelService._build_metadata(model_id, f'bench_{dataset_name}', model_path, dataset_name,
+                                            n_days, model_config, {}, {}, history)
+    metadata.update(version=1, parent_model_id=None)
+    metadata_manager.add_metadata(metadata)
+    return model_id
+
+
+class BenchmarkSuite:
+    """
+    依資料規模執行各群組的基準測試，結果累積於 self.results。
+    """
+
+    def __init__(self, workspace: str, repeat: int = 5, warmup: int = 1, train_repeat: int = 3,
+                 look_back: int = 10, n_days: int = 5, batch_size: int = 256, groups=GROUPS,
+                 source_csv: str = BUNDLED_CSV):
+        self.workspace = workspace
+        self.source_csv = source_csv
+        self.repeat = repeat
+        self.warmup = warmup
+        self.train_repeat = train_repeat
+        self.look_back = look_back
+        self.n_days = n_days
+        self.batch_size = batch_size
+        self.groups = tuple(groups)
+        self.data_dir = os.path.join(workspace, 'data', 'processed_data')
+        self.data_service = DataService(DataLoader(data_dir=self.data_dir))
+        self.results: List[Dict[str, Any]] = []
+
+    def record(self, group: str, name: str, scale: int, timings: List[float], items: int = None, **extra):
+        result = {'name': f'{group}.{name}', 'group': group, 'scale': scale, **summarize(timings, items), **extra}
+        self.results.append(result)
+        print(f"  {result['name']:<28} x{scale:<5} median {result['median_s'] * 1000:>10.2f} ms"
+              f"  min {result['min_s'] * 1000:>10.2f} ms")
+        return result
+
+    def run(self, scales: List[int]):
+        source = load_source(self.data_service, self.source_csv)
+        for scale in scales:
+            df = scale_frame(source, scale)
+            dataset_name = f'bench_x{scale}'
+            path = self.data_service.get_parquet_path(dataset_name)
+            df.to_parquet(path, index=False)
+            self.data_service.catalog_dataset(dataset_name, path)
+            print(f"規模 x{scale}: {len(df)} 列")
+            self.run_scale(df, dataset_name, scale)
+
+    def run_scale(self, df: pd.DataFrame, dataset_name: str, scale: int):
+        preprocessor = DataPreprocessor()
+        X, y, scaler = preprocessor.preprocess(df, self.look_back, self.n_days, 'close')
+        state = {'X': X, 'y': y, 'scaler': scaler, 'feature_columns': preprocessor.feature_columns}
+
+        if 'preprocess' in self.groups:
+            self.bench_preprocess(df, scale)
+        if self.groups_need_model():
+            state['model'] = self.build_model(X, y)
+        if 'train' in self.groups:
+            self.bench_train(state['model'], X, y, scale)
+        if 'inference' in self.groups:
+            self.bench_inference(state['model'], X, scale)
+        if 'charts' in self.groups:
+            self.bench_charts(df, scale)
+        if 'api' in self.groups:
+            self.bench_api(state, dataset_name, scale)
+
+    def groups_need_model(self) -> bool:
+        return any(group in self.groups for group in ('train', 'inference', 'api'))
+
+    def bench_preprocess(self, df: pd.DataFrame, scale: int):
+        preprocessor = DataPreprocessor()
+        features = preprocessor.feature_engineering(df.copy())
+        normalized, _ = preprocessor.normalize_data(features)
+        rows = len(df)
+
+        self.record('preprocess', 'feature_engineering', scale,
+                    measure(lambda: preprocessor.feature_engineering(df.copy()), self.repeat, self.warmup), rows)
+        self.record('preprocess', 'normalize_data', scale,
+                    measure(lambda: preprocessor.normalize_data(features), self.repeat, self.warmup), rows)
+        self.record('preprocess', 'create_sequences', scale,
+                    measure(lambda: preprocessor.create_sequences(normalized, self.look_back, self.n_days, 'close'),
+                            self.repeat, self.warmup), rows)
+        self.record('preprocess', 'preprocess', scale,
+                    measure(lambda: preprocessor.preprocess(df, self.look_back, self.n_days, 'close'),
+                            self.repeat, self.warmup), rows)
+
+    def build_model(self, X: np.ndarray, y: np.ndarray):
+        from src.models.trainer import ModelTrainer
+
+        trainer = ModelTrainer()
+        return trainer.build_model(X.shape[1:], y.shape[1], {'lstm_units': 32, 'dropout_rate': 0.2})
+
+    def bench_train(self, model, X: np.ndarray, y: np.ndarray, scale: int):
+        batch_size = 64
+        # 暖身一次小批次以排除 tf.function 追蹤成本
+        model.fit(X[:batch_size], y[:batch_size], epochs=1, batch_size=batch_size, verbose=0)
+        timings = measure(lambda: model.fit(X, y, epochs=1, batch_size=batch_size, verbose=0),
+                          self.train_repeat, warmup=0)
+        self.record('train', 'epoch', scale, timings, len(X), batch_size=batch_size)
+
+    def bench_inference(self, model, X: np.ndarray, scale: int):
+        from src.models.numpy_runtime import NumpyLSTMModel, export_model
+
+        export_path = os.path.join(self.workspace, f'bench_inference_x{scale}.npz')
+        numpy_model = NumpyLSTMModel.load(export_model(model, export_path))
+        single = X[-1:]
+        batch = X[-self.batch_size:]
+
+        for runtime, predict in (('keras', lambda inputs: model.predict(inputs, verbose=0)),
+                                 ('numpy', numpy_model.predict)):
+            self.record('inference', f'{runtime}_single', scale,
+                        measure(lambda: predict(single), self.repeat, self.warmup), 1)
+            self.record('inference', f'{runtime}_batch', scale,
+                        measure(lambda: predict(batch), self.repeat, self.warmup), len(batch))
+
+    def bench_charts(self, df: pd.DataFrame, scale: int):
+        from src.ui.components.chart_generator import ChartGenerator
+
+        chart_gen = ChartGenerator()
+        rng = np.random.default_rng(0)
+        predictions = pd.DataFrame({
+            'target_date': pd.bdate_range(df['date'].iloc[-1], periods=self.n_days + 1)[1:],
+            'up_down_probability': rng.random(self.n_days),
+            'change_magnitude': rng.normal(0, 0.01, self.n_days),
+        })
+        rows = len(df)
+
+        self.record('charts', 'historical', scale,
+                    measure(lambda: chart_gen.generate_historical_chart(df), self.repeat, self.warmup), rows)
+        figure = chart_gen.generate_historical_chart(df)
+        # Dash 將圖表序列化為 JSON 傳給瀏覽器，資料量大時這一步比建構更耗時
+        self.record('charts', 'historical_to_json', scale,
+                    measure(figure.to_json, self.repeat, self.warmup), rows)
+        self.record('charts', 'prediction', scale,
+                    measure(lambda: chart_gen.generate_prediction_chart(predictions), self.repeat, self.warmup))
+        self.record('charts', 'combined', scale,
+                    measure(lambda: chart_gen.generate_combined_chart(df, predictions), self.repeat, self.warmup),
+                    rows)
+        self.record('charts', 'probability_heatmap', scale,
+                    measure(lambda: chart_gen.generate_probability_heatmap(predictions), self.repeat, self.warmup))
+
+    def register_model(self, state: Dict[str, Any], dataset_name: str) -> str:
+        return register_model(self.workspace, state['model'], state['scaler'], state['feature_columns'],
+                              dataset_name, self.look_back, self.n_days)
+
+    def bench_api(self, state: Dict[str, Any], dataset_name: str, scale: int):
+        from src.app import create_app
+
+        model_id = self.register_model(state, dataset_name)
+        app = create_app(preload_ml=False)
+        client = app.test_client()
+
+        def get(url):
+            def call():
+                response = client.get(url)
+                assert response.status_code == 200, (url, response.status_code, response.get_data(as_text=True))
+            return call
+
+        predict_url = f'/api/model/predict?model_id={model_id}&n_days={self.n_days}'
+        # 第一次預測包含載入模型與 scaler（之後由快取提供）
+        self.record('api', 'predict_cold', scale, measure(get(predict_url), 1, warmup=0))
+
+        endpoints = {
+            'status': '/api/status',
+            'data_list': '/api/data/list',
+            'data_history': f'/api/data/history?dataset_name={dataset_name}',
+            'model_list': '/api/model/list',
+            'predict': predict_url,
+            'metrics': '/metrics',
+        }
+        for name, url in endpoints.items():
+            self.record('api', name, scale, measure(get(url), self.repeat, self.warmup))
+
+
+def print_summary(results: List[Dict[str, Any]]):
+    print(f"\n{'項目':<30}{'倍數':>6}{'中位數 (ms)':>14}{'最小 (ms)':>12}{'標準差 (ms)':>14}{'每秒處理量':>14}")
+    for r in results:
+        throughput = f"{r['items_per_s']:.1f}" if 'items_per_s' in r else '-'
+        print(f"{r['name']:<30}{r['scale']:>6}{r['median_s'] * 1000:>14.2f}{r['min_s'] * 1000:>12.2f}"
+              f"{r['stdev_s'] * 1000:>14.2f}{throughput:>14}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='執行效能基準測試套件並輸出 JSON 結果')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10], help='資料放大倍數')
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS), help='要執行的群組')
+    parser.add_argument('--repeat', type=int, default=5, help='每個項目的測量次數')
+    parser.add_argument('--warmup', type=int, default=1, help='每個項目測量前的暖身次數')
+    parser.add_argument('--train-repeat', type=int, default=3, help='訓練 epoch 的測量次數')
+    parser.add_argument('--look-back', type=int, default=10)
+    parser.add_argument('--n-days', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=256, help='批次推論的樣本數')
+    parser.add_argument('--synthetic-rows', type=int,
+                        help='改用 src/data/synthetic.py 產生指定列數的合成資料作為來源（再依 --scales 放大）')
+    parser.add_argument('--output', help='JSON 結果路徑，預設為 benchmarks/results/suite_<時間>.json')
+    parser.add_argument('--record', action='store_true', help='同時存入結果歷史（見 benchmarks/history.py）')
+    args = parser.parse_args()
+
+    environment = environment_info()
+    print(f"{environment['cpu_model']}（{environment['usable_cpus']} 個可用 CPU），Python {environment['python']}")
+
+    started = time.perf_counter()
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workspace:
+        # create_app 以目前工作目錄決定資料與模型目錄
+        os.chdir(workspace)
+        try:
+            source_csv = BUNDLED_CSV
+            if args.synthetic_rows:
+                from src.data.synthetic import SyntheticMarketGenerator
+
+                source_csv = SyntheticMarketGenerator().write_ticker(
+                    os.path.join(workspace, 'synthetic.csv'), args.synthetic_rows)
+            suite = BenchmarkSuite(workspace, repeat=args.repeat, warmup=args.warmup,
+                                   train_repeat=args.train_repeat, look_back=args.look_back,
+                                   n_days=args.n_days, batch_size=args.batch_size, groups=args.groups,
+                                   source_csv=source_csv)
+            suite.run(args.scales)
+        finally:
+            os.chdir(original_cwd)
+
+    print_summary(suite.results)
+
+    output = args.output
+    if not output:
+        os.makedirs(DEFAULT_OUTPUT_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = os.path.join(DEFAULT_OUTPUT_DIR, f'suite_{stamp}.json')
+    report = {
+        'format_version': RESULT_FORMAT_VERSION,
+        'environment': environment,
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'record')},
+        'duration_s': round(time.perf_counter() - started, 1),
+        'results': suite.results,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+    print(f"\n結果已寫入 {output}")
+
+    if args.record:
+        from history import ResultsHistory
+
+        print(f"已存入歷史: {ResultsHistory().record(report)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,10 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 import os
 import sys
 import json
+import threading
+import time
+import uuid
 
 # 將專案根目錄加入 Python 路徑
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -9,12 +12,114 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.utils.data_loader import DataLoader
 from src.utils.model_manager import ModelManager
 from src.utils.metadata_manager import MetadataManager
-from src.services.data_service import DataService
+from src.services.data_service import DatasetExistsError, DataService, InvalidDatasetNameError
 from src.services.model_service import ModelService
+from src.services.bulk_training_service import BulkTrainingService
+from src.services.bulk_import_service import BulkImportService
+from src.services.prediction_service import ModelNotFoundError, PredictionService
+from src.services.upload_service import ChunkedUploadService, UploadOffsetError
 from src.data.preprocessor import DataPreprocessor
-
-def create_app():
+from src.data.ingest import IngestError
+from src.config import Config
+from src.utils.logger import get_logger, use_application_handlers
+from src.utils.metrics import CONTENT_TYPE, REGISTRY
+from src.utils.stage_timer import StageTimer
+
+logger = get_logger('app')
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram('http_request_duration_seconds',
+                                           'HTTP request latency by route.',
+                                           ['method', 'route', 'status'])
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge('http_requests_in_flight',
+                                         'HTTP requests currently being served.',
+                                         ['method', 'route'])
+
+# 訓練與推論路徑需要的重型模組；API 啟動時不匯入，由第一次使用或背景預先匯入載入
+ML_MODULES = ('src.models.trainer', 'sklearn.preprocessing')
+
+
+def preload_ml_modules(delay: float = 0.0):
+    """
+    於背景執行緒預先匯入 TensorFlow 與 scikit-learn，讓第一次訓練/推論不必等待匯入。
+    :param delay: 開始匯入前等待的秒數，讓伺服器先開始服務請求。
+    :return: 背景執行緒。
+    """
+    def run():
+        time.sleep(delay)
+        import importlib
+        start = time.perf_counter()
+        for module_name in ML_MODULES:
+            importlib.import_module(module_name)
+        logger.info("背景預先匯入 ML 模組完成，耗時 %.2f 秒", time.perf_counter() - start)
+
+    thread = threading.Thread(target=run, name='ml-preload', daemon=True)
+    thread.start()
+    return thread
+
+
+def history_records(df) -> list:
+    """
+    將歷史資料轉換為 /api/data/history 回應的紀錄列表：日期轉為字串、欄位名稱轉為小寫。
+    日期型別的欄位（例如解析後的「時間」）一律輸出為 YYYY-MM-DD，而非 JSON 編碼器預設的 HTTP 日期格式。
+    :param df: 資料集 DataFrame。
+    :return: [{欄位: 值}]。
+    """
+    # 確保日期格式正確
+    df_copy = df.copy()
+    for col in df_copy.select_dtypes(include=['datetime', 'datetimetz']).columns:
+        df_copy[col] = df_copy[col].dt.strftime('%Y-%m-%d')
+    if 'date' in df_copy.columns or 'Date' in df_copy.columns:
+        date_col = 'date' if 'date' in df_copy.columns else 'Date'
+        df_copy[date_col] = df_copy[date_col].astype(str)
+
+    # 標準化欄位名稱為小寫
+    df_copy.columns = df_copy.columns.str.lower()
+    return df_copy.to_dict(orient='records')
+
+
+def cors_headers(origin: str | None) -> list:
+    """
+    允許 Config.CORS_ORIGINS 中的來源（儀表板）從瀏覽器直接呼叫 API。
+    :param origin: 請求的 Origin 標頭。
+    :return: 要加入回應的 [(標頭, 值)]，來源不在允許清單時為空。
+    """
+    if not origin or not ('*' in Config.CORS_ORIGINS or origin in Config.CORS_ORIGINS):
+        return []
+    return [
+        ('Access-Control-Allow-Origin', origin),
+        ('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS'),
+        ('Access-Control-Allow-Headers', 'Content-Type'),
+        ('Access-Control-Expose-Headers', 'X-Total-Count, Server-Timing'),
+        ('Vary', 'Origin'),
+    ]
+
+
+def parse_samples(value: str | None) -> int:
+    """
+    解析預測 API 的 samples 查詢參數（Monte Carlo dropout 取樣數）。
+    :param value: 查詢參數值，未提供時為 None。
+    :return: 取樣數，0 表示單次確定性預測。
+    :raises ValueError: 不是 0 ~ Config.MC_DROPOUT_MAX_SAMPLES 的整數。
+    """
+    if value in (None, ''):
+        return 0
+    try:
+        samples = int(value)
+    except ValueError:
+        samples = -1
+    if not (0 <= samples <= Config.MC_DROPOUT_MAX_SAMPLES):
+        raise ValueError(f"'samples' must be an integer between 0 and {Config.MC_DROPOUT_MAX_SAMPLES}.")
+    return samples
+
+
+def create_app(preload_ml: bool = None):
+    """
+    建立 Flask 應用程式。
+    :param preload_ml: 是否於背景預先匯入 ML 模組，預設依 Config.ML_PRELOAD（環境變數 ML_PRELOAD=1）。
+    """
     app = Flask(__name__)
+    # 路由中的 app.logger 也經由背景執行緒寫出
+    use_application_handlers(app.logger)
 
     # 配置
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a_very_secret_key')
@@ -27,7 +132,50 @@ def create_app():
     metadata_manager = MetadataManager(metadata_dir=os.path.join(os.getcwd(), 'models', 'metadata')) # 模型元資料儲存路徑
     data_service = DataService(data_loader)
     model_service = ModelService(model_manager, metadata_manager)
+    bulk_training_service = BulkTrainingService(data_service, model_manager, metadata_manager)
+    upload_service = ChunkedUploadService(upload_dir=app.config['UPLOAD_FOLDER'])
+    bulk_import_service = BulkImportService(data_service)
     data_preprocessor = DataPreprocessor() # 初始化資料預處理器
+    prediction_service = PredictionService(data_service, model_service, data_preprocessor)
+    # 非同步 API（src/asgi.py）直接使用相同的服務與快取；生產環境服務（src/serve.py）據批次任務延後重新建立工作程序
+    app.extensions['stock_prediction'] = {
+        'data_service': data_service,
+        'model_service': model_service,
+        'prediction_service': prediction_service,
+        'bulk_training_service': bulk_training_service,
+        'bulk_import_service': bulk_import_service,
+    }
+
+    def prepare_training_data(dataset_name, n_days, look_back=None, target_column=None):
+        """
+        載入資料集並完成預處理，依時間順序切分訓練集與驗證集
+        :return: (model_config, (X_train, y_train, X_val, y_val, scaler))
+        """
+        # 載入原始數據（以管線型別載入數值欄位）
+        raw_df = data_service.get_dataset(dataset_name, dtype=data_preprocessor.dtype)
+
+        # 預處理數據
+        # 為了範例，我們假設 look_back=5, target_column='Close'
+        look_back = look_back or 5
+        target_column = target_column or 'Close'
+        X, y, scaler = data_preprocessor.preprocess(raw_df, look_back, n_days, target_column)
+
+        # 保留最後一段資料作為驗證集，供提前停止監控驗證損失
+        split_idx = int(len(X) * (1 - Config.VALIDATION_SPLIT))
+        if split_idx <= 0 or split_idx >= len(X):
+            raise ValueError("資料量不足，無法切分訓練集與驗證集。")
+        X_train, y_train = X[:split_idx], y[:split_idx]
+        X_val, y_val = X[split_idx:], y[split_idx:]
+
+        model_config = {
+            'look_back': look_back,
+            'n_days': n_days,
+            'target_column': target_column,
+            'input_shape': X_train.shape[1:], # 傳遞給 build_model
+            'output_units': y_train.shape[1], # 傳遞給 build_model
+            'feature_columns': data_preprocessor.feature_columns # 推論與微調需沿用相同的特徵順序
+        }
+        return model_config, (X_train, y_train, X_val, y_val, scaler)
 
     # 範例路由
     @app.route('/')
@@ -36,7 +184,7 @@ def create_app():
 
     @app.route('/api/status')
     def status():
-        return jsonify({"status": "running", "version": "1.0"})
+        return jsonify({"status": "running", "version": "1.0", "ml_loaded": 'tensorflow' in sys.modules})
 
     @app.route('/api/model/train', methods=['POST'])
     def train_model():
@@ -58,30 +206,7 @@ def create_app():
             return jsonify({"error": "'n_days' must be an integer."}), 400
 
         try:
-            # 載入原始數據
-            raw_df = data_service.get_dataset(dataset_name)
-            
-            # 預處理數據
-            # 這裡需要定義 look_back 和 target_column
-            # 為了範例，我們假設 look_back=5, target_column='Close'
-            look_back = 5 
-            target_column = 'Close'
-            X, y, scaler = data_preprocessor.preprocess(raw_df, look_back, n_days, target_column)
-
-            # 這裡需要將 X, y 分割為訓練集和驗證集
-            # 為了簡化，這裡直接使用全部數據作為訓練數據
-            # 實際應用中應進行適當的分割
-            X_train, y_train = X, y
-            X_val, y_val = X, y # 暫時使用相同數據作為驗證集
-
-            # 模擬模型配置
-            model_config = {
-                'look_back': look_back,
-                'n_days': n_days,
-                'target_column': target_column,
-                'input_shape': X_train.shape[1:], # 傳遞給 build_model
-                'output_units': y_train.shape[1] # 傳遞給 build_model
-            }
+            model_config, training_data = prepare_training_data(dataset_name, n_days)
 
             # 啟動模型訓練 (這裡需要將 ModelService 的 train_and_save_model 調整為非同步)
             # 為了簡化，這裡直接同步執行
@@ -89,7 +214,7 @@ def create_app():
                 dataset_name=dataset_name,
                 n_days=n_days,
                 model_config=model_config,
-                training_data=(X_train, y_train, X_val, y_val, scaler) # 傳遞所有必要數據
+                training_data=training_data # 傳遞所有必要數據
             )
             return jsonify({"message": "Model training started", "task_id": model_id}), 202
         except FileNotFoundError as e:
@@ -100,6 +225,208 @@ def create_app():
             app.logger.error(f"模型訓練失敗: {e}")
             return jsonify({"error": f"模型訓練失敗: {e}"}), 500
 
+    @app.route('/api/model/train/resume/<task_id>', methods=['POST'])
+    def resume_training(task_id):
+        """
+        從最後一個檢查點繼續執行中斷的訓練任務（例如部署或當機後）
+        """
+        job = model_service.get_training_job(task_id)
+        if not job:
+            return jsonify({"error": "Task not found or already completed"}), 404
+
+        try:
+            model_config, training_data = prepare_training_data(
+                job['dataset_name'], job['n_days'], job.get('look_back'), job.get('target_column')
+            )
+            model_id = model_service.train_and_save_model(
+                dataset_name=job['dataset_name'],
+                n_days=job['n_days'],
+                model_config=model_config,
+                training_data=training_data,
+                model_id=task_id
+            )
+            return jsonify({"message": "Model training resumed", "task_id": model_id}), 202
+        except FileNotFoundError as e:
+            return jsonify({"error": str(e)}), 404
+        except Exception as e:
+            app.logger.error(f"續訓模型失敗: {e}")
+            return jsonify({"error": f"續訓模型失敗: {e}"}), 500
+
+    @app.route('/api/model/train/panel', methods=['POST'])
+    def train_panel_model():
+        """
+        以多個資料集訓練單一面板模型（每檔各自正規化，可選 ticker embedding）
+        請求主體: dataset_names (必要，至少一個), n_days (必要), use_ticker_embedding (可選，預設 true)
+        """
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body must be JSON"}), 400
+
+        dataset_names = data.get('dataset_names')
+        n_days = data.get('n_days')
+        if not isinstance(dataset_names, list) or not dataset_names or not n_days:
+            return jsonify({"error": "Missing 'dataset_names' (list) or 'n_days' in request body."}), 400
+        if len(set(dataset_names)) != len(dataset_names):
+            return jsonify({"error": "'dataset_names' must not contain duplicates."}), 400
+
+        try:
+            n_days = int(n_days)
+            if not (1 <= n_days <= 30):
+                return jsonify({"error": "Invalid 'n_days' value. Must be between 1 and 30."}), 400
+        except ValueError:
+            return jsonify({"error": "'n_days' must be an integer."}), 400
+
+        try:
+            look_back = Config.DEFAULT_LOOK_BACK
+            target_column = 'Close'
+            datasets = {name: data_service.get_dataset(name, dtype=data_preprocessor.dtype)
+                        for name in dataset_names}
+            panel_data = data_preprocessor.preprocess_panel(
+                datasets, look_back, n_days, target_column, validation_split=Config.VALIDATION_SPLIT
+            )
+            if len(panel_data['X_train']) == 0 or len(panel_data['X_val']) == 0:
+                return jsonify({"error": "Not enough data to build training and validation windows."}), 400
+
+            model_config = {
+                'look_back': look_back,
+                'n_days': n_days,
+                'target_column': target_column,
+                'input_shape': panel_data['X_train'].shape[1:],
+                'output_units': panel_data['y_train'].shape[1],
+                'feature_columns': panel_data['feature_columns']
+            }
+            model_id = model_service.train_panel_model(
+                dataset_names, n_days, model_config, panel_data,
+                use_ticker_embedding=bool(data.get('use_ticker_embedding', True))
+            )
+            return jsonify({"message": "Model training started", "task_id": model_id}), 202
+        except FileNotFoundError as e:
+            return jsonify({"error": str(e)}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            app.logger.error(f"面板模型訓練失敗: {e}")
+            return jsonify({"error": f"面板模型訓練失敗: {e}"}), 500
+
+    @app.route('/api/model/finetune', methods=['POST'])
+    def finetune_model():
+        """
+        以既有模型為起點，在最新資料的最近視窗上微調，並儲存為新版本模型
+        請求主體: model_id (必要), epochs, recent_windows (可選)
+        """
+        data = request.get_json()
+        if not data or not data.get('model_id'):
+            return jsonify({"error": "Missing 'model_id' in request body."}), 400
+
+        parent_model_id = data['model_id']
+        metadata = model_service.get_model_metadata(parent_model_id)
+        if not metadata:
+            return jsonify({"error": "Model not found"}), 404
+
+        if metadata.get('panel'):
+            return jsonify({"error": "Fine-tuning panel models is not supported."}), 400
+
+        model_config = metadata['model_config']
+        scaler = model_service.load_scaler(parent_model_id)
+        if scaler is None or not model_config.get('feature_columns'):
+            return jsonify({"error": "Model has no saved scaler or feature schema; retrain it first."}), 400
+
+        try:
+            epochs = int(data.get('epochs', Config.FINE_TUNE_EPOCHS))
+            recent_windows = int(data.get('recent_windows', Config.FINE_TUNE_WINDOWS))
+        except (TypeError, ValueError):
+            return jsonify({"error": "'epochs' and 'recent_windows' must be integers."}), 400
+
+        try:
+            df = data_service.get_dataset(metadata['dataset_name'], dtype=data_preprocessor.dtype)
+            date_col = 'date' if 'date' in df.columns else 'Date'
+            data_end_date = str(df.iloc[-1][date_col]) if date_col in df.columns else None
+
+            # 沿用父模型的 scaler 與特徵欄位，只處理最近的資料視窗
+            X, y, _ = data_preprocessor.preprocess(
+                df, model_config['look_back'], model_config['n_days'], model_config['target_column'],
+                scaler=scaler, feature_columns=model_config['feature_columns'],
+                recent_windows=recent_windows
+            )
+            split_idx = int(len(X) * (1 - Config.VALIDATION_SPLIT))
+            if split_idx <= 0 or split_idx >= len(X):
+                return jsonify({"error": "Not enough recent data to fine-tune."}), 400
+
+            model_id = model_service.fine_tune_model(
+                parent_model_id,
+                (X[:split_idx], y[:split_idx], X[split_idx:], y[split_idx:]),
+                epochs=epochs,
+                data_end_date=data_end_date
+            )
+            return jsonify({
+                "message": "Model fine-tuning completed",
+                "task_id": model_id,
+                "parent_model_id": parent_model_id
+            }), 202
+        except FileNotFoundError as e:
+            return jsonify({"error": str(e)}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            app.logger.error(f"模型微調失敗: {e}")
+            return jsonify({"error": f"模型微調失敗: {e}"}), 500
+
+    @app.route('/api/model/train/bulk', methods=['POST'])
+    def train_bulk():
+        """
+        批次平行訓練：將 dataset_names x n_days 的所有組合分派到程序池，立即返回批次任務 ID
+        """
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Request body must be JSON"}), 400
+
+        dataset_names = data.get('dataset_names')
+        if not isinstance(dataset_names, list) or not dataset_names:
+            return jsonify({"error": "'dataset_names' must be a non-empty list."}), 400
+
+        # 未指定時訓練所有預測天數 (1-30)
+        n_days_list = data.get('n_days') or list(range(Config.MIN_PREDICTION_DAYS, Config.MAX_PREDICTION_DAYS + 1))
+        if not isinstance(n_days_list, list):
+            n_days_list = [n_days_list]
+
+        try:
+            bulk_job_id = bulk_training_service.submit(
+                dataset_names, n_days_list,
+                look_back=data.get('look_back'),
+                target_column=data.get('target_column'),
+                hyperparameters=data.get('hyperparameters'),
+                max_workers=data.get('max_workers'),
+                threads_per_worker=data.get('threads_per_worker')
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        status = bulk_training_service.get_status(bulk_job_id)
+        return jsonify({
+            "message": "Bulk training started",
+            "bulk_job_id": bulk_job_id,
+            "total_jobs": status['total_jobs'],
+            "workers": status['workers'],
+            "threads_per_worker": status['threads_per_worker']
+        }), 202
+
+    @app.route('/api/model/train/bulk/<bulk_job_id>', methods=['GET'])
+    def get_bulk_status(bulk_job_id):
+        """
+        批次訓練進度、吞吐量（模型/小時）與每個任務的耗時
+        """
+        status = bulk_training_service.get_status(bulk_job_id)
+        if status is None:
+            return jsonify({"error": "Bulk job not found"}), 404
+        return jsonify(status), 200
+
+    @app.route('/api/model/train/resumable', methods=['GET'])
+    def list_resumable_jobs():
+        """
+        列出仍有檢查點、可續訓的訓練任務
+        """
+        return jsonify(model_service.get_resumable_jobs()), 200
+
     @app.route('/api/model/train/status/<task_id>', methods=['GET'])
     def get_train_status(task_id):
         metadata = model_service.get_model_metadata(task_id)
@@ -114,10 +441,31 @@ def create_app():
                 "message": "Model training completed",
                 "model_id": task_id
             }), 200
-        else:
-            # 這裡可以模擬 pending 或 running 狀態
-            # 為了簡化，如果沒有元資料就認為任務不存在或失敗
-            return jsonify({"error": "Task not found or failed"}), 404
+
+        # 仍保留檢查點表示訓練進行中，或程序中斷後等待續訓
+        job = model_service.get_training_job(task_id)
+        if job:
+            total_epochs = job['hyperparameters'].get('epochs') or 1
+            return jsonify({
+                "task_id": task_id,
+                "status": "running",
+                "progress": min(1.0, job['completed_epochs'] / total_epochs),
+                "message": f"Training {job['model_name']}: epoch {job['completed_epochs']}/{total_epochs}"
+            }), 200
+
+        return jsonify({"error": "Task not found or failed"}), 404
+
+    @app.route('/api/data/list', methods=['GET'])
+    def list_datasets():
+        """
+        列出所有資料集與其目錄資訊（列數、日期範圍、欄位型別、缺失值、雜湊、收盤價範圍）
+        只讀取資料檔旁的 .meta.json，不讀取資料檔本身
+        """
+        try:
+            return jsonify(data_service.list_datasets()), 200
+        except Exception as e:
+            app.logger.error(f"取得資料集列表失敗: {e}")
+            return jsonify({"error": f"Failed to list datasets: {str(e)}"}), 500
 
     @app.route('/api/data/history', methods=['GET'])
     def get_history():
@@ -133,20 +481,7 @@ def create_app():
         try:
             # 載入歷史資料
             df = data_service.get_dataset(dataset_name)
-
-            # 轉換為 JSON 格式
-            # 確保日期格式正確
-            df_copy = df.copy()
-            if 'date' in df_copy.columns or 'Date' in df_copy.columns:
-                date_col = 'date' if 'date' in df_copy.columns else 'Date'
-                df_copy[date_col] = df_copy[date_col].astype(str)
-
-            # 標準化欄位名稱為小寫
-            df_copy.columns = df_copy.columns.str.lower()
-
-            # 返回 JSON
-            result = df_copy.to_dict(orient='records')
-            return jsonify(result), 200
+            return jsonify(history_records(df)), 200
 
         except FileNotFoundError as e:
             return jsonify({"error": f"Dataset not found: {str(e)}"}), 404
@@ -158,7 +493,10 @@ def create_app():
     def get_prediction():
         """
         取得模型預測結果
-        查詢參數: model_id (必要), n_days (必要)
+        查詢參數: model_id (必要), n_days (必要), dataset_name (面板模型必要，指定要預測的資料集),
+        samples (可選，Monte Carlo dropout 取樣數，回應另含 change_quantiles),
+        debug (可選，1 時回應 {"predictions": [...], "timings": {...}})
+        各階段耗時（毫秒）以 Server-Timing 標頭回傳。
         """
         model_id = request.args.get('model_id')
         n_days = request.args.get('n_days')
@@ -174,59 +512,31 @@ def create_app():
             return jsonify({"error": "'n_days' must be an integer."}), 400
 
         try:
-            # 取得模型元資料
-            metadata = model_service.get_model_metadata(model_id)
-            if not metadata:
-                return jsonify({"error": "Model not found"}), 404
-
-            # 載入訓練資料集以取得最新資料點
-            dataset_name = metadata['dataset_name']
-            df = data_service.get_dataset(dataset_name)
-
-            # 在預處理前先保存最後的日期
-            import pandas as pd
-            from datetime import timedelta
-            last_date = pd.to_datetime(df.iloc[-1]['date'] if 'date' in df.columns else df.iloc[-1]['Date'])
-
-            # 預處理資料以取得輸入特徵
-            look_back = metadata['model_config']['look_back']
-            target_column = metadata['model_config']['target_column']
-
-            # 只需要最後 look_back 個資料點進行預測
-            X, _, scaler = data_preprocessor.preprocess(df, look_back, n_days, target_column)
-
-            # 取得最後一組輸入資料
-            last_X = X[-1:] if len(X) > 0 else X
-
-            # 使用模型服務進行預測
-            predictions = model_service.predict(model_id, last_X)
-
-            # 格式化預測結果
-
-            prediction_results = []
-            for i in range(n_days):
-                target_date = last_date + timedelta(days=i+1)
-
-                # 假設預測輸出為價格變化
-                # 計算漲跌機率和幅度（這裡需要根據實際模型輸出調整）
-                pred_value = float(predictions[0][i]) if len(predictions.shape) > 1 else float(predictions[i])
-
-                # 簡化處理：將預測值轉換為漲跌機率和幅度
-                up_down_probability = 0.5 + (pred_value * 0.1)  # 示例計算
-                up_down_probability = max(0.0, min(1.0, up_down_probability))
-
-                change_magnitude = pred_value * 0.01  # 示例：轉換為百分比
-
-                prediction_results.append({
-                    "target_date": target_date.strftime('%Y-%m-%d'),
-                    "up_down_probability": up_down_probability,
-                    "change_magnitude": change_magnitude
-                })
-
-            return jsonify(prediction_results), 200
+            samples = parse_samples(request.args.get('samples'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
+        timer = StageTimer()
+        try:
+            with timer.activate():
+                prediction_results = prediction_service.predict(model_id, n_days, request.args.get('dataset_name'),
+                                                                samples)
+
+            with timer.stage('serialize'):
+                if request.args.get('debug') in ('1', 'true'):
+                    # JSON 中的耗時不含序列化本身，完整明細見 Server-Timing 標頭
+                    response = jsonify({"predictions": prediction_results, "timings": timer.to_dict()})
+                else:
+                    response = jsonify(prediction_results)
+            response.headers['Server-Timing'] = timer.server_timing()
+            return response, 200
+
+        except ModelNotFoundError:
+            return jsonify({"error": "Model not found"}), 404
         except FileNotFoundError as e:
             return jsonify({"error": f"Dataset not found: {str(e)}"}), 404
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             app.logger.error(f"預測失敗: {e}")
             import traceback
@@ -237,10 +547,31 @@ def create_app():
     def list_models():
         """
         取得已訓練模型列表
+        查詢參數（皆為可選）: dataset_name, n_days, sort（training_date/model_name/dataset_name/n_days）,
+        order（asc/desc）, limit, offset；總數以 X-Total-Count 標頭返回
         """
+        args = request.args
+        if not any(key in args for key in ('dataset_name', 'n_days', 'sort', 'order', 'limit', 'offset')):
+            try:
+                return jsonify(model_service.get_all_model_metadata()), 200
+            except Exception as e:
+                app.logger.error(f"取得模型列表失敗: {e}")
+                return jsonify({"error": f"Failed to get model list: {str(e)}"}), 500
+
         try:
-            models = model_service.get_all_model_metadata()
-            return jsonify(models), 200
+            models, total = model_service.query_model_metadata(
+                sort_by=args.get('sort', 'training_date'),
+                descending=args.get('order', 'desc').lower() != 'asc',
+                limit=args.get('limit', type=int),
+                offset=args.get('offset', 0, type=int),
+                dataset_name=args.get('dataset_name'),
+                n_days=args.get('n_days', type=int)
+            )
+            response = jsonify(models)
+            response.headers['X-Total-Count'] = str(total)
+            return response, 200
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             app.logger.error(f"取得模型列表失敗: {e}")
             return jsonify({"error": f"Failed to get model list: {str(e)}"}), 500
@@ -272,111 +603,235 @@ def create_app():
             return jsonify({"error": "Invalid file format. Only CSV files are allowed"}), 400
 
         try:
-            # 確保上傳目錄存在
-            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+            # 直接從上傳串流分塊匯入：第一個區塊驗證並對應欄位，之後逐塊檢查並寫入 Parquet，
+            # 不先寫出暫存 CSV，也不將整個檔案載入記憶體
+            result = data_service.ingest_csv(file.stream, dataset_name)
+            return jsonify({
+                "message": "Dataset uploaded successfully",
+                "dataset_name": dataset_name,
+                "rows": result['rows'],
+                "columns": result['columns'],
+                "date_format": result['date_format'],
+                "catalog": result['catalog']
+            }), 200
 
-            # 儲存檔案
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], dataset_name)
+        except DatasetExistsError:
+            return jsonify({"error": "Dataset name already exists"}), 400
+        except InvalidDatasetNameError:
+            return jsonify({"error": "Invalid dataset name"}), 400
+        except IngestError as e:
+            return jsonify({"error": f"Invalid CSV file: {str(e)}"}), 400
+        except Exception as e:
+            app.logger.error(f"上傳資料失敗: {e}")
+            return jsonify({"error": f"Failed to upload data: {str(e)}"}), 500
 
-            # 檢查檔案是否已存在
-            if os.path.exists(file_path):
+    @app.route('/api/data/upload/sessions', methods=['POST'])
+    def create_upload_session():
+        """
+        建立分塊上傳工作階段（儀表板直接從瀏覽器上傳，不經過 Dash callback）
+        請求參數 (JSON):
+        - filename: 檔案名稱 (必要，.csv)
+        - size: 檔案大小，位元組 (必要)
+        - dataset_name: 資料集名稱 (可選，預設為檔案名稱)
+        回應包含 upload_id 與 chunk_size，之後依序 PUT 各區塊。
+        """
+        data = request.get_json(silent=True) or {}
+        # 上傳前先檢查名稱，避免傳完整個檔案才發現資料集已存在
+        dataset_name = data.get('dataset_name') or data.get('filename')
+        try:
+            if dataset_name and data_service.dataset_exists(dataset_name):
                 return jsonify({"error": "Dataset name already exists"}), 400
+        except InvalidDatasetNameError:
+            return jsonify({"error": "Invalid dataset name"}), 400
+        try:
+            session = upload_service.create_session(data.get('filename'), data.get('dataset_name'), data.get('size'))
+            return jsonify(session), 201
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-            file.save(file_path)
-
-            # 驗證 CSV 格式
-            import pandas as pd
-            try:
-                df = pd.read_csv(file_path)
-
-                # 檢查必要欄位（支援中英文）
-                # 英文欄位對應
-                date_columns = ['date', '時間', '日期', 'Date', 'TIME']
-                close_columns = ['close', '收盤價', '收盘价', 'Close', 'CLOSE']
-
-                # 檢查是否有日期欄位
-                has_date = any(col in df.columns for col in date_columns)
-                # 檢查是否有收盤價欄位
-                has_close = any(col in df.columns for col in close_columns)
-
-                if not has_date or not has_close:
-                    missing = []
-                    if not has_date:
-                        missing.append('date/時間')
-                    if not has_close:
-                        missing.append('close/收盤價')
-
-                    os.remove(file_path)  # 刪除無效檔案
-                    return jsonify({
-                        "error": f"CSV file is missing required columns: {', '.join(missing)}. Your columns: {', '.join(df.columns[:5])}..."
-                    }), 400
-
-                # 標準化欄位名稱
-                column_mapping = {}
-
-                # 對應日期欄位
-                for col in date_columns:
-                    if col in df.columns:
-                        column_mapping[col] = 'date'
-                        break
-
-                # 對應收盤價欄位
-                for col in close_columns:
-                    if col in df.columns:
-                        column_mapping[col] = 'close'
-                        break
-
-                # 對應其他可能的欄位
-                price_mapping = {
-                    '開盤價': 'open',
-                    '最高價': 'high',
-                    '最低價': 'low',
-                    '成交量': 'volume',
-                    'Open': 'open',
-                    'High': 'high',
-                    'Low': 'low',
-                    'Volume': 'volume'
-                }
-
-                for chinese_col, english_col in price_mapping.items():
-                    if chinese_col in df.columns:
-                        column_mapping[chinese_col] = english_col
-
-                # 重新命名欄位
-                if column_mapping:
-                    df.rename(columns=column_mapping, inplace=True)
-                    # 保存標準化後的檔案
-                    df.to_csv(file_path, index=False)
-
-                # 將檔案移動到處理後的資料目錄
-                processed_dir = os.path.join(os.getcwd(), 'data', 'processed_data')
-                os.makedirs(processed_dir, exist_ok=True)
-
-                final_path = os.path.join(processed_dir, dataset_name)
-
-                # 如果檔案已存在，先刪除
-                if os.path.exists(final_path):
-                    os.remove(final_path)
-
-                os.rename(file_path, final_path)
-
-                return jsonify({
-                    "message": "Dataset uploaded successfully",
-                    "dataset_name": dataset_name,
-                    "rows": len(df),
-                    "columns": list(df.columns)
-                }), 200
+    @app.route('/api/data/upload/sessions/<upload_id>', methods=['GET'])
+    def get_upload_session(upload_id):
+        """
+        查詢上傳進度；續傳時從回應的 received 位移繼續
+        """
+        try:
+            return jsonify(upload_service.get_session(upload_id)), 200
+        except FileNotFoundError as e:
+            return jsonify({"error": str(e)}), 404
 
-            except Exception as e:
-                # 清理檔案
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                return jsonify({"error": f"Invalid CSV file: {str(e)}"}), 400
+    @app.route('/api/data/upload/sessions/<upload_id>', methods=['PUT'])
+    def upload_chunk(upload_id):
+        """
+        上傳一個區塊
+        查詢參數: offset (必要，區塊起始位移，必須等於已接收的位元組數)
+        請求內容: 區塊的原始位元組 (application/octet-stream)
+        位移不符時回應 409 與伺服器已接收的 received。
+        """
+        offset = request.args.get('offset', type=int)
+        if offset is None:
+            return jsonify({"error": "Missing or invalid 'offset' parameter"}), 400
+        try:
+            session = upload_service.write_chunk(upload_id, offset, request.stream, request.content_length)
+            return jsonify(session), 200
+        except FileNotFoundError as e:
+            return jsonify({"error": str(e)}), 404
+        except UploadOffsetError as e:
+            return jsonify({"error": str(e), "received": e.received}), 409
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
+    @app.route('/api/data/upload/sessions/<upload_id>/complete', methods=['POST'])
+    def complete_upload(upload_id):
+        """
+        所有區塊上傳完成後匯入資料集，回應格式同 /api/data/upload
+        """
+        try:
+            result = upload_service.complete(upload_id, data_service)
+            return jsonify({
+                "message": "Dataset uploaded successfully",
+                "dataset_name": result['dataset_name'],
+                "rows": result['rows'],
+                "columns": result['columns'],
+                "date_format": result['date_format'],
+                "catalog": result['catalog']
+            }), 200
+        except FileNotFoundError as e:
+            return jsonify({"error": str(e)}), 404
+        except UploadOffsetError as e:
+            return jsonify({"error": str(e), "received": e.received}), 409
+        except DatasetExistsError:
+            return jsonify({"error": "Dataset name already exists"}), 400
+        except InvalidDatasetNameError:
+            return jsonify({"error": "Invalid dataset name"}), 400
+        except IngestError as e:
+            return jsonify({"error": f"Invalid CSV file: {str(e)}"}), 400
         except Exception as e:
-            app.logger.error(f"上傳資料失敗: {e}")
+            app.logger.error(f"匯入上傳資料失敗: {e}")
             return jsonify({"error": f"Failed to upload data: {str(e)}"}), 500
 
+    @app.route('/api/data/upload/sessions/<upload_id>', methods=['DELETE'])
+    def abort_upload(upload_id):
+        """
+        取消上傳並刪除暫存檔
+        """
+        try:
+            upload_service.abort(upload_id)
+            return jsonify({"message": "Upload aborted", "upload_id": upload_id}), 200
+        except FileNotFoundError as e:
+            return jsonify({"error": str(e)}), 404
+
+    @app.route('/api/data/import', methods=['POST'])
+    def import_data():
+        """
+        批次匯入多個 CSV（一檔一個股票代號），以程序池平行匯入，立即返回匯入任務 ID
+        請求參數（二擇一）:
+        - file: zip 壓縮檔 (multipart/form-data)，表單欄位 prefix、max_workers、skip_existing、overwrite 可選
+        - JSON {"path": 伺服器上的目錄或 zip（必須位於 data/ 之下）, "prefix", "max_workers",
+          "skip_existing", "overwrite"}
+        已存在同名資料集的檔案預設記錄為失敗，skip_existing 時略過，overwrite 時取代。
+        單一檔案失敗不會中斷整批匯入，失敗原因列在 GET /api/data/import/<import_id> 的 failures。
+        """
+        remove_source = False
+        if 'file' in request.files:
+            file = request.files['file']
+            if not file.filename.endswith('.zip'):
+                return jsonify({"error": "Invalid file format. Only zip archives are allowed"}), 400
+            options = request.form
+            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+            source = os.path.join(app.config['UPLOAD_FOLDER'], f"import-{uuid.uuid4().hex}.zip")
+            file.save(source)
+            remove_source = True
+        else:
+            options = request.get_json(silent=True) or {}
+            if not options.get('path'):
+                return jsonify({"error": "Provide a zip 'file' or a JSON body with 'path'."}), 400
+            data_root = os.path.realpath(os.path.join(os.getcwd(), 'data'))
+            source = os.path.realpath(os.path.join(data_root, options['path']))
+            if os.path.commonpath([data_root, source]) != data_root or not os.path.exists(source):
+                return jsonify({"error": "'path' must be an existing directory or zip inside data/."}), 400
+
+        try:
+            max_workers = options.get('max_workers')
+            import_id = bulk_import_service.submit(
+                source,
+                prefix=options.get('prefix') or '',
+                skip_existing=str(options.get('skip_existing', '')).lower() in ('1', 'true'),
+                max_workers=int(max_workers) if max_workers else None,
+                remove_source=remove_source,
+                overwrite=str(options.get('overwrite', '')).lower() in ('1', 'true')
+            )
+        except (TypeError, ValueError) as e:
+            if remove_source and os.path.exists(source):
+                os.remove(source)
+            return jsonify({"error": str(e)}), 400
+
+        status = bulk_import_service.get_status(import_id)
+        return jsonify({
+            "message": "Bulk import started",
+            "import_id": import_id,
+            "total_files": status['total_files'],
+            "workers": status['workers']
+        }), 202
+
+    @app.route('/api/data/import/<import_id>', methods=['GET'])
+    def get_import_status(import_id):
+        """
+        批次匯入進度、吞吐量（檔案/秒、列/秒、MB/秒）與每個檔案的結果
+        """
+        status = bulk_import_service.get_status(import_id)
+        if status is None:
+            return jsonify({"error": "Import job not found"}), 404
+        return jsonify(status), 200
+
+    @app.before_request
+    def start_request_metrics():
+        """
+        記錄請求開始時間與進行中的請求數；路由標籤使用路由規則（例如 /api/model/train/bulk/<bulk_job_id>），
+        標籤數量不隨請求路徑成長
+        """
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        g.metrics_labels = (request.method, route)
+        g.metrics_in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(request.method, route)
+        g.metrics_in_flight.inc()
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(error=None):
+        """
+        請求結束時（包含未處理的例外）記錄延遲
+        """
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        g.metrics_in_flight.dec()
+        method, route = g.metrics_labels
+        status = g.get('metrics_status', 500)
+        HTTP_REQUEST_DURATION.labels(method, route, status).observe(time.perf_counter() - start)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """
+        Prometheus 格式的指標：API 延遲與進行中請求、資料集與模型快取、推論批次、訓練任務與程序記憶體
+        """
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    @app.after_request
+    def add_cors_headers(response):
+        """
+        允許 Config.CORS_ORIGINS 中的來源（儀表板）從瀏覽器直接呼叫 API
+        """
+        for name, value in cors_headers(request.headers.get('Origin')):
+            response.headers.add(name, value)
+        return response
+
+    if Config.ML_PRELOAD if preload_ml is None else preload_ml:
+        preload_ml_modules(delay=Config.ML_PRELOAD_DELAY)
+
     return app
 
 if __name__ == '__main__':
@@ -0,0 +1,367 @@
+"""
+非同步（ASGI）API
+與 Flask API 相同的端點與回應格式，在事件迴圈上處理連線，慢速的用戶端只佔用一個協程而不佔用執行緒：
+- 資料集列表、歷史資料、模型列表與預測由非同步處理常式處理：讀取資料集、模型與元資料交給 I/O 執行緒池，
+  預處理、推論與大型回應的 JSON 序列化交給運算執行緒池（NumPy 運算時釋放 GIL，且可共用同一份快取）
+- 其他端點（訓練、上傳、匯入、/metrics 等）先以非同步方式讀完請求主體，再交給固定大小的執行緒池執行 Flask 應用程式
+三個執行緒池的大小固定，同時連線數不受執行緒數限制。
+
+用法:
+    python -m src.asgi --port 5000                            # 以 uvicorn 執行，套用 Config 的連線設定
+    uvicorn --factory src.asgi:create_asgi_app --port 5000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl
+
+# 將專案根目錄加入 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.app import (HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, cors_headers, create_app, history_records,
+                     parse_samples)
+from src.config import Config
+from src.services.prediction_service import ModelNotFoundError
+from src.utils.logger import get_logger
+from src.utils.stage_timer import StageTimer
+
+logger = get_logger('asgi')
+
+JSON_HEADERS = [(b'content-type', b'application/json')]
+
+
+class Request:
+    """
+    非同步處理常式使用的請求：方法、路徑、查詢參數與標頭（名稱為小寫）。
+    """
+
+    def __init__(self, scope: Dict[str, Any]):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.args: Dict[str, str] = {}
+        query = scope.get('query_string', b'').decode('latin-1')
+        for key, value in parse_qsl(query, keep_blank_values=True):
+            # 與 Flask 的 request.args.get 相同，重複的參數取第一個
+            self.args.setdefault(key, value)
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+                        for name, value in scope['headers']}
+
+    def int_arg(self, key: str, default: int = None) -> int | None:
+        """
+        與 Flask 的 request.args.get(key, default, type=int) 相同，無法轉換時返回預設值。
+        """
+        try:
+            return int(self.args[key])
+        except (KeyError, ValueError):
+            return default
+
+
+class AsyncApi:
+    """
+    ASGI 應用程式。
+    """
+
+    def __init__(self, flask_app=None, io_threads: int = None, cpu_threads: int = None,
+                 wsgi_threads: int = None):
+        """
+        :param flask_app: 提供服務與其他端點的 Flask 應用程式，預設以 create_app() 建立。
+        :param io_threads: 讀取檔案的執行緒數，預設 Config.ASGI_IO_THREADS。
+        :param cpu_threads: 預處理、推論與序列化的執行緒數，預設 Config.ASGI_CPU_THREADS（None 表示可用核心數）。
+        :param wsgi_threads: 執行 Flask 端點的執行緒數，預設 Config.ASGI_WSGI_THREADS。
+        """
+        from src.services.bulk_training_service import available_cpus
+
+        self.flask_app = flask_app or create_app()
+        services = self.flask_app.extensions['stock_prediction']
+        self.data_service = services['data_service']
+        self.model_service = services['model_service']
+        self.prediction_service = services['prediction_service']
+
+        self.io_executor = ThreadPoolExecutor(io_threads or Config.ASGI_IO_THREADS,
+                                              thread_name_prefix='asgi-io')
+        self.cpu_executor = ThreadPoolExecutor(
+            cpu_threads or Config.ASGI_CPU_THREADS or len(available_cpus()),
+            thread_name_prefix='asgi-cpu')
+        self.wsgi_executor = ThreadPoolExecutor(wsgi_threads or Config.ASGI_WSGI_THREADS,
+                                                thread_name_prefix='asgi-wsgi')
+
+        self.routes: Dict[Tuple[str, str], Callable] = {
+            ('GET', '/api/status'): self.status,
+            ('GET', '/api/data/list'): self.list_datasets,
+            ('GET', '/api/data/history'): self.get_history,
+            ('GET', '/api/model/list'): self.list_models,
+            ('GET', '/api/model/predict'): self.get_prediction,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        handler = self.routes.get((scope['method'], scope['path']))
+        if handler is None:
+            await self._call_wsgi(scope, receive, send)
+            return
+
+        request = Request(scope)
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(request.method, request.path)
+        in_flight.inc()
+        start = time.perf_counter()
+        status = 500
+        try:
+            try:
+                status, body, headers = await handler(request)
+            except Exception as e:
+                logger.exception("處理 %s 失敗: %s", request.path, e)
+                status, body, headers = 500, {"error": f"Internal server error: {str(e)}"}, []
+            if not isinstance(body, bytes):
+                body = self._dumps(body)
+            headers = headers + cors_headers(request.headers.get('origin'))
+            headers = JSON_HEADERS + [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                      for name, value in headers]
+            headers.append((b'content-length', str(len(body)).encode()))
+            await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+            await send({'type': 'http.response.body', 'body': body})
+        finally:
+            in_flight.dec()
+            HTTP_REQUEST_DURATION.labels(request.method, request.path, status).observe(
+                time.perf_counter() - start)
+
+    def _dumps(self, data: Any) -> bytes:
+        # 以 Flask 的 JSON 設定（排序鍵、ASCII 跳脫、緊湊格式）序列化，回應內容與 Flask API 相同
+        return self.flask_app.json.response(data).get_data()
+
+    async def _run(self, executor: ThreadPoolExecutor, func: Callable, *args,
+                   timer: StageTimer = None) -> Any:
+        """
+        在執行緒池執行函式；指定 timer 時在該執行緒啟用計時器，記錄下層模組的階段耗時。
+        """
+        def call():
+            if timer is None:
+                return func(*args)
+            with timer.activate():
+                return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+    # ---------------------------------------------------------------- 端點
+
+    async def status(self, request: Request):
+        status = {"status": "running", "version": "1.0", "ml_loaded": 'tensorflow' in sys.modules}
+        return 200, status, []
+
+    async def list_datasets(self, request: Request):
+        try:
+            return 200, await self._run(self.io_executor, self.data_service.list_datasets), []
+        except Exception as e:
+            logger.error("取得資料集列表失敗: %s", e)
+            return 500, {"error": f"Failed to list datasets: {str(e)}"}, []
+
+    async def get_history(self, request: Request):
+        dataset_name = request.args.get('dataset_name')
+        if not dataset_name:
+            return 400, {"error": "Missing 'dataset_name' parameter"}, []
+
+        try:
+            df = await self._run(self.io_executor, self.data_service.get_dataset, dataset_name)
+            # 數萬列的轉換與序列化是主要的運算成本
+            body = await self._run(self.cpu_executor, lambda: self._dumps(history_records(df)))
+            return 200, body, []
+        except FileNotFoundError as e:
+            return 404, {"error": f"Dataset not found: {str(e)}"}, []
+        except Exception as e:
+            logger.error("取得歷史資料失敗: %s", e)
+            return 500, {"error": f"Failed to get historical data: {str(e)}"}, []
+
+    async def list_models(self, request: Request):
+        args = request.args
+        try:
+            query_keys = ('dataset_name', 'n_days', 'sort', 'order', 'limit', 'offset')
+            if not any(key in args for key in query_keys):
+                models = await self._run(self.io_executor,
+                                         self.model_service.get_all_model_metadata)
+                return 200, models, []
+
+            models, total = await self._run(
+                self.io_executor, lambda: self.model_service.query_model_metadata(
+                    sort_by=args.get('sort', 'training_date'),
+                    descending=args.get('order', 'desc').lower() != 'asc',
+                    limit=request.int_arg('limit'),
+                    offset=request.int_arg('offset', 0),
+                    dataset_name=args.get('dataset_name'),
+                    n_days=request.int_arg('n_days')
+                ))
+            return 200, models, [('X-Total-Count', str(total))]
+        except ValueError as e:
+            return 400, {"error": str(e)}, []
+        except Exception as e:
+            logger.error("取得模型列表失敗: %s", e)
+            return 500, {"error": f"Failed to get model list: {str(e)}"}, []
+
+    async def get_prediction(self, request: Request):
+        model_id = request.args.get('model_id')
+        n_days = request.args.get('n_days')
+
+        if not model_id or not n_days:
+            return 400, {"error": "Missing 'model_id' or 'n_days' parameter"}, []
+
+        try:
+            n_days = int(n_days)
+            if not (1 <= n_days <= 30):
+                return 400, {"error": "Invalid 'n_days' value. Must be between 1 and 30."}, []
+        except ValueError:
+            return 400, {"error": "'n_days' must be an integer."}, []
+
+        try:
+            samples = parse_samples(request.args.get('samples'))
+        except ValueError as e:
+            return 400, {"error": str(e)}, []
+
+        timer = StageTimer()
+        try:
+            inputs = await self._run(self.io_executor, self.prediction_service.load_inputs,
+                                     model_id, n_days, request.args.get('dataset_name'), samples,
+                                     timer=timer)
+            prediction_results = await self._run(self.cpu_executor, self.prediction_service.compute,
+                                                 inputs, timer=timer)
+
+            with timer.stage('serialize'):
+                if request.args.get('debug') in ('1', 'true'):
+                    # JSON 中的耗時不含序列化本身，完整明細見 Server-Timing 標頭
+                    body = self._dumps({"predictions": prediction_results,
+                                        "timings": timer.to_dict()})
+                else:
+                    body = self._dumps(prediction_results)
+            return 200, body, [('Server-Timing', timer.server_timing())]
+
+        except ModelNotFoundError:
+            return 404, {"error": "Model not found"}, []
+        except FileNotFoundError as e:
+            return 404, {"error": f"Dataset not found: {str(e)}"}, []
+        except ValueError as e:
+            return 400, {"error": str(e)}, []
+        except Exception as e:
+            logger.exception("預測失敗: %s", e)
+            return 500, {"error": f"Prediction failed: {str(e)}"}, []
+
+    # ---------------------------------------------------------------- 其他端點（Flask）
+
+    async def _call_wsgi(self, scope, receive, send):
+        """
+        讀完請求主體（超過 Config.ASGI_SPOOL_SIZE 時暫存到磁碟）後，在執行緒池中執行 Flask 應用程式。
+        """
+        body = tempfile.SpooledTemporaryFile(max_size=Config.ASGI_SPOOL_SIZE)
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return
+            body.write(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        body.seek(0)
+
+        try:
+            status, headers, chunks = await asyncio.get_running_loop().run_in_executor(
+                self.wsgi_executor, self._run_wsgi, build_environ(scope, body))
+        finally:
+            body.close()
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''.join(chunks)})
+
+    def _run_wsgi(self, environ: Dict[str, Any]
+                  ) -> Tuple[int, List[Tuple[bytes, bytes]], List[bytes]]:
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+        result = self.flask_app(environ, start_response)
+        try:
+            chunks = list(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers'], chunks
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for executor in (self.io_executor, self.cpu_executor, self.wsgi_executor):
+                    executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+def build_environ(scope: Dict[str, Any], body) -> Dict[str, Any]:
+    """
+    由 ASGI scope 建立 WSGI environ（PEP 3333）。
+    :param scope: ASGI HTTP scope。
+    :param body: 已讀完的請求主體（檔案物件）。
+    :return: environ。
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def create_asgi_app() -> AsyncApi:
+    """
+    ASGI 伺服器使用的工廠函式（uvicorn --factory src.asgi:create_asgi_app）。
+    """
+    return AsyncApi()
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description='以 uvicorn 執行非同步 API')
+    parser.add_argument('--host', default=Config.FLASK_HOST)
+    parser.add_argument('--port', type=int, default=Config.FLASK_PORT)
+    args = parser.parse_args()
+
+    uvicorn.run(create_asgi_app(), host=args.host, port=args.port, lifespan='on',
+                backlog=Config.SERVER_BACKLOG, timeout_keep_alive=Config.ASGI_KEEP_ALIVE_TIMEOUT,
+                h11_max_incomplete_event_size=Config.ASGI_MAX_HEADER_SIZE)
+
+
+if __name__ == '__main__':
+    main()
@@ -38,15 +38,71 @@ class Config:
     DEFAULT_LOOK_BACK = 5  # 使用過去 N 天的資料作為輸入
     DEFAULT_TARGET_COLUMN = 'close'  # 預測目標欄位
 
+    # 數值管線的浮點型別（載入、特徵工程、正規化、序列、訓練與推論）
+    # Keras 預設以 float32 計算，使用 float32 可避免每個批次的型別轉換並減半記憶體
+    DEFAULT_DTYPE = 'float32'
+
     # 超參數預設值
     DEFAULT_HYPERPARAMETERS = {
         'learning_rate': 0.001,
         'lstm_units': 64,
         'dropout_rate': 0.3,
         'epochs': 30,
-        'batch_size': 32
+        'batch_size': 32,
+        'early_stopping_patience': 5,  # 驗證損失連續 N 個 epoch 未改善即停止
+        'checkpoint_interval': 1  # 每 N 個 epoch 寫入一次檢查點
+    }
+
+    # 依時間順序保留最後一段資料作為驗證集的比例
+    VALIDATION_SPLIT = 0.2
+
+    # 微調配置（以既有模型為起點，只用最近的資料視窗續訓）
+    FINE_TUNE_EPOCHS = 5
+    FINE_TUNE_WINDOWS = 250  # 使用最近 N 組序列
+    FINE_TUNE_LR_FACTOR = 0.1  # 微調學習率 = 原學習率 x 此係數
+    FINE_TUNE_PATIENCE = 2
+
+    # 啟動後於背景預先匯入 TensorFlow 等重型模組（API 啟動時不匯入，第一次訓練/推論時才載入）
+    ML_PRELOAD = os.environ.get('ML_PRELOAD', '0') == '1'
+    ML_PRELOAD_DELAY = 1.0  # 伺服器開始服務後延遲 N 秒再預先匯入
+
+    # 日誌：紀錄經由佇列交給背景執行緒寫入，請求執行緒不等待 I/O
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_FILE = os.environ.get('LOG_FILE')  # 每行一筆 JSON 的日誌檔，未設定時只輸出到主控台
+    LOG_JSON = os.environ.get('LOG_JSON', '0') == '1'  # 主控台也輸出 JSON
+    LOG_QUEUE_SIZE = 10_000  # 佇列已滿時丟棄紀錄並計入 log_records_dropped_total
+    LOG_RATE_LIMIT = 50  # 每個 logger 每秒最多輸出的紀錄數（可累積兩倍），0 表示不限制
+    LOG_SAMPLE_RATES = {  # 高頻率事件的抽樣比例（依 get_logger 名稱），WARNING 以上不抽樣
+        'model_manager.load': 0.1,
     }
 
+    # 批次平行訓練配置（多個 資料集 x 預測天數 組合）
+    BULK_THREADS_PER_WORKER = 2  # 每個工作程序的 TensorFlow intra-op 執行緒數（亦為綁定的 CPU 核心數）
+    BULK_INTER_OP_THREADS = 1  # 每個工作程序的 TensorFlow inter-op 執行緒數
+    BULK_MAX_WORKERS = None  # 工作程序上限，None 表示依可用核心數 / 每程序執行緒數決定
+
+    # 記憶體快取：預測與切換模型時不必每次重新讀取資料集與模型檔案
+    DATASET_CACHE_SIZE = 16  # 保留的資料集數（依資料集名稱與型別）
+    MODEL_CACHE_SIZE = 8  # 保留的推論模型與 scaler 數
+
+    # 機率預測（Monte Carlo dropout）：預測 API 的 samples 參數指定取樣數，全部取樣在同一次前向傳播中完成
+    MC_DROPOUT_MAX_SAMPLES = 1000
+    MC_DROPOUT_QUANTILES = (0.05, 0.5, 0.95)  # 回應中 change_quantiles 的分位數（p5、p50、p95）
+
+    # 上傳 CSV 的串流匯入：每次讀取與寫入 Parquet 的列數（記憶體用量上限）
+    INGEST_CHUNK_ROWS = 50_000
+
+    # 批次匯入（目錄或 zip 中的多個 CSV）
+    IMPORT_MAX_WORKERS = None  # 工作程序上限，None 表示依可用核心數決定
+
+    # 儀表板的分塊、可續傳上傳
+    UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # 每個區塊的位元組數（亦為單一區塊上限）
+    UPLOAD_MAX_SIZE = 2 * 1024 * 1024 * 1024  # 單一檔案上限
+    UPLOAD_SESSION_TTL = 24 * 60 * 60  # 未完成的上傳保留秒數，逾期後清除暫存檔
+
+    # 允許直接呼叫 API 的瀏覽器來源（儀表板與 API 分屬不同埠號），以逗號分隔，* 表示全部
+    CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:8050,http://127.0.0.1:8050').split(',')
+
     # API 配置
     FLASK_HOST = '0.0.0.0'
     FLASK_PORT = 5000
@@ -57,6 +113,25 @@ class Config:
     DASH_PORT = 8050
     DASH_DEBUG = True
 
+    # 生產環境服務（python -m src.serve）：父程序預熱後 fork 出多個工作程序
+    SERVER_WORKERS = None  # 工作程序數，None 表示依可用核心數決定
+    SERVER_THREADS = 4  # 每個工作程序同時處理的請求數
+    SERVER_MAX_REQUESTS = 10_000  # 工作程序處理此數量的請求後重新建立（有背景批次任務時延後），0 表示不限制
+    SERVER_MAX_REQUESTS_JITTER = 1_000  # 隨機加上 0~N，避免所有工作程序同時重新建立
+    SERVER_GRACEFUL_TIMEOUT = 30  # 停止服務時等待進行中請求的秒數（替換工作程序時等背景任務完成，不設逾時）
+    SERVER_BACKLOG = 2048
+    SERVER_WARM_MODELS = [m for m in os.environ.get('WARM_MODELS', '').split(',') if m]  # fork 前預熱的模型 ID
+    SERVER_WARM_LATEST = 0  # 另外預熱最近訓練的 N 個模型
+    SERVER_WARM_DATASETS = [d for d in os.environ.get('WARM_DATASETS', '').split(',') if d]
+
+    # 非同步 API（python -m src.asgi）：連線由事件迴圈處理，檔案讀取與運算交給固定大小的執行緒池
+    ASGI_IO_THREADS = 32  # 讀取資料集、模型與元資料
+    ASGI_CPU_THREADS = None  # 預處理、推論與序列化，None 表示可用核心數
+    ASGI_WSGI_THREADS = 8  # 執行其他（Flask）端點
+    ASGI_SPOOL_SIZE = 1024 * 1024  # 交給 Flask 的請求主體超過此位元組數時暫存到磁碟
+    ASGI_MAX_HEADER_SIZE = 64 * 1024  # uvicorn 的請求標頭上限（位元組）
+    ASGI_KEEP_ALIVE_TIMEOUT = 5  # uvicorn 保留閒置 keep-alive 連線的秒數
+
     # 效能目標
     PERFORMANCE_TARGETS = {
         'upload_to_prediction_time': 300,  # 5 分鐘（秒）
@@ -92,11 +167,10 @@ class ProductionConfig(Config):
     FLASK_DEBUG = False
     DASH_DEBUG = False
 
-    # 生產環境應從環境變數讀取密鑰
-    SECRET_KEY = os.environ.get('SECRET_KEY')
+    SERVER_WARM_LATEST = 3
 
-    if not SECRET_KEY:
-        raise ValueError("生產環境必須設定 SECRET_KEY 環境變數")
+    # 生產環境應從環境變數讀取密鑰（於 get_config 時檢查，避免匯入模組即失敗）
+    SECRET_KEY = os.environ.get('SECRET_KEY')
 
 
 class TestingConfig(Config):
@@ -125,4 +199,9 @@ def get_config(config_name='default'):
     :param config_name: 配置名稱 ('development', 'production', 'testing', 'default')
     :return: 配置類別
     """
-    return config.get(config_name, DevelopmentConfig)
+    config_class = config.get(config_name, DevelopmentConfig)
+
+    if config_class is ProductionConfig and not os.environ.get('SECRET_KEY'):
+        raise ValueError("生產環境必須設定 SECRET_KEY 環境變數")
+
+    return config_class
@@ -0,0 +1,255 @@
+"""
+資料集目錄
+在資料集寫入時計算統計資訊（列數、日期範圍、欄位型別、缺失值、內容雜湊、收盤價範圍），
+以 <資料集>.meta.json 存放在資料檔旁邊，列出與驗證資料集時不需讀取資料檔本身。
+"""
+
+import datetime
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+CATALOG_VERSION = 1
+META_SUFFIX = '.meta.json'
+
+DATE_COLUMNS = ('date', 'Date', '時間', '日期', 'TIME')
+CLOSE_COLUMNS = ('close', 'Close', '收盤價', '收盘价', 'CLOSE')
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def _merge_dtype(current: str, new: str) -> str:
+    """
+    合併不同區塊推斷出的欄位型別：相同時保留，皆為數值時提升為 float64，否則為 object。
+    """
+    if current is None or current == new:
+        return new
+    numeric = ('int', 'float', 'uint')
+    if current.startswith(numeric) and new.startswith(numeric):
+        return 'float64'
+    return 'object'
+
+
+class DatasetStatsAccumulator:
+    """
+    以區塊（DataFrame 片段）逐步累積資料集統計，可用於一次讀入或分塊串流的寫入流程。
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.schema: Dict[str, str] = {}
+        self.null_counts: Dict[str, int] = {}
+        self.date_column = None
+        self.close_column = None
+        self.first_date = None
+        self.last_date = None
+        self.min_date = None
+        self.max_date = None
+        self.min_close = None
+        self.max_close = None
+        self.last_close = None
+        self._hash = hashlib.sha256()
+        self._hashed_bytes = 0
+
+    def update_hash(self, data: bytes):
+        """
+        將原始位元組加入內容雜湊（呼叫端依檔案順序傳入）。
+        """
+        self._hash.update(data)
+        self._hashed_bytes += len(data)
+
+    def update(self, chunk: pd.DataFrame):
+        """
+        加入一個資料區塊的統計。
+        :param chunk: 依檔案順序的 DataFrame 片段。
+        """
+        if not self.schema:
+            self.date_column = next((col for col in DATE_COLUMNS if col in chunk.columns), None)
+            self.close_column = next((col for col in CLOSE_COLUMNS if col in chunk.columns), None)
+
+        self.rows += len(chunk)
+        for col, dtype in chunk.dtypes.items():
+            self.schema[col] = _merge_dtype(self.schema.get(col), str(dtype))
+        for col, count in chunk.isna().sum().items():
+            self.null_counts[col] = self.null_counts.get(col, 0) + int(count)
+
+        if self.date_column is not None and len(chunk):
+            dates = pd.to_datetime(chunk[self.date_column], errors='coerce').dropna()
+            if len(dates):
+                if self.first_date is None:
+                    self.first_date = dates.iloc[0]
+                self.last_date = dates.iloc[-1]
+                self.min_date = min(self.min_date, dates.min()) if self.min_date is not None else dates.min()
+                self.max_date = max(self.max_date, dates.max()) if self.max_date is not None else dates.max()
+
+        if self.close_column is not None and len(chunk):
+            close = pd.to_numeric(chunk[self.close_column], errors='coerce').dropna()
+            if len(close):
+                chunk_min, chunk_max = float(close.min()), float(close.max())
+                self.min_close = chunk_min if self.min_close is None else min(self.min_close, chunk_min)
+                self.max_close = chunk_max if self.max_close is None else max(self.max_close, chunk_max)
+                self.last_close = float(close.iloc[-1])
+
+    def to_entry(self, dataset_name: str, file_path: str = None) -> Dict[str, Any]:
+        """
+        產生目錄項目。
+        :param dataset_name: 資料集名稱。
+        :param file_path: 資料檔路徑（可選），用於記錄檔案大小與修改時間以偵測過期。
+        """
+        def iso(value):
+            return value.strftime('%Y-%m-%d') if value is not None else None
+
+        entry = {
+            'catalog_version': CATALOG_VERSION,
+            'dataset_name': dataset_name,
+            'rows': self.rows,
+            'columns': [{'name': col, 'dtype': dtype, 'null_count': self.null_counts.get(col, 0)}
+                        for col, dtype in self.schema.items()],
+            'date_column': self.date_column,
+            'close_column': self.close_column,
+            'first_date': iso(self.first_date),
+            'last_date': iso(self.last_date),
+            'min_date': iso(self.min_date),
+            'max_date': iso(self.max_date),
+            'min_close': self.min_close,
+            'max_close': self.max_close,
+            'last_close': self.last_close,
+            'sha256': self._hash.hexdigest() if self._hashed_bytes else None,
+            'cataloged_at': datetime.datetime.now().isoformat()
+        }
+        if file_path is not None:
+            stat = os.stat(file_path)
+            entry.update({'file_name': os.path.basename(file_path), 'size': stat.st_size,
+                          'mtime_ns': stat.st_mtime_ns})
+        return entry
+
+
+def compute_entry(file_path: str, dataset_name: str = None, chunksize: int = 100_000) -> Dict[str, Any]:
+    """
+    串流讀取資料檔計算目錄項目（用於既有資料集的補建）。
+    CSV 以分塊讀取，記憶體用量與檔案大小無關。
+    :param file_path: CSV 或 Parquet 檔案路徑。
+    :param dataset_name: 資料集名稱，預設為檔案名稱。
+    :param chunksize: CSV 每個區塊的列數。
+    """
+    accumulator = DatasetStatsAccumulator()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            accumulator.update_hash(block)
+
+    if file_path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            accumulator.update(batch.to_pandas())
+    else:
+        for chunk in pd.read_csv(file_path, chunksize=chunksize):
+            accumulator.update(chunk)
+
+    return accumulator.to_entry(dataset_name or os.path.basename(file_path), file_path)
+
+
+class DatasetCatalog:
+    """
+    讀寫資料檔旁的 <資料集>.meta.json 目錄項目。
+    """
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+
+    def meta_path(self, dataset_name: str) -> str:
+        return os.path.join(self.data_dir, f"{dataset_name}{META_SUFFIX}")
+
+    def write_entry(self, dataset_name: str, entry: Dict[str, Any]) -> str:
+        """
+        原子性地寫入目錄項目。
+        """
+        meta_path = self.meta_path(dataset_name)
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=4, default=_json_default)
+        os.replace(tmp_path, meta_path)
+        return meta_path
+
+    def build_entry(self, dataset_name: str, file_path: str = None) -> Dict[str, Any]:
+        """
+        從資料檔計算並寫入目錄項目。
+        """
+        file_path = file_path or os.path.join(self.data_dir, dataset_name)
+        entry = compute_entry(file_path, dataset_name)
+        self.write_entry(dataset_name, entry)
+        return entry
+
+    def get_entry(self, dataset_name: str) -> Dict[str, Any] | None:
+        """
+        讀取目錄項目（不讀取資料檔）；資料檔的大小或修改時間與紀錄不同時標記 stale。
+        """
+        meta_path = self.meta_path(dataset_name)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+
+        data_path = os.path.join(self.data_dir, entry.get('file_name') or dataset_name)
+        try:
+            stat = os.stat(data_path)
+            entry['stale'] = (stat.st_size, stat.st_mtime_ns) != (entry.get('size'), entry.get('mtime_ns'))
+        except FileNotFoundError:
+            entry['stale'] = True
+        return entry
+
+    def remove_entry(self, dataset_name: str):
+        meta_path = self.meta_path(dataset_name)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+    def list_entries(self) -> List[Dict[str, Any]]:
+        """
+        列出所有目錄項目（只讀取 .meta.json 檔案）。
+        """
+        names = sorted(f[:-len(META_SUFFIX)] for f in os.listdir(self.data_dir) if f.endswith(META_SUFFIX))
+        entries = [self.get_entry(name) for name in names]
+        return [entry for entry in entries if entry is not None]
+
+    def backfill(self, dataset_names: Iterable[str], rebuild_stale: bool = True) -> List[str]:
+        """
+        為沒有目錄項目（或已過期）的既有資料集補建項目。
+        :return: 已補建的資料集名稱。
+        """
+        built = []
+        for name in dataset_names:
+            entry = self.get_entry(name)
+            if entry is None or (rebuild_stale and entry['stale']):
+                self.build_entry(name)
+                built.append(name)
+        return built
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"無法序列化 {type(value)}")
+
+
+def main():
+    """
+    命令列：為資料目錄中的既有資料集補建目錄項目。
+    用法: python -m src.data.catalog --data-dir data/processed_data
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='為既有資料集建立目錄項目')
+    parser.add_argument('--data-dir', default=os.path.join('data', 'processed_data'))
+    args = parser.parse_args()
+
+    catalog = DatasetCatalog(args.data_dir)
+    names = [f for f in os.listdir(args.data_dir) if f.endswith(('.csv', '.parquet'))]
+    for name in catalog.backfill(names):
+        print(f"已建立目錄項目: {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""
+CSV 串流匯入
+分塊讀取上傳的 CSV：以第一個區塊驗證並對應欄位名稱、決定欄位型別與日期格式，
+每個區塊以固定格式解析日期並做向量化檢查（日期遞增、重複日期、非正價格），
+再直接寫入 Parquet 檔案的一個 row group，同時累積資料集目錄的統計資訊。
+記憶體用量只與區塊大小有關，與上傳檔案大小無關。
+"""
+
+import os
+from typing import Any, BinaryIO, Dict, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data.catalog import CLOSE_COLUMNS, DATE_COLUMNS, HASH_BLOCK_SIZE, DatasetStatsAccumulator
+
+DEFAULT_CHUNKSIZE = 50_000
+
+# 其他欄位的標準名稱（日期與收盤價欄位另外對應為 date、close）
+COLUMN_MAPPING = {
+    '開盤價': 'open',
+    '最高價': 'high',
+    '最低價': 'low',
+    '成交量': 'volume',
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Volume': 'volume'
+}
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
+# 依序嘗試的日期格式，第一個能解析第一個區塊所有日期的格式會套用到整個檔案
+DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%Y%m%d', '%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M:%S',
+                '%m/%d/%Y')
+
+# 每種檢查在錯誤訊息中最多列出的列數
+MAX_REPORTED_ROWS = 5
+
+
+class IngestError(ValueError):
+    """
+    上傳的資料未通過驗證（欄位缺漏、日期無法解析、順序錯誤、重複日期或非正價格）。
+    """
+
+
+def map_columns(columns: List[str]) -> Dict[str, str]:
+    """
+    建立原始欄位名稱到標準名稱的對應，缺少日期或收盤價欄位時拋出 IngestError。
+    :param columns: CSV 標頭欄位。
+    :return: {原始名稱: 標準名稱}，只包含需要改名的欄位。
+    """
+    date_col = next((col for col in DATE_COLUMNS if col in columns), None)
+    close_col = next((col for col in CLOSE_COLUMNS if col in columns), None)
+    if date_col is None or close_col is None:
+        missing = []
+        if date_col is None:
+            missing.append('date/時間')
+        if close_col is None:
+            missing.append('close/收盤價')
+        raise IngestError(
+            f"CSV file is missing required columns: {', '.join(missing)}. "
+            f"Your columns: {', '.join(columns[:5])}..."
+        )
+
+    mapping = {col: name for col, name in COLUMN_MAPPING.items() if col in columns}
+    mapping.update({date_col: 'date', close_col: 'close'})
+    return {col: name for col, name in mapping.items() if col != name}
+
+
+def detect_date_format(values: pd.Series, date_formats: Sequence[str] = DATE_FORMATS) -> str:
+    """
+    從候選格式中找出能解析所有值的日期格式。
+    :param values: 第一個區塊的日期字串。
+    :param date_formats: 依序嘗試的候選格式。
+    :return: strftime 格式字串。
+    """
+    sample = values.dropna()
+    if sample.empty:
+        raise IngestError("The date column has no values in the first rows of the file.")
+    for date_format in date_formats:
+        if pd.to_datetime(sample, format=date_format, errors='coerce').notna().all():
+            return date_format
+    raise IngestError(f"Unrecognized date format: '{sample.iloc[0]}'. "
+                      f"Supported formats: {', '.join(date_formats)}")
+
+
+def _source_column(mapping: Dict[str, str], name: str) -> str:
+    """
+    取得對應到標準名稱的原始欄位名稱（原始名稱即為標準名稱時不在對應表中）。
+    """
+    return next((col for col, standard in mapping.items() if standard == name), name)
+
+
+def _describe_rows(line_numbers: np.ndarray) -> str:
+    shown = ', '.join(str(n) for n in line_numbers[:MAX_REPORTED_ROWS])
+    more = len(line_numbers) - MAX_REPORTED_ROWS
+    return f"{shown} (+{more} more)" if more > 0 else shown
+
+
+class CsvIngestor:
+    """
+    將 CSV 串流轉換為 Parquet 資料集。
+    """
+
+    def __init__(self, chunksize: int = DEFAULT_CHUNKSIZE, date_format: str = None):
+        """
+        :param chunksize: 每個區塊的列數，決定記憶體用量上限與 Parquet row group 大小。
+        :param date_format: 固定的日期格式（可選），預設從第一個區塊偵測。
+        """
+        self.chunksize = chunksize
+        self.date_format = date_format
+
+    def _read_csv(self, source: Union[str, BinaryIO], **kwargs) -> Any:
+        # 檔案結尾多出的逗號會產生沒有名稱的空欄位，匯入時直接略過
+        return pd.read_csv(source, usecols=lambda col: not str(col).startswith('Unnamed:'),
+                           **kwargs)
+
+    def _plan(self, source: Union[str, BinaryIO]) -> Dict[str, Any]:
+        """
+        讀取第一個區塊，決定欄位對應、讀取型別與日期格式。
+        第一個區塊是數值的欄位固定為 float64；文字或全為缺失值的欄位以字串保存原始內容，
+        避免後續區塊推斷出不同型別而無法寫入同一個 Parquet schema。
+        """
+        position = source.tell() if hasattr(source, 'tell') else None
+        try:
+            first = self._read_csv(source, nrows=self.chunksize)
+        except ValueError as e:
+            # 包含空檔案、格式錯誤與編碼錯誤
+            raise IngestError(f"Unable to parse CSV file: {e}") from e
+        if position is not None:
+            source.seek(position)
+
+        columns = [str(col) for col in first.columns]
+        mapping = map_columns(columns)
+        date_source = _source_column(mapping, 'date')
+
+        dtypes = {}
+        for col in columns:
+            series = first[col]
+            numeric = (pd.api.types.is_numeric_dtype(series)
+                       and not pd.api.types.is_bool_dtype(series))
+            float_column = col != date_source and numeric and series.notna().any()
+            dtypes[col] = 'float64' if float_column else str
+
+        date_values = first[date_source].astype(str).where(first[date_source].notna())
+        return {
+            'mapping': mapping,
+            'dtypes': dtypes,
+            'date_format': self.date_format or detect_date_format(date_values)
+        }
+
+    @staticmethod
+    def _schema(dtypes: Dict[str, Any], mapping: Dict[str, str]):
+        import pyarrow as pa
+
+        fields = []
+        for col, dtype in dtypes.items():
+            name = mapping.get(col, col)
+            if name == 'date':
+                fields.append(pa.field(name, pa.timestamp('ns')))
+            else:
+                fields.append(pa.field(name, pa.float64() if dtype == 'float64' else pa.string()))
+        return pa.schema(fields)
+
+    @staticmethod
+    def _validate(chunk: pd.DataFrame, raw_dates: pd.Series, date_format: str, first_line: int,
+                  previous_date: Any) -> List[str]:
+        """
+        檢查一個區塊：日期必須可解析、嚴格遞增且不重複，價格欄位必須為正數。
+        :param first_line: 區塊第一列在 CSV 檔案中的行號（標頭為第 1 行）。
+        :param previous_date: 前一個區塊最後的日期（datetime64 整數值），用於檢查區塊邊界。
+        :return: 錯誤訊息列表。
+        """
+        errors = []
+        line_numbers = np.arange(first_line, first_line + len(chunk))
+
+        unparsed = chunk['date'].isna().to_numpy()
+        if unparsed.any():
+            rows = line_numbers[unparsed]
+            errors.append(f"Invalid date (expected format {date_format}) at line(s) "
+                          f"{_describe_rows(rows)}: '{raw_dates.to_numpy()[unparsed][0]}'")
+            return errors
+
+        dates = chunk['date'].to_numpy().astype('int64')
+        first_previous = previous_date if previous_date is not None else np.iinfo('int64').min
+        previous = np.concatenate(([first_previous], dates[:-1]))
+        duplicated = dates == previous
+        out_of_order = dates < previous
+        if duplicated.any():
+            errors.append(f"Duplicate date at line(s) {_describe_rows(line_numbers[duplicated])}")
+        if out_of_order.any():
+            errors.append(f"Dates must be in ascending order; out of order at line(s) "
+                          f"{_describe_rows(line_numbers[out_of_order])}")
+
+        for col in PRICE_COLUMNS:
+            if col in chunk.columns and chunk[col].dtype == 'float64':
+                non_positive = (chunk[col] <= 0).to_numpy()
+                if non_positive.any():
+                    errors.append(f"Non-positive '{col}' price at line(s) "
+                                  f"{_describe_rows(line_numbers[non_positive])}")
+        return errors
+
+    def ingest(self, source: Union[str, BinaryIO], output_path: str,
+               dataset_name: str) -> Dict[str, Any]:
+        """
+        分塊匯入 CSV 並寫入 Parquet 檔案（先寫入暫存檔，全部通過驗證後才取代目標檔案）。
+        :param source: CSV 檔案路徑或可 seek 的二進位檔案物件（例如上傳檔案的串流）。
+        :param output_path: 輸出的 Parquet 檔案路徑。
+        :param dataset_name: 資料集名稱，用於目錄項目。
+        :return: {'rows', 'columns', 'date_format', 'catalog'}，catalog 為資料集目錄項目。
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        plan = self._plan(source)
+        date_format, mapping = plan['date_format'], plan['mapping']
+        date_source = _source_column(mapping, 'date')
+        schema = self._schema(plan['dtypes'], mapping)
+
+        accumulator = DatasetStatsAccumulator()
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        rows, previous_date = 0, None
+        try:
+            with pq.ParquetWriter(tmp_path, schema) as writer:
+                try:
+                    chunks = self._read_csv(source, chunksize=self.chunksize, dtype=plan['dtypes'])
+                    for chunk in chunks:
+                        raw_dates = chunk[date_source]
+                        chunk = chunk.rename(columns=mapping)
+                        chunk['date'] = pd.to_datetime(raw_dates, format=date_format,
+                                                       errors='coerce')
+
+                        errors = self._validate(chunk, raw_dates, date_format, rows + 2,
+                                                previous_date)
+                        if errors:
+                            raise IngestError('; '.join(errors))
+
+                        writer.write_table(pa.Table.from_pandas(chunk, schema=schema,
+                                                                preserve_index=False))
+                        accumulator.update(chunk)
+                        if len(chunk):
+                            previous_date = int(chunk['date'].to_numpy().astype('int64')[-1])
+                        rows += len(chunk)
+                except ValueError as e:
+                    # 數值欄位在後面的區塊出現文字時，pandas 會拋出 ValueError
+                    if isinstance(e, IngestError):
+                        raise
+                    raise IngestError(f"Invalid value in CSV file: {e}") from e
+
+            if rows == 0:
+                raise IngestError("CSV file contains no data rows.")
+
+            with open(tmp_path, 'rb') as f:
+                for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+                    accumulator.update_hash(block)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        return {
+            'rows': rows,
+            'columns': schema.names,
+            'date_format': date_format,
+            'catalog': accumulator.to_entry(dataset_name, output_path)
+        }
@@ -0,0 +1,200 @@
+"""
+CSV 解析設定檔
+依來源格式預先定義欄位型別、缺失值標記、日期欄位與固定的日期格式，
+讀取時不需逐欄推斷型別或逐值推斷日期格式，並在可用時使用 pyarrow 解析引擎。
+DataLoader 依 CSV 標頭自動選擇設定檔，也可指定名稱。
+"""
+
+import csv
+import io
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data.ingest import DATE_FORMATS, detect_date_format
+
+try:
+    import pyarrow  # noqa: F401
+    DEFAULT_ENGINE = 'pyarrow'
+except ImportError:
+    DEFAULT_ENGINE = 'c'
+
+# 設定檔有多個日期格式時，用來決定格式的列數
+DATE_SAMPLE_ROWS = 1000
+
+
+def read_header(source: str, encoding: str = 'utf-8-sig') -> List[str]:
+    """
+    只讀取 CSV 的第一列（標頭）。
+    :param source: CSV 檔案路徑。
+    :return: 欄位名稱（已去除 BOM）。
+    """
+    with open(source, 'r', encoding=encoding, newline='') as f:
+        return next(csv.reader(io.StringIO(f.readline())), [])
+
+
+class CsvParserProfile:
+    """
+    一種來源格式的 CSV 解析設定。
+    """
+
+    def __init__(self, name: str, date_columns: Sequence[str] = (),
+                 date_format: Union[str, Sequence[str]] = None,
+                 float_columns: Sequence[str] = (), string_columns: Sequence[str] = (),
+                 signature: Sequence[str] = (), na_values: Sequence[str] = None,
+                 encoding: str = 'utf-8-sig', drop_unnamed: bool = True, engine: str = None):
+        """
+        :param name: 設定檔名稱。
+        :param date_columns: 日期欄位的候選名稱，使用標頭中第一個存在的欄位。
+        :param date_format: 日期欄位的固定格式（strftime），None 表示保留原始字串。
+                            指定多個格式時，以前 DATE_SAMPLE_ROWS 列決定整個欄位使用的格式。
+        :param float_columns: 以 float64 讀取的欄位（標頭中不存在的欄位略過）。
+        :param string_columns: 以字串讀取的欄位（例如帶有「億」單位的金額）。
+        :param signature: 辨識此格式所需的欄位，標頭包含全部欄位與一個日期欄位時視為此格式。
+        :param na_values: 缺失值標記；指定時不再比對 pandas 預設的缺失值字串。None 表示使用 pandas 預設值。
+        :param encoding: 檔案編碼，utf-8-sig 可同時處理有無 BOM 的檔案。
+        :param drop_unnamed: 刪除沒有名稱的欄位（列尾多餘的逗號造成的空欄位）。
+        :param engine: read_csv 解析引擎，None 表示 pyarrow 可用時使用 pyarrow。
+        """
+        self.name = name
+        self.date_columns = tuple(date_columns)
+        self.date_formats = (date_format,) if isinstance(date_format, str) else tuple(date_format or ())
+        self.float_columns = tuple(float_columns)
+        self.string_columns = tuple(string_columns)
+        self.signature = tuple(signature)
+        self.na_values = list(na_values) if na_values is not None else None
+        self.encoding = encoding
+        self.drop_unnamed = drop_unnamed
+        self.engine = engine or DEFAULT_ENGINE
+
+    def __repr__(self):
+        return f"CsvParserProfile({self.name!r})"
+
+    def date_column(self, header: Sequence[str]) -> Union[str, None]:
+        return next((col for col in self.date_columns if col in header), None)
+
+    def matches(self, header: Sequence[str]) -> bool:
+        """
+        判斷標頭是否符合此格式。
+        """
+        return bool(self.signature) and self.date_column(header) is not None \
+            and all(col in header for col in self.signature)
+
+    def read_options(self, header: Sequence[str]) -> Dict:
+        """
+        依實際標頭產生 read_csv 參數：只對存在的欄位指定型別，並以明確的欄位清單排除空欄位。
+        """
+        options = {'encoding': self.encoding, 'engine': self.engine}
+        if self.drop_unnamed:
+            # pyarrow 引擎不支援以函式指定 usecols，因此由標頭產生欄位清單
+            options['usecols'] = [col for col in header if col and not col.startswith('Unnamed')]
+        dtype = {col: 'float64' for col in self.float_columns if col in header}
+        dtype.update({col: object for col in self.string_columns if col in header})
+        date_col = self.date_column(header)
+        if date_col is not None:
+            dtype[date_col] = object
+        if dtype:
+            options['dtype'] = dtype
+        if self.na_values is not None:
+            options['na_values'] = self.na_values
+            options['keep_default_na'] = False
+        return options
+
+    def read(self, file_path: str) -> pd.DataFrame:
+        """
+        以此設定檔讀取 CSV，日期欄位以固定格式轉換為 datetime64。
+        :param file_path: CSV 檔案路徑。
+        :return: DataFrame。
+        """
+        needs_header = self.drop_unnamed or self.date_columns or self.float_columns or self.string_columns
+        header = read_header(file_path, self.encoding) if needs_header else []
+        df = pd.read_csv(file_path, **self.read_options(header))
+
+        string_cols = [col for col in self.string_columns if col in df.columns]
+        if string_cols and self.engine == 'pyarrow':
+            # pyarrow 引擎以 None 表示字串欄位的缺失值，與 c 引擎一致改為 NaN
+            for col in string_cols:
+                df[col] = df[col].where(df[col].notna(), np.nan)
+
+        date_col = self.date_column(header)
+        if date_col is not None and self.date_formats:
+            try:
+                date_format = self.date_format_for(df[date_col])
+                df[date_col] = pd.to_datetime(df[date_col], format=date_format)
+            except ValueError as e:
+                raise ValueError(f"日期欄位 '{date_col}' 不符合設定檔 '{self.name}' 的格式 "
+                                 f"{', '.join(self.date_formats)}: {e}") from e
+        return df
+
+    def date_format_for(self, values: pd.Series) -> str:
+        """
+        決定日期欄位使用的格式：只有一個格式時直接使用，否則取第一個能解析樣本中所有日期的格式。
+        :param values: 日期欄位的原始字串。
+        :return: strftime 格式字串。
+        """
+        if len(self.date_formats) == 1:
+            return self.date_formats[0]
+        return detect_date_format(values.head(DATE_SAMPLE_ROWS), self.date_formats)
+
+
+# 台灣市場匯出格式（內附的 19940513-20251111.csv）：BOM、中文欄位、N/A、YYYY/M/D 日期
+# （分 K 另加 HH:MM:SS）、列尾多餘的逗號；買賣超等金額欄位帶有「億」「萬」單位，保留為字串。
+# 日期格式與串流匯入相同（DATE_FORMATS），兩種讀取路徑接受相同的檔案。
+# 舊版上傳流程會將 時間/收盤價 改名為 date/close，其餘欄位不變，因此同樣適用。
+TW_MARKET_PROFILE = CsvParserProfile(
+    name='tw_market',
+    date_columns=('時間', 'date'),
+    date_format=DATE_FORMATS,
+    float_columns=('開盤價', '最高價', '最低價', '收盤價', 'close', 'SMA5', 'SMA10', 'SMA20', 'SMA60', 'SMA120',
+                   'SMA240', '成交量', 'MA5', 'MA10', 'DIF12-26', 'MACD9', 'OSC', 'K(9,3)', 'D(9,3)'),
+    string_columns=('買賣超(元)', '外資累計買賣超(元)', '買進(元)', '賣出(元)'),
+    signature=('開盤價', '最高價', '最低價'),
+    na_values=('N/A', '')
+)
+
+# 無法辨識的格式：與 pd.read_csv 預設行為相同（推斷型別、保留所有欄位與原始日期字串）
+DEFAULT_PROFILE = CsvParserProfile(name='default', encoding=None, drop_unnamed=False, engine='c')
+
+PARSER_PROFILES: Dict[str, CsvParserProfile] = {
+    profile.name: profile for profile in (TW_MARKET_PROFILE, DEFAULT_PROFILE)
+}
+
+
+def register_profile(profile: CsvParserProfile):
+    """
+    註冊新的來源格式；自動選擇時先比對較早註冊的設定檔。
+    """
+    PARSER_PROFILES[profile.name] = profile
+
+
+def get_profile(name: str) -> CsvParserProfile:
+    """
+    依名稱取得設定檔。
+    """
+    if name not in PARSER_PROFILES:
+        raise ValueError(f"未知的 CSV 解析設定檔: {name}。可用: {', '.join(PARSER_PROFILES)}")
+    return PARSER_PROFILES[name]
+
+
+def detect_profile(file_path: str) -> CsvParserProfile:
+    """
+    依 CSV 標頭選擇設定檔，沒有符合的格式時使用預設設定檔。
+    """
+    try:
+        header = read_header(file_path)
+    except (UnicodeDecodeError, StopIteration):
+        return DEFAULT_PROFILE
+    return next((profile for profile in PARSER_PROFILES.values() if profile.matches(header)), DEFAULT_PROFILE)
+
+
+def read_csv(file_path: str, profile: Union[str, CsvParserProfile] = None) -> pd.DataFrame:
+    """
+    以指定（或自動選擇）的設定檔讀取 CSV。
+    :param profile: 設定檔名稱或物件，None 表示依標頭自動選擇。
+    """
+    if profile is None:
+        profile = detect_profile(file_path)
+    elif isinstance(profile, str):
+        profile = get_profile(profile)
+    return profile.read(file_path)
@@ -1,10 +1,26 @@
 import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import TYPE_CHECKING
+
+from src.config import Config
+from src.utils.stage_timer import stage
+
+if TYPE_CHECKING:
+    # scikit-learn 匯入耗時，延遲到第一次正規化時才載入
+    from sklearn.preprocessing import MinMaxScaler
 
 class DataPreprocessor:
-    def __init__(self):
+    # 特徵計算所需的暖身列數：SMA_30 需要 30 列，EMA_7 在 60 列後與完整歷史的差異可忽略
+    FEATURE_WARMUP_ROWS = 60
+
+    def __init__(self, dtype: str = None):
+        """
+        :param dtype: 數值管線使用的浮點型別，預設為 Config.DEFAULT_DTYPE (float32)。
+        """
         self.scaler = None
+        self.feature_columns = None
+        self.dtype = np.dtype(dtype or Config.DEFAULT_DTYPE)
 
     def feature_engineering(self, df: pd.DataFrame) -> pd.DataFrame:
         """
@@ -53,18 +69,30 @@ class DataPreprocessor:
         # 刪除包含 NaN 的行，這些 NaN 是由於計算移動平均或 pct_change 造成的
         df.dropna(inplace=True)
 
+        # 統一數值欄位的型別，後續正規化與序列創建都沿用此型別
+        numeric_cols = df.select_dtypes(include='number').columns
+        df = df.astype({col: self.dtype for col in numeric_cols})
+
         return df
 
-    def normalize_data(self, df: pd.DataFrame) -> tuple[pd.DataFrame, MinMaxScaler]:
+    def normalize_data(self, df: pd.DataFrame, scaler: 'MinMaxScaler' = None) -> tuple[pd.DataFrame, 'MinMaxScaler']:
         """
         使用 MinMaxScaler 對數據進行正規化。
         :param df: 包含特徵的 DataFrame。
+        :param scaler: 已擬合的 MinMaxScaler（可選）；提供時直接沿用，不重新擬合。
         :return: 正規化後的 DataFrame 和 MinMaxScaler 實例。
         """
-        self.scaler = MinMaxScaler(feature_range=(0, 1))
-        normalized_data = self.scaler.fit_transform(df)
+        # MinMaxScaler 會保留 float32 輸入的型別，不會升級為 float64
+        # 以區域變數計算，同一個預處理器被多個請求同時使用時不會取用其他請求的 scaler
+        if scaler is not None:
+            normalized_data = scaler.transform(df.astype(self.dtype))
+        else:
+            from sklearn.preprocessing import MinMaxScaler
+            scaler = MinMaxScaler(feature_range=(0, 1))
+            normalized_data = scaler.fit_transform(df.astype(self.dtype))
+        self.scaler = scaler
         normalized_df = pd.DataFrame(normalized_data, columns=df.columns, index=df.index)
-        return normalized_df, self.scaler
+        return normalized_df, scaler
 
     def create_sequences(self, data: pd.DataFrame, look_back: int, forecast_horizon: int, target_column: str):
         """
@@ -75,30 +103,69 @@ class DataPreprocessor:
         :param target_column: 目標欄位名稱 (例如 'Close')。
         :return: (X, y) - X 是輸入序列，y 是目標值。
         """
-        X, y = [], []
         # 找到目標欄位的索引
         target_idx = data.columns.get_loc(target_column)
+        return self.create_sequences_from_array(data.to_numpy(dtype=self.dtype), look_back,
+                                                forecast_horizon, target_idx)
 
-        for i in range(len(data) - look_back - forecast_horizon + 1):
-            # 輸入序列 (X) 是從當前位置開始的 look_back 個時間步
-            X.append(data.iloc[i:(i + look_back)].values)
-            # 目標值 (y) 是從 look_back 之後的 forecast_horizon 個時間步的目標欄位值
-            # 這裡假設我們預測的是目標欄位的未來值
-            y.append(data.iloc[(i + look_back):(i + look_back + forecast_horizon), target_idx].values)
+    def create_sequences_from_array(self, values: np.ndarray, look_back: int, forecast_horizon: int,
+                                    target_idx: int):
+        """
+        從已正規化的二維陣列 (時間步, 特徵) 創建序列，供共用同一份正規化資料的多個任務使用。
+        :param values: 已正規化的特徵陣列（可為唯讀的記憶體映射陣列）。
+        :param look_back: 用於預測的歷史時間步長。
+        :param forecast_horizon: 預測未來的天數。
+        :param target_idx: 目標欄位的索引。
+        :return: (X, y)
+        """
+        values = np.asarray(values, dtype=self.dtype)
+        n_samples = len(values) - look_back - forecast_horizon + 1
+
+        if n_samples <= 0:
+            return (np.empty((0, look_back, values.shape[1]), dtype=self.dtype),
+                    np.empty((0, forecast_horizon), dtype=self.dtype))
+
+        # 以滑動視窗一次取出所有序列，取代逐列的 iloc 迴圈
+        # 輸入序列 (X) 是從每個位置開始的 look_back 個時間步
+        windows = sliding_window_view(values, look_back, axis=0)[:n_samples]
+        X = np.ascontiguousarray(windows.transpose(0, 2, 1))
+        # 目標值 (y) 是從 look_back 之後的 forecast_horizon 個時間步的目標欄位值
+        y = np.ascontiguousarray(
+            sliding_window_view(values[look_back:, target_idx], forecast_horizon)[:n_samples]
+        )
 
-        return np.array(X), np.array(y)
+        return X, y
 
-    def preprocess(self, df: pd.DataFrame, look_back: int, forecast_horizon: int, target_column: str):
+    def preprocess(self, df: pd.DataFrame, look_back: int, forecast_horizon: int, target_column: str,
+                   scaler: 'MinMaxScaler' = None, feature_columns: list = None, recent_windows: int = None):
         """
         執行完整的預處理流程：特徵工程 -> 正規化 -> 序列創建。
         :param df: 原始 DataFrame。
         :param look_back: 用於預測的歷史時間步長。
         :param forecast_horizon: 預測未來的天數。
         :param target_column: 目標欄位名稱（支援大小寫，如 'close' 或 'Close'）。
+        :param scaler: 已擬合的 MinMaxScaler（可選），例如模型訓練時儲存的 scaler。
+        :param feature_columns: 模型的特徵欄位順序（可選），提供時依此順序選取特徵。
+        :param recent_windows: 只產生最近 N 組序列（可選），僅處理所需的資料尾段。
         :return: (X, y, scaler) - X 是輸入序列，y 是目標值，scaler 是用於正規化的 MinMaxScaler 實例。
         """
-        df_features = self.feature_engineering(df.copy())
-        normalized_df, self.scaler = self.normalize_data(df_features)
+        if recent_windows:
+            # 只保留產生最近 recent_windows 組序列所需的資料列（含特徵暖身）
+            needed_rows = recent_windows + look_back + forecast_horizon - 1 + self.FEATURE_WARMUP_ROWS
+            df = df.tail(needed_rows)
+
+        with stage('features'):
+            df_features = self.feature_engineering(df.copy())
+
+        if feature_columns is not None:
+            missing = [col for col in feature_columns if col not in df_features.columns]
+            if missing:
+                raise ValueError(f"資料缺少模型所需的特徵欄位: {missing}")
+            df_features = df_features[list(feature_columns)]
+
+        self.feature_columns = list(df_features.columns)
+        with stage('normalize'):
+            normalized_df, scaler = self.normalize_data(df_features, scaler=scaler)
 
         # 自動偵測目標欄位名稱（不區分大小寫）
         actual_target_col = None
@@ -110,8 +177,67 @@ class DataPreprocessor:
         if actual_target_col is None:
             raise ValueError(f"找不到目標欄位 '{target_column}'。可用欄位: {list(normalized_df.columns)}")
 
-        X, y = self.create_sequences(normalized_df, look_back, forecast_horizon, actual_target_col)
-        return X, y, self.scaler
+        with stage('sequences'):
+            X, y = self.create_sequences(normalized_df, look_back, forecast_horizon, actual_target_col)
+        if recent_windows:
+            X, y = X[-recent_windows:], y[-recent_windows:]
+        return X, y, scaler
+
+    def preprocess_panel(self, datasets: dict, look_back: int, forecast_horizon: int, target_column: str,
+                         validation_split: float = 0.0) -> dict:
+        """
+        多資料集（多檔股票）的面板預處理：每檔各自特徵工程與正規化後建立序列，
+        再依時間位置輪流交錯成單一訓練資料流。
+        :param datasets: {資料集名稱: 原始 DataFrame}，字典順序即為 ticker 編號。
+        :param look_back: 用於預測的歷史時間步長。
+        :param forecast_horizon: 預測未來的天數。
+        :param target_column: 目標欄位名稱（支援大小寫）。
+        :param validation_split: 每檔依時間順序保留最後一段作為驗證集的比例。
+        :return: 包含 X_train, y_train, ticker_train, X_val, y_val, ticker_val,
+                 scalers（每檔一個）, tickers, feature_columns 的字典。
+        """
+        if not datasets:
+            raise ValueError("面板訓練至少需要一個資料集。")
+
+        features = {name: self.feature_engineering(df.copy()) for name, df in datasets.items()}
+
+        # 只使用所有資料集共有的特徵欄位，並維持第一個資料集的欄位順序
+        first_columns = next(iter(features.values())).columns
+        common = set(first_columns).intersection(*(set(df.columns) for df in features.values()))
+        feature_columns = [col for col in first_columns if col in common]
+
+        actual_target_col = next((col for col in feature_columns if col.lower() == target_column.lower()), None)
+        if actual_target_col is None:
+            raise ValueError(f"找不到所有資料集共有的目標欄位 '{target_column}'。共有欄位: {feature_columns}")
+
+        tickers = list(datasets.keys())
+        scalers = {}
+        parts = {'train': [], 'val': []}
+        for ticker_idx, name in enumerate(tickers):
+            normalized_df, scalers[name] = self.normalize_data(features[name][feature_columns])
+            X, y = self.create_sequences(normalized_df, look_back, forecast_horizon, actual_target_col)
+            split_idx = int(len(X) * (1 - validation_split))
+            for part, (X_part, y_part) in (('train', (X[:split_idx], y[:split_idx])),
+                                           ('val', (X[split_idx:], y[split_idx:]))):
+                # 以相對時間位置排序，讓不同 ticker 的序列輪流出現在同一批次中
+                position = np.arange(len(X_part)) / max(len(X_part), 1)
+                ticker_ids = np.full(len(X_part), ticker_idx, dtype=np.int32)
+                parts[part].append((X_part, y_part, ticker_ids, position))
+
+        self.scaler = None
+        self.feature_columns = feature_columns
+
+        result = {'scalers': scalers, 'tickers': tickers, 'feature_columns': feature_columns}
+        for part, chunks in parts.items():
+            X = np.concatenate([chunk[0] for chunk in chunks])
+            y = np.concatenate([chunk[1] for chunk in chunks])
+            ticker_ids = np.concatenate([chunk[2] for chunk in chunks])
+            order = np.argsort(np.concatenate([chunk[3] for chunk in chunks]), kind='stable')
+            result[f'X_{part}'] = X[order]
+            result[f'y_{part}'] = y[order]
+            result[f'ticker_{part}'] = ticker_ids[order]
+
+        return result
 
     def inverse_transform_target(self, scaled_target: np.ndarray, target_column: str) -> np.ndarray:
         """
@@ -136,7 +262,7 @@ class DataPreprocessor:
         
         # 這裡需要一個更精確的方法來處理，目前先用一個簡化的方法
         # 假設 scaler 是針對所有特徵進行 fit 的
-        dummy_array = np.zeros((scaled_target.shape[0], self.scaler.n_features_in_))
+        dummy_array = np.zeros((scaled_target.shape[0], self.scaler.n_features_in_), dtype=self.dtype)
         target_idx = self.scaler.feature_names_in_.tolist().index(target_column) if hasattr(self.scaler, 'feature_names_in_') else None
         
         if target_idx is None:
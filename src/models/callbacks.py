@@ -0,0 +1,136 @@
+import json
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+from tensorflow import keras
+
+
+def _atomic_write(target_path: str, write_func, suffix: str = '') -> None:
+    """
+    先寫入同目錄下的暫存檔，再以 os.replace 原子性地取代目標檔案。
+    中途當機時目標檔案仍保持上一個完整版本。
+    :param target_path: 最終檔案路徑。
+    :param write_func: 接收暫存檔路徑並寫入內容的函數。
+    :param suffix: 暫存檔副檔名（例如 Keras 要求的 '.keras'）。
+    """
+    directory = os.path.dirname(target_path)
+    tmp_path = os.path.join(directory, f".{os.path.basename(target_path)}.{os.getpid()}.tmp{suffix}")
+    try:
+        write_func(tmp_path)
+        os.replace(tmp_path, target_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ResumableEarlyStopping(keras.callbacks.EarlyStopping):
+    """
+    可從檢查點恢復 best/wait/best_weights 狀態的 EarlyStopping，
+    讓中斷後續訓練時的耐心值與最佳權重不會被重置。
+    """
+
+    def __init__(self, initial_state: Dict[str, Any] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.initial_state = initial_state or {}
+
+    def on_train_begin(self, logs=None):
+        super().on_train_begin(logs)
+        if self.initial_state:
+            self.best = self.initial_state.get('best')
+            self.wait = self.initial_state.get('wait', 0)
+            self.best_epoch = self.initial_state.get('best_epoch', 0)
+            self.best_weights = self.initial_state.get('best_weights')
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        取得可寫入 JSON 的狀態（不含權重）。
+        """
+        return {
+            'best': float(self.best) if self.best is not None else None,
+            'wait': int(self.wait),
+            'best_epoch': int(self.best_epoch),
+            'stopped': bool(self.stopped_epoch > 0)
+        }
+
+
+class TrainingCheckpoint(keras.callbacks.Callback):
+    """
+    每隔 interval 個 epoch 將模型（含優化器狀態）、最佳權重與訓練狀態
+    原子性地寫入檢查點目錄，供程序重啟後續訓練。
+    """
+
+    MODEL_FILE = 'last.keras'
+    BEST_WEIGHTS_FILE = 'best_weights.npz'
+    STATE_FILE = 'state.json'
+
+    def __init__(self, checkpoint_dir: str, interval: int = 1,
+                 early_stopping: ResumableEarlyStopping = None):
+        super().__init__()
+        self.checkpoint_dir = checkpoint_dir
+        self.interval = max(1, int(interval))
+        self.early_stopping = early_stopping
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+    def on_epoch_end(self, epoch, logs=None):
+        completed_epochs = epoch + 1
+        # 提前停止的最後一個 epoch 一律寫入，確保狀態標記為已停止
+        if completed_epochs % self.interval != 0 and not self.model.stop_training:
+            return
+        self.save(completed_epochs)
+
+    def save(self, completed_epochs: int):
+        """
+        寫入檢查點：模型 -> 最佳權重 -> 狀態檔（狀態檔最後寫入，作為完整檢查點的標記）。
+        :param completed_epochs: 已完成的 epoch 數。
+        """
+        model_path = os.path.join(self.checkpoint_dir, self.MODEL_FILE)
+        _atomic_write(model_path, self.model.save, suffix='.keras')
+
+        state = {'epoch': completed_epochs}
+        if self.early_stopping is not None:
+            state.update(self.early_stopping.get_state())
+            best_weights = self.early_stopping.best_weights
+            if best_weights is not None:
+                weights_path = os.path.join(self.checkpoint_dir, self.BEST_WEIGHTS_FILE)
+                _atomic_write(weights_path,
+                              lambda path: _save_weights(path, best_weights), suffix='.npz')
+
+        state_path = os.path.join(self.checkpoint_dir, self.STATE_FILE)
+        _atomic_write(state_path, lambda path: _save_json(path, state))
+
+    @classmethod
+    def load_state(cls, checkpoint_dir: str) -> Dict[str, Any] | None:
+        """
+        讀取檢查點狀態；目錄中沒有完整檢查點時返回 None。
+        :return: 包含 epoch、best、wait 等欄位的字典，最佳權重位於 'best_weights'。
+        """
+        state_path = os.path.join(checkpoint_dir, cls.STATE_FILE)
+        model_path = os.path.join(checkpoint_dir, cls.MODEL_FILE)
+        if not (os.path.exists(state_path) and os.path.exists(model_path)):
+            return None
+
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+
+        weights_path = os.path.join(checkpoint_dir, cls.BEST_WEIGHTS_FILE)
+        if os.path.exists(weights_path):
+            state['best_weights'] = _load_weights(weights_path)
+
+        state['model_path'] = model_path
+        return state
+
+
+def _save_json(path: str, data: Dict[str, Any]):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=4)
+
+
+def _save_weights(path: str, weights: List[np.ndarray]):
+    with open(path, 'wb') as f:
+        np.savez(f, *weights)
+
+
+def _load_weights(path: str) -> List[np.ndarray]:
+    with np.load(path) as data:
+        return [data[f"arr_{i}"] for i in range(len(data.files))]
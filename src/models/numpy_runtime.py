@@ -0,0 +1,261 @@
+"""
+純 NumPy 的 LSTM 推論執行環境
+將 ModelTrainer 建構的 LSTM -> Dropout -> Dense 模型（含面板模型的 ticker embedding）
+的權重匯出為單一 .npz 檔案，推論時以向量化的 NumPy 前向傳播計算，不需載入 TensorFlow。
+predict_samples() 以 Monte Carlo dropout 在同一次向量化計算中產生多組隨機預測。
+本模組不得在模組層級匯入 tensorflow。
+"""
+
+import json
+import os
+from typing import Any, Dict
+
+import numpy as np
+
+EXPORT_FORMAT_VERSION = 1
+
+_ACTIVATIONS = {
+    'tanh': np.tanh,
+    'sigmoid': lambda x: 0.5 * (np.tanh(0.5 * x) + 1.0),  # 數值穩定，避免 exp 溢位
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0),
+}
+
+
+def _layer_type(layer: Any) -> str:
+    return layer.__class__.__name__
+
+
+def _activation_name(activation: Any) -> str:
+    name = activation if isinstance(activation, str) else getattr(activation, '__name__', str(activation))
+    return 'linear' if name in (None, 'None') else name
+
+
+def export_model(model: Any, export_path: str) -> str:
+    """
+    從 Keras 模型擷取權重並寫入 .npz 檔案（以暫存檔原子性取代）。
+    只支援 ModelTrainer.build_model / build_panel_model 的架構，其他架構會拋出 ValueError。
+    :param model: 已訓練的 Keras 模型。
+    :param export_path: 匯出檔案路徑。
+    :return: 匯出檔案路徑。
+    """
+    lstm_layers, dense_layers, embedding_layers = [], [], []
+    dropout_rate = 0.0
+    for layer in model.layers:
+        layer_type = _layer_type(layer)
+        if layer_type == 'LSTM':
+            lstm_layers.append(layer)
+        elif layer_type == 'Dense':
+            dense_layers.append(layer)
+        elif layer_type == 'Embedding':
+            embedding_layers.append(layer)
+        elif layer_type == 'Dropout':
+            dropout_rate = float(layer.get_config().get('rate', 0.0))
+        elif layer_type not in ('InputLayer', 'Dropout', 'Flatten', 'Concatenate'):
+            raise ValueError(f"NumPy 推論不支援的層: {layer_type}")
+
+    if len(lstm_layers) != 1 or len(dense_layers) != 1 or len(embedding_layers) > 1:
+        raise ValueError("NumPy 推論只支援單一 LSTM 層接單一 Dense 輸出層的模型。")
+
+    lstm, dense = lstm_layers[0], dense_layers[0]
+    lstm_config = lstm.get_config()
+    if lstm_config.get('return_sequences') or lstm_config.get('go_backwards') or not lstm_config.get('use_bias', True):
+        raise ValueError("NumPy 推論不支援 return_sequences、go_backwards 或無偏置的 LSTM。")
+
+    activation = _activation_name(lstm_config.get('activation'))
+    recurrent_activation = _activation_name(lstm_config.get('recurrent_activation'))
+    dense_activation = _activation_name(dense.get_config().get('activation'))
+    for name in (activation, recurrent_activation, dense_activation):
+        if name not in _ACTIVATIONS:
+            raise ValueError(f"NumPy 推論不支援的激活函數: {name}")
+
+    kernel, recurrent_kernel, bias = (np.asarray(w, dtype=np.float32) for w in lstm.get_weights())
+    dense_kernel, dense_bias = (np.asarray(w, dtype=np.float32) for w in dense.get_weights())
+    arrays = {
+        'lstm_kernel': kernel,
+        'lstm_recurrent_kernel': recurrent_kernel,
+        'lstm_bias': bias,
+        'dense_kernel': dense_kernel,
+        'dense_bias': dense_bias,
+    }
+    if embedding_layers:
+        arrays['ticker_embedding'] = np.asarray(embedding_layers[0].get_weights()[0], dtype=np.float32)
+
+    config = {
+        'format_version': EXPORT_FORMAT_VERSION,
+        'units': int(recurrent_kernel.shape[0]),
+        'input_shape': [int(dim) for dim in model.inputs[0].shape[1:]],
+        'output_units': int(dense_kernel.shape[1]),
+        'activation': activation,
+        'recurrent_activation': recurrent_activation,
+        'dense_activation': dense_activation,
+        'ticker_embedding': bool(embedding_layers),
+        'dropout_rate': dropout_rate,
+    }
+    arrays['config'] = np.array(json.dumps(config))
+
+    tmp_path = f"{export_path}.{os.getpid()}.tmp.npz"
+    try:
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, export_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return export_path
+
+
+class NumpyLSTMModel:
+    """
+    以 NumPy 執行 LSTM -> Dense 的前向傳播，predict() 介面與 Keras 模型相容
+    （面板模型的輸入為 [序列, ticker 編號]）。
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], config: Dict[str, Any]):
+        self.config = config
+        self.units = config['units']
+        self.input_shape = tuple(config['input_shape'])
+        self.kernel = arrays['lstm_kernel']
+        self.recurrent_kernel = arrays['lstm_recurrent_kernel']
+        self.bias = arrays['lstm_bias']
+        self.dense_kernel = arrays['dense_kernel']
+        self.dense_bias = arrays['dense_bias']
+        self.ticker_embedding = arrays.get('ticker_embedding')
+        self.dropout_rate = config.get('dropout_rate')  # 較早的匯出檔未記錄
+        self._activation = _ACTIVATIONS[config['activation']]
+        self._recurrent_activation = _ACTIVATIONS[config['recurrent_activation']]
+        self._dense_activation = _ACTIVATIONS[config['dense_activation']]
+
+    @classmethod
+    def load(cls, export_path: str) -> 'NumpyLSTMModel':
+        """
+        從 export_model 產生的 .npz 檔案載入模型。
+        """
+        with np.load(export_path, allow_pickle=False) as data:
+            config = json.loads(str(data['config']))
+            if config.get('format_version') != EXPORT_FORMAT_VERSION:
+                raise ValueError(f"不支援的匯出格式版本: {config.get('format_version')}")
+            arrays = {key: data[key] for key in data.files if key != 'config'}
+        return cls(arrays, config)
+
+    def lstm_forward(self, X: np.ndarray) -> np.ndarray:
+        """
+        計算 LSTM 最後一個時間步的隱藏狀態。
+        輸入投影一次對所有時間步做矩陣乘法，只有遞迴部分需要逐步計算。
+        :param X: 輸入序列 (batch, look_back, features)。
+        :return: 隱藏狀態 (batch, units)。
+        """
+        X = np.asarray(X, dtype=np.float32)
+        batch, steps, _ = X.shape
+        units = self.units
+
+        # Keras 的閘門順序為 input, forget, cell, output
+        projected = X @ self.kernel + self.bias
+        h = np.zeros((batch, units), dtype=np.float32)
+        c = np.zeros((batch, units), dtype=np.float32)
+        for t in range(steps):
+            z = projected[:, t, :] + h @ self.recurrent_kernel
+            i = self._recurrent_activation(z[:, :units])
+            f = self._recurrent_activation(z[:, units:2 * units])
+            g = self._activation(z[:, 2 * units:3 * units])
+            o = self._recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * self._activation(c)
+        return h
+
+    def hidden_forward(self, inputs: Any) -> np.ndarray:
+        """
+        計算 Dense 輸出層之前（亦即 dropout 作用處）的特徵：LSTM 隱藏狀態，面板模型再接上 ticker embedding。
+        :param inputs: 序列陣列，或面板模型的 [序列, ticker 編號]。
+        :return: (batch, features)。
+        """
+        if self.ticker_embedding is not None:
+            if not isinstance(inputs, (list, tuple)) or len(inputs) != 2:
+                raise ValueError("面板模型的輸入必須為 [序列, ticker 編號]。")
+            X, tickers = inputs
+            return np.concatenate([
+                self.lstm_forward(X),
+                self.ticker_embedding[np.asarray(tickers, dtype=np.int64).reshape(-1)]
+            ], axis=1)
+        if isinstance(inputs, (list, tuple)):
+            inputs = inputs[0]
+        return self.lstm_forward(inputs)
+
+    def predict(self, inputs: Any, batch_size: int = None, verbose: Any = None) -> np.ndarray:
+        """
+        進行預測（batch_size 與 verbose 僅為與 Keras 介面相容而保留）。
+        :param inputs: 序列陣列，或面板模型的 [序列, ticker 編號]。
+        :return: 預測值 (batch, output_units)。
+        """
+        hidden = self.hidden_forward(inputs)
+        return self._dense_activation(hidden @ self.dense_kernel + self.dense_bias)
+
+    def predict_samples(self, inputs: Any, n_samples: int, dropout_rate: float = None,
+                        seed: int = None) -> np.ndarray:
+        """
+        Monte Carlo dropout：以訓練模式的 dropout 產生 n_samples 組隨機預測。
+        dropout 只位於 Dense 輸出層之前，前段的 LSTM 只需計算一次，
+        n_samples 組遮罩再以單一批次的矩陣乘法處理，成本隨 n_samples 的增加遠低於線性。
+        :param inputs: 同 predict()。
+        :param n_samples: 取樣數。
+        :param dropout_rate: dropout 比例，預設為匯出時記錄的比例（較早的匯出檔必須指定）。
+        :param seed: 亂數種子（可選）。
+        :return: 預測值 (n_samples, batch, output_units)。
+        """
+        rate = self.dropout_rate if dropout_rate is None else dropout_rate
+        if rate is None:
+            raise ValueError("匯出檔未記錄 dropout 比例，請指定 dropout_rate。")
+        if n_samples < 1:
+            raise ValueError("n_samples 必須大於 0。")
+
+        hidden = self.hidden_forward(inputs)
+        keep = 1.0 - rate
+        if keep < 1.0:
+            # 與 Keras Dropout 相同，保留的單元除以保留比例，期望值與推論模式一致
+            rng = np.random.default_rng(seed)
+            mask = rng.random((n_samples, *hidden.shape), dtype=np.float32) < keep
+            sampled = np.where(mask, hidden / np.float32(keep), np.float32(0))
+        else:
+            sampled = np.broadcast_to(hidden, (n_samples, *hidden.shape))
+        return self._dense_activation(sampled @ self.dense_kernel + self.dense_bias)
+
+    __call__ = predict
+
+
+def main():
+    """
+    命令列：將既有的 .keras 模型匯出為 NumPy 推論權重檔，並驗證與 Keras 輸出一致。
+    用法: python -m src.models.numpy_runtime --model-dir models/saved_models [--model-id ID ...]
+    """
+    import argparse
+    from src.utils.model_manager import ModelManager
+
+    parser = argparse.ArgumentParser(description='匯出 NumPy 推論權重檔')
+    parser.add_argument('--model-dir', default=os.path.join('models', 'saved_models'))
+    parser.add_argument('--model-id', nargs='*', help='要匯出的模型 ID，預設為全部')
+    parser.add_argument('--atol', type=float, default=1e-4, help='驗證的容許誤差')
+    args = parser.parse_args()
+
+    model_manager = ModelManager(model_dir=args.model_dir)
+    model_ids = args.model_id or sorted(
+        name[:-len('.keras')] for name in os.listdir(args.model_dir) if name.endswith('.keras')
+    )
+
+    rng = np.random.default_rng(0)
+    for model_id in model_ids:
+        try:
+            export_path = model_manager.export_inference_model(model_id)
+        except (ValueError, FileNotFoundError) as e:
+            print(f"略過 {model_id}: {e}")
+            continue
+
+        keras_model = model_manager.load_model(model_id)
+        numpy_model = NumpyLSTMModel.load(export_path)
+        X = rng.random((8, *numpy_model.input_shape), dtype=np.float32)
+        inputs = [X, np.zeros((8, 1), dtype=np.int32)] if numpy_model.ticker_embedding is not None else X
+        max_error = float(np.max(np.abs(keras_model.predict(inputs, verbose=0) - numpy_model.predict(inputs))))
+        status = 'OK' if max_error <= args.atol else 'MISMATCH'
+        print(f"{model_id}: {export_path} 最大誤差 {max_error:.2e} {status}")
+
+
+if __name__ == '__main__':
+    main()
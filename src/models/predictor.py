@@ -1,41 +1,101 @@
 import numpy as np
-import tensorflow as tf # 假設使用 TensorFlow
 from typing import Any
 
 class ModelPredictor:
-    def __init__(self, model: tf.keras.Model):
+    def __init__(self, model: Any):
+        """
+        :param model: Keras 模型或 NumpyLSTMModel（兩者皆提供 predict(inputs, verbose=0)）。
+        """
         self.model = model
+        self._keras_rollout = None  # 延遲建立的 tf.function，重複呼叫時沿用已編譯的圖
+
+    @property
+    def output_units(self) -> int:
+        """
+        模型每次前向傳播輸出的預測步數（Dense 輸出層的單元數）。
+        """
+        if hasattr(self.model, 'dense_kernel'):
+            return int(self.model.dense_kernel.shape[1])
+        return int(self.model.output_shape[-1])
 
-    def predict_next_n_days(self, input_sequence: np.ndarray, n_days: int) -> np.ndarray:
+    def predict_next_n_days(self, input_sequence: Any, n_days: int, target_idx: int = None) -> np.ndarray:
         """
-        使用訓練好的模型預測未來 N 天的股價變化。
-        注意：這個是一個簡化的預測器。實際的序列預測通常需要更複雜的邏輯，
-        例如多步預測（multi-step prediction）或遞歸預測（recursive prediction），
-        其中每個新的預測點都作為下一個預測的輸入。
-        為保持獨立性，這裡只進行單步預測，並重複 N 次。
-        
-        :param input_sequence: 經過預處理和正規化的輸入序列 (例如 (1, look_back, num_features))。
-                                注意：這裡假設 input_sequence 已經是正確的 input shape。
+        使用訓練好的模型預測未來 N 天的正規化目標值。
+        多步輸出的模型（輸出單元數 >= n_days，即 ModelTrainer 以 n_days 為輸出單元建構的模型）
+        只需一次前向傳播；輸出步數較少的模型則以遞迴方式預測：每次的預測寫回目標欄位並推進輸入視窗，
+        其他特徵沿用視窗最後一天的值。Keras 模型的遞迴在 tf.function 編譯的迴圈中執行。
+
+        :param input_sequence: 經過預處理和正規化的輸入序列 (batch, look_back, features)，
+                               面板模型為 [序列, ticker 編號]。
         :param n_days: 預測未來的天數。
-        :return: 預測的未來 N 天的正規化股價變化 (例如漲跌機率或幅度)。
+        :param target_idx: 目標欄位在特徵中的索引，遞迴預測時必須指定。
+        :return: 預測值 (batch, n_days)。
         """
         if n_days <= 0:
             raise ValueError("預測天數 n_days 必須大於 0。")
 
-        predictions = []
-        current_input = input_sequence # 假設輸入序列已經是批次格式 (batch_size, look_back, features)
+        steps_per_pass = self.output_units
+        if steps_per_pass >= n_days:
+            return np.asarray(self.model.predict(input_sequence, verbose=0))[:, :n_days]
+
+        if target_idx is None:
+            raise ValueError(f"模型每次只輸出 {steps_per_pass} 步，遞迴預測 {n_days} 天需要指定 target_idx。")
+
+        if isinstance(input_sequence, (list, tuple)):
+            window, extra_inputs = input_sequence[0], list(input_sequence[1:])
+        else:
+            window, extra_inputs = input_sequence, []
+        window = np.asarray(window, dtype=np.float32)
+        passes = -(-n_days // steps_per_pass)
+
+        if type(self.model).__name__ == 'NumpyLSTMModel':
+            predictions = self._numpy_rollout(window, extra_inputs, passes, target_idx)
+        else:
+            predictions = self._compiled_rollout(window, extra_inputs, passes, target_idx)
+        return predictions[:, :n_days]
+
+    def _numpy_rollout(self, window: np.ndarray, extra_inputs: list, passes: int, target_idx: int) -> np.ndarray:
+        """
+        NumpyLSTMModel 的遞迴預測：每步只是一次 NumPy 前向傳播，沒有框架的呼叫成本。
+        """
+        look_back = window.shape[1]
+        outputs = []
+        for _ in range(passes):
+            prediction = self.model.predict([window] + extra_inputs if extra_inputs else window)
+            outputs.append(prediction)
+            new_rows = np.repeat(window[:, -1:, :], prediction.shape[1], axis=1)
+            new_rows[:, :, target_idx] = prediction
+            window = np.concatenate([window, new_rows], axis=1)[:, -look_back:]
+        return np.concatenate(outputs, axis=1)
+
+    def _compiled_rollout(self, window: np.ndarray, extra_inputs: list, passes: int, target_idx: int) -> np.ndarray:
+        """
+        Keras 模型的遞迴預測：整個迴圈在同一個 tf.function 中執行，不逐步呼叫 model.predict。
+        步數與目標欄位以張量傳入，不同的 n_days 不會重新追蹤。
+        """
+        import tensorflow as tf
+
+        if self._keras_rollout is None:
+            model = self.model
 
-        for _ in range(n_days):
-            # 進行單步預測
-            next_prediction = self.model.predict(current_input, verbose=0)
-            predictions.append(next_prediction[0]) # 取出批次中的第一個預測結果
+            @tf.function(reduce_retracing=True)
+            def rollout(window, extra_inputs, passes, target_idx):
+                look_back = window.shape[1]
+                target_mask = tf.one_hot(target_idx, tf.shape(window)[2], dtype=window.dtype)
+                outputs = tf.TensorArray(window.dtype, size=passes)
+                for i in tf.range(passes):
+                    prediction = tf.cast(model([window] + extra_inputs if extra_inputs else window,
+                                               training=False), window.dtype)
+                    outputs = outputs.write(i, prediction)
+                    new_rows = tf.repeat(window[:, -1:, :], tf.shape(prediction)[1], axis=1)
+                    new_rows = new_rows * (1 - target_mask) + prediction[:, :, None] * target_mask
+                    window = tf.concat([window, new_rows], axis=1)[:, -look_back:]
+                # (passes, batch, 步數) -> (batch, passes * 步數)
+                stacked = outputs.stack()
+                return tf.reshape(tf.transpose(stacked, [1, 0, 2]), [tf.shape(stacked)[1], -1])
 
-            # 更新輸入序列以進行下一個預測 (這裡是一個簡化方法)
-            # 在實際的多步預測中，通常需要將最新預測的結果整合回輸入序列
-            # 例如：current_input = np.roll(current_input, -1, axis=1)
-            # current_input[0, -1, target_feature_idx] = next_prediction[0]
-            # 為了簡潔，這裡假設模型足夠簡單，不依賴於精確序列更新
-            # 或者每次都是基於一個固定的 input_sequence 進行單步預測
-            pass # 這裡不更新 input_sequence，因為大多數基於 LSTM 的多步預測已經是在訓練時定義了輸出步長
+            self._keras_rollout = rollout
 
-        return np.array(predictions)
+        return self._keras_rollout(tf.constant(window), [tf.constant(x) for x in extra_inputs],
+                                   tf.constant(passes, dtype=tf.int32),
+                                   tf.constant(target_idx, dtype=tf.int32)).numpy()
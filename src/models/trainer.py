@@ -4,12 +4,33 @@ from tensorflow.keras import layers
 import numpy as np
 from typing import Dict, Any, Tuple
 
+from src.config import Config
+from src.models.callbacks import ResumableEarlyStopping, TrainingCheckpoint
+from src.utils.logger import get_logger
+
+logger = get_logger('trainer')
+
 # 為了簡化，這裡不直接使用 Keras Tuner，而是模擬其功能
 # 實際專案中會整合 Keras Tuner 進行自動超參數調整
 
 class ModelTrainer:
-    def __init__(self):
+    def __init__(self, dtype: str = None):
+        """
+        :param dtype: 訓練資料的浮點型別，預設為 Config.DEFAULT_DTYPE (float32)。
+        """
         self.model: keras.Model = None
+        self.dtype = np.dtype(dtype or Config.DEFAULT_DTYPE)
+
+    def _as_dtype(self, data: Any) -> Any:
+        """
+        將浮點 NumPy 陣列轉換為管線型別（已是該型別時不複製）；
+        多輸入模型的列表逐一處理，整數輸入（例如 ticker 編號）與其他輸入原樣返回。
+        """
+        if isinstance(data, (list, tuple)):
+            return [self._as_dtype(item) for item in data]
+        if isinstance(data, np.ndarray) and np.issubdtype(data.dtype, np.floating):
+            return data.astype(self.dtype, copy=False)
+        return data
 
     def build_model(self, input_shape: Tuple[int, ...], output_units: int, hyperparameters: Dict[str, Any]) -> keras.Model:
         """
@@ -19,39 +40,119 @@ class ModelTrainer:
         :param hyperparameters: 包含學習率、層數、單元數等超參數的字典。
         :return: 編譯後的 Keras 模型。
         """
-        model = keras.Sequential([
+        # 透過 tf.keras 於呼叫時解析（keras 延遲載入器在首次存取後會被替換成實際模組）
+        model = tf.keras.Sequential([
             layers.Input(shape=input_shape),
             layers.LSTM(hyperparameters.get('lstm_units', 50), return_sequences=False),
             layers.Dropout(hyperparameters.get('dropout_rate', 0.2)),
             layers.Dense(output_units, activation='linear') # 預測數值，使用 linear 激活
         ])
 
-        optimizer = keras.optimizers.Adam(learning_rate=hyperparameters.get('learning_rate', 0.001))
+        optimizer = tf.keras.optimizers.Adam(learning_rate=hyperparameters.get('learning_rate', 0.001))
         model.compile(optimizer=optimizer, loss='mse', metrics=['mae']) # 迴歸問題使用 mse 和 mae
 
         self.model = model
         return model
 
+    def build_panel_model(self, input_shape: Tuple[int, ...], output_units: int, n_tickers: int,
+                          hyperparameters: Dict[str, Any], use_ticker_embedding: bool = True) -> keras.Model:
+        """
+        建構多檔股票共用的面板模型。
+        啟用 ticker embedding 時模型有兩個輸入 [序列, ticker 編號]，ticker 向量與 LSTM 輸出串接後
+        送入輸出層；未啟用時與 build_model 相同。
+        :param input_shape: 序列輸入形狀 (look_back, num_features)。
+        :param output_units: 輸出層的單元數。
+        :param n_tickers: ticker 數量（embedding 表大小）。
+        :param hyperparameters: 超參數字典，可包含 ticker_embedding_dim。
+        :param use_ticker_embedding: 是否加入 ticker embedding。
+        :return: 編譯後的 Keras 模型。
+        """
+        if not use_ticker_embedding:
+            return self.build_model(input_shape, output_units, hyperparameters)
+
+        sequence_input = layers.Input(shape=input_shape, name='sequence')
+        ticker_input = layers.Input(shape=(1,), dtype='int32', name='ticker')
+
+        x = layers.LSTM(hyperparameters.get('lstm_units', 50), return_sequences=False)(sequence_input)
+        ticker_vector = layers.Flatten()(
+            layers.Embedding(n_tickers, hyperparameters.get('ticker_embedding_dim', 8))(ticker_input)
+        )
+        x = layers.Concatenate()([x, ticker_vector])
+        x = layers.Dropout(hyperparameters.get('dropout_rate', 0.2))(x)
+        output = layers.Dense(output_units, activation='linear')(x)
+
+        model = keras.Model(inputs=[sequence_input, ticker_input], outputs=output)
+        optimizer = keras.optimizers.Adam(learning_rate=hyperparameters.get('learning_rate', 0.001))
+        model.compile(optimizer=optimizer, loss='mse', metrics=['mae'])
+
+        self.model = model
+        return model
+
     def train_model(self, X_train: np.ndarray, y_train: np.ndarray,
                     X_val: np.ndarray, y_val: np.ndarray,
-                    hyperparameters: Dict[str, Any]) -> keras.callbacks.History:
+                    hyperparameters: Dict[str, Any],
+                    checkpoint_dir: str = None) -> keras.callbacks.History:
         """
         訓練模型。
+        以驗證損失進行提前停止並還原最佳權重；指定 checkpoint_dir 時會定期寫入檢查點，
+        若該目錄已有檢查點則從上次完成的 epoch 繼續訓練。
         :param X_train: 訓練數據的輸入特徵。
         :param y_train: 訓練數據的目標值。
         :param X_val: 驗證數據的輸入特徵。
         :param y_val: 驗證數據的目標值。
-        :param hyperparameters: 包含 epochs, batch_size 等訓練參數的字典。
+        :param hyperparameters: 包含 epochs, batch_size, early_stopping_patience,
+                                checkpoint_interval 等訓練參數的字典。
+        :param checkpoint_dir: 檢查點目錄（可選）。
         :return: 訓練歷史對象。
         """
         if self.model is None:
             raise ValueError("模型尚未建構。請先調用 build_model。")
 
+        defaults = Config.DEFAULT_HYPERPARAMETERS
+        initial_epoch = 0
+        early_stopping_state = None
+
+        if checkpoint_dir:
+            checkpoint_state = TrainingCheckpoint.load_state(checkpoint_dir)
+            if checkpoint_state:
+                # 從檢查點恢復模型權重與優化器狀態
+                self.model = keras.models.load_model(checkpoint_state['model_path'])
+                initial_epoch = checkpoint_state['epoch']
+                early_stopping_state = checkpoint_state
+                logger.info(f"從檢查點恢復訓練，已完成 {initial_epoch} 個 epoch")
+
+        epochs = hyperparameters.get('epochs', 50)
+        if early_stopping_state and early_stopping_state.get('stopped'):
+            # 上次已提前停止，不再繼續訓練，只還原最佳權重
+            epochs = initial_epoch
+
+        early_stopping = ResumableEarlyStopping(
+            monitor='val_loss',
+            patience=hyperparameters.get('early_stopping_patience',
+                                         defaults['early_stopping_patience']),
+            restore_best_weights=True,
+            initial_state=early_stopping_state,
+            verbose=1
+        )
+        callbacks = [early_stopping]
+        if checkpoint_dir:
+            callbacks.append(TrainingCheckpoint(
+                checkpoint_dir,
+                interval=hyperparameters.get('checkpoint_interval', defaults['checkpoint_interval']),
+                early_stopping=early_stopping
+            ))
+
+        # 以管線型別送入 Keras，避免每個批次重新轉換
+        X_train, y_train = self._as_dtype(X_train), self._as_dtype(y_train)
+        X_val, y_val = self._as_dtype(X_val), self._as_dtype(y_val)
+
         history = self.model.fit(
             X_train, y_train,
-            epochs=hyperparameters.get('epochs', 50),
+            epochs=epochs,
+            initial_epoch=initial_epoch,
             batch_size=hyperparameters.get('batch_size', 32),
             validation_data=(X_val, y_val),
+            callbacks=callbacks,
             verbose=1
         )
         return history
@@ -64,17 +165,19 @@ class ModelTrainer:
         在實際應用中，這裡會整合 Keras Tuner 或其他超參數優化庫。
         :return: 最佳超參數字典。
         """
-        print("正在執行自動超參數調整 (模擬)...")
+        logger.info("正在執行自動超參數調整 (模擬)...")
         best_hyperparameters = {
             'learning_rate': 0.001,
             'lstm_units': 64,
             'dropout_rate': 0.3,
             'epochs': 30,
-            'batch_size': 32
+            'batch_size': 32,
+            'early_stopping_patience': 5,
+            'checkpoint_interval': 1
         }
         # 這裡可以加入更複雜的搜索邏輯，例如隨機搜索或網格搜索
         # 為了簡化，直接返回預設的最佳參數
-        print(f"模擬超參數調整完成，最佳參數: {best_hyperparameters}")
+        logger.info(f"模擬超參數調整完成，最佳參數: {best_hyperparameters}")
         return best_hyperparameters
 
     def evaluate_model(self, X_test: np.ndarray, y_test: np.ndarray) -> Dict[str, float]:
@@ -87,7 +190,7 @@ class ModelTrainer:
         if self.model is None:
             raise ValueError("模型尚未建構或訓練。")
 
-        loss, mae = self.model.evaluate(X_test, y_test, verbose=0)
+        loss, mae = self.model.evaluate(self._as_dtype(X_test), self._as_dtype(y_test), verbose=0)
         return {"loss": loss, "mae": mae}
 
     def get_model(self) -> keras.Model:
@@ -0,0 +1,421 @@
+"""
+生產環境服務
+父程序建立應用程式、預先載入常用的模型與資料集後再 fork 出多個工作程序，
+工作程序以寫入時複製（copy-on-write）共用這些記憶體分頁，並共用同一個監聽 socket。
+每個工作程序以固定大小的執行緒池處理請求，處理 max_requests（加上隨機抖動）個請求後
+停止接受新連線、完成進行中的請求再結束，由父程序補上新的工作程序。
+批次訓練與批次匯入在接受請求的工作程序中以背景執行緒執行：有進行中的背景任務時延後重新建立，
+SIGHUP 替換時舊的工作程序停止接受連線，等背景任務完成才結束。
+
+訊號：SIGTERM / SIGINT 優雅停止所有工作程序（逾時後強制結束，進行中的背景任務會中斷）；
+SIGHUP 替換所有工作程序。
+
+用法:
+    SECRET_KEY=... python -m src.serve --workers 4 --warm-latest 3
+    python -m src.serve --config development --app dashboard --port 8050
+"""
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+# 將專案根目錄加入 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import Config, get_config
+from src.utils.logger import flush_logs, get_logger, use_application_handlers
+
+logger = get_logger('serve')
+access_logger = get_logger('access')
+
+# 工作程序啟動後不到此秒數即結束時，視為啟動失敗並延遲重新建立，避免快速重啟迴圈
+MIN_WORKER_LIFETIME_S = 1.0
+
+
+class RequestHandler(WSGIRequestHandler):
+    """
+    請求紀錄改由應用程式的日誌佇列輸出；存取紀錄預設關閉。
+    """
+    access_log = False
+
+    def log_request(self, code='-', size='-'):
+        if self.access_log:
+            access_logger.info('"%s" %s %s', self.requestline, code, size,
+                               extra={'client': self.address_string(), 'status': str(code)})
+
+    def log(self, type: str, message: str, *args):
+        getattr(logger, type if type in ('info', 'warning', 'error') else 'info')(message, *args)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    以固定大小的執行緒池處理連線的 WSGI 伺服器，使用已綁定的監聽 socket（由父程序建立）。
+    """
+
+    def __init__(self, fd: int, app, threads: int, handler=RequestHandler,
+                 on_request: Callable[[], None] = None):
+        """
+        :param fd: 已開始監聽的 socket 檔案描述子。
+        :param app: WSGI 應用程式。
+        :param threads: 同時處理的請求數。
+        :param handler: 請求處理類別。
+        :param on_request: 每接受一個連線時呼叫。
+        """
+        super().__init__('127.0.0.1', 0, app, handler=handler, fd=fd)
+        # 多個工作程序共用監聽 socket；其他程序先取走連線時 accept 不阻塞，讓 shutdown 能即時生效
+        self.socket.setblocking(False)
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+        self._on_request = on_request
+
+    def process_request(self, request, client_address):
+        if self._on_request:
+            self._on_request()
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def drain(self):
+        """
+        等待進行中與已接受的請求處理完成。
+        """
+        self._pool.shutdown(wait=True)
+
+
+class PreforkServer:
+    """
+    預先 fork 的多工作程序伺服器。
+    """
+
+    def __init__(self, app, host: str, port: int, workers: int, threads: int = None,
+                 max_requests: int = None, max_requests_jitter: int = None,
+                 graceful_timeout: float = None, backlog: int = None,
+                 background_busy: Callable[[], bool] = None):
+        """
+        :param app: WSGI 應用程式（fork 前已完成預熱）。
+        :param host: 監聽位址。
+        :param port: 監聽埠，0 表示由作業系統指定。
+        :param workers: 工作程序數。
+        :param threads: 每個工作程序的請求執行緒數，預設 Config.SERVER_THREADS。
+        :param max_requests: 工作程序處理此數量的請求後重新建立，0 表示不限制；預設 Config.SERVER_MAX_REQUESTS。
+        :param max_requests_jitter: 加在 max_requests 上的隨機量上限，避免所有工作程序同時重建。
+        :param graceful_timeout: 停止時等待進行中請求的秒數，逾時後強制結束。
+        :param backlog: 監聽佇列長度。
+        :param background_busy: 返回工作程序是否有進行中的背景任務（批次訓練、批次匯入）；
+                                有任務時延後重新建立，替換時等任務完成才結束。
+        """
+        self.app = app
+        self.host = host
+        self.workers = workers
+        self.threads = threads or Config.SERVER_THREADS
+        self.max_requests = Config.SERVER_MAX_REQUESTS if max_requests is None else max_requests
+        self.max_requests_jitter = (Config.SERVER_MAX_REQUESTS_JITTER if max_requests_jitter is None
+                                    else max_requests_jitter)
+        self.graceful_timeout = Config.SERVER_GRACEFUL_TIMEOUT if graceful_timeout is None else graceful_timeout
+
+        self.socket = socket.create_server((host, port), backlog=backlog or Config.SERVER_BACKLOG)
+        self.port = self.socket.getsockname()[1]
+        self.background_busy = background_busy or (lambda: False)
+        self._children: Dict[int, float] = {}  # pid -> 啟動時間
+        self._retiring = set()  # 已要求停止、正在完成工作的舊工作程序（不計入工作程序數）
+        self._stopping = False
+        self._reload = False
+
+    # ---------------------------------------------------------------- 父程序
+
+    def run(self):
+        """
+        建立工作程序並持續監控，直到收到 SIGTERM / SIGINT。
+        """
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+
+        # 預熱產生的物件移到永久世代，GC 不會觸碰（寫入）這些分頁，工作程序得以持續共用
+        gc.collect()
+        gc.freeze()
+        logger.info("於 %s:%d 啟動 %d 個工作程序（每個 %d 個執行緒）", self.host, self.port, self.workers, self.threads)
+
+        backoff_until = 0.0
+        while not self._stopping:
+            for pid, started, status in self._reap():
+                if not self._stopping:
+                    code = os.waitstatus_to_exitcode(status)
+                    if code != 0 and time.monotonic() - started < MIN_WORKER_LIFETIME_S:
+                        logger.error("工作程序 %d 啟動後立即結束（%d），稍後重試", pid, code)
+                        backoff_until = time.monotonic() + MIN_WORKER_LIFETIME_S
+                    elif code != 0:
+                        logger.warning("工作程序 %d 異常結束（%d）", pid, code)
+            if self._reload:
+                self._reload = False
+                self._rolling_restart()
+            if time.monotonic() >= backoff_until:
+                while len(self._children) - len(self._retiring) < self.workers and not self._stopping:
+                    self._spawn()
+            time.sleep(0.1)
+
+        self._stop_children()
+        self.socket.close()
+        logger.info("伺服器已停止")
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame):
+        self._reload = True
+
+    def _reap(self) -> List[tuple]:
+        """
+        :return: 已結束的工作程序 [(pid, 啟動時間, 結束狀態)]。
+        """
+        finished = []
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            started = self._children.pop(pid, None)
+            self._retiring.discard(pid)
+            if started is not None:
+                finished.append((pid, started, status))
+        return finished
+
+    def _spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                self._run_worker()
+                code = 0
+            except Exception:
+                logger.exception("工作程序 %d 發生未預期的錯誤", os.getpid())
+            finally:
+                flush_logs()
+                os._exit(code)
+        self._children[pid] = time.monotonic()
+        return pid
+
+    def _rolling_restart(self):
+        """
+        替換所有工作程序：先建立新的工作程序，再要求舊的停止。舊的工作程序停止接受連線、完成進行中的請求，
+        有背景任務時等任務完成才結束（可能超過 graceful_timeout，因此不強制結束），結束時由主迴圈回收。
+        """
+        for pid in [pid for pid in self._children if pid not in self._retiring]:
+            self._spawn()
+            self._retiring.add(pid)
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        logger.info("已建立新的工作程序，舊的工作程序完成工作後結束")
+
+    def _terminate(self, pids: List[int]):
+        """
+        對指定的工作程序送出 SIGTERM，等待 graceful_timeout 秒後強制結束仍未停止者。
+        """
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid, _, _ in self._reap():
+                remaining.discard(pid)
+            remaining &= set(self._children)
+            time.sleep(0.05)
+        for pid in remaining:
+            logger.warning("工作程序 %d 未於 %.0f 秒內停止，強制結束", pid, self.graceful_timeout)
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self._children.pop(pid, None)
+
+    def _stop_children(self):
+        self._terminate(list(self._children))
+
+    # ---------------------------------------------------------------- 工作程序
+
+    def _run_worker(self):
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        gc.unfreeze()
+
+        limit = 0
+        if self.max_requests:
+            limit = self.max_requests + random.randint(0, self.max_requests_jitter)
+        handled = 0
+        lock = threading.Lock()
+
+        recycle = threading.Event()
+
+        def count_request():
+            nonlocal handled
+            with lock:
+                handled += 1
+                if limit and handled >= limit:
+                    recycle.set()
+
+        parent = os.getppid()
+        server = PooledWSGIServer(self.socket.fileno(), self.app, self.threads, on_request=count_request)
+        thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.1},
+                                  name='accept', daemon=True)
+        thread.start()
+        # 父程序意外結束時（例如被 SIGKILL）工作程序也隨之停止
+        deferred = False
+        while not stop.wait(1.0) and os.getppid() == parent:
+            if recycle.is_set():
+                if not self.background_busy():
+                    break
+                if not deferred:
+                    deferred = True
+                    logger.info("工作程序 %d 已達請求上限，背景任務完成後再重新建立", os.getpid())
+
+        server.shutdown()
+        server.drain()
+        # 背景執行緒是 daemon，程序結束即中斷，因此等任務完成（任務狀態寫在報告中）再結束
+        if self.background_busy() and os.getppid() == parent:
+            logger.info("工作程序 %d 已停止接受連線，等待背景任務完成", os.getpid())
+            while self.background_busy() and os.getppid() == parent:
+                time.sleep(1.0)
+        if recycle.is_set():
+            logger.info("工作程序 %d 已處理 %d 個請求，重新建立", os.getpid(), handled)
+
+
+def warm_up(app, model_ids: List[str] = (), latest: int = 0, dataset_names: List[str] = (),
+            n_days: int = 1) -> Dict[str, List[str]]:
+    """
+    於父程序預先以實際的 API 路徑載入模型與資料集，填入資料集、模型與 scaler 快取。
+    只預熱已匯出 NumPy 推論權重的模型，避免在 fork 前匯入 TensorFlow（TensorFlow 的執行緒無法安全 fork）。
+    :param app: API 的 Flask 應用程式。
+    :param model_ids: 要預熱的模型 ID。
+    :param latest: 另外預熱最近訓練的 N 個模型。
+    :param dataset_names: 要預熱的資料集名稱。
+    :param n_days: 預熱預測的天數。
+    :return: {'models': 已預熱的模型, 'datasets': 已預熱的資料集, 'skipped': 略過的模型}。
+    """
+    from src.utils.model_manager import ModelManager
+
+    client = app.test_client()
+    model_ids = list(model_ids)
+    if latest:
+        response = client.get('/api/model/list', query_string={'sort': 'training_date', 'order': 'desc',
+                                                                'limit': latest})
+        model_ids += [model['model_id'] for model in response.get_json() or []
+                      if model['model_id'] not in model_ids]
+
+    model_manager = ModelManager(model_dir=os.path.join(os.getcwd(), 'models', 'saved_models'))
+    warmed = {'models': [], 'datasets': [], 'skipped': []}
+    for model_id in model_ids:
+        if not os.path.exists(model_manager.get_export_path(model_id)):
+            logger.warning("模型 %s 沒有 NumPy 推論權重，略過預熱", model_id)
+            warmed['skipped'].append(model_id)
+            continue
+        response = client.get('/api/model/predict', query_string={'model_id': model_id, 'n_days': n_days})
+        if response.status_code == 200:
+            warmed['models'].append(model_id)
+        else:
+            logger.warning("預熱模型 %s 失敗: %s", model_id, response.get_json())
+            warmed['skipped'].append(model_id)
+
+    for dataset_name in dataset_names:
+        response = client.get('/api/data/history', query_string={'dataset_name': dataset_name})
+        if response.status_code == 200:
+            warmed['datasets'].append(dataset_name)
+        else:
+            logger.warning("預熱資料集 %s 失敗: %s", dataset_name, response.get_json())
+
+    if 'tensorflow' in sys.modules:
+        logger.warning("TensorFlow 已於父程序載入，工作程序中的訓練與 Keras 推論可能無法正常運作")
+    logger.info("已預熱 %d 個模型與 %d 個資料集", len(warmed['models']), len(warmed['datasets']))
+    return warmed
+
+
+def default_workers() -> int:
+    """
+    :return: 預設的工作程序數（可用核心數）。
+    """
+    from src.services.bulk_training_service import available_cpus
+    return len(available_cpus())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='以多個預先 fork 的工作程序執行 API 或前端')
+    parser.add_argument('--config', default='production', help='設定名稱（production / development）')
+    parser.add_argument('--app', choices=('api', 'dashboard'), default='api')
+    parser.add_argument('--host')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--threads', type=int)
+    parser.add_argument('--max-requests', type=int)
+    parser.add_argument('--max-requests-jitter', type=int)
+    parser.add_argument('--graceful-timeout', type=float)
+    parser.add_argument('--warm-models', help='以逗號分隔的模型 ID')
+    parser.add_argument('--warm-latest', type=int, help='另外預熱最近訓練的 N 個模型')
+    parser.add_argument('--warm-datasets', help='以逗號分隔的資料集名稱')
+    parser.add_argument('--access-log', action='store_true', help='記錄每個請求')
+    args = parser.parse_args()
+
+    config = get_config(args.config)
+    RequestHandler.access_log = args.access_log
+
+    if args.app == 'api':
+        from src.app import create_app
+        # 背景預先匯入會在 fork 前啟動執行緒並載入 TensorFlow，生產模式下不使用
+        app = create_app(preload_ml=False)
+        warm_up(app,
+                model_ids=args.warm_models.split(',') if args.warm_models else config.SERVER_WARM_MODELS,
+                latest=config.SERVER_WARM_LATEST if args.warm_latest is None else args.warm_latest,
+                dataset_names=(args.warm_datasets.split(',') if args.warm_datasets
+                               else config.SERVER_WARM_DATASETS))
+        host, port = args.host or config.FLASK_HOST, config.FLASK_PORT if args.port is None else args.port
+    else:
+        from src.ui.dashboard import create_dashboard
+        dashboard = create_dashboard(flask_api_url=os.environ.get('API_URL', 'http://localhost:5000'))
+        app = dashboard.server
+        use_application_handlers(app.logger)
+        host, port = args.host or config.DASH_HOST, config.DASH_PORT if args.port is None else args.port
+
+    def option(value, default):
+        return default if value is None else value
+
+    def background_busy():
+        services = app.extensions['stock_prediction']
+        return (services['bulk_training_service'].has_active_jobs()
+                or services['bulk_import_service'].has_active_jobs())
+
+    server = PreforkServer(app, host, port,
+                           workers=args.workers or config.SERVER_WORKERS or default_workers(),
+                           threads=option(args.threads, config.SERVER_THREADS),
+                           max_requests=option(args.max_requests, config.SERVER_MAX_REQUESTS),
+                           max_requests_jitter=option(args.max_requests_jitter, config.SERVER_MAX_REQUESTS_JITTER),
+                           graceful_timeout=option(args.graceful_timeout, config.SERVER_GRACEFUL_TIMEOUT),
+                           backlog=config.SERVER_BACKLOG,
+                           background_busy=background_busy if args.app == 'api' else None)
+    server.run()
+
+
+if __name__ == '__main__':
+    main()
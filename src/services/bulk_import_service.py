@@ -0,0 +1,423 @@
+"""
+批次資料匯入服務
+將目錄或 zip 壓縮檔中的每個 CSV（通常一檔一個股票代號）分派到程序池平行匯入，
+每個檔案使用與 /api/data/upload 相同的欄位對應與驗證（CsvIngestor），
+單一檔案失敗只記錄在報告中，不中斷整批匯入。
+"""
+
+import datetime
+import json
+import multiprocessing
+import os
+import threading
+import time
+import queue
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, List
+
+from src.config import Config
+from src.data.ingest import CsvIngestor
+from src.services.bulk_training_service import available_cpus
+from src.services.data_service import DataService, InvalidDatasetNameError, validate_dataset_name
+from src.utils.logger import get_logger
+
+logger = get_logger('bulk_import_service')
+
+# 報告寫入的最短間隔（秒），數千個檔案時避免每完成一個檔案就重寫報告
+REPORT_INTERVAL_S = 1.0
+
+# 工作程序開始處理檔案時放入該檔案的索引，主程序據此將檔案標記為 running
+_started_queue = None
+
+
+def _init_worker(started_queue=None):
+    """
+    工作程序初始化：每個程序只用一個執行緒，平行度完全由程序數決定，避免超額使用核心。
+    :param started_queue: 回報開始處理哪個檔案的佇列（可選）。
+    """
+    global _started_queue
+    _started_queue = started_queue
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = '1'
+    import pyarrow as pa
+    pa.set_cpu_count(1)
+    pa.set_io_thread_count(1)
+
+
+def _import_file(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    在工作程序中匯入單一 CSV（目錄中的檔案或 zip 中的成員）並寫入 Parquet。
+    目錄項目由主程序寫入。
+    :param spec: {'index', 'source', 'member', 'output_path', 'dataset_name', 'chunksize'}。
+    :return: CsvIngestor.ingest 的結果，另含 seconds 與 pid。
+    """
+    if _started_queue is not None:
+        _started_queue.put(spec['index'])
+    start = time.perf_counter()
+    ingestor = CsvIngestor(spec['chunksize'])
+    if spec['member'] is None:
+        result = ingestor.ingest(spec['source'], spec['output_path'], spec['dataset_name'])
+    else:
+        with zipfile.ZipFile(spec['source']) as archive, archive.open(spec['member']) as stream:
+            result = ingestor.ingest(stream, spec['output_path'], spec['dataset_name'])
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    result['pid'] = os.getpid()
+    return result
+
+
+def list_csv_files(source: str) -> List[Dict[str, Any]]:
+    """
+    列出目錄（含子目錄）或 zip 壓縮檔中的 CSV 檔案。
+    :param source: 目錄或 .zip 檔案路徑。
+    :return: [{'file', 'member', 'size'}]，member 為 zip 成員名稱（目錄來源為 None）。
+    """
+    if os.path.isdir(source):
+        files = []
+        for root, _, names in os.walk(source):
+            for name in names:
+                if name.lower().endswith('.csv'):
+                    path = os.path.join(root, name)
+                    files.append({'file': os.path.relpath(path, source), 'member': None,
+                                  'size': os.path.getsize(path)})
+        return sorted(files, key=lambda item: item['file'])
+
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            return [
+                {'file': info.filename, 'member': info.filename, 'size': info.file_size}
+                for info in archive.infolist()
+                if not info.is_dir() and info.filename.lower().endswith('.csv')
+                and not info.filename.startswith('__MACOSX/')
+            ]
+
+    raise ValueError(f"匯入來源必須是目錄或 zip 壓縮檔: {source}")
+
+
+class BulkImportService:
+    """
+    批次匯入：以程序池平行匯入目錄或 zip 中的所有 CSV，並回報每個檔案的結果與吞吐量。
+    """
+
+    def __init__(self, data_service: DataService):
+        self.data_service = data_service
+        self.work_root = os.path.join(self.data_service.data_storage_dir, 'imports')
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, source: str, prefix: str = '', skip_existing: bool = False, max_workers: int = None,
+               remove_source: bool = False, overwrite: bool = False) -> str:
+        """
+        提交批次匯入並於背景執行緒執行，立即返回匯入任務 ID。
+        參數同 run()。
+        :return: 匯入任務 ID。
+        """
+        import_id = self._create_job(source, prefix, skip_existing, max_workers, remove_source, overwrite)
+        thread = threading.Thread(target=self._run_job, args=(import_id,), daemon=True)
+        thread.start()
+        return import_id
+
+    def run(self, source: str, prefix: str = '', skip_existing: bool = False, max_workers: int = None,
+            remove_source: bool = False, overwrite: bool = False) -> Dict[str, Any]:
+        """
+        同步執行批次匯入（命令列使用）。
+        已存在同名資料集的檔案預設記錄為失敗（與 /api/data/upload 相同），
+        skip_existing 時略過，overwrite 時取代既有資料集。
+        :param source: 目錄或 zip 壓縮檔路徑。
+        :param prefix: 資料集名稱前綴，資料集名稱為 前綴 + 檔案名稱。
+        :param skip_existing: 已存在同名資料集時略過。
+        :param max_workers: 工作程序上限（可選），預設為 Config.IMPORT_MAX_WORKERS 或可用核心數。
+        :param remove_source: 完成後刪除來源檔案（API 上傳的暫存 zip）。
+        :param overwrite: 取代已存在的同名資料集（含舊版 CSV）。
+        :return: 匯入任務狀態（含每個檔案的結果與吞吐量）。
+        :raises InvalidDatasetNameError: 前綴含路徑。
+        """
+        import_id = self._create_job(source, prefix, skip_existing, max_workers, remove_source, overwrite)
+        self._run_job(import_id)
+        return self.get_status(import_id)
+
+    def has_active_jobs(self) -> bool:
+        """
+        是否有尚未結束的匯入任務（生產環境服務據此延後重新建立工作程序）。
+        """
+        with self._lock:
+            return any(job['status'] in ('queued', 'running') for job in self._jobs.values())
+
+    def get_status(self, import_id: str) -> Dict[str, Any] | None:
+        """
+        取得匯入任務狀態；記憶體中沒有時讀取已寫入的報告（例如服務重啟後）。
+        """
+        with self._lock:
+            job = self._jobs.get(import_id)
+            if job is not None:
+                return self._snapshot(job)
+
+        report_path = os.path.join(self.work_root, import_id, 'report.json')
+        if os.path.exists(report_path):
+            with open(report_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return None
+
+    def _create_job(self, source, prefix, skip_existing, max_workers, remove_source, overwrite) -> str:
+        if skip_existing and overwrite:
+            raise ValueError("skip_existing 與 overwrite 不可同時指定。")
+        if prefix:
+            validate_dataset_name(prefix)
+        files = list_csv_files(source)
+        if not files:
+            raise ValueError(f"匯入來源中沒有 CSV 檔案: {source}")
+
+        seen = {}
+        tasks = []
+        for item in files:
+            dataset_name = f"{prefix or ''}{os.path.basename(item['file'])}"
+            task = dict(item, dataset_name=dataset_name, status='pending', rows=None, error=None, seconds=None)
+            try:
+                exists = self.data_service.dataset_exists(dataset_name)
+            except InvalidDatasetNameError as e:
+                # zip 成員名稱可能含有目前平台不視為分隔符號的字元（例如 \）
+                task.update(status='failed', error=str(e))
+            else:
+                if dataset_name in seen:
+                    # 不同子目錄中的同名檔案會對應到同一個資料集，保留第一個
+                    task.update(status='failed',
+                                error=f"資料集名稱 '{dataset_name}' 與 {seen[dataset_name]} 重複")
+                elif exists and skip_existing:
+                    task['status'] = 'skipped'
+                elif exists and not overwrite:
+                    task.update(status='failed', error="Dataset name already exists")
+            seen.setdefault(dataset_name, item['file'])
+            tasks.append(task)
+
+        workers = min(len(available_cpus()), max_workers or Config.IMPORT_MAX_WORKERS or len(available_cpus()))
+        workers = max(1, min(workers, sum(task['status'] == 'pending' for task in tasks) or 1))
+
+        import_id = str(uuid.uuid4())
+        job = {
+            'import_id': import_id,
+            'status': 'queued',
+            'source': source,
+            'prefix': prefix or '',
+            'overwrite': bool(overwrite),
+            'created_at': datetime.datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'workers': workers,
+            'remove_source': remove_source,
+            'tasks': tasks,
+            '_start': None,
+            '_end': None,
+            '_last_report': 0.0
+        }
+        with self._lock:
+            self._jobs[import_id] = job
+        # 立即寫入報告：多工作程序服務中，查詢可能由其他工作程序處理，只能從報告取得狀態
+        self._write_report(job, force=True)
+        return import_id
+
+    def _run_job(self, import_id: str):
+        with self._lock:
+            job = self._jobs[import_id]
+            job['status'] = 'running'
+            job['started_at'] = datetime.datetime.now().isoformat()
+            job['_start'] = time.perf_counter()
+        self._write_report(job, force=True)
+
+        is_zip = not os.path.isdir(job['source'])
+        specs = {
+            index: {
+                'index': index,
+                'source': job['source'] if is_zip else os.path.join(job['source'], task['file']),
+                'member': task['member'],
+                'output_path': self.data_service.get_parquet_path(task['dataset_name']),
+                'dataset_name': task['dataset_name'],
+                'chunksize': Config.INGEST_CHUNK_ROWS
+            }
+            for index, task in enumerate(job['tasks']) if task['status'] == 'pending'
+        }
+
+        try:
+            if job['workers'] == 1:
+                # 單一工作程序時直接在目前程序執行，省去建立程序池的成本
+                for index, spec in specs.items():
+                    self._set_running(job, index)
+                    try:
+                        self._record_result(job, index, _import_file(spec))
+                    except Exception as e:
+                        self._record_failure(job, index, e)
+            elif specs:
+                self._import_all(job, specs)
+
+            with self._lock:
+                job['status'] = 'completed'
+        except Exception as e:
+            logger.error(f"批次匯入 {import_id} 失敗: {e}")
+            with self._lock:
+                for task in job['tasks']:
+                    if task['status'] in ('pending', 'running'):
+                        task['status'] = 'failed'
+                        task['error'] = str(e)
+                job['status'] = 'failed'
+                job['error'] = str(e)
+        finally:
+            with self._lock:
+                job['_end'] = time.perf_counter()
+                job['finished_at'] = datetime.datetime.now().isoformat()
+            self._write_report(job, force=True)
+            if job['remove_source'] and os.path.isfile(job['source']):
+                os.remove(job['source'])
+
+    def _import_all(self, job: Dict[str, Any], specs: Dict[int, Dict[str, Any]]):
+        """
+        以程序池匯入所有檔案；主程序是唯一寫入目錄項目的程序。
+        大檔案先送出，避免最後只剩一個程序在處理大檔案。
+        送出的檔案維持 pending，工作程序開始處理時才標記為 running。
+        """
+        # 使用 spawn：API 程序可能已載入 TensorFlow，fork 後的子程序無法安全使用
+        context = multiprocessing.get_context('spawn')
+        started = context.Queue()
+        order = sorted(specs, key=lambda index: job['tasks'][index]['size'], reverse=True)
+        with ProcessPoolExecutor(max_workers=job['workers'], mp_context=context,
+                                 initializer=_init_worker, initargs=(started,)) as executor:
+            futures = {executor.submit(_import_file, specs[index]): index for index in order}
+
+            remaining = set(futures)
+            starting = []
+            while remaining:
+                done, remaining = wait(remaining, timeout=REPORT_INTERVAL_S,
+                                       return_when=FIRST_COMPLETED)
+                # 先記錄已結束的檔案，再處理開始的回報
+                for future in done:
+                    index = futures[future]
+                    try:
+                        self._record_result(job, index, future.result())
+                    except Exception as e:
+                        self._record_failure(job, index, e)
+                starting = self._drain_started(job, started, starting)
+        started.close()
+
+    def _drain_started(self, job: Dict[str, Any], started, starting: List[int]) -> List[int]:
+        """
+        將工作程序回報已開始處理的檔案標記為 running。
+        工作程序可能在前一個檔案的結果送達前就開始下一個檔案，
+        running 已達工作程序數時保留回報，等結果記錄後再標記。
+
+        :param starting: 上次保留的回報
+        :return: 本次保留的回報
+        """
+        while True:
+            try:
+                starting.append(started.get_nowait())
+            except queue.Empty:
+                break
+
+        deferred = []
+        with self._lock:
+            running = sum(task['status'] == 'running' for task in job['tasks'])
+            for index in starting:
+                if running >= job['workers']:
+                    deferred.append(index)
+                elif job['tasks'][index]['status'] == 'pending':
+                    job['tasks'][index]['status'] = 'running'
+                    running += 1
+        self._write_report(job)
+        return deferred
+
+    def _set_running(self, job: Dict[str, Any], index: int):
+        with self._lock:
+            # 回報可能晚於結果送達，已結束的檔案不改回 running
+            if job['tasks'][index]['status'] == 'pending':
+                job['tasks'][index]['status'] = 'running'
+
+    def _record_result(self, job: Dict[str, Any], index: int, result: Dict[str, Any]):
+        task = job['tasks'][index]
+        self.data_service.record_ingest(task['dataset_name'], result)
+        with self._lock:
+            task.update(status='completed', rows=result['rows'], seconds=result['seconds'])
+        self._write_report(job)
+
+    def _record_failure(self, job: Dict[str, Any], index: int, error: Exception):
+        task = job['tasks'][index]
+        logger.error(f"批次匯入檔案 {task['file']} 失敗: {error}")
+        with self._lock:
+            task.update(status='failed', error=str(error))
+        self._write_report(job)
+
+    def _snapshot(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        產生可序列化的狀態，並計算吞吐量（呼叫端需持有鎖）。
+        """
+        counts = {status: 0 for status in ('pending', 'running', 'completed', 'failed', 'skipped')}
+        for task in job['tasks']:
+            counts[task['status']] += 1
+
+        completed = [task for task in job['tasks'] if task['status'] == 'completed']
+        elapsed_s = None
+        throughput = {'files_per_s': None, 'rows_per_s': None, 'mb_per_s': None}
+        if job['_start'] is not None:
+            elapsed_s = (job['_end'] or time.perf_counter()) - job['_start']
+            if elapsed_s > 0:
+                throughput = {
+                    'files_per_s': round(len(completed) / elapsed_s, 2),
+                    'rows_per_s': round(sum(task['rows'] for task in completed) / elapsed_s, 1),
+                    'mb_per_s': round(sum(task['size'] for task in completed) / elapsed_s / (1024 * 1024), 2)
+                }
+
+        snapshot = {key: value for key, value in job.items() if not key.startswith('_')}
+        snapshot['tasks'] = [dict(task) for task in job['tasks']]
+        snapshot.update({
+            'total_files': len(job['tasks']),
+            'counts': counts,
+            'progress': (len(job['tasks']) - counts['pending'] - counts['running']) / len(job['tasks']),
+            'elapsed_s': round(elapsed_s, 3) if elapsed_s is not None else None,
+            'failures': [{'file': task['file'], 'error': task['error']}
+                         for task in job['tasks'] if task['status'] == 'failed'],
+            **throughput
+        })
+        return snapshot
+
+    def _write_report(self, job: Dict[str, Any], force: bool = False):
+        with self._lock:
+            now = time.perf_counter()
+            if not force and now - job['_last_report'] < REPORT_INTERVAL_S:
+                return
+            job['_last_report'] = now
+            snapshot = self._snapshot(job)
+        work_dir = os.path.join(self.work_root, job['import_id'])
+        os.makedirs(work_dir, exist_ok=True)
+        report_path = os.path.join(work_dir, 'report.json')
+        tmp_path = f"{report_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, report_path)
+
+
+def main():
+    import argparse
+    from src.utils.data_loader import DataLoader
+
+    parser = argparse.ArgumentParser(description='平行匯入目錄或 zip 壓縮檔中的所有 CSV')
+    parser.add_argument('source', help='目錄或 .zip 檔案路徑')
+    parser.add_argument('--prefix', default='', help='資料集名稱前綴')
+    existing = parser.add_mutually_exclusive_group()
+    existing.add_argument('--skip-existing', action='store_true', help='略過已存在的資料集')
+    existing.add_argument('--overwrite', action='store_true', help='取代已存在的資料集（預設記錄為失敗）')
+    parser.add_argument('--workers', type=int, help='工作程序上限')
+    parser.add_argument('--data-dir', default=os.path.join('data', 'processed_data'))
+    args = parser.parse_args()
+
+    service = BulkImportService(DataService(DataLoader(data_dir=args.data_dir)))
+    report = service.run(args.source, prefix=args.prefix, skip_existing=args.skip_existing,
+                         max_workers=args.workers, overwrite=args.overwrite)
+
+    counts = report['counts']
+    print(f"匯入 {report['import_id']}: {counts['completed']}/{report['total_files']} 成功，"
+          f"{counts['failed']} 失敗，{counts['skipped']} 略過，{report['workers']} 個工作程序，"
+          f"耗時 {report['elapsed_s']} 秒（{report['files_per_s']} 檔/秒，{report['mb_per_s']} MB/秒）")
+    for failure in report['failures']:
+        print(f"  失敗 {failure['file']}: {failure['error']}")
+
+
+if __name__ == '__main__':
+    main()
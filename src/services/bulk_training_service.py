@@ -0,0 +1,525 @@
+"""
+批次平行訓練服務
+將多個 (資料集, 預測天數) 組合分派到程序池平行訓練：
+每個資料集只做一次特徵工程與正規化，工作程序以記憶體映射共用正規化後的陣列，
+並各自綁定一組 CPU 核心與 TensorFlow 執行緒數，避免程序之間互相搶佔。
+"""
+
+import datetime
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+import numpy as np
+
+from src.config import Config
+from src.data.preprocessor import DataPreprocessor
+from src.services.data_service import DataService
+from src.services.model_service import TRAINING_DURATION, TRAINING_JOBS
+from src.utils.metadata_manager import MetadataManager
+from src.utils.metrics import REGISTRY
+from src.utils.logger import get_logger
+from src.utils.model_manager import ModelManager
+
+logger = get_logger('bulk_training_service')
+
+BULK_TASKS = REGISTRY.gauge('bulk_training_tasks',
+                            'Bulk training tasks held in memory by state.', ['state'])
+BULK_QUEUE_DEPTH = REGISTRY.gauge('bulk_training_queue_depth',
+                                  'Bulk training tasks waiting for a free worker process.')
+
+
+def available_cpus() -> List[int]:
+    """
+    取得目前程序可使用的 CPU 核心編號。
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_workers(n_jobs: int, max_workers: int = None, threads_per_worker: int = None) -> Dict[str, Any]:
+    """
+    依機器核心數決定工作程序數，並將核心切分為各工作程序專屬的核心組。
+    :param n_jobs: 訓練任務數。
+    :param max_workers: 工作程序上限（可選），預設為 Config.BULK_MAX_WORKERS 或依核心數決定。
+    :param threads_per_worker: 每個工作程序的執行緒數（可選），預設為 Config.BULK_THREADS_PER_WORKER。
+    :return: 包含 workers, threads_per_worker, core_sets 的字典。
+    """
+    cpus = available_cpus()
+    threads_per_worker = max(1, int(threads_per_worker or Config.BULK_THREADS_PER_WORKER))
+    threads_per_worker = min(threads_per_worker, len(cpus))
+    workers = max(1, len(cpus) // threads_per_worker)
+    max_workers = max_workers or Config.BULK_MAX_WORKERS
+    if max_workers:
+        workers = min(workers, int(max_workers))
+    workers = max(1, min(workers, n_jobs))
+
+    core_sets = [cpus[i * threads_per_worker:(i + 1) * threads_per_worker] for i in range(workers)]
+    return {'workers': workers, 'threads_per_worker': threads_per_worker, 'core_sets': core_sets}
+
+
+def _init_worker(threads_per_worker: int, inter_op_threads: int, core_queue):
+    """
+    工作程序初始化：綁定一組 CPU 核心，並在 TensorFlow 執行階段建立前設定執行緒數。
+    """
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads_per_worker)
+
+    try:
+        cores = core_queue.get_nowait()
+    except queue.Empty:
+        cores = None
+    if cores and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads_per_worker)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+def _train_job(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    在工作程序中訓練單一 (資料集, 預測天數) 組合。
+    只建立序列、訓練與儲存模型檔案；元資料回傳給主程序統一寫入。
+    :param spec: 任務設定（共用陣列路徑、scaler 路徑、超參數等）。
+    :return: 包含 metadata 與 timing 的字典。
+    """
+    start = time.perf_counter()
+    from src.models.trainer import ModelTrainer
+    from src.services.model_service import ModelService
+
+    n_days = spec['n_days']
+    preprocessor = DataPreprocessor(dtype=spec['dtype'])
+    values = np.load(spec['array_path'], mmap_mode='r')
+    X, y = preprocessor.create_sequences_from_array(values, spec['look_back'], n_days, spec['target_idx'])
+
+    split_idx = int(len(X) * (1 - spec['validation_split']))
+    if split_idx <= 0 or split_idx >= len(X):
+        raise ValueError(f"資料集 '{spec['dataset_name']}' 資料量不足，無法切分 n_days={n_days} 的訓練集與驗證集。")
+    X_train, y_train = X[:split_idx], y[:split_idx]
+    X_val, y_val = X[split_idx:], y[split_idx:]
+    sequence_s = time.perf_counter() - start
+
+    trainer = ModelTrainer(dtype=spec['dtype'])
+    hyperparameters = spec['hyperparameters']
+    trainer.build_model(input_shape=X_train.shape[1:], output_units=y_train.shape[1],
+                        hyperparameters=hyperparameters)
+    train_start = time.perf_counter()
+    history = trainer.train_model(X_train, y_train, X_val, y_val, hyperparameters)
+    performance_metrics = trainer.evaluate_model(X_val, y_val)
+    train_s = time.perf_counter() - train_start
+
+    model_id = spec['model_id']
+    model_manager = ModelManager(model_dir=spec['model_dir'])
+    model_path = model_manager.save_model(trainer.get_model(), model_id)
+    shutil.copyfile(spec['scaler_path'], model_manager.get_scaler_path(model_id))
+
+    model_config = {
+        'look_back': spec['look_back'],
+        'target_column': spec['target_column'],
+        'input_shape': X_train.shape[1:],
+        'output_units': y_train.shape[1],
+        'feature_columns': spec['feature_columns']
+    }
+    metadata = ModelService._build_metadata(
+        model_id, spec['model_name'], model_path, spec['dataset_name'], n_days,
+        model_config, hyperparameters, performance_metrics, history
+    )
+
+    return {
+        'metadata': metadata,
+        'timing': {
+            'sequence_s': round(sequence_s, 3),
+            'train_s': round(train_s, 3),
+            'total_s': round(time.perf_counter() - start, 3),
+            'pid': os.getpid()
+        }
+    }
+
+
+class BulkTrainingService:
+    """
+    批次平行訓練：以程序池訓練多個 (資料集, 預測天數) 組合，並回報吞吐量與每個任務的耗時。
+    """
+
+    def __init__(self, data_service: DataService, model_manager: ModelManager,
+                 metadata_manager: MetadataManager, dtype: str = None):
+        self.data_service = data_service
+        self.model_manager = model_manager
+        self.metadata_manager = metadata_manager
+        self.dtype = dtype or Config.DEFAULT_DTYPE
+        self.work_root = os.path.join(self.model_manager.model_dir, 'bulk')
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        # 佇列長度在抓取指標時才計算；以弱參照避免指標讓服務物件無法回收
+        ref = weakref.ref(self)
+        for state in ('pending', 'running', 'completed', 'failed'):
+            BULK_TASKS.labels(state).set_function(
+                lambda state=state: ref().count_tasks(state) if ref() is not None else 0)
+        BULK_QUEUE_DEPTH.set_function(lambda: ref().queue_depth() if ref() is not None else 0)
+
+    def count_tasks(self, state: str) -> int:
+        """
+        記憶體中所有批次任務裡指定狀態的訓練任務數。
+        """
+        with self._lock:
+            return sum(task['status'] == state
+                       for job in self._jobs.values() for task in job['tasks'])
+
+    def has_active_jobs(self) -> bool:
+        """
+        是否有尚未結束的批次任務（生產環境服務據此延後重新建立工作程序）。
+        """
+        with self._lock:
+            return any(job['status'] in ('queued', 'running') for job in self._jobs.values())
+
+    def queue_depth(self) -> int:
+        """
+        等待空閒工作程序的訓練任務數（已送入程序池但尚未開始的任務也計入）。
+        """
+        with self._lock:
+            return sum(
+                max(0, sum(task['status'] in ('pending', 'running') for task in job['tasks'])
+                    - job['workers'])
+                for job in self._jobs.values() if job['status'] in ('queued', 'running')
+            )
+
+    def submit(self, dataset_names: List[str], n_days_list: List[int], look_back: int = None,
+               target_column: str = None, hyperparameters: Dict[str, Any] = None,
+               max_workers: int = None, threads_per_worker: int = None) -> str:
+        """
+        提交批次訓練並於背景執行緒執行，立即返回批次任務 ID。
+        參數同 run()。
+        :return: 批次任務 ID。
+        """
+        bulk_job_id = self._create_job(dataset_names, n_days_list, look_back, target_column,
+                                       hyperparameters, max_workers, threads_per_worker)
+        thread = threading.Thread(target=self._run_job, args=(bulk_job_id,), daemon=True)
+        thread.start()
+        return bulk_job_id
+
+    def run(self, dataset_names: List[str], n_days_list: List[int], look_back: int = None,
+            target_column: str = None, hyperparameters: Dict[str, Any] = None,
+            max_workers: int = None, threads_per_worker: int = None) -> Dict[str, Any]:
+        """
+        同步執行批次訓練（命令列使用）。
+        :param dataset_names: 資料集名稱列表。
+        :param n_days_list: 預測天數列表，與資料集兩兩組合成訓練任務。
+        :param look_back: 歷史時間步長，預設為 Config.DEFAULT_LOOK_BACK。
+        :param target_column: 目標欄位，預設為 Config.DEFAULT_TARGET_COLUMN。
+        :param hyperparameters: 所有任務共用的超參數，預設為 Config.DEFAULT_HYPERPARAMETERS。
+        :param max_workers: 工作程序上限（可選）。
+        :param threads_per_worker: 每個工作程序的執行緒數（可選）。
+        :return: 批次任務狀態（含吞吐量與每個任務的耗時）。
+        """
+        bulk_job_id = self._create_job(dataset_names, n_days_list, look_back, target_column,
+                                       hyperparameters, max_workers, threads_per_worker)
+        self._run_job(bulk_job_id)
+        return self.get_status(bulk_job_id)
+
+    def get_status(self, bulk_job_id: str) -> Dict[str, Any] | None:
+        """
+        取得批次任務狀態；記憶體中沒有時讀取已寫入的報告（例如服務重啟後）。
+        """
+        with self._lock:
+            job = self._jobs.get(bulk_job_id)
+            if job is not None:
+                return self._snapshot(job)
+
+        report_path = os.path.join(self.work_root, bulk_job_id, 'report.json')
+        if os.path.exists(report_path):
+            with open(report_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return None
+
+    def _create_job(self, dataset_names, n_days_list, look_back, target_column,
+                    hyperparameters, max_workers, threads_per_worker) -> str:
+        dataset_names = list(dict.fromkeys(dataset_names or []))
+        n_days_list = sorted({int(n) for n in (n_days_list or [])})
+        if not dataset_names or not n_days_list:
+            raise ValueError("批次訓練至少需要一個資料集與一個預測天數。")
+        for n_days in n_days_list:
+            if not (Config.MIN_PREDICTION_DAYS <= n_days <= Config.MAX_PREDICTION_DAYS):
+                raise ValueError(f"預測天數 {n_days} 超出範圍 "
+                                 f"{Config.MIN_PREDICTION_DAYS}-{Config.MAX_PREDICTION_DAYS}。")
+
+        tasks = [{'dataset_name': name, 'n_days': n_days, 'status': 'pending',
+                  'model_id': None, 'error': None, 'timing': None}
+                 for name in dataset_names for n_days in n_days_list]
+        plan = plan_workers(len(tasks), max_workers, threads_per_worker)
+
+        bulk_job_id = str(uuid.uuid4())
+        job = {
+            'bulk_job_id': bulk_job_id,
+            'status': 'queued',
+            'created_at': datetime.datetime.now().isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'dataset_names': dataset_names,
+            'n_days': n_days_list,
+            'look_back': look_back or Config.DEFAULT_LOOK_BACK,
+            'target_column': target_column or Config.DEFAULT_TARGET_COLUMN,
+            'hyperparameters': dict(hyperparameters or Config.DEFAULT_HYPERPARAMETERS),
+            'workers': plan['workers'],
+            'threads_per_worker': plan['threads_per_worker'],
+            'core_sets': plan['core_sets'],
+            'preprocessing': {},
+            'tasks': tasks,
+            '_start': None,
+            '_end': None
+        }
+        with self._lock:
+            self._jobs[bulk_job_id] = job
+        # 立即寫入報告：多工作程序服務中，查詢可能由其他工作程序處理，只能從報告取得狀態
+        self._write_report(job)
+        return bulk_job_id
+
+    def _prepare_dataset(self, job: Dict[str, Any], dataset_name: str, work_dir: str,
+                         index: int) -> Dict[str, Any]:
+        """
+        對單一資料集做一次特徵工程與正規化，結果寫入工作目錄供該資料集的所有任務共用。
+        """
+        start = time.perf_counter()
+        preprocessor = DataPreprocessor(dtype=self.dtype)
+        raw_df = self.data_service.get_dataset(dataset_name, dtype=self.dtype)
+        features = preprocessor.feature_engineering(raw_df.copy())
+        normalized_df, scaler = preprocessor.normalize_data(features)
+
+        target_column = job['target_column']
+        target_col = next((col for col in normalized_df.columns if col.lower() == target_column.lower()), None)
+        if target_col is None:
+            raise ValueError(f"找不到目標欄位 '{target_column}'。可用欄位: {list(normalized_df.columns)}")
+
+        stem = f"dataset_{index:04d}"
+        array_path = os.path.join(work_dir, f"{stem}.npy")
+        scaler_path = os.path.join(work_dir, f"{stem}.scaler.pkl")
+        np.save(array_path, normalized_df.to_numpy(dtype=self.dtype))
+        import joblib
+        joblib.dump(scaler, scaler_path)
+
+        with self._lock:
+            job['preprocessing'][dataset_name] = {
+                'rows': int(len(normalized_df)),
+                'seconds': round(time.perf_counter() - start, 3)
+            }
+        return {
+            'array_path': array_path,
+            'scaler_path': scaler_path,
+            'target_idx': int(normalized_df.columns.get_loc(target_col)),
+            'feature_columns': list(normalized_df.columns)
+        }
+
+    def _run_job(self, bulk_job_id: str):
+        with self._lock:
+            job = self._jobs[bulk_job_id]
+            job['status'] = 'running'
+            job['started_at'] = datetime.datetime.now().isoformat()
+            job['_start'] = time.perf_counter()
+        self._write_report(job)
+
+        work_dir = os.path.join(self.work_root, bulk_job_id)
+        os.makedirs(work_dir, exist_ok=True)
+        model_name_prefix = f"Bulk_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        try:
+            # 每個資料集只預處理一次
+            shared = {}
+            for index, dataset_name in enumerate(job['dataset_names']):
+                try:
+                    shared[dataset_name] = self._prepare_dataset(job, dataset_name, work_dir, index)
+                except Exception as e:
+                    logger.error(f"批次訓練 {bulk_job_id}: 資料集 '{dataset_name}' 預處理失敗: {e}")
+                    self._fail_tasks(job, lambda task: task['dataset_name'] == dataset_name, str(e))
+
+            specs = {}
+            for index, task in enumerate(job['tasks']):
+                if task['dataset_name'] not in shared:
+                    continue
+                specs[index] = dict(
+                    shared[task['dataset_name']],
+                    dataset_name=task['dataset_name'],
+                    n_days=task['n_days'],
+                    model_id=str(uuid.uuid4()),
+                    model_name=f"{model_name_prefix}_{index + 1:03d}",
+                    look_back=job['look_back'],
+                    target_column=job['target_column'],
+                    hyperparameters=job['hyperparameters'],
+                    validation_split=Config.VALIDATION_SPLIT,
+                    dtype=self.dtype,
+                    model_dir=self.model_manager.model_dir
+                )
+
+            if specs:
+                self._train_all(job, specs)
+
+            with self._lock:
+                job['status'] = 'completed'
+        except Exception as e:
+            logger.error(f"批次訓練 {bulk_job_id} 失敗: {e}")
+            self._fail_tasks(job, lambda task: task['status'] in ('pending', 'running'), str(e))
+            with self._lock:
+                job['status'] = 'failed'
+                job['error'] = str(e)
+        finally:
+            with self._lock:
+                job['_end'] = time.perf_counter()
+                job['finished_at'] = datetime.datetime.now().isoformat()
+            self._write_report(job)
+            # 共用的正規化陣列只在訓練期間需要，保留報告即可
+            for name in os.listdir(work_dir):
+                if name != 'report.json':
+                    os.remove(os.path.join(work_dir, name))
+
+    def _train_all(self, job: Dict[str, Any], specs: Dict[int, Dict[str, Any]]):
+        """
+        以程序池訓練所有任務；主程序是唯一寫入元資料的程序。
+        """
+        # 使用 spawn：父程序可能已初始化 TensorFlow，fork 後的子程序無法安全使用
+        context = multiprocessing.get_context('spawn')
+        core_queue = context.Queue()
+        for cores in job['core_sets']:
+            core_queue.put(cores)
+
+        with ProcessPoolExecutor(
+            max_workers=job['workers'],
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(job['threads_per_worker'], Config.BULK_INTER_OP_THREADS, core_queue)
+        ) as executor:
+            futures = {}
+            for index, spec in specs.items():
+                futures[executor.submit(_train_job, spec)] = index
+                with self._lock:
+                    job['tasks'][index]['status'] = 'running'
+                    job['tasks'][index]['model_id'] = spec['model_id']
+
+            for future in as_completed(futures):
+                task = job['tasks'][futures[future]]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"批次訓練任務 {task['dataset_name']} / n_days={task['n_days']} 失敗: {e}")
+                    TRAINING_JOBS.labels('bulk', 'failed').inc()
+                    with self._lock:
+                        task['status'] = 'failed'
+                        task['error'] = str(e)
+                    continue
+
+                TRAINING_DURATION.labels('bulk').observe(result['timing']['total_s'])
+                TRAINING_JOBS.labels('bulk', 'completed').inc()
+                metadata = result['metadata']
+                metadata.update({"version": 1, "parent_model_id": None, "bulk_job_id": job['bulk_job_id']})
+                self.metadata_manager.add_metadata(metadata)
+                with self._lock:
+                    task['status'] = 'completed'
+                    task['timing'] = result['timing']
+                self._write_report(job)
+
+    def _fail_tasks(self, job: Dict[str, Any], predicate, error: str):
+        with self._lock:
+            for task in job['tasks']:
+                if predicate(task):
+                    task['status'] = 'failed'
+                    task['error'] = error
+
+    def _snapshot(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        產生可序列化的狀態，並計算吞吐量（呼叫端需持有鎖）。
+        """
+        counts = {status: 0 for status in ('pending', 'running', 'completed', 'failed')}
+        for task in job['tasks']:
+            counts[task['status']] += 1
+
+        elapsed_s = None
+        models_per_hour = None
+        if job['_start'] is not None:
+            elapsed_s = (job['_end'] or time.perf_counter()) - job['_start']
+            if elapsed_s > 0:
+                models_per_hour = round(counts['completed'] / elapsed_s * 3600, 2)
+
+        train_times = [task['timing']['total_s'] for task in job['tasks'] if task['timing']]
+        snapshot = {key: value for key, value in job.items() if not key.startswith('_')}
+        snapshot['tasks'] = [dict(task) for task in job['tasks']]
+        snapshot.update({
+            'total_jobs': len(job['tasks']),
+            'counts': counts,
+            'progress': (counts['completed'] + counts['failed']) / len(job['tasks']),
+            'elapsed_s': round(elapsed_s, 3) if elapsed_s is not None else None,
+            'models_per_hour': models_per_hour,
+            'mean_job_s': round(sum(train_times) / len(train_times), 3) if train_times else None
+        })
+        return snapshot
+
+    def _write_report(self, job: Dict[str, Any]):
+        with self._lock:
+            snapshot = self._snapshot(job)
+        work_dir = os.path.join(self.work_root, job['bulk_job_id'])
+        os.makedirs(work_dir, exist_ok=True)
+        report_path = os.path.join(work_dir, 'report.json')
+        tmp_path = f"{report_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, report_path)
+
+
+def _parse_n_days(value: str) -> List[int]:
+    """
+    解析預測天數參數，支援 '1-30' 範圍與 '1,5,10' 列表。
+    """
+    n_days = []
+    for part in value.split(','):
+        part = part.strip()
+        if '-' in part:
+            low, high = part.split('-', 1)
+            n_days.extend(range(int(low), int(high) + 1))
+        elif part:
+            n_days.append(int(part))
+    return n_days
+
+
+def main():
+    import argparse
+    from src.utils.data_loader import DataLoader
+
+    parser = argparse.ArgumentParser(description='批次平行訓練多個 (資料集, 預測天數) 組合')
+    parser.add_argument('--datasets', nargs='+', required=True, help='資料集名稱')
+    parser.add_argument('--n-days', default=f"{Config.MIN_PREDICTION_DAYS}-{Config.MAX_PREDICTION_DAYS}",
+                        help="預測天數，例如 '1-30' 或 '1,5,10'")
+    parser.add_argument('--workers', type=int, help='工作程序上限')
+    parser.add_argument('--threads-per-worker', type=int, help='每個工作程序的執行緒數')
+    parser.add_argument('--epochs', type=int, help='覆寫預設 epoch 數')
+    args = parser.parse_args()
+
+    hyperparameters = dict(Config.DEFAULT_HYPERPARAMETERS)
+    if args.epochs:
+        hyperparameters['epochs'] = args.epochs
+
+    service = BulkTrainingService(
+        DataService(DataLoader(data_dir=os.path.join(os.getcwd(), 'data', 'processed_data'))),
+        ModelManager(model_dir=os.path.join(os.getcwd(), 'models', 'saved_models')),
+        MetadataManager(metadata_dir=os.path.join(os.getcwd(), 'models', 'metadata'))
+    )
+    report = service.run(args.datasets, _parse_n_days(args.n_days), hyperparameters=hyperparameters,
+                         max_workers=args.workers, threads_per_worker=args.threads_per_worker)
+
+    print(f"批次任務 {report['bulk_job_id']}: {report['counts']['completed']}/{report['total_jobs']} 完成，"
+          f"{report['workers']} 個工作程序 x {report['threads_per_worker']} 執行緒，"
+          f"耗時 {report['elapsed_s']} 秒，{report['models_per_hour']} 模型/小時")
+    for task in report['tasks']:
+        timing = task['timing'] or {}
+        print(f"  {task['dataset_name']:<30} n_days={task['n_days']:<3} {task['status']:<10} "
+              f"{timing.get('total_s', '-')}s {task['error'] or ''}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,49 @@
 import pandas as pd
 from src.utils.data_loader import DataLoader
+from src.data.catalog import DatasetCatalog
+from src.data.ingest import CsvIngestor
+from src.config import Config
+from src.utils.lru_cache import LRUCache
+from src.utils.logger import get_logger
 import uuid
 import os
-from typing import List
+from typing import Any, BinaryIO, Dict, List, Union
+
+logger = get_logger('data_service')
+
+
+class DatasetExistsError(ValueError):
+    """
+    已有同名的資料集（Parquet 或舊版 CSV）。
+    """
+
+
+class InvalidDatasetNameError(ValueError):
+    """
+    資料集名稱不是資料目錄中的單一檔名（含路徑分隔符號或 ..）。
+    """
+
+
+def validate_dataset_name(dataset_name: str) -> str:
+    """
+    檢查用戶端提供的資料集名稱只能是資料目錄中的檔名，避免寫入或刪除資料目錄以外的檔案。
+    :return: 資料集名稱。
+    :raises InvalidDatasetNameError: 名稱為空、含路徑分隔符號、.. 或 NUL 字元。
+    """
+    if not isinstance(dataset_name, str) or not dataset_name.strip():
+        raise InvalidDatasetNameError("資料集名稱不可為空。")
+    if ('/' in dataset_name or '\\' in dataset_name or '..' in dataset_name or '\0' in dataset_name
+            or os.path.basename(dataset_name) != dataset_name):
+        raise InvalidDatasetNameError(f"資料集名稱不可包含路徑: '{dataset_name}'")
+    return dataset_name
+
 
 class DataService:
     def __init__(self, data_loader: DataLoader):
         self.data_loader = data_loader
         self.data_storage_dir = data_loader.data_dir # 儲存處理後資料的目錄
+        self.catalog = DatasetCatalog(self.data_storage_dir) # 資料檔旁的 .meta.json 統計資訊
+        self.cache = LRUCache('dataset', Config.DATASET_CACHE_SIZE) # 最近使用的資料集，預測時不必每次讀檔
 
     def upload_and_process_data(self, file_path: str, dataset_name: str) -> str:
         """
@@ -16,6 +52,7 @@ class DataService:
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"上傳檔案不存在: {file_path}")
+        validate_dataset_name(dataset_name)
 
         # 檢查資料集名稱是否已存在
         if self.get_all_datasets() and dataset_name in self.get_all_datasets():
@@ -23,13 +60,115 @@ class DataService:
 
         df = self.data_loader.load_csv(file_path)
         self.data_loader.save_dataframe(df, dataset_name)
+        self.catalog_dataset(dataset_name, os.path.join(self.data_storage_dir, f"{dataset_name}.parquet"))
         return dataset_name
 
-    def get_dataset(self, dataset_name: str) -> pd.DataFrame:
+    def ingest_csv(self, source: Union[str, BinaryIO], dataset_name: str, chunksize: int = None,
+                   overwrite: bool = False) -> Dict[str, Any]:
+        """
+        以分塊串流方式匯入 CSV，驗證後存為 <資料集>.parquet 並寫入目錄項目。
+        驗證失敗時拋出 IngestError，既有的同名資料集不受影響。
+        :param source: CSV 檔案路徑或可 seek 的檔案物件（例如上傳檔案的串流）。
+        :param dataset_name: 資料集名稱。
+        :param chunksize: 每個區塊的列數，預設為 Config.INGEST_CHUNK_ROWS。
+        :param overwrite: 取代同名的資料集（含舊版 CSV）；預設不取代。
+        :return: {'rows', 'columns', 'date_format', 'catalog'}。
+        :raises InvalidDatasetNameError: 資料集名稱含路徑。
+        :raises DatasetExistsError: 資料集已存在且未指定 overwrite。
+        """
+        if not overwrite and self.dataset_exists(dataset_name):
+            raise DatasetExistsError(f"資料集名稱 '{dataset_name}' 已存在。")
+        output_path = self.get_parquet_path(dataset_name)
+        ingestor = CsvIngestor(chunksize or Config.INGEST_CHUNK_ROWS)
+        result = ingestor.ingest(source, output_path, dataset_name)
+        return self.record_ingest(dataset_name, result)
+
+    def dataset_exists(self, dataset_name: str) -> bool:
+        """
+        是否已有同名的資料集：匯入的 Parquet 檔或舊版上傳流程儲存的同名 CSV。
+        :raises InvalidDatasetNameError: 資料集名稱含路徑。
+        """
+        legacy_path = self._legacy_path(dataset_name)
+        return os.path.isfile(self.get_parquet_path(dataset_name)) or os.path.isfile(legacy_path)
+
+    def get_parquet_path(self, dataset_name: str) -> str:
+        """
+        取得匯入資料集的 Parquet 檔案路徑。
+        :raises InvalidDatasetNameError: 資料集名稱含路徑。
+        """
+        return os.path.join(self.data_storage_dir, f"{validate_dataset_name(dataset_name)}.parquet")
+
+    def _legacy_path(self, dataset_name: str) -> str:
+        """
+        舊版上傳流程以資料集名稱作為檔名儲存的 CSV 路徑。
+        """
+        return os.path.join(self.data_storage_dir, validate_dataset_name(dataset_name))
+
+    def record_ingest(self, dataset_name: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        CsvIngestor 寫入 Parquet 檔案後的收尾：移除同名的舊版 CSV 並寫入目錄項目
+        （批次匯入時由主程序對工作程序的結果呼叫）。
+        :param result: CsvIngestor.ingest 的結果。
+        :return: result；目錄項目寫入失敗時 catalog 為 None。
+        """
+        # 舊版上傳流程以 CSV 儲存同名資料集，載入時會優先於 Parquet，匯入成功後移除
+        legacy_path = self._legacy_path(dataset_name)
+        if os.path.isfile(legacy_path):
+            os.remove(legacy_path)
+
+        try:
+            self.catalog.write_entry(dataset_name, result['catalog'])
+        except OSError as e:
+            # 目錄項目可之後以 python -m src.data.catalog 補建，不影響匯入結果
+            logger.warning("寫入資料集目錄項目失敗: %s", e)
+            result['catalog'] = None
+        return result
+
+    def catalog_dataset(self, dataset_name: str, file_path: str = None) -> Dict[str, Any]:
+        """
+        計算資料集的統計資訊並寫入目錄項目（於資料寫入後呼叫）。
+        :param dataset_name: 資料集名稱。
+        :param file_path: 資料檔路徑（可選），預設為資料目錄下的同名檔案。
+        :return: 目錄項目。
+        """
+        return self.catalog.build_entry(dataset_name, file_path)
+
+    def get_dataset_entry(self, dataset_name: str) -> Dict[str, Any] | None:
+        """
+        取得資料集的目錄項目（不讀取資料檔）。
+        """
+        return self.catalog.get_entry(dataset_name)
+
+    def list_datasets(self) -> List[Dict[str, Any]]:
+        """
+        列出所有資料集及其目錄項目；尚未建立目錄項目的資料檔只列出名稱與檔案大小。
+        """
+        entries = self.catalog.list_entries()
+        cataloged = {entry['dataset_name'] for entry in entries}
+        cataloged |= {entry.get('file_name') for entry in entries}
+        for name in sorted(os.listdir(self.data_storage_dir)):
+            if name.endswith(('.csv', '.parquet')) and name not in cataloged:
+                entries.append({
+                    'dataset_name': name,
+                    'cataloged': False,
+                    'size': os.path.getsize(os.path.join(self.data_storage_dir, name))
+                })
+        return entries
+
+    def get_dataset(self, dataset_name: str, dtype: str = None) -> pd.DataFrame:
         """
-        根據資料集名稱獲取處理後的資料。
+        根據資料集名稱獲取處理後的資料（以 LRU 快取保存最近使用的資料集，檔案更新時重新載入）。
+        :param dtype: 浮點欄位的目標型別（可選），訓練與推論路徑傳入管線型別。
         """
-        return self.data_loader.load_dataframe(dataset_name)
+        path = self.data_loader.resolve_dataset_path(dataset_name)
+        stat = os.stat(path)
+        df = self.cache.get(
+            (dataset_name, dtype),
+            lambda: self.data_loader.load_dataframe(dataset_name, dtype=dtype),
+            signature=(path, stat.st_mtime_ns, stat.st_size)
+        )
+        # 淺複製：呼叫端新增或替換欄位不會影響快取中的資料集
+        return df.copy(deep=False)
 
     def get_all_datasets(self) -> List[str]:
         """
@@ -1,47 +1,131 @@
 import uuid
 import datetime
+import functools
+import time
 from typing import Dict, Any, List, Tuple
 import numpy as np
 
 from src.utils.model_manager import ModelManager
 from src.utils.metadata_manager import MetadataManager
-from src.models.trainer import ModelTrainer
+from src.utils.lru_cache import LRUCache
+from src.utils.logger import get_logger
+from src.utils.metrics import REGISTRY
+from src.utils.stage_timer import stage
+from src.config import Config
+
+logger = get_logger('model_service')
+
+# ModelTrainer 會匯入 TensorFlow，延遲到訓練路徑第一次使用時才匯入，
+# 讓不需要模型的 API（狀態、歷史資料、模型列表）不必等待 TensorFlow 載入
+
+INFERENCE_BATCH_SIZE = REGISTRY.histogram('inference_batch_size', 'Samples per inference batch.',
+                                          buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512))
+INFERENCE_DURATION = REGISTRY.histogram('inference_batch_duration_seconds',
+                                        'Model forward pass time per batch.', ['runtime'],
+                                        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                                                 0.05, 0.1, 0.25, 0.5, 1.0))
+MODEL_LOAD_DURATION = REGISTRY.histogram(
+    'model_load_duration_seconds', 'Time to load a model or scaler from disk on a cache miss.',
+    ['kind'])
+TRAINING_DURATION = REGISTRY.histogram('training_job_duration_seconds',
+                                       'Wall time of training jobs.', ['kind'],
+                                       buckets=(1, 5, 10, 30, 60, 120, 300, 600,
+                                                1200, 1800, 3600, 7200))
+TRAINING_JOBS = REGISTRY.counter('training_jobs_total',
+                                 'Finished training jobs by kind and status.',
+                                 ['kind', 'status'])
+TRAINING_IN_PROGRESS = REGISTRY.gauge('training_jobs_in_progress',
+                                      'Training jobs currently running in this process.',
+                                      ['kind'])
+
+
+def observe_training(kind: str):
+    """
+    記錄訓練任務的耗時、結果與進行中的數量。
+    :param kind: 任務類型（single、panel、finetune、bulk）。
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            in_progress = TRAINING_IN_PROGRESS.labels(kind)
+            in_progress.inc()
+            start = time.perf_counter()
+            status = 'failed'
+            try:
+                result = func(*args, **kwargs)
+                status = 'completed'
+                return result
+            finally:
+                in_progress.dec()
+                TRAINING_DURATION.labels(kind).observe(time.perf_counter() - start)
+                TRAINING_JOBS.labels(kind, status).inc()
+        return wrapper
+    return decorator
+
 
 class ModelService:
     def __init__(self, model_manager: ModelManager, metadata_manager: MetadataManager):
         self.model_manager = model_manager
         self.metadata_manager = metadata_manager
+        # 推論模型與 scaler 快取：切換回最近使用過的模型時不必重新讀檔
+        self.model_cache = LRUCache('model', Config.MODEL_CACHE_SIZE)
+        self.scaler_cache = LRUCache('scaler', Config.MODEL_CACHE_SIZE)
 
+    @observe_training('single')
     def train_and_save_model(self, dataset_name: str, n_days: int,
                              model_config: Dict[str, Any],
-                             training_data: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Any]) -> str:
+                             training_data: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Any],
+                             model_id: str = None) -> str:
         """
         訓練模型並儲存，同時記錄元資料。
-        整合自動超參數調整功能。
+        整合自動超參數調整功能。訓練過程會寫入檢查點，若傳入的 model_id 仍有未完成的
+        檢查點，則沿用原本的超參數並從最後一個檢查點繼續訓練。
         :param dataset_name: 用於訓練的資料集名稱。
         :param n_days: 預測天數。
         :param model_config: 模型配置（包含 input_shape, output_units, look_back, target_column 等）。
         :param training_data: 訓練數據 (X_train, y_train, X_val, y_val, scaler)。
+        :param model_id: 要續訓的任務 ID（可選），未提供時建立新的模型 ID。
         :return: 訓練後模型的 ID。
         """
-        model_id = str(uuid.uuid4())
-        model_name = f"Model_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        model_id = model_id or str(uuid.uuid4())
+        checkpoint_dir = self.model_manager.get_checkpoint_dir(model_id)
+        job = self.model_manager.load_training_job(model_id)
 
         X_train, y_train, X_val, y_val, scaler = training_data
 
         # 初始化模型訓練器
+        from src.models.trainer import ModelTrainer
         trainer = ModelTrainer()
 
-        # 執行自動超參數調整
-        print(f"開始為模型 {model_id} 執行自動超參數調整...")
-        best_hyperparameters = trainer.auto_tune_hyperparameters(
-            X_train, y_train, X_val, y_val,
-            input_shape=model_config['input_shape'],
-            output_units=model_config['output_units']
-        )
+        if job:
+            # 續訓：沿用原始任務的名稱與超參數，確保與檢查點一致
+            logger.info(f"從檢查點續訓模型 {model_id}（已完成 {job['completed_epochs']} 個 epoch）...")
+            model_name = job['model_name']
+            best_hyperparameters = job['hyperparameters']
+        else:
+            model_name = f"Model_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+            # 執行自動超參數調整
+            logger.info(f"開始為模型 {model_id} 執行自動超參數調整...")
+            best_hyperparameters = trainer.auto_tune_hyperparameters(
+                X_train, y_train, X_val, y_val,
+                input_shape=model_config['input_shape'],
+                output_units=model_config['output_units']
+            )
+
+            self.model_manager.save_training_job(model_id, {
+                "model_id": model_id,
+                "model_name": model_name,
+                "dataset_name": dataset_name,
+                "n_days": n_days,
+                "look_back": model_config.get('look_back'),
+                "target_column": model_config.get('target_column'),
+                "hyperparameters": best_hyperparameters,
+                "created_at": datetime.datetime.now().isoformat()
+            })
 
         # 使用最佳超參數建構模型
-        print(f"使用最佳超參數建構模型: {best_hyperparameters}")
+        logger.info(f"使用最佳超參數建構模型: {best_hyperparameters}")
         model = trainer.build_model(
             input_shape=model_config['input_shape'],
             output_units=model_config['output_units'],
@@ -49,33 +133,192 @@ class ModelService:
         )
 
         # 訓練模型
-        print(f"開始訓練模型 {model_id}...")
-        history = trainer.train_model(X_train, y_train, X_val, y_val, best_hyperparameters)
+        logger.info(f"開始訓練模型 {model_id}...")
+        history = trainer.train_model(X_train, y_train, X_val, y_val, best_hyperparameters,
+                                      checkpoint_dir=checkpoint_dir)
 
         # 評估模型
-        print(f"評估模型 {model_id}...")
+        logger.info(f"評估模型 {model_id}...")
         performance_metrics = trainer.evaluate_model(X_val, y_val)
-        print(f"模型效能: {performance_metrics}")
+        logger.info(f"模型效能: {performance_metrics}")
 
-        # 儲存模型
+        # 儲存模型與 scaler（推論與微調需沿用相同的正規化）
         trained_model = trainer.get_model()
         model_path = self.model_manager.save_model(trained_model, model_id)
-        print(f"模型已儲存至: {model_path}")
+        logger.info(f"模型已儲存至: {model_path}")
+        if scaler is not None:
+            self.model_manager.save_scaler(scaler, model_id)
 
         # 記錄完整的元資料
-        metadata = {
+        metadata = self._build_metadata(
+            model_id, model_name, model_path, dataset_name, n_days,
+            model_config, best_hyperparameters, performance_metrics, history
+        )
+        metadata["version"] = 1
+        metadata["parent_model_id"] = None
+        self.metadata_manager.add_metadata(metadata)
+        logger.info(f"模型元資料已記錄: {model_id}")
+
+        # 模型與元資料皆已保存，檢查點不再需要
+        self.model_manager.remove_checkpoint(model_id)
+
+        return model_id
+
+    @observe_training('panel')
+    def train_panel_model(self, dataset_names: List[str], n_days: int,
+                          model_config: Dict[str, Any], panel_data: Dict[str, Any],
+                          use_ticker_embedding: bool = True) -> str:
+        """
+        以多個資料集訓練單一面板模型，可服務其中任何一檔股票。
+        :param dataset_names: 參與訓練的資料集名稱（順序即 ticker 編號）。
+        :param n_days: 預測天數。
+        :param model_config: 模型配置（look_back, target_column, input_shape, output_units, feature_columns）。
+        :param panel_data: DataPreprocessor.preprocess_panel 的輸出。
+        :param use_ticker_embedding: 是否加入 ticker embedding 輸入。
+        :return: 面板模型的 ID。
+        """
+        model_id = str(uuid.uuid4())
+        model_name = f"Panel_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        def model_inputs(part):
+            X = panel_data[f'X_{part}']
+            if not use_ticker_embedding:
+                return X
+            return [X, panel_data[f'ticker_{part}'].reshape(-1, 1)]
+
+        X_train, X_val = model_inputs('train'), model_inputs('val')
+        y_train, y_val = panel_data['y_train'], panel_data['y_val']
+
+        from src.models.trainer import ModelTrainer
+        trainer = ModelTrainer()
+        hyperparameters = trainer.auto_tune_hyperparameters(
+            X_train, y_train, X_val, y_val,
+            input_shape=model_config['input_shape'],
+            output_units=model_config['output_units']
+        )
+        trainer.build_panel_model(
+            input_shape=model_config['input_shape'],
+            output_units=model_config['output_units'],
+            n_tickers=len(dataset_names),
+            hyperparameters=hyperparameters,
+            use_ticker_embedding=use_ticker_embedding
+        )
+
+        logger.info(f"開始訓練面板模型 {model_id}（{len(dataset_names)} 個資料集，"
+              f"{len(panel_data['y_train'])} 組序列）...")
+        history = trainer.train_model(X_train, y_train, X_val, y_val, hyperparameters)
+        performance_metrics = trainer.evaluate_model(X_val, y_val)
+        logger.info(f"面板模型效能: {performance_metrics}")
+
+        model_path = self.model_manager.save_model(trainer.get_model(), model_id)
+        # 每檔各自的 scaler 以 {資料集名稱: scaler} 的形式儲存
+        self.model_manager.save_scaler(panel_data['scalers'], model_id)
+
+        metadata = self._build_metadata(
+            model_id, model_name, model_path, f"panel({len(dataset_names)})", n_days,
+            model_config, hyperparameters, performance_metrics, history
+        )
+        metadata.update({
+            "version": 1,
+            "parent_model_id": None,
+            "panel": True,
+            "dataset_names": list(dataset_names),
+            "ticker_index": {name: idx for idx, name in enumerate(dataset_names)},
+            "use_ticker_embedding": use_ticker_embedding
+        })
+        self.metadata_manager.add_metadata(metadata)
+        logger.info(f"面板模型元資料已記錄: {model_id}")
+
+        return model_id
+
+    @observe_training('finetune')
+    def fine_tune_model(self, parent_model_id: str,
+                        training_data: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray],
+                        epochs: int = None, learning_rate: float = None,
+                        data_end_date: str = None) -> str:
+        """
+        以既有模型的權重為起點，只用最近的資料視窗做少量 epoch 的微調，
+        並儲存為新版本的模型（元資料中記錄父模型）。
+        :param parent_model_id: 要微調的既有模型 ID。
+        :param training_data: 以父模型 scaler 與特徵欄位處理後的 (X_train, y_train, X_val, y_val)。
+        :param epochs: 微調 epoch 數，預設為 Config.FINE_TUNE_EPOCHS。
+        :param learning_rate: 微調學習率（可選），預設為父模型學習率乘以 Config.FINE_TUNE_LR_FACTOR。
+        :param data_end_date: 微調資料的最後日期（可選），記錄於元資料中。
+        :return: 新模型的 ID。
+        """
+        parent = self.metadata_manager.get_metadata_by_id(parent_model_id)
+        if not parent:
+            raise ValueError(f"找不到模型 '{parent_model_id}' 的元資料。")
+
+        X_train, y_train, X_val, y_val = training_data
+        model_id = str(uuid.uuid4())
+        version = parent.get('version', 1) + 1
+        epochs = epochs or Config.FINE_TUNE_EPOCHS
+
+        # 載入父模型權重（含優化器狀態）作為起點
+        from src.models.trainer import ModelTrainer
+        trainer = ModelTrainer()
+        trainer.model = self.model_manager.load_model(parent_model_id)
+
+        hyperparameters = dict(parent.get('hyperparameters') or Config.DEFAULT_HYPERPARAMETERS)
+        if learning_rate is None:
+            learning_rate = hyperparameters.get('learning_rate', 0.001) * Config.FINE_TUNE_LR_FACTOR
+        trainer.model.optimizer.learning_rate = learning_rate
+        fine_tune_hyperparameters = dict(hyperparameters, epochs=epochs, learning_rate=learning_rate,
+                                         early_stopping_patience=Config.FINE_TUNE_PATIENCE)
+
+        logger.info(f"開始微調模型 {parent_model_id} -> {model_id}（{len(X_train)} 組序列，{epochs} 個 epoch）...")
+        history = trainer.train_model(X_train, y_train, X_val, y_val, fine_tune_hyperparameters)
+        performance_metrics = trainer.evaluate_model(X_val, y_val)
+        logger.info(f"微調後模型效能: {performance_metrics}")
+
+        model_path = self.model_manager.save_model(trainer.get_model(), model_id)
+        scaler = self.model_manager.load_scaler(parent_model_id)
+        if scaler is not None:
+            self.model_manager.save_scaler(scaler, model_id)
+
+        metadata = self._build_metadata(
+            model_id, f"{parent.get('model_name', 'Model')}_v{version}", model_path,
+            parent['dataset_name'], parent['n_days'], parent['model_config'],
+            fine_tune_hyperparameters, performance_metrics, history
+        )
+        metadata.update({
+            "version": version,
+            "parent_model_id": parent_model_id,
+            "root_model_id": parent.get('root_model_id') or parent_model_id,
+            "fine_tune": {
+                "epochs": epochs,
+                "learning_rate": learning_rate,
+                "windows": int(len(X_train) + len(X_val)),
+                "data_end_date": data_end_date
+            }
+        })
+        self.metadata_manager.add_metadata(metadata)
+        logger.info(f"微調模型元資料已記錄: {model_id}（父模型 {parent_model_id}）")
+
+        return model_id
+
+    @staticmethod
+    def _build_metadata(model_id: str, model_name: str, model_path: str, dataset_name: str,
+                        n_days: int, model_config: Dict[str, Any], hyperparameters: Dict[str, Any],
+                        performance_metrics: Dict[str, float], history: Any) -> Dict[str, Any]:
+        """
+        組合模型元資料（一般訓練與微調共用）。
+        """
+        return {
             "model_id": model_id,
             "model_name": model_name,
             "file_path": model_path,
             "training_date": datetime.datetime.now().isoformat(),
             "performance_metrics": performance_metrics,
-            "hyperparameters": best_hyperparameters,
+            "hyperparameters": hyperparameters,
             "model_config": {
                 "look_back": model_config.get('look_back'),
                 "n_days": n_days,
                 "target_column": model_config.get('target_column'),
                 "input_shape": list(model_config['input_shape']),
-                "output_units": model_config['output_units']
+                "output_units": model_config['output_units'],
+                "feature_columns": model_config.get('feature_columns')
             },
             "dataset_name": dataset_name,
             "n_days": n_days,
@@ -83,13 +326,47 @@ class ModelService:
                 "final_loss": float(history.history['loss'][-1]) if 'loss' in history.history else None,
                 "final_val_loss": float(history.history['val_loss'][-1]) if 'val_loss' in history.history else None,
                 "final_mae": float(history.history['mae'][-1]) if 'mae' in history.history else None,
-                "final_val_mae": float(history.history['val_mae'][-1]) if 'val_mae' in history.history else None
+                "final_val_mae": float(history.history['val_mae'][-1]) if 'val_mae' in history.history else None,
+                "epochs_trained": history.epoch[-1] + 1 if isinstance(history.epoch, list) and history.epoch else None
             }
         }
-        self.metadata_manager.add_metadata(metadata)
-        print(f"模型元資料已記錄: {model_id}")
 
-        return model_id
+    def load_scaler(self, model_id: str) -> Any | None:
+        """
+        載入模型訓練時儲存的 scaler（舊版模型返回 None），以快取保存最近使用的 scaler。
+        """
+        return self.scaler_cache.get(
+            model_id, lambda: self._timed_load('scaler', self.model_manager.load_scaler, model_id)
+        )
+
+    def load_inference_model(self, model_id: str) -> Any:
+        """
+        載入推論用模型，以快取保存最近使用的模型。
+        模型 ID 對應的檔案在訓練完成後不再改變（微調會建立新的模型 ID），因此不需檢查檔案是否更新。
+        """
+        return self.model_cache.get(
+            model_id,
+            lambda: self._timed_load('model', self.model_manager.load_inference_model, model_id)
+        )
+
+    @staticmethod
+    def _timed_load(kind: str, loader, model_id: str) -> Any:
+        with MODEL_LOAD_DURATION.labels(kind).time():
+            return loader(model_id)
+
+    def get_training_job(self, model_id: str) -> Dict[str, Any] | None:
+        """
+        取得尚未完成（仍有檢查點）的訓練任務設定與進度。
+        """
+        return self.model_manager.load_training_job(model_id)
+
+    def get_resumable_jobs(self) -> List[Dict[str, Any]]:
+        """
+        列出所有可從檢查點續訓的訓練任務。
+        """
+        jobs = [self.model_manager.load_training_job(model_id)
+                for model_id in self.model_manager.list_checkpoint_ids()]
+        return [job for job in jobs if job]
 
     def get_model_metadata(self, model_id: str) -> Dict[str, Any] | None:
         """
@@ -103,6 +380,16 @@ class ModelService:
         """
         return self.metadata_manager.get_all_metadata()
 
+    def query_model_metadata(self, sort_by: str = 'training_date', descending: bool = True,
+                             limit: int = None, offset: int = 0, **filters) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        依條件查詢模型元資料（排序與分頁），同時返回符合條件的總數。
+        :return: (元資料列表, 總數)
+        """
+        models = self.metadata_manager.query_metadata(sort_by=sort_by, descending=descending,
+                                                      limit=limit, offset=offset, **filters)
+        return models, self.metadata_manager.count_metadata(**filters)
+
     def predict(self, model_id: str, input_data: Any) -> Any:
         """
         使用指定模型進行預測。
@@ -110,8 +397,54 @@ class ModelService:
         :param input_data: 預測輸入數據。
         :return: 預測結果。
         """
-        model = self.model_manager.load_model(model_id)
-        predictions = model.predict(input_data)
+        # 有匯出權重時以 NumPy 推論，不需載入 TensorFlow
+        with stage('model_load'):
+            model = self.load_inference_model(model_id)
+        if isinstance(input_data, np.ndarray):
+            input_data = input_data.astype(Config.DEFAULT_DTYPE, copy=False)
+        batch = input_data if isinstance(input_data, np.ndarray) else input_data[0]
+        runtime = 'numpy' if type(model).__name__ == 'NumpyLSTMModel' else 'keras'
+
+        start = time.perf_counter()
+        with stage('forward'):
+            predictions = model.predict(input_data)
+        INFERENCE_DURATION.labels(runtime).observe(time.perf_counter() - start)
+        INFERENCE_BATCH_SIZE.observe(len(batch))
+        return predictions
+
+    def predict_samples(self, model_id: str, input_data: Any, n_samples: int,
+                        dropout_rate: float = None, seed: int = None) -> np.ndarray:
+        """
+        以 Monte Carlo dropout 取得 n_samples 組隨機預測，所有取樣在同一次前向傳播中完成。
+        NumPy 模型只對 dropout 之後的輸出層取樣；Keras 模型將輸入複製 n_samples 份，
+        以訓練模式（啟用 dropout）呼叫一次。
+        :param model_id: 要使用的模型 ID。
+        :param input_data: 預測輸入數據（同 predict()）。
+        :param n_samples: 取樣數。
+        :param dropout_rate: 較早的 NumPy 匯出檔未記錄 dropout 比例時使用（通常取自模型元資料）。
+        :param seed: 亂數種子（可選，僅 NumPy 模型）。
+        :return: 預測結果 (n_samples, batch, output_units)。
+        """
+        with stage('model_load'):
+            model = self.load_inference_model(model_id)
+        if isinstance(input_data, np.ndarray):
+            input_data = input_data.astype(Config.DEFAULT_DTYPE, copy=False)
+        batch = input_data if isinstance(input_data, np.ndarray) else input_data[0]
+        runtime = 'numpy' if type(model).__name__ == 'NumpyLSTMModel' else 'keras'
+
+        start = time.perf_counter()
+        with stage('forward'):
+            if runtime == 'numpy':
+                if model.dropout_rate is not None:
+                    dropout_rate = None
+                predictions = model.predict_samples(input_data, n_samples, dropout_rate=dropout_rate, seed=seed)
+            else:
+                inputs = input_data if isinstance(input_data, (list, tuple)) else [input_data]
+                tiled = [np.tile(x, (n_samples,) + (1,) * (np.ndim(x) - 1)) for x in inputs]
+                outputs = model(tiled if len(tiled) > 1 else tiled[0], training=True)
+                predictions = np.asarray(outputs).reshape(n_samples, len(batch), -1)
+        INFERENCE_DURATION.labels(runtime).observe(time.perf_counter() - start)
+        INFERENCE_BATCH_SIZE.observe(len(batch) * n_samples)
         return predictions
 
     def update_model_performance(self, model_id: str, metrics: Dict[str, Any]):
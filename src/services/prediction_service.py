@@ -0,0 +1,201 @@
+"""
+預測服務
+取得模型元資料、載入資料集尾段、以訓練時的 scaler 預處理並執行前向傳播。
+讀取檔案（load_inputs）與運算（compute）分為兩步，非同步 API 可分別交給不同的執行緒池；
+指定 samples 時以 Monte Carlo dropout 取樣，由取樣分布計算每個預測日的上漲機率、平均漲跌幅與分位數。
+各階段以 stage() 標記，請求啟用 StageTimer 時可取得耗時明細（Server-Timing）。
+"""
+
+from datetime import timedelta
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.config import Config
+from src.data.preprocessor import DataPreprocessor
+from src.services.data_service import DataService
+from src.services.model_service import ModelService
+from src.utils.stage_timer import stage
+
+
+class ModelNotFoundError(LookupError):
+    """
+    指定的模型 ID 沒有元資料。
+    """
+
+
+class PredictionService:
+    def __init__(self, data_service: DataService, model_service: ModelService,
+                 data_preprocessor: DataPreprocessor = None):
+        self.data_service = data_service
+        self.model_service = model_service
+        self.data_preprocessor = data_preprocessor or DataPreprocessor()
+
+    def predict(self, model_id: str, n_days: int, dataset_name: str = None,
+                samples: int = 0) -> List[Dict[str, Any]]:
+        """
+        以資料集最後 look_back 個資料點預測未來 n_days 天。
+        :param model_id: 模型 ID。
+        :param n_days: 預測天數。
+        :param dataset_name: 面板模型要預測的資料集（必須是參與訓練的資料集），單一資料集模型忽略。
+        :param samples: Monte Carlo dropout 取樣數，0 表示單次確定性預測。
+        :return: [{'target_date', 'up_down_probability', 'change_magnitude'}]；
+                 取樣時另含 'change_quantiles'（{'p5': ..., 'p50': ..., 'p95': ...}）。
+        :raises ModelNotFoundError: 模型不存在。
+        :raises ValueError: 面板模型未指定有效的資料集。
+        :raises FileNotFoundError: 資料集不存在。
+        """
+        return self.compute(self.load_inputs(model_id, n_days, dataset_name, samples))
+
+    def load_inputs(self, model_id: str, n_days: int, dataset_name: str = None,
+                    samples: int = 0) -> Dict[str, Any]:
+        """
+        預測中讀取檔案的部分：模型元資料、資料集、scaler 與推論模型（皆經由快取）。
+        非同步 API 在 I/O 執行緒池執行此步驟，再將 compute() 交給運算執行緒池。
+        參數與例外同 predict()。
+        :return: compute() 的輸入。
+        """
+        with stage('metadata'):
+            metadata = self.model_service.get_model_metadata(model_id)
+        if not metadata:
+            raise ModelNotFoundError(model_id)
+
+        # 載入訓練資料集以取得最新資料點
+        ticker_idx = None
+        if metadata.get('panel'):
+            # 面板模型可服務任何參與訓練的資料集，由查詢參數指定
+            if dataset_name not in metadata['ticker_index']:
+                raise ValueError("Panel models require a 'dataset_name' the model was trained on.")
+            ticker_idx = metadata['ticker_index'][dataset_name]
+        else:
+            dataset_name = metadata['dataset_name']
+
+        with stage('dataset'):
+            df = self.data_service.get_dataset(dataset_name, dtype=self.data_preprocessor.dtype)
+
+        # 有儲存 scaler 的模型沿用訓練時的正規化與特徵順序，只處理資料尾段
+        with stage('scaler_load'):
+            scaler = self.model_service.load_scaler(model_id)
+        if ticker_idx is not None and scaler is not None:
+            scaler = scaler[dataset_name]
+
+        # 推論模型也在此載入快取（ModelService 內以 model_load 計時），compute() 只做前向傳播
+        self.model_service.load_inference_model(model_id)
+
+        return {'model_id': model_id, 'n_days': n_days, 'metadata': metadata, 'df': df,
+                'scaler': scaler, 'ticker_idx': ticker_idx, 'samples': samples}
+
+    def compute(self, inputs: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        預測中的運算部分：預處理資料尾段、前向傳播並格式化結果。
+        :param inputs: load_inputs() 的結果。
+        :return: 同 predict()。
+        """
+        metadata, df, n_days = inputs['metadata'], inputs['df'], inputs['n_days']
+        scaler, ticker_idx = inputs['scaler'], inputs['ticker_idx']
+        preprocessor = self.data_preprocessor
+
+        # 在預處理前先保存最後的日期
+        last_date = pd.to_datetime(df.iloc[-1]['date'] if 'date' in df.columns else df.iloc[-1]['Date'])
+
+        look_back = metadata['model_config']['look_back']
+        target_column = metadata['model_config']['target_column']
+
+        # 只需要最後 look_back 個資料點進行預測
+        feature_columns = metadata['model_config'].get('feature_columns')
+        if scaler is not None and feature_columns:
+            X, _, scaler = preprocessor.preprocess(
+                df, look_back, n_days, target_column,
+                scaler=scaler, feature_columns=feature_columns, recent_windows=1
+            )
+        else:
+            X, _, scaler = preprocessor.preprocess(df, look_back, n_days, target_column)
+
+        # 取得最後一組輸入資料
+        last_X = X[-1:] if len(X) > 0 else X
+        if ticker_idx is not None and metadata.get('use_ticker_embedding'):
+            last_X = [last_X, np.full((len(last_X), 1), ticker_idx, dtype=np.int32)]
+
+        if inputs.get('samples'):
+            # 取樣的比較基準：模型輸入視窗最後一天的目標值（正規化後）。
+            # 特徵順序取自模型元資料或本次擬合的 scaler，不讀取多個請求共用的預處理器狀態
+            columns = feature_columns or list(scaler.feature_names_in_)
+            target_idx = [col.lower() for col in columns].index(target_column.lower())
+            reference = float(X[-1, -1, target_idx])
+            dropout_rate = (metadata.get('hyperparameters') or {}).get('dropout_rate')
+            samples = self.model_service.predict_samples(inputs['model_id'], last_X, inputs['samples'],
+                                                         dropout_rate=dropout_rate)
+            with stage('format'):
+                return self.summarize_samples(samples[:, 0, :], reference, scaler, target_idx, last_date, n_days)
+
+        # 使用模型服務進行預測（模型已於 load_inputs 載入快取，前向傳播在 ModelService 內計時）
+        predictions = self.model_service.predict(inputs['model_id'], last_X)
+
+        with stage('format'):
+            return self.format_predictions(predictions, last_date, n_days)
+
+    @staticmethod
+    def format_predictions(predictions: Any, last_date: pd.Timestamp, n_days: int) -> List[Dict[str, Any]]:
+        """
+        將模型輸出轉換為每個目標日期的漲跌機率與幅度。
+        """
+        prediction_results = []
+        for i in range(n_days):
+            target_date = last_date + timedelta(days=i+1)
+
+            # 假設預測輸出為價格變化
+            # 計算漲跌機率和幅度（這裡需要根據實際模型輸出調整）
+            pred_value = float(predictions[0][i]) if len(predictions.shape) > 1 else float(predictions[i])
+
+            # 簡化處理：將預測值轉換為漲跌機率和幅度
+            up_down_probability = 0.5 + (pred_value * 0.1)  # 示例計算
+            up_down_probability = max(0.0, min(1.0, up_down_probability))
+
+            change_magnitude = pred_value * 0.01  # 示例：轉換為百分比
+
+            prediction_results.append({
+                "target_date": target_date.strftime('%Y-%m-%d'),
+                "up_down_probability": up_down_probability,
+                "change_magnitude": change_magnitude
+            })
+        return prediction_results
+
+    @staticmethod
+    def summarize_samples(samples: np.ndarray, reference: float, scaler: Any, target_idx: int,
+                          last_date: pd.Timestamp, n_days: int) -> List[Dict[str, Any]]:
+        """
+        由 Monte Carlo dropout 的取樣計算每個目標日期的上漲機率、平均漲跌幅與漲跌幅分位數。
+        取樣與基準皆以 scaler 還原為價格後，計算相對於基準的漲跌幅。
+        :param samples: 正規化後的預測取樣 (n_samples, n_days)。
+        :param reference: 比較基準（模型輸入最後一天的正規化目標值）。
+        :param scaler: 模型使用的 MinMaxScaler。
+        :param target_idx: 目標欄位在特徵中的索引。
+        :param last_date: 資料集最後一天。
+        :param n_days: 預測天數。
+        :return: 同 predict()。
+        """
+        # MinMaxScaler 對每個欄位是線性轉換：原始值 = (正規化值 - min_) / scale_
+        offset, scale = float(scaler.min_[target_idx]), float(scaler.scale_[target_idx])
+        prices = (samples.astype(np.float64) - offset) / scale
+        base_price = (reference - offset) / scale
+        if base_price == 0:
+            raise ValueError("比較基準價格為 0，無法計算漲跌幅。")
+        changes = prices / base_price - 1.0
+
+        quantiles = Config.MC_DROPOUT_QUANTILES
+        quantile_values = np.quantile(changes, quantiles, axis=0)
+        up_probability = (changes > 0).mean(axis=0)
+        mean_change = changes.mean(axis=0)
+
+        prediction_results = []
+        for i in range(n_days):
+            target_date = last_date + timedelta(days=i+1)
+            prediction_results.append({
+                "target_date": target_date.strftime('%Y-%m-%d'),
+                "up_down_probability": float(up_probability[i]),
+                "change_magnitude": float(mean_change[i]),
+                "change_quantiles": {f"p{round(q * 100)}": float(quantile_values[j, i])
+                                     for j, q in enumerate(quantiles)},
+            })
+        return prediction_results
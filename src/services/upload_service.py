@@ -0,0 +1,232 @@
+"""
+分塊、可續傳的資料上傳
+瀏覽器將檔案切成固定大小的區塊直接送到 API，每個區塊依位移附加到暫存檔，
+上傳工作階段（<upload_id>.json）與已接收的內容（<upload_id>.part）都存放在上傳目錄，
+連線中斷或伺服器重新啟動後，用戶端查詢已接收的位元組數即可從中斷處繼續。
+全部接收後以 DataService.ingest_csv 串流匯入為資料集。
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Any, BinaryIO, Dict
+
+from src.config import Config
+from src.data.ingest import map_columns
+from src.services.data_service import validate_dataset_name
+
+UPLOAD_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+COPY_BLOCK_SIZE = 64 * 1024
+
+
+class UploadOffsetError(ValueError):
+    """
+    區塊的起始位移與伺服器已接收的位元組數不符，用戶端應從 received 繼續。
+    """
+
+    def __init__(self, message: str, received: int):
+        super().__init__(message)
+        self.received = received
+
+
+class ChunkedUploadService:
+    def __init__(self, upload_dir: str, chunk_size: int = None, max_size: int = None, session_ttl: float = None):
+        """
+        :param upload_dir: 存放上傳工作階段與暫存檔的目錄。
+        :param chunk_size: 建議用戶端使用的區塊大小（位元組），也是單一區塊的上限。
+        :param max_size: 單一檔案大小上限（位元組）。
+        :param session_ttl: 未完成的工作階段保留秒數，逾期後清除。
+        """
+        self.upload_dir = upload_dir
+        self.chunk_size = chunk_size or Config.UPLOAD_CHUNK_SIZE
+        self.max_size = max_size or Config.UPLOAD_MAX_SIZE
+        self.session_ttl = session_ttl or Config.UPLOAD_SESSION_TTL
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, upload_id: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def _paths(self, upload_id: str) -> tuple[str, str]:
+        if not UPLOAD_ID_PATTERN.fullmatch(upload_id or ''):
+            raise FileNotFoundError(f"找不到上傳工作階段: {upload_id}")
+        base = os.path.join(self.upload_dir, upload_id)
+        return f"{base}.json", f"{base}.part"
+
+    def _save_session(self, session: Dict[str, Any]):
+        session_path, _ = self._paths(session['upload_id'])
+        tmp_path = f"{session_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(session, f, ensure_ascii=False)
+        os.replace(tmp_path, session_path)
+
+    def _load_session(self, upload_id: str) -> Dict[str, Any]:
+        session_path, part_path = self._paths(upload_id)
+        if not os.path.exists(session_path):
+            raise FileNotFoundError(f"找不到上傳工作階段: {upload_id}")
+        with open(session_path, 'r', encoding='utf-8') as f:
+            session = json.load(f)
+        # 已接收的位元組數以暫存檔大小為準，伺服器中斷時未寫完的區塊不會被誤認為已接收
+        session['received'] = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        return session
+
+    def _remove_session(self, upload_id: str):
+        for path in self._paths(upload_id):
+            if os.path.exists(path):
+                os.remove(path)
+        with self._locks_guard:
+            self._locks.pop(upload_id, None)
+
+    def create_session(self, filename: str, dataset_name: str, size: int) -> Dict[str, Any]:
+        """
+        建立上傳工作階段。
+        :param filename: 原始檔案名稱（必須為 .csv）。
+        :param dataset_name: 資料集名稱，預設為檔案名稱。
+        :param size: 檔案大小（位元組）。
+        :return: 工作階段資訊，包含 upload_id、chunk_size 與 received。
+        :raises InvalidDatasetNameError: 資料集名稱含路徑（建立時即拒絕，不必等整個檔案傳完）。
+        """
+        if not filename or not filename.endswith('.csv'):
+            raise ValueError("Invalid file format. Only CSV files are allowed")
+        dataset_name = validate_dataset_name(dataset_name or filename)
+        if not isinstance(size, int) or size <= 0:
+            raise ValueError("'size' must be a positive integer.")
+        if size > self.max_size:
+            raise ValueError(f"File is too large ({size} bytes). Maximum size is {self.max_size} bytes.")
+
+        self.cleanup_expired()
+        now = time.time()
+        session = {
+            'upload_id': uuid.uuid4().hex,
+            'filename': filename,
+            'dataset_name': dataset_name,
+            'size': size,
+            'chunk_size': self.chunk_size,
+            'received': 0,
+            'created_at': now,
+            'updated_at': now
+        }
+        self._save_session(session)
+        open(self._paths(session['upload_id'])[1], 'wb').close()
+        return session
+
+    def get_session(self, upload_id: str) -> Dict[str, Any]:
+        """
+        查詢工作階段（用戶端續傳前取得已接收的位元組數）。
+        """
+        return self._load_session(upload_id)
+
+    def write_chunk(self, upload_id: str, offset: int, stream: BinaryIO, length: int) -> Dict[str, Any]:
+        """
+        將一個區塊附加到暫存檔。
+        :param offset: 區塊在檔案中的起始位移，必須等於已接收的位元組數。
+        :param stream: 區塊內容的串流（例如 request.stream），以固定大小的緩衝區複製。
+        :param length: 區塊長度（Content-Length）。
+        :return: 更新後的工作階段資訊。
+        """
+        with self._lock(upload_id):
+            session = self._load_session(upload_id)
+            if offset != session['received']:
+                raise UploadOffsetError(
+                    f"Chunk offset {offset} does not match received bytes {session['received']}.",
+                    session['received']
+                )
+            if length is None or length <= 0 or length > self.chunk_size:
+                raise ValueError(f"Chunk length must be between 1 and {self.chunk_size} bytes.")
+            if offset + length > session['size']:
+                raise ValueError(f"Chunk exceeds the declared file size {session['size']}.")
+
+            _, part_path = self._paths(upload_id)
+            with open(part_path, 'r+b') as f:
+                f.seek(offset)
+                copied = 0
+                while copied < length:
+                    block = stream.read(min(COPY_BLOCK_SIZE, length - copied))
+                    if not block:
+                        break
+                    f.write(block)
+                    copied += len(block)
+                if copied != length:
+                    # 連線中斷：捨棄不完整的區塊，用戶端從 offset 重送
+                    f.truncate(offset)
+                    raise UploadOffsetError(f"Chunk was incomplete ({copied} of {length} bytes).", offset)
+
+            if offset == 0:
+                self._validate_header(upload_id, part_path, is_last=length == session['size'])
+
+            session['received'] = offset + length
+            session['updated_at'] = time.time()
+            self._save_session(session)
+            return session
+
+    def _validate_header(self, upload_id: str, part_path: str, is_last: bool):
+        """
+        收到第一個區塊後立即檢查標頭，缺少必要欄位時不必等整個檔案上傳完才失敗。
+        標頭超過第一個區塊時略過，留待匯入時檢查。
+        """
+        with open(part_path, 'rb') as f:
+            first_line = f.readline()
+        if not first_line.endswith(b'\n') and not is_last:
+            return
+        try:
+            header = next(csv.reader(io.StringIO(first_line.decode('utf-8-sig'))), [])
+            map_columns(header)
+        except ValueError:
+            # 包含 IngestError 與 UnicodeDecodeError
+            self._remove_session(upload_id)
+            raise
+
+    def complete(self, upload_id: str, data_service: Any) -> Dict[str, Any]:
+        """
+        檔案全部接收後匯入為資料集，並移除工作階段與暫存檔（匯入失敗時亦同，用戶端需修正檔案後重新上傳）。
+        :param data_service: DataService，使用其 ingest_csv 串流匯入。
+        :return: ingest_csv 的結果，另含 dataset_name。
+        """
+        with self._lock(upload_id):
+            session = self._load_session(upload_id)
+            if session['received'] != session['size']:
+                raise UploadOffsetError(
+                    f"Upload is incomplete: received {session['received']} of {session['size']} bytes.",
+                    session['received']
+                )
+            _, part_path = self._paths(upload_id)
+            try:
+                result = data_service.ingest_csv(part_path, session['dataset_name'])
+            finally:
+                self._remove_session(upload_id)
+        result['dataset_name'] = session['dataset_name']
+        return result
+
+    def abort(self, upload_id: str):
+        """
+        取消上傳並刪除暫存檔。
+        """
+        with self._lock(upload_id):
+            self._load_session(upload_id)
+            self._remove_session(upload_id)
+
+    def cleanup_expired(self) -> int:
+        """
+        清除超過保留時間未更新的工作階段。
+        :return: 清除的數量。
+        """
+        removed = 0
+        cutoff = time.time() - self.session_ttl
+        for name in os.listdir(self.upload_dir):
+            upload_id, ext = os.path.splitext(name)
+            if ext != '.json' or not UPLOAD_ID_PATTERN.fullmatch(upload_id):
+                continue
+            try:
+                if os.path.getmtime(os.path.join(self.upload_dir, name)) < cutoff:
+                    self._remove_session(upload_id)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
@@ -0,0 +1,177 @@
+/*
+ * 分塊、可續傳的資料上傳
+ *
+ * 瀏覽器直接將選擇的 CSV 檔案切成區塊送到 Flask API（/api/data/upload/sessions），
+ * 檔案內容不經過 Dash callback，也不需 base64 編碼。
+ * - 每個區塊失敗時以指數退避重試，重試前向伺服器查詢已接收的位元組數並從該處繼續；
+ * - 上傳工作階段的 upload_id 依檔案（名稱、大小、修改時間）記在 localStorage，
+ *   重試用盡或頁面重新整理後，重新選擇同一個檔案即可從中斷處續傳；
+ * - 進度與結果透過 dash_clientside.set_props 寫入 upload-state，由 Dash callback 顯示。
+ */
+(function () {
+    'use strict';
+
+    var DROPZONE_ID = 'chunked-upload-dropzone';
+    var STATE_ID = 'upload-state';
+    var STORAGE_PREFIX = 'chunked-upload:';
+    var MAX_RETRIES = 5;
+    var RETRY_BASE_MS = 1000;
+
+    function setState(state) {
+        if (window.dash_clientside && window.dash_clientside.set_props) {
+            window.dash_clientside.set_props(STATE_ID, {data: state});
+        }
+    }
+
+    function sleep(ms) {
+        return new Promise(function (resolve) { setTimeout(resolve, ms); });
+    }
+
+    function storageKey(file) {
+        return STORAGE_PREFIX + file.name + ':' + file.size + ':' + file.lastModified;
+    }
+
+    function requestJson(url, options) {
+        return fetch(url, options).then(function (response) {
+            return response.json().catch(function () { return {}; }).then(function (body) {
+                return {status: response.status, body: body};
+            });
+        });
+    }
+
+    // 取得可續傳的工作階段（伺服器上仍存在），否則建立新的工作階段
+    function openSession(apiUrl, file) {
+        var key = storageKey(file);
+        var uploadId = window.localStorage.getItem(key);
+        var resume = uploadId
+            ? requestJson(apiUrl + '/api/data/upload/sessions/' + uploadId)
+            : Promise.resolve({status: 404});
+
+        return resume.then(function (result) {
+            if (result.status === 200) {
+                return result.body;
+            }
+            return requestJson(apiUrl + '/api/data/upload/sessions', {
+                method: 'POST',
+                headers: {'Content-Type': 'application/json'},
+                body: JSON.stringify({filename: file.name, dataset_name: file.name, size: file.size})
+            }).then(function (created) {
+                if (created.status !== 201) {
+                    throw new Error(created.body.error || ('HTTP ' + created.status));
+                }
+                window.localStorage.setItem(key, created.body.upload_id);
+                return created.body;
+            });
+        });
+    }
+
+    // 上傳一個區塊；409 表示伺服器已接收的位元組數不同，回傳伺服器的位移
+    function sendChunk(apiUrl, session, file, offset) {
+        var blob = file.slice(offset, Math.min(offset + session.chunk_size, file.size));
+        return requestJson(apiUrl + '/api/data/upload/sessions/' + session.upload_id + '?offset=' + offset, {
+            method: 'PUT',
+            headers: {'Content-Type': 'application/octet-stream'},
+            body: blob
+        }).then(function (result) {
+            if (result.status === 200 || result.status === 409) {
+                return result.body.received;
+            }
+            var error = new Error(result.body.error || ('HTTP ' + result.status));
+            // 4xx（409 除外）為無法重試的錯誤，例如標頭缺少必要欄位
+            error.fatal = result.status >= 400 && result.status < 500;
+            throw error;
+        });
+    }
+
+    function sendChunkWithRetry(apiUrl, session, file, offset, attempt) {
+        return sendChunk(apiUrl, session, file, offset).catch(function (error) {
+            if (error.fatal || attempt >= MAX_RETRIES) {
+                throw error;
+            }
+            setState({status: 'retrying', filename: file.name, received: offset, size: file.size,
+                      attempt: attempt + 1, error: error.message});
+            return sleep(RETRY_BASE_MS * Math.pow(2, attempt)).then(function () {
+                // 重試前同步伺服器已接收的位移（前一次請求可能已寫入但回應遺失）
+                return requestJson(apiUrl + '/api/data/upload/sessions/' + session.upload_id)
+                    .then(function (result) { return result.status === 200 ? result.body.received : offset; })
+                    .catch(function () { return offset; })
+                    .then(function (received) {
+                        if (received !== offset) {
+                            return received;
+                        }
+                        return sendChunkWithRetry(apiUrl, session, file, offset, attempt + 1);
+                    });
+            });
+        });
+    }
+
+    function upload(apiUrl, file) {
+        var key = storageKey(file);
+        setState({status: 'uploading', filename: file.name, received: 0, size: file.size});
+
+        return openSession(apiUrl, file).then(function (session) {
+            function next(offset) {
+                setState({status: 'uploading', filename: file.name, received: offset, size: file.size});
+                if (offset >= file.size) {
+                    return requestJson(apiUrl + '/api/data/upload/sessions/' + session.upload_id + '/complete', {
+                        method: 'POST'
+                    });
+                }
+                return sendChunkWithRetry(apiUrl, session, file, offset, 0).then(next);
+            }
+            return next(session.received);
+        }).then(function (result) {
+            window.localStorage.removeItem(key);
+            if (result.status === 200) {
+                setState({status: 'done', filename: file.name, received: file.size, size: file.size,
+                          dataset_name: result.body.dataset_name, rows: result.body.rows});
+            } else {
+                setState({status: 'error', filename: file.name, error: result.body.error || ('HTTP ' + result.status)});
+            }
+        }).catch(function (error) {
+            if (error.fatal) {
+                window.localStorage.removeItem(key);
+            }
+            setState({status: 'error', filename: file.name, error: error.message, resumable: !error.fatal});
+        });
+    }
+
+    function apiUrlOf(zone) {
+        return (zone.getAttribute('data-api-url') || '').replace(/\/$/, '');
+    }
+
+    // 點擊上傳區時建立暫時的檔案選擇器（不放進 React 管理的 DOM），每次都是新的 change 事件
+    document.addEventListener('click', function (event) {
+        var zone = event.target.closest && event.target.closest('#' + DROPZONE_ID);
+        if (!zone) {
+            return;
+        }
+        event.preventDefault();
+        var input = document.createElement('input');
+        input.type = 'file';
+        input.accept = '.csv';
+        input.addEventListener('change', function () {
+            if (input.files && input.files.length > 0) {
+                upload(apiUrlOf(zone), input.files[0]);
+            }
+        });
+        input.click();
+    });
+
+    document.addEventListener('dragover', function (event) {
+        if (event.target.closest && event.target.closest('#' + DROPZONE_ID)) {
+            event.preventDefault();
+        }
+    });
+
+    document.addEventListener('drop', function (event) {
+        var zone = event.target.closest && event.target.closest('#' + DROPZONE_ID);
+        if (!zone) {
+            return;
+        }
+        event.preventDefault();
+        if (event.dataTransfer && event.dataTransfer.files.length > 0) {
+            upload(apiUrlOf(zone), event.dataTransfer.files[0]);
+        }
+    });
+})();
@@ -4,7 +4,12 @@
 """
 
 import os
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from src.data.catalog import DatasetCatalog
+from src.utils.logger import get_logger
+
+logger = get_logger('data_selector')
 
 
 class DataSelector:
@@ -26,18 +31,22 @@ class DataSelector:
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir, exist_ok=True)
 
+        # 上傳時寫入的資料集統計資訊（.meta.json）
+        self.catalog = DatasetCatalog(self.data_dir)
+
     def scan_datasets(self) -> List[str]:
         """
-        掃描資料目錄，取得所有可用的 CSV 資料集
-        :return: 資料集檔案名稱列表
+        掃描資料目錄，取得所有可用的資料集（CSV 檔案，以及上傳匯入的 <資料集>.parquet）
+        :return: 資料集名稱列表
         """
         try:
             files = os.listdir(self.data_dir)
-            # 只返回 CSV 檔案
             csv_files = [f for f in files if f.endswith('.csv')]
-            return csv_files
+            # Parquet 資料集以去除副檔名的資料集名稱列出（與 DataLoader.load_dataframe 的查找方式一致）
+            parquet_datasets = [f[:-len('.parquet')] for f in files if f.endswith('.parquet')]
+            return csv_files + [name for name in parquet_datasets if name not in csv_files]
         except Exception as e:
-            print(f"掃描資料集時發生錯誤: {e}")
+            logger.warning(f"掃描資料集時發生錯誤: {e}")
             return []
 
     def get_dataset_list(self) -> List[str]:
@@ -58,6 +67,9 @@ class DataSelector:
         for dataset in datasets:
             # 移除 .csv 副檔名作為顯示名稱
             display_name = dataset.replace('.csv', '')
+            entry = self.get_catalog_entry(dataset)
+            if entry and entry.get('first_date'):
+                display_name = f"{display_name} ({entry['first_date']} ~ {entry['last_date']}, {entry['rows']} 筆)"
             options.append({
                 'label': display_name,
                 'value': dataset
@@ -65,15 +77,37 @@ class DataSelector:
 
         return options
 
+    def get_dataset_path(self, dataset_name: str) -> Optional[str]:
+        """
+        取得資料集的資料檔路徑（CSV 優先，其次為 <資料集>.parquet），不存在時返回 None
+        :param dataset_name: 資料集名稱
+        """
+        for path in (os.path.join(self.data_dir, dataset_name),
+                     os.path.join(self.data_dir, f"{dataset_name}.parquet")):
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def get_catalog_entry(self, dataset_name: str) -> Optional[Dict[str, any]]:
+        """
+        取得資料集的目錄項目（不讀取資料檔），沒有目錄項目時返回 None
+        :param dataset_name: 資料集名稱
+        """
+        try:
+            return self.catalog.get_entry(dataset_name)
+        except Exception as e:
+            logger.warning(f"讀取資料集目錄項目時發生錯誤: {e}")
+            return None
+
     def get_dataset_info(self, dataset_name: str) -> Dict[str, any]:
         """
-        取得資料集的基本資訊
+        取得資料集的基本資訊（有目錄項目時附上列數、日期範圍、欄位與收盤價統計）
         :param dataset_name: 資料集名稱
         :return: 資料集資訊字典
         """
-        dataset_path = os.path.join(self.data_dir, dataset_name)
+        dataset_path = self.get_dataset_path(dataset_name)
 
-        if not os.path.exists(dataset_path):
+        if dataset_path is None:
             return {"error": "資料集不存在"}
 
         try:
@@ -85,12 +119,21 @@ class DataSelector:
             mod_time = os.path.getmtime(dataset_path)
             mod_datetime = datetime.datetime.fromtimestamp(mod_time)
 
-            return {
+            info = {
                 "name": dataset_name,
                 "size": file_size,
                 "size_mb": round(file_size / (1024 * 1024), 2),
                 "modified_date": mod_datetime.strftime('%Y-%m-%d %H:%M:%S')
             }
+
+            entry = self.get_catalog_entry(dataset_name)
+            if entry:
+                info.update({key: entry.get(key) for key in (
+                    'rows', 'first_date', 'last_date', 'date_column', 'close_column',
+                    'min_close', 'max_close', 'last_close', 'sha256', 'stale'
+                )})
+                info['columns'] = entry.get('columns', [])
+            return info
         except Exception as e:
             return {"error": str(e)}
 
@@ -100,5 +143,13 @@ class DataSelector:
         :param dataset_name: 資料集名稱
         :return: True 如果有效，否則 False
         """
-        dataset_path = os.path.join(self.data_dir, dataset_name)
-        return os.path.exists(dataset_path) and dataset_name.endswith('.csv')
+        dataset_path = self.get_dataset_path(dataset_name)
+        if dataset_path is None or not (dataset_name.endswith('.csv')
+                                        or dataset_path.endswith('.parquet')):
+            return False
+
+        # 有目錄項目時一併檢查是否有資料列與日期、收盤價欄位
+        entry = self.get_catalog_entry(dataset_name)
+        if entry and not entry.get('stale'):
+            return bool(entry.get('rows')) and bool(entry.get('date_column')) and bool(entry.get('close_column'))
+        return True
@@ -5,71 +5,220 @@
 
 import os
 import json
-from typing import List, Dict, Optional
+import threading
+import time
+from typing import List, Dict, Optional, Tuple
+
+from src.utils.metadata_manager import MetadataManager
+from src.utils.logger import get_logger
+
+logger = get_logger('model_selector')
 
 
 class ModelSelector:
     """
-    模型選擇器，負責管理和提供可用模型的選項
+    模型選擇器，負責管理和提供可用模型的選項。
+    模型清單保存在記憶體中的目錄（catalog），只在元資料檔案或模型註冊表變動時增量更新；
+    依 ID 與資料集查詢使用預先建立的索引。
     """
 
-    def __init__(self, metadata_dir: str = None):
+    def __init__(self, metadata_dir: str = None, refresh_interval: float = 1.0):
         """
         初始化模型選擇器
         :param metadata_dir: 模型元資料目錄路徑
+        :param refresh_interval: 檢查檔案變動的最短間隔（秒），間隔內直接使用記憶體中的目錄
         """
         if metadata_dir is None:
             metadata_dir = os.path.join(os.getcwd(), 'models', 'metadata')
 
         self.metadata_dir = metadata_dir
+        self.refresh_interval = refresh_interval
 
         # 確保元資料目錄存在
         if not os.path.exists(self.metadata_dir):
             os.makedirs(self.metadata_dir, exist_ok=True)
 
-    def get_model_list(self) -> List[Dict[str, any]]:
+        self._registry = None
+        self._lock = threading.RLock()
+        self._last_check = None
+        # 目錄 mtime 與各 JSON 檔案的 (mtime_ns, size, 模型列表)
+        self._dir_mtime_ns = None
+        self._file_entries: Dict[str, Tuple[int, int, List[Dict[str, any]]]] = {}
+        # 註冊表檔案（含 WAL）的簽章、最後一次讀取的 updated_at 與內容
+        self._registry_signature = None
+        self._registry_updated_at = None
+        self._registry_entries: Dict[str, Dict[str, any]] = {}
+        # 由上述來源建立的排序清單與索引
+        self._models: List[Dict[str, any]] = []
+        self._by_id: Dict[str, Dict[str, any]] = {}
+        self._by_dataset: Dict[str, List[Dict[str, any]]] = {}
+        self._dropdown_options: List[Dict[str, str]] = []
+
+    def _get_registry(self) -> Optional[MetadataManager]:
         """
-        取得所有已訓練模型的列表
-        :return: 模型元資料列表
+        取得模型註冊表；目錄中沒有註冊表（也沒有待匯入的 metadata.json）時返回 None。
         """
-        models = []
+        if self._registry is None:
+            has_registry = os.path.exists(os.path.join(self.metadata_dir, MetadataManager.REGISTRY_FILE))
+            has_legacy_json = os.path.exists(os.path.join(self.metadata_dir, 'metadata.json'))
+            if has_registry or has_legacy_json:
+                self._registry = MetadataManager(metadata_dir=self.metadata_dir)
+        return self._registry
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        檢查元資料是否變動，只重新讀取有變動的 JSON 檔案與註冊表中更新過的模型。
+        :param force: 忽略 refresh_interval 立即檢查。
+        :return: 目錄內容是否有變動。
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._last_check is not None and now - self._last_check < self.refresh_interval:
+                return False
+            self._last_check = now
 
-        try:
-            # 讀取所有 JSON 元資料檔案
-            files = os.listdir(self.metadata_dir)
-            json_files = [f for f in files if f.endswith('.json')]
+            changed = False
+            try:
+                changed |= self._refresh_files()
+                changed |= self._refresh_registry()
+            except Exception as e:
+                logger.warning(f"取得模型列表時發生錯誤: {e}")
 
-            for json_file in json_files:
-                metadata_path = os.path.join(self.metadata_dir, json_file)
-                try:
-                    with open(metadata_path, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
+            if changed or self._dir_mtime_ns is None:
+                self._rebuild_indexes()
+            return changed
 
-                        # 如果 metadata 是列表（舊格式），取出所有模型
-                        if isinstance(metadata, list):
-                            models.extend(metadata)
-                        # 如果是單一物件（新格式），直接添加
-                        else:
-                            models.append(metadata)
-                except Exception as e:
-                    print(f"讀取模型元資料 {json_file} 時發生錯誤: {e}")
-                    continue
+    def _refresh_files(self) -> bool:
+        """
+        依目錄 mtime 偵測新增/刪除的檔案，依各檔案的 mtime 與大小偵測內容變動。
+        """
+        changed = False
+        dir_mtime_ns = os.stat(self.metadata_dir).st_mtime_ns
+        if dir_mtime_ns != self._dir_mtime_ns:
+            self._dir_mtime_ns = dir_mtime_ns
+            json_files = {f for f in os.listdir(self.metadata_dir) if f.endswith('.json')}
+            for removed in set(self._file_entries) - json_files:
+                del self._file_entries[removed]
+                changed = True
+            for added in json_files - set(self._file_entries):
+                self._file_entries[added] = (None, None, [])
+
+        for json_file, (mtime_ns, size, _) in list(self._file_entries.items()):
+            metadata_path = os.path.join(self.metadata_dir, json_file)
+            try:
+                stat = os.stat(metadata_path)
+            except FileNotFoundError:
+                del self._file_entries[json_file]
+                changed = True
+                continue
+            if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+                continue
 
-            # 依訓練日期排序（最新的在前）
-            models.sort(key=lambda x: x.get('training_date', ''), reverse=True)
+            changed = True
+            models = []
+            try:
+                with open(metadata_path, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                # 如果 metadata 是列表（舊格式），取出所有模型；如果是單一物件（新格式），直接添加
+                models = metadata if isinstance(metadata, list) else [metadata]
+            except Exception as e:
+                logger.warning(f"讀取模型元資料 {json_file} 時發生錯誤: {e}")
+            self._file_entries[json_file] = (stat.st_mtime_ns, stat.st_size, models)
+        return changed
+
+    def _registry_file_signature(self) -> Optional[Tuple]:
+        signature = []
+        for suffix in ('', '-wal'):
+            path = os.path.join(self.metadata_dir, MetadataManager.REGISTRY_FILE + suffix)
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature) if signature[0] else None
 
-        except Exception as e:
-            print(f"取得模型列表時發生錯誤: {e}")
+    def _refresh_registry(self) -> bool:
+        """
+        註冊表檔案未變動時不查詢；變動時只讀取 updated_at 較新的模型，
+        模型數量減少（有刪除）時才完整重新讀取。
+        """
+        registry = self._get_registry()
+        signature = self._registry_file_signature()
+        if registry is None or signature == self._registry_signature:
+            return False
+        self._registry_signature = signature
+
+        count = registry.count_metadata()
+        reloaded = self._registry_updated_at is None or count < len(self._registry_entries)
+        if reloaded:
+            # 首次讀取或有模型被刪除：完整重新讀取
+            self._registry_entries = {}
+            self._registry_updated_at = 0.0
+        # 游標只前進到實際讀到的資料，查詢後才提交的更新下次仍會讀到
+        cursor = None if reloaded else self._registry_updated_at
+        updated, last_updated = registry.query_updated(updated_after=cursor)
+
+        for metadata in updated:
+            self._registry_entries[metadata.get('model_id')] = metadata
+        if last_updated is not None:
+            self._registry_updated_at = last_updated
+
+        if len(self._registry_entries) != count:
+            # 同時有新增與刪除，下次檢查時完整重新讀取
+            self._registry_updated_at = None
+            self._registry_signature = None
+        return reloaded or bool(updated)
+
+    def _rebuild_indexes(self):
+        """
+        合併註冊表與 JSON 檔案（註冊表優先），依訓練日期排序並建立 ID 與資料集索引。
+        """
+        models = list(self._registry_entries.values())
+        seen_ids = set(self._registry_entries)
+        for json_file in sorted(self._file_entries):
+            for metadata in self._file_entries[json_file][2]:
+                if isinstance(metadata, dict):
+                    if metadata.get('model_id') in seen_ids:
+                        continue
+                    seen_ids.add(metadata.get('model_id'))
+                models.append(metadata)
+
+        # 依訓練日期排序（最新的在前）
+        models.sort(key=lambda x: x.get('training_date', '') if isinstance(x, dict) else '', reverse=True)
+
+        by_id, by_dataset = {}, {}
+        for metadata in models:
+            if not isinstance(metadata, dict):
+                continue
+            by_id.setdefault(metadata.get('model_id'), metadata)
+            dataset_names = set(metadata.get('dataset_names') or [])
+            dataset_names.add(metadata.get('dataset_name'))
+            for name in dataset_names:
+                by_dataset.setdefault(name, []).append(metadata)
 
-        return models
+        self._models = models
+        self._by_id = by_id
+        self._by_dataset = by_dataset
+        self._dropdown_options = self._build_dropdown_options(models)
+
+    def get_model_list(self) -> List[Dict[str, any]]:
+        """
+        取得所有已訓練模型的列表
+        :return: 模型元資料列表
+        """
+        self.refresh()
+        return list(self._models)
 
     def get_dropdown_options(self) -> List[Dict[str, str]]:
         """
         取得下拉選單格式的選項
         :return: Dash Dropdown 元件所需的選項列表
         """
-        models = self.get_model_list()
+        self.refresh()
+        return self._dropdown_options
 
+    @staticmethod
+    def _build_dropdown_options(models: List[Dict[str, any]]) -> List[Dict[str, str]]:
         options = []
         for model in models:
             # 跳過非字典類型的項目
@@ -103,24 +252,13 @@ class ModelSelector:
         :param model_id: 模型 ID
         :return: 模型元資料字典，如果找不到則返回 None
         """
-        # 先嘗試找獨立的模型 JSON 檔案
-        metadata_path = os.path.join(self.metadata_dir, f"{model_id}.json")
-
-        if os.path.exists(metadata_path):
-            try:
-                with open(metadata_path, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                    return metadata
-            except Exception as e:
-                print(f"讀取模型元資料時發生錯誤: {e}")
-
-        # 如果找不到獨立檔案，從所有模型列表中查找
-        all_models = self.get_model_list()
-        for model in all_models:
-            if model.get('model_id') == model_id:
-                return model
-
-        return None
+        self.refresh()
+        metadata = self._by_id.get(model_id)
+        if metadata is None and self._last_check is not None:
+            # 剛寫入、尚未超過檢查間隔的模型：強制檢查一次
+            if self.refresh(force=True):
+                metadata = self._by_id.get(model_id)
+        return metadata
 
     def format_model_info(self, metadata: Dict[str, any]) -> str:
         """
@@ -163,14 +301,14 @@ class ModelSelector:
         取得已訓練模型的數量
         :return: 模型數量
         """
-        return len(self.get_model_list())
+        self.refresh()
+        return len(self._models)
 
     def filter_models_by_dataset(self, dataset_name: str) -> List[Dict[str, any]]:
         """
-        根據訓練資料集過濾模型
+        根據訓練資料集過濾模型（面板模型只要包含該資料集即符合）
         :param dataset_name: 資料集名稱
         :return: 使用指定資料集訓練的模型列表
         """
-        all_models = self.get_model_list()
-        filtered_models = [m for m in all_models if m.get('dataset_name') == dataset_name]
-        return filtered_models
+        self.refresh()
+        return list(self._by_dataset.get(dataset_name, []))
@@ -1,4 +1,4 @@
-from dash import Dash, html, dcc, Input, Output, State
+from dash import Dash, html, dcc, Input, Output, State, no_update
 import dash_bootstrap_components as dbc
 import sys
 import os
@@ -9,10 +9,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from src.ui.components.chart_generator import ChartGenerator
 from src.ui.components.data_selector import DataSelector
 from src.ui.components.model_selector import ModelSelector
+from src.utils.stage_timer import parse_server_timing
 import pandas as pd
 import requests
-import base64
-import io
 
 def create_dashboard(flask_api_url='http://localhost:5000'):
     """
@@ -32,18 +31,21 @@ def create_dashboard(flask_api_url='http://localhost:5000'):
                 dbc.Col(html.H2("資料選擇與模型訓練", className="text-primary"), width=12),
             ]),
             dbc.Row([
-                dbc.Col(dcc.Upload(
-                    id='upload-data',
+                # 檔案由瀏覽器分塊直接上傳到 API（assets/chunked_upload.js），不經過 Dash callback
+                dbc.Col(html.Div(
+                    id='chunked-upload-dropzone',
                     children=html.Div([
                         '拖曳或 ',
-                        html.A('選擇檔案')
+                        html.A('選擇檔案'),
+                        '（中斷後重新選擇同一檔案即可續傳）'
                     ]),
                     style={
                         'width': '100%', 'height': '60px', 'lineHeight': '60px',
                         'borderWidth': '1px', 'borderStyle': 'dashed',
-                        'borderRadius': '5px', 'textAlign': 'center', 'margin': '10px'
+                        'borderRadius': '5px', 'textAlign': 'center', 'margin': '10px',
+                        'cursor': 'pointer'
                     },
-                    multiple=False
+                    **{'data-api-url': flask_api_url}
                 ), width=6),
                 dbc.Col(dcc.Dropdown(
                     id='dataset-selector',
@@ -62,6 +64,7 @@ def create_dashboard(flask_api_url='http://localhost:5000'):
                 ), width=6),
                 dbc.Col(dbc.Button("開始訓練模型", id='train-button', color="primary", className="me-1"), width=6),
             ]),
+            html.Div(id='dataset-info', className="text-muted small"),
             html.Div(id='output-data-upload'),
             html.Div(id='training-status'),
         ], className="mb-4"),
@@ -85,18 +88,43 @@ def create_dashboard(flask_api_url='http://localhost:5000'):
         ]),
 
         # 儲存 API URL
-        dcc.Store(id='api-url', data=flask_api_url)
+        dcc.Store(id='api-url', data=flask_api_url),
+        # 分塊上傳的進度與結果（由 chunked_upload.js 寫入）
+        dcc.Store(id='upload-state')
     ])
 
     # Callback: 更新資料集選擇器選項
     @app.callback(
         Output('dataset-selector', 'options'),
-        Input('api-url', 'data')
+        Input('api-url', 'data'),
+        Input('upload-state', 'data')
     )
-    def update_dataset_options(api_url):
-        """取得可用資料集列表"""
+    def update_dataset_options(api_url, upload_state):
+        """取得可用資料集列表（上傳完成時重新整理）"""
+        if upload_state and upload_state.get('status') != 'done':
+            return no_update
         return data_selector.get_dropdown_options()
 
+    # Callback: 顯示所選資料集的目錄資訊（列數、日期範圍、欄位數、最新收盤價）
+    @app.callback(
+        Output('dataset-info', 'children'),
+        Input('dataset-selector', 'value')
+    )
+    def display_dataset_info(dataset_name):
+        """顯示資料集資訊（讀取目錄項目，不讀取資料檔）"""
+        if not dataset_name:
+            return ""
+        info = data_selector.get_dataset_info(dataset_name)
+        if not info:
+            return ""
+        if info.get('rows') is None:
+            return f"{dataset_name}: {info.get('size_mb')} MB，尚未建立目錄資訊"
+        text = (f"{dataset_name}: {info['rows']} 筆，{info.get('first_date')} ~ {info.get('last_date')}，"
+                f"{len(info.get('columns', []))} 個欄位，最新收盤價 {info.get('last_close')}")
+        if info.get('stale'):
+            text += "（資料檔已變更，目錄資訊可能過期）"
+        return text
+
     # Callback: 更新模型選擇器選項
     @app.callback(
         Output('model-selector', 'options'),
@@ -106,40 +134,31 @@ def create_dashboard(flask_api_url='http://localhost:5000'):
         """從 API 取得已訓練模型列表"""
         return model_selector.get_dropdown_options()
 
-    # Callback: 處理資料上傳
+    # Callback: 顯示分塊上傳的進度與結果
     @app.callback(
         Output('output-data-upload', 'children'),
-        Input('upload-data', 'contents'),
-        State('upload-data', 'filename'),
-        State('api-url', 'data')
+        Input('upload-state', 'data')
     )
-    def handle_data_upload(contents, filename, api_url):
-        """處理資料上傳"""
-        if contents is None:
+    def display_upload_state(upload_state):
+        """顯示上傳進度"""
+        if not upload_state:
             return ""
 
-        try:
-            # 解析上傳的檔案
-            content_type, content_string = contents.split(',')
-            decoded = base64.b64decode(content_string)
-
-            # 使用檔名作為資料集名稱
-            dataset_name = filename
-
-            # 發送到 Flask API
-            files = {'file': (filename, io.BytesIO(decoded), 'text/csv')}
-            data = {'dataset_name': dataset_name}
-
-            response = requests.post(f'{api_url}/api/data/upload', files=files, data=data)
-
-            if response.status_code == 200:
-                return dbc.Alert(f"資料集 {dataset_name} 上傳成功！", color="success")
-            else:
-                error = response.json().get('error', '未知錯誤')
-                return dbc.Alert(f"上傳失敗: {error}", color="danger")
-
-        except Exception as e:
-            return dbc.Alert(f"上傳時發生錯誤: {str(e)}", color="danger")
+        status = upload_state.get('status')
+        filename = upload_state.get('filename')
+        if status == 'done':
+            return dbc.Alert(f"資料集 {upload_state.get('dataset_name')} 上傳成功！（{upload_state.get('rows')} 筆）",
+                             color="success")
+        if status == 'error':
+            hint = "，重新選擇同一檔案即可從中斷處續傳" if upload_state.get('resumable') else ""
+            return dbc.Alert(f"上傳失敗: {upload_state.get('error', '未知錯誤')}{hint}", color="danger")
+
+        size = upload_state.get('size') or 1
+        percent = round(100 * upload_state.get('received', 0) / size)
+        label = f"{filename}: {percent}%"
+        if status == 'retrying':
+            label += f"（連線失敗，第 {upload_state.get('attempt')} 次重試）"
+        return dbc.Progress(value=percent, label=label, striped=True, animated=True, className="my-2")
 
     # Callback: 處理訓練按鈕
     @app.callback(
@@ -223,8 +242,10 @@ def create_dashboard(flask_api_url='http://localhost:5000'):
             historical_data['date'] = pd.to_datetime(historical_data['date'])
 
             # 取得預測結果
+            # dataset_name 供面板模型選擇要預測的資料集，單一資料集模型會忽略
             pred_response = requests.get(f'{api_url}/api/model/predict',
-                                        params={'model_id': model_id, 'n_days': n_days})
+                                        params={'model_id': model_id, 'n_days': n_days,
+                                                'dataset_name': dataset_name})
             if pred_response.status_code != 200:
                 return {}, {}, {}, f"無法取得預測結果: {pred_response.json().get('error', '未知錯誤')}"
 
@@ -236,7 +257,15 @@ def create_dashboard(flask_api_url='http://localhost:5000'):
             combined_fig = chart_gen.generate_combined_chart(historical_data, prediction_data)
             pred_fig = chart_gen.generate_prediction_chart(prediction_data)
 
-            output_msg = dbc.Alert(f"已成功載入模型 {model_id} 的預測結果", color="success")
+            output_msg = [dbc.Alert(f"已成功載入模型 {model_id} 的預測結果", color="success")]
+
+            # 最近一次預測請求的各階段耗時（Server-Timing 標頭）
+            timings = parse_server_timing(pred_response.headers.get('Server-Timing'))
+            if timings:
+                output_msg.append(html.Small(
+                    "預測耗時: " + "、".join(f"{name} {ms:.1f} ms" for name, ms in timings.items()),
+                    className="text-muted"
+                ))
 
             return hist_fig, combined_fig, pred_fig, output_msg
 
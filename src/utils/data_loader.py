@@ -1,19 +1,38 @@
 import pandas as pd
 import os
 
+from src.data.parser_profiles import read_csv
+from src.utils.logger import get_logger
+
+logger = get_logger('data_loader')
+
 class DataLoader:
     def __init__(self, data_dir='data'):
         self.data_dir = data_dir
         os.makedirs(self.data_dir, exist_ok=True)
 
-    def load_csv(self, file_path: str) -> pd.DataFrame:
+    @staticmethod
+    def _apply_dtype(df: pd.DataFrame, dtype: str = None) -> pd.DataFrame:
+        """
+        將浮點欄位轉換為指定型別（例如 float32）；dtype 為 None 時保留原始精度。
+        """
+        if dtype is None:
+            return df
+        float_cols = df.select_dtypes(include='floating').columns
+        if len(float_cols) == 0:
+            return df
+        return df.astype({col: dtype for col in float_cols})
+
+    def load_csv(self, file_path: str, dtype: str = None, profile=None) -> pd.DataFrame:
         """
         載入 CSV 檔案，處理中文欄位名稱、額外技術指標和缺失值。
+        :param dtype: 浮點欄位的目標型別（可選），供數值管線直接取得 float32 資料。
+        :param profile: CSV 解析設定檔名稱或物件（可選），預設依標頭自動選擇，見 src/data/parser_profiles.py。
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"檔案不存在: {file_path}")
 
-        df = pd.read_csv(file_path)
+        df = read_csv(file_path, profile)
 
         # 處理缺失值：刪除包含 N/A 值的整行數據
         df.dropna(inplace=True)
@@ -51,7 +70,7 @@ class DataLoader:
         # 包含額外技術指標：如果 CSV 中有其他欄位，它們將被保留
         # 這裡不需要額外處理，因為 rename 之後，未映射的欄位會保留原名
 
-        return df
+        return self._apply_dtype(df, dtype)
 
     def save_dataframe(self, df: pd.DataFrame, dataset_name: str):
         """
@@ -59,12 +78,11 @@ class DataLoader:
         """
         save_path = os.path.join(self.data_dir, f"{dataset_name}.parquet")
         df.to_parquet(save_path)
-        print(f"資料集 '{dataset_name}' 已儲存至 {save_path}")
+        logger.info("資料集 '%s' 已儲存至 %s", dataset_name, save_path)
 
-    def load_dataframe(self, dataset_name: str) -> pd.DataFrame:
+    def resolve_dataset_path(self, dataset_name: str) -> str:
         """
-        載入已儲存的 DataFrame。
-        支援 .csv 和 .parquet 格式。
+        依 load_dataframe 的查找順序取得資料集檔案路徑。
         """
         # 先嘗試找 CSV 檔案（因為上傳的檔案是 CSV）
         csv_path = os.path.join(self.data_dir, dataset_name)
@@ -72,19 +90,29 @@ class DataLoader:
 
         # 如果 dataset_name 本身就包含 .csv，直接使用
         if dataset_name.endswith('.csv') and os.path.exists(csv_path):
-            df = pd.read_csv(csv_path)
-            return df
+            return csv_path
 
         # 嘗試 parquet 格式
         if os.path.exists(parquet_path):
-            return pd.read_parquet(parquet_path)
+            return parquet_path
 
         # 嘗試添加 .csv
         csv_with_ext = os.path.join(self.data_dir, f"{dataset_name}.csv")
         if os.path.exists(csv_with_ext):
-            df = pd.read_csv(csv_with_ext)
-            return df
+            return csv_with_ext
 
         # 都找不到就報錯
         raise FileNotFoundError(f"資料集 '{dataset_name}' 不存在。已嘗試: {csv_path}, {parquet_path}, {csv_with_ext}")
 
+    def load_dataframe(self, dataset_name: str, dtype: str = None, profile=None) -> pd.DataFrame:
+        """
+        載入已儲存的 DataFrame。
+        支援 .csv 和 .parquet 格式。
+        :param dtype: 浮點欄位的目標型別（可選）；顯示用途請保留 None 以維持原始精度。
+        :param profile: CSV 資料集的解析設定檔名稱或物件（可選），預設依標頭自動選擇。
+        """
+        path = self.resolve_dataset_path(dataset_name)
+        if path.endswith('.parquet'):
+            return self._apply_dtype(pd.read_parquet(path), dtype)
+        df = read_csv(path, profile)
+        return self._apply_dtype(df, dtype)
@@ -1,55 +1,314 @@
 """
 日誌記錄模組
 提供統一的日誌記錄功能
+
+紀錄先放入有界佇列，由背景執行緒寫入主控台與檔案，請求執行緒不必等待 I/O；
+佇列已滿時直接丟棄並計入 log_records_dropped_total。檔案輸出為每行一筆的 JSON。
+高頻率的 logger 可設定速率限制（token bucket）與抽樣，被略過的筆數附在下一筆紀錄上。
 """
 
+import atexit
+import copy
+import itertools
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+# 應用程式各模組 logger 的共同上層名稱
+ROOT_LOGGER_NAME = 'stock_prediction'
+DEFAULT_QUEUE_SIZE = 10_000
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+TEXT_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# LogRecord 的標準屬性；其餘屬性（logging 的 extra=）視為結構化欄位
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_lock = threading.RLock()
+_listeners: list = []  # [(QueueListener, NonBlockingQueueHandler)]
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    將紀錄格式化為單行 JSON：時間、級別、logger、訊息、執行緒、程序，以及 extra= 傳入的欄位。
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+            'process': record.process,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exception'] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """
+    主控台用的文字格式；有被速率限制略過的紀錄時於訊息後註明筆數。
+    """
+
+    def __init__(self):
+        super().__init__(TEXT_FORMAT, datefmt=TEXT_DATE_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += f" (已略過 {suppressed} 筆)"
+        return text
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    放入佇列後立即返回的 handler；佇列已滿時丟棄紀錄，不阻塞呼叫端。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 在呼叫端只展開訊息與例外；格式化交給背景執行緒的 handler
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _dropped_counter().inc()
 
 
-def setup_logger(name: str, log_file: str = None, level=logging.INFO) -> logging.Logger:
+def _dropped_counter():
+    # metrics 模組本身也使用 logger，於第一次丟棄時才匯入
+    from src.utils.metrics import REGISTRY
+    return REGISTRY.counter('log_records_dropped_total', 'Log records dropped because the log queue was full.')
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket 速率限制：每秒補充 rate 筆、最多累積 burst 筆。
+    超過的紀錄被略過並計數，下一筆通過的紀錄帶有 suppressed 欄位。
+    """
+
+    def __init__(self, rate: float, burst: int = None, clock=time.monotonic):
+        """
+        :param rate: 每秒允許的紀錄數。
+        :param burst: 可累積的筆數，預設為 rate 的兩倍。
+        :param clock: 取得目前時間（秒）的函式。
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate * 2))
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._last = clock()
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens < 1:
+                self._suppressed += 1
+                return False
+            self._tokens -= 1
+            suppressed, self._suppressed = self._suppressed, 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    抽樣：WARNING 以下的紀錄每 round(1 / rate) 筆保留第一筆，並帶有 sample_rate 欄位供彙整時還原數量；
+    WARNING 以上一律保留。
+    """
+
+    def __init__(self, rate: float):
+        """
+        :param rate: 保留比例，介於 0 到 1 之間。
+        """
+        super().__init__()
+        if not 0 < rate <= 1:
+            raise ValueError("抽樣比例必須介於 0 到 1 之間")
+        self.rate = rate
+        self._every = max(1, round(1 / rate))
+        self._counter = itertools.count()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if next(self._counter) % self._every:
+            return False
+        record.sample_rate = self.rate
+        return True
+
+
+def setup_logger(name: str, log_file: str = None, level=logging.INFO, queued: bool = True,
+                 json_console: bool = False, queue_size: int = DEFAULT_QUEUE_SIZE) -> logging.Logger:
     """
     設定並返回一個 logger 實例
     :param name: logger 名稱
-    :param log_file: 日誌檔案路徑（可選）
+    :param log_file: 日誌檔案路徑（可選），每行一筆 JSON
     :param level: 日誌級別
+    :param queued: 是否經由佇列交給背景執行緒寫入；False 時於呼叫端同步寫入
+    :param json_console: 主控台是否也輸出 JSON
+    :param queue_size: 佇列容量，已滿時丟棄紀錄
     :return: Logger 實例
     """
-    logger = logging.getLogger(name)
-    logger.setLevel(level)
+    with _lock:
+        logger = logging.getLogger(name)
+        logger.setLevel(level)
+
+        # 避免重複添加 handler
+        if logger.handlers:
+            return logger
+
+        # 控制台 handler
+        console_handler = logging.StreamHandler()
+        console_handler.setLevel(level)
+        console_handler.setFormatter(JsonFormatter() if json_console else TextFormatter())
+        handlers = [console_handler]
+
+        # 檔案 handler（如果指定了檔案路徑）
+        if log_file:
+            # 確保日誌目錄存在
+            log_dir = os.path.dirname(log_file)
+            if log_dir and not os.path.exists(log_dir):
+                os.makedirs(log_dir, exist_ok=True)
 
-    # 避免重複添加 handler
-    if logger.handlers:
+            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler.setLevel(level)
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+
+        if not queued:
+            for handler in handlers:
+                logger.addHandler(handler)
+            return logger
+
+        log_queue = queue.Queue(maxsize=queue_size)
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        handler = NonBlockingQueueHandler(log_queue)
+        _listeners.append((listener, handler))
+        logger.addHandler(handler)
         return logger
 
-    # 建立格式化器
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-
-    # 控制台 handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(level)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-
-    # 檔案 handler（如果指定了檔案路徑）
-    if log_file:
-        # 確保日誌目錄存在
-        log_dir = os.path.dirname(log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir, exist_ok=True)
-
-        file_handler = logging.FileHandler(log_file, encoding='utf-8')
-        file_handler.setLevel(level)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
 
+def flush_logs():
+    """
+    等待所有佇列中的紀錄寫出。
+    """
+    with _lock:
+        listeners = [listener for listener, _ in _listeners if listener._thread is not None]
+    for listener in listeners:
+        listener.queue.join()
+        for handler in listener.handlers:
+            handler.flush()
+
+
+@atexit.register
+def shutdown_logging():
+    """
+    停止背景寫入執行緒；停止前會寫出佇列中剩餘的紀錄。程序結束時自動呼叫。
+    """
+    with _lock:
+        listeners, _listeners[:] = list(_listeners), []
+    for listener, _ in listeners:
+        if listener._thread is not None:
+            listener.stop()
+
+
+def _restart_after_fork():
+    # 背景寫入執行緒不會被 fork 複製；子程序改用新的佇列並重新啟動寫入執行緒
+    global _lock
+    _lock = threading.RLock()
+    for listener, handler in _listeners:
+        if listener._thread is not None:
+            listener._thread = None
+            handler.queue = listener.queue = queue.Queue(maxsize=listener.queue.maxsize)
+            listener.start()
+
+
+if hasattr(os, 'register_at_fork'):  # Windows 沒有 fork
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def _application_root() -> logging.Logger:
+    """
+    :return: 應用程式上層 logger，第一次呼叫時依 Config 設定佇列與 handler。
+    """
+    from src.config import Config
+
+    with _lock:
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        if not root.handlers:
+            setup_logger(ROOT_LOGGER_NAME, Config.LOG_FILE, Config.LOG_LEVEL,
+                         json_console=Config.LOG_JSON, queue_size=Config.LOG_QUEUE_SIZE)
+        return root
+
+
+def use_application_handlers(logger: logging.Logger) -> logging.Logger:
+    """
+    讓其他套件建立的 logger（例如 Flask 的 app.logger）改由應用程式的日誌佇列輸出，不在呼叫端寫入 stderr。
+    :param logger: 要改寫 handler 的 logger
+    :return: 同一個 Logger 實例
+    """
+    root = _application_root()
+    with _lock:
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        for handler in root.handlers:
+            logger.addHandler(handler)
     return logger
 
 
+def get_logger(name: str, rate_limit: float = None, sample_rate: float = None) -> logging.Logger:
+    """
+    取得應用程式模組的 logger（stock_prediction.<name>），第一次呼叫時依 Config 設定上層 logger。
+    :param name: 模組名稱，例如 'model_manager'
+    :param rate_limit: 每秒允許的紀錄數，預設為 Config.LOG_RATE_LIMIT；0 表示不限制
+    :param sample_rate: 抽樣比例，預設依 Config.LOG_SAMPLE_RATES，未列出時不抽樣
+    :return: Logger 實例
+    """
+    from src.config import Config
+
+    with _lock:
+        logger = _application_root().getChild(name)
+        if not getattr(logger, '_filters_configured', False):
+            if sample_rate is None:
+                sample_rate = Config.LOG_SAMPLE_RATES.get(name)
+            if rate_limit is None:
+                rate_limit = Config.LOG_RATE_LIMIT
+            # 先抽樣再限速，速率限制只計算抽樣後保留的紀錄
+            if sample_rate is not None and sample_rate < 1:
+                logger.addFilter(SamplingFilter(sample_rate))
+            if rate_limit:
+                logger.addFilter(RateLimitFilter(rate_limit))
+            logger._filters_configured = True
+        return logger
+
+
 def get_default_logger(name: str = 'stock_prediction') -> logging.Logger:
     """
     取得預設的 logger
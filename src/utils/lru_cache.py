@@ -0,0 +1,80 @@
+"""
+有容量上限的 LRU 快取
+用於資料集與推論模型：命中時不需重新讀取檔案，並記錄命中、未命中與淘汰次數。
+每個項目附帶簽章（例如檔案的修改時間），簽章改變時視為未命中並重新載入，
+其他程序（例如命令列的批次匯入）更新檔案後不會讀到過期的內容。
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from src.utils.metrics import REGISTRY
+
+CACHE_REQUESTS = REGISTRY.counter('cache_requests_total',
+                                  'Cache lookups by cache and result (hit/miss).',
+                                  ['cache', 'result'])
+CACHE_EVICTIONS = REGISTRY.counter('cache_evictions_total',
+                                   'Entries evicted to stay within the cache size.',
+                                   ['cache'])
+CACHE_ENTRIES = REGISTRY.gauge('cache_entries', 'Entries currently held in the cache.', ['cache'])
+
+
+class LRUCache:
+    def __init__(self, name: str, maxsize: int):
+        """
+        :param name: 快取名稱（指標的 cache 標籤）。
+        :param maxsize: 最多保留的項目數，0 表示停用快取。
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = CACHE_REQUESTS.labels(name, 'hit')
+        self._misses = CACHE_REQUESTS.labels(name, 'miss')
+        self._evictions = CACHE_EVICTIONS.labels(name)
+        # 以弱參照回報項目數，快取物件不會因為註冊在指標中而無法回收
+        ref = weakref.ref(self)
+        CACHE_ENTRIES.labels(name).set_function(lambda: len(ref()) if ref() is not None else 0)
+
+    def get(self, key: Hashable, loader: Callable[[], Any], signature: Hashable = None) -> Any:
+        """
+        取得快取的值，未命中或簽章不符時呼叫 loader 載入並保存。
+        載入在鎖外進行，載入較慢的項目不會阻塞其他項目的讀取。
+        :param key: 快取鍵。
+        :param loader: 載入函式。
+        :param signature: 內容的簽章（可選），與保存時不同時重新載入。
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self._hits.inc()
+                return entry[1]
+        self._misses.inc()
+
+        value = loader()
+        if self.maxsize <= 0:
+            return value
+        with self._lock:
+            self._entries[key] = (signature, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions.inc()
+        return value
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] = None):
+        """
+        移除符合條件的項目（未指定時全部移除）。
+        """
+        with self._lock:
+            for key in [key for key in self._entries if predicate is None or predicate(key)]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable):
+        return key in self._entries
@@ -1,77 +1,268 @@
 import json
 import os
-from typing import List, Dict, Any
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger('metadata_manager')
 
 class MetadataManager:
+    """
+    模型註冊表：以 SQLite 儲存模型元資料，在 model_id、dataset_name 與 training_date 上建立索引。
+    寫入使用 BEGIN IMMEDIATE 交易，多個訓練程序同時寫入時由 SQLite 的檔案鎖序列化；
+    資料庫使用 WAL 模式，讀取不會被寫入阻擋。
+    首次開啟時會將舊版的 metadata.json 一次性匯入，並將原檔更名為 .bak。
+    """
+
+    REGISTRY_FILE = 'registry.db'
+    SORTABLE_COLUMNS = ('training_date', 'model_name', 'dataset_name', 'n_days', 'updated_at')
+
     def __init__(self, metadata_file='metadata.json', metadata_dir='models'):
         self.metadata_dir = metadata_dir
         os.makedirs(self.metadata_dir, exist_ok=True)
         self.metadata_file_path = os.path.join(self.metadata_dir, metadata_file)
-        self.metadata: List[Dict[str, Any]] = self._load_metadata()
+        self.registry_path = os.path.join(self.metadata_dir, self.REGISTRY_FILE)
+        self._init_registry()
+        self._migrate_json()
 
-    def _load_metadata(self) -> List[Dict[str, Any]]:
+    @contextmanager
+    def _connect(self):
+        """
+        開啟資料庫連線（每個操作一條連線，可安全地在多執行緒與多程序間使用）。
         """
-        從 JSON 檔案載入所有模型元資料。
+        conn = sqlite3.connect(self.registry_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA busy_timeout = 30000")
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self):
+        """
+        寫入交易：BEGIN IMMEDIATE 立即取得寫入鎖，避免讀取後再升級鎖時與其他程序衝突。
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _init_registry(self):
         """
-        if os.path.exists(self.metadata_file_path):
-            with open(self.metadata_file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return []
+        建立資料表與索引。
+        """
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS models (
+                    model_id TEXT PRIMARY KEY,
+                    model_name TEXT,
+                    dataset_name TEXT,
+                    n_days INTEGER,
+                    training_date TEXT,
+                    parent_model_id TEXT,
+                    updated_at REAL NOT NULL,
+                    metadata TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_models_dataset_date ON models (dataset_name, training_date);
+                CREATE INDEX IF NOT EXISTS idx_models_training_date ON models (training_date);
+                CREATE INDEX IF NOT EXISTS idx_models_updated_at ON models (updated_at);
+
+                -- 面板模型以多個資料集訓練，依資料集查詢時一併列出
+                CREATE TABLE IF NOT EXISTS model_datasets (
+                    model_id TEXT NOT NULL,
+                    dataset_name TEXT NOT NULL,
+                    PRIMARY KEY (model_id, dataset_name)
+                );
+                CREATE INDEX IF NOT EXISTS idx_model_datasets_dataset ON model_datasets (dataset_name);
+            """)
+
+    def _migrate_json(self):
+        """
+        將舊版 metadata.json 匯入資料庫（已存在的 model_id 不覆蓋），完成後將原檔更名為 .bak。
+        """
+        if not os.path.exists(self.metadata_file_path):
+            return
+
+        with open(self.metadata_file_path, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+
+        with self._transaction() as conn:
+            for record in records:
+                if isinstance(record, dict) and record.get('model_id'):
+                    self._write(conn, record, overwrite=False)
+
+        os.replace(self.metadata_file_path, f"{self.metadata_file_path}.bak")
+        logger.info("已將 %d 筆模型元資料從 %s 匯入 %s", len(records), self.metadata_file_path, self.registry_path)
 
-    def _save_metadata(self):
+    @staticmethod
+    def _write(conn: sqlite3.Connection, metadata: Dict[str, Any], overwrite: bool = True):
         """
-        將所有模型元資料儲存到 JSON 檔案。
+        寫入單筆元資料（呼叫端需在交易中）。
         """
-        with open(self.metadata_file_path, 'w', encoding='utf-8') as f:
-            json.dump(self.metadata, f, ensure_ascii=False, indent=4)
+        model_id = metadata['model_id']
+        conflict = """DO UPDATE SET model_name = excluded.model_name, dataset_name = excluded.dataset_name,
+                      n_days = excluded.n_days, training_date = excluded.training_date,
+                      parent_model_id = excluded.parent_model_id, updated_at = excluded.updated_at,
+                      metadata = excluded.metadata""" if overwrite else "DO NOTHING"
+        cursor = conn.execute(
+            f"""INSERT INTO models (model_id, model_name, dataset_name, n_days, training_date,
+                                    parent_model_id, updated_at, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (model_id) {conflict}""",
+            (model_id, metadata.get('model_name'), metadata.get('dataset_name'), metadata.get('n_days'),
+             metadata.get('training_date'), metadata.get('parent_model_id'), time.time(),
+             json.dumps(metadata, ensure_ascii=False))
+        )
+        if cursor.rowcount == 0:
+            return
+
+        conn.execute("DELETE FROM model_datasets WHERE model_id = ?", (model_id,))
+        dataset_names = set(metadata.get('dataset_names') or [])
+        if metadata.get('dataset_name'):
+            dataset_names.add(metadata['dataset_name'])
+        conn.executemany("INSERT INTO model_datasets (model_id, dataset_name) VALUES (?, ?)",
+                         [(model_id, name) for name in sorted(dataset_names)])
+
+    @property
+    def metadata(self) -> List[Dict[str, Any]]:
+        """
+        所有模型元資料（相容舊版的 metadata 屬性）。
+        """
+        return self.get_all_metadata()
 
     def add_metadata(self, new_metadata: Dict[str, Any]):
         """
-        添加新的模型元資料。
+        添加新的模型元資料（相同 model_id 時覆蓋）。
         :param new_metadata: 包含模型元資料的字典。
         """
-        self.metadata.append(new_metadata)
-        self._save_metadata()
-        print(f"已添加模型元資料: {new_metadata.get('model_id', '未知ID')}")
+        with self._transaction() as conn:
+            self._write(conn, new_metadata)
+        logger.info("已添加模型元資料: %s", new_metadata.get('model_id', '未知ID'))
 
     def get_all_metadata(self) -> List[Dict[str, Any]]:
         """
-        獲取所有模型元資料。
+        獲取所有模型元資料（依加入順序）。
         """
-        return self.metadata
+        with self._connect() as conn:
+            rows = conn.execute("SELECT metadata FROM models ORDER BY rowid").fetchall()
+        return [json.loads(row['metadata']) for row in rows]
 
     def get_metadata_by_id(self, model_id: str) -> Dict[str, Any] | None:
         """
         根據模型 ID 獲取單個模型元資料。
         """
-        for meta in self.metadata:
-            if meta.get('model_id') == model_id:
-                return meta
-        return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT metadata FROM models WHERE model_id = ?", (model_id,)).fetchone()
+        return json.loads(row['metadata']) if row else None
 
     def update_metadata(self, model_id: str, updates: Dict[str, Any]):
         """
-        更新指定模型 ID 的元資料。
+        更新指定模型 ID 的元資料（讀取與寫回在同一個交易中完成）。
         """
-        for i, meta in enumerate(self.metadata):
-            if meta.get('model_id') == model_id:
-                self.metadata[i].update(updates)
-                self._save_metadata()
-                print(f"已更新模型元資料: {model_id}")
-                return True
-        print(f"未找到模型 ID 為 '{model_id}' 的元資料進行更新。")
+        with self._transaction() as conn:
+            row = conn.execute("SELECT metadata FROM models WHERE model_id = ?", (model_id,)).fetchone()
+            if row:
+                metadata = json.loads(row['metadata'])
+                metadata.update(updates)
+                self._write(conn, metadata)
+        if row:
+            logger.info("已更新模型元資料: %s", model_id)
+            return True
+        logger.warning("未找到模型 ID 為 '%s' 的元資料進行更新。", model_id)
         return False
 
     def delete_metadata(self, model_id: str):
         """
         刪除指定模型 ID 的元資料。
         """
-        initial_len = len(self.metadata)
-        self.metadata = [meta for meta in self.metadata if meta.get('model_id') != model_id]
-        if len(self.metadata) < initial_len:
-            self._save_metadata()
-            print(f"已刪除模型元資料: {model_id}")
+        with self._transaction() as conn:
+            deleted = conn.execute("DELETE FROM models WHERE model_id = ?", (model_id,)).rowcount
+            conn.execute("DELETE FROM model_datasets WHERE model_id = ?", (model_id,))
+        if deleted:
+            logger.info("已刪除模型元資料: %s", model_id)
             return True
-        print(f"未找到模型 ID 為 '{model_id}' 的元資料進行刪除。")
+        logger.warning("未找到模型 ID 為 '%s' 的元資料進行刪除。", model_id)
         return False
 
+    def _build_filters(self, dataset_name: str = None, n_days: int = None, parent_model_id: str = None,
+                       trained_after: str = None, trained_before: str = None,
+                       updated_after: float = None) -> tuple[str, list]:
+        clauses, params = [], []
+        if dataset_name is not None:
+            clauses.append("model_id IN (SELECT model_id FROM model_datasets WHERE dataset_name = ?)")
+            params.append(dataset_name)
+        if n_days is not None:
+            clauses.append("n_days = ?")
+            params.append(int(n_days))
+        if parent_model_id is not None:
+            clauses.append("parent_model_id = ?")
+            params.append(parent_model_id)
+        if trained_after is not None:
+            clauses.append("training_date >= ?")
+            params.append(trained_after)
+        if trained_before is not None:
+            clauses.append("training_date < ?")
+            params.append(trained_before)
+        if updated_after is not None:
+            clauses.append("updated_at > ?")
+            params.append(updated_after)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query_metadata(self, sort_by: str = 'training_date', descending: bool = True,
+                       limit: int = None, offset: int = 0, **filters) -> List[Dict[str, Any]]:
+        """
+        依條件查詢模型元資料，支援排序與分頁。
+        :param sort_by: 排序欄位（training_date, model_name, dataset_name, n_days, updated_at）。
+        :param descending: 是否遞減排序。
+        :param limit: 最多返回筆數（可選）。
+        :param offset: 略過的筆數。
+        :param filters: dataset_name（含面板模型）, n_days, parent_model_id,
+                        trained_after, trained_before（ISO 日期字串）, updated_after（時間戳）。
+        :return: 元資料列表。
+        """
+        if sort_by not in self.SORTABLE_COLUMNS:
+            raise ValueError(f"不支援的排序欄位: {sort_by}，可用欄位: {list(self.SORTABLE_COLUMNS)}")
+
+        where, params = self._build_filters(**filters)
+        sql = f"SELECT metadata FROM models{where} ORDER BY {sort_by} {'DESC' if descending else 'ASC'}, rowid"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [int(limit), int(offset)]
+        elif offset:
+            sql += " LIMIT -1 OFFSET ?"
+            params.append(int(offset))
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [json.loads(row['metadata']) for row in rows]
+
+    def query_updated(self, updated_after: float = None
+                      ) -> Tuple[List[Dict[str, Any]], float | None]:
+        """
+        依 updated_at 遞增取得在指定時間戳之後寫入的元資料（供快取增量更新）。
+        游標取自同一次查詢返回的資料列，查詢之後才提交的寫入一定晚於游標，下次仍會被讀到。
+        :param updated_after: 上次的游標，None 表示全部讀取。
+        :return: (元資料列表, 返回資料中最大的 updated_at；沒有資料時為 None)。
+        """
+        where, params = self._build_filters(updated_after=updated_after)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT metadata, updated_at FROM models{where} "
+                                "ORDER BY updated_at, rowid", params).fetchall()
+        return [json.loads(row['metadata']) for row in rows], (rows[-1]['updated_at'] if rows else None)
+
+    def count_metadata(self, **filters) -> int:
+        """
+        計算符合條件的模型數量（分頁用），條件同 query_metadata。
+        """
+        where, params = self._build_filters(**filters)
+        with self._connect() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM models{where}", params).fetchone()[0]
@@ -1,38 +1,169 @@
 import os
-import tensorflow as tf # 假設使用 TensorFlow
+import json
+import shutil
+from typing import List, Dict, Any, TYPE_CHECKING
+
+from src.models.numpy_runtime import NumpyLSTMModel, export_model
+from src.utils.logger import get_logger
+
+logger = get_logger('model_manager')
+# 每次載入模型都會記錄，依 Config.LOG_SAMPLE_RATES 抽樣
+load_logger = get_logger('model_manager.load')
+
+if TYPE_CHECKING:
+    import tensorflow as tf # 假設使用 TensorFlow
 
 class ModelManager:
     def __init__(self, model_dir='models'):
         self.model_dir = model_dir
         os.makedirs(self.model_dir, exist_ok=True)
 
-    def save_model(self, model: tf.keras.Model, model_id: str):
+    def save_model(self, model: 'tf.keras.Model', model_id: str):
         """
-        儲存機器學習模型。
+        儲存機器學習模型，並同時匯出供 NumPy 推論使用的權重檔。
         :param model: 要儲存的 TensorFlow Keras 模型。
         :param model_id: 模型的唯一識別符。
         """
         model_path = os.path.join(self.model_dir, f"{model_id}.keras") # TensorFlow 3.x 推薦的格式
         model.save(model_path)
-        print(f"模型 '{model_id}' 已儲存至 {model_path}")
+        logger.info("模型 '%s' 已儲存至 %s", model_id, model_path)
+        try:
+            export_model(model, self.get_export_path(model_id))
+        except ValueError as e:
+            # 不支援的架構仍可透過 TensorFlow 推論
+            logger.warning("模型 '%s' 無法匯出 NumPy 推論權重: %s", model_id, e)
         return model_path
 
-    def load_model(self, model_id: str) -> tf.keras.Model:
+    def load_model(self, model_id: str) -> 'tf.keras.Model':
         """
         載入機器學習模型。
         :param model_id: 模型的唯一識別符。
         :return: 載入的 TensorFlow Keras 模型。
         """
+        import tensorflow as tf
+
         model_path = os.path.join(self.model_dir, f"{model_id}.keras")
         if not os.path.exists(model_path):
             raise FileNotFoundError(f"模型 '{model_id}' 不存在於 {model_path}")
         model = tf.keras.models.load_model(model_path)
-        print(f"模型 '{model_id}' 已從 {model_path} 載入")
+        load_logger.info("模型 '%s' 已從 %s 載入", model_id, model_path, extra={'model_id': model_id})
         return model
 
+    def export_inference_model(self, model_id: str) -> str:
+        """
+        將既有的 .keras 模型匯出為 NumPy 推論權重檔（用於匯出舊模型）。
+        :param model_id: 模型的唯一識別符。
+        :return: 匯出檔案路徑。
+        """
+        return export_model(self.load_model(model_id), self.get_export_path(model_id))
+
+    def load_inference_model(self, model_id: str) -> Any:
+        """
+        載入推論用模型：有匯出權重檔時使用不需 TensorFlow 的 NumpyLSTMModel，
+        否則退回載入 Keras 模型。兩者皆提供相同的 predict() 介面。
+        :param model_id: 模型的唯一識別符。
+        :return: NumpyLSTMModel 或 Keras 模型。
+        """
+        export_path = self.get_export_path(model_id)
+        if os.path.exists(export_path):
+            model = NumpyLSTMModel.load(export_path)
+            load_logger.info("模型 '%s' 推論權重已從 %s 載入", model_id, export_path, extra={'model_id': model_id})
+            return model
+        return self.load_model(model_id)
+
+    def get_export_path(self, model_id: str) -> str:
+        """
+        獲取指定模型 NumPy 推論權重檔的儲存路徑。
+        """
+        return os.path.join(self.model_dir, f"{model_id}.npz")
+
+    def save_scaler(self, scaler: Any, model_id: str) -> str:
+        """
+        儲存模型訓練時使用的 scaler，供推論與微調沿用相同的正規化。
+        :param scaler: 已擬合的 scaler。
+        :param model_id: 模型的唯一識別符。
+        :return: scaler 檔案路徑。
+        """
+        import joblib
+
+        scaler_path = self.get_scaler_path(model_id)
+        joblib.dump(scaler, scaler_path)
+        return scaler_path
+
+    def load_scaler(self, model_id: str) -> Any | None:
+        """
+        載入模型的 scaler；舊版模型沒有儲存 scaler 時返回 None。
+        """
+        import joblib
+
+        scaler_path = self.get_scaler_path(model_id)
+        if not os.path.exists(scaler_path):
+            return None
+        return joblib.load(scaler_path)
+
+    def get_scaler_path(self, model_id: str) -> str:
+        """
+        獲取指定模型 scaler 的儲存路徑。
+        """
+        return os.path.join(self.model_dir, f"{model_id}.scaler.pkl")
+
     def get_model_path(self, model_id: str) -> str:
         """
         獲取指定模型的儲存路徑。
         """
         return os.path.join(self.model_dir, f"{model_id}.keras")
 
+    def get_checkpoint_dir(self, model_id: str) -> str:
+        """
+        獲取指定模型訓練檢查點的目錄。
+        """
+        return os.path.join(self.model_dir, 'checkpoints', model_id)
+
+    def list_checkpoint_ids(self) -> List[str]:
+        """
+        列出所有尚未完成（仍保留檢查點）的訓練任務 ID。
+        """
+        checkpoints_root = os.path.join(self.model_dir, 'checkpoints')
+        if not os.path.isdir(checkpoints_root):
+            return []
+        return [name for name in os.listdir(checkpoints_root)
+                if os.path.isdir(os.path.join(checkpoints_root, name))]
+
+    def remove_checkpoint(self, model_id: str):
+        """
+        刪除指定模型的檢查點目錄（訓練完成並儲存後呼叫）。
+        """
+        shutil.rmtree(self.get_checkpoint_dir(model_id), ignore_errors=True)
+
+    def save_training_job(self, model_id: str, job: Dict[str, Any]):
+        """
+        將訓練任務的設定（資料集、預測天數、模型配置與超參數）寫入檢查點目錄，
+        讓程序重啟後能以相同設定續訓。
+        """
+        checkpoint_dir = self.get_checkpoint_dir(model_id)
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        job_path = os.path.join(checkpoint_dir, 'job.json')
+        tmp_path = f"{job_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, job_path)
+
+    def load_training_job(self, model_id: str) -> Dict[str, Any] | None:
+        """
+        讀取訓練任務設定；若存在檢查點狀態，一併附上已完成的 epoch 數。
+        :return: 任務設定字典，找不到時返回 None。
+        """
+        checkpoint_dir = self.get_checkpoint_dir(model_id)
+        job_path = os.path.join(checkpoint_dir, 'job.json')
+        if not os.path.exists(job_path):
+            return None
+
+        with open(job_path, 'r', encoding='utf-8') as f:
+            job = json.load(f)
+
+        state_path = os.path.join(checkpoint_dir, 'state.json')
+        job['completed_epochs'] = 0
+        if os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                job['completed_epochs'] = json.load(f).get('epoch', 0)
+        return job
@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from app import create_app
+    FLASK_AVAILABLE = True
+except ImportError:
+    FLASK_AVAILABLE = False
+
+
+@unittest.skipUnless(FLASK_AVAILABLE, "Flask 應用尚未完整實作")
+class TestAPIMetrics(unittest.TestCase):
+    """
+    整合測試：GET /metrics 端點
+    """
+
+    def setUp(self):
+        self.app = create_app()
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+    def test_metrics_report_route_latency(self):
+        """
+        測試 /metrics 以 Prometheus 文字格式回報各路由（以路由規則為標籤）的延遲與程序記憶體。
+        """
+        self.client.get('/api/status')
+        self.client.get('/api/model/train/bulk/does-not-exist')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain; version=0.0.4'))
+
+        body = response.get_data(as_text=True)
+        self.assertIn('http_request_duration_seconds_count'
+                      '{method="GET",route="/api/status",status="200"}', body)
+        self.assertIn('route="/api/model/train/bulk/<bulk_job_id>",status="404"', body)
+        self.assertIn('http_requests_in_flight{method="GET",route="/metrics"} 1', body)
+        self.assertIn('process_resident_memory_bytes', body)
+        self.assertIn('cache_requests_total', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from app import create_app
+    from data.synthetic import SyntheticMarketGenerator
+    FLASK_AVAILABLE = True
+except ImportError:
+    FLASK_AVAILABLE = False
+
+
+@unittest.skipUnless(FLASK_AVAILABLE, "Flask 應用尚未完整實作")
+class TestApiUpload(unittest.TestCase):
+    """
+    整合測試：上傳不取代既有的同名資料集，歷史資料的日期格式
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.client = create_app().test_client()
+        self.csv_path = SyntheticMarketGenerator(seed=5).write_ticker(
+            os.path.join(self.tmp_dir.name, 'SYN.csv'), 120)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def upload(self, dataset_name):
+        with open(self.csv_path, 'rb') as f:
+            return self.client.post('/api/data/upload',
+                                    data={'file': (f, 'SYN.csv'), 'dataset_name': dataset_name},
+                                    content_type='multipart/form-data')
+
+    def test_existing_dataset_name_is_rejected(self):
+        """
+        測試同名資料集（已匯入的 Parquet 或舊版 CSV）已存在時，上傳與建立分塊上傳皆回應 400 且不修改既有檔案。
+        """
+        self.assertEqual(self.upload('syn').status_code, 200)
+        response = self.upload('syn')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {"error": "Dataset name already exists"})
+
+        legacy_path = os.path.join('data', 'processed_data', 'legacy.csv')
+        with open(legacy_path, 'w') as f:
+            f.write('date,open,high,low,close,volume\n2025-01-01,100,105,98,103,1000\n')
+        self.assertEqual(self.upload('legacy.csv').status_code, 400)
+        self.assertTrue(os.path.exists(legacy_path))
+
+        response = self.client.post('/api/data/upload/sessions',
+                                    json={'filename': 'SYN.csv', 'dataset_name': 'syn',
+                                          'size': 100})
+        self.assertEqual(response.status_code, 400)
+
+    def test_dataset_name_with_path_is_rejected(self):
+        """
+        測試含路徑的資料集名稱回應 400，不在資料目錄以外寫入檔案。
+        """
+        for dataset_name in ('../../../escaped', 'sub/dir', '..', 'a\\b'):
+            response = self.upload(dataset_name)
+            self.assertEqual(response.status_code, 400, dataset_name)
+            self.assertEqual(response.get_json(), {"error": "Invalid dataset name"})
+
+            response = self.client.post('/api/data/upload/sessions',
+                                        json={'filename': 'SYN.csv', 'dataset_name': dataset_name,
+                                              'size': 100})
+            self.assertEqual(response.status_code, 400, dataset_name)
+
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir.name, '..', 'escaped.parquet')))
+        escaped = [name for name in os.listdir(self.tmp_dir.name) if name.startswith('escaped')]
+        self.assertEqual(escaped, [])
+
+    def test_history_dates_are_iso_strings(self):
+        """
+        測試直接放入資料目錄的台灣市場格式 CSV（start.bat 複製的範例資料），
+        歷史資料的「時間」欄位輸出為 YYYY-MM-DD 而非 HTTP 日期格式。
+        """
+        shutil.copy(self.csv_path, os.path.join('data', 'processed_data', 'tw.csv'))
+        records = self.client.get('/api/data/history',
+                                  query_string={'dataset_name': 'tw.csv'}).get_json()
+
+        self.assertEqual(len(records), 120)
+        self.assertEqual(records[0]['時間'], '1994-05-13')
+
+if __name__ == '__main__':
+    unittest.main()
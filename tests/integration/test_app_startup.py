@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# 在全新的直譯器中建立應用程式，回報已載入的重型模組
+STARTUP_SCRIPT = """
+import json, sys
+sys.path.insert(0, {root!r})
+from src.app import create_app
+app = create_app(preload_ml={preload})
+status = app.test_client().get('/api/status').get_json()
+{wait}
+print(json.dumps({{'status': status,
+                  'tensorflow': 'tensorflow' in sys.modules,
+                  'sklearn': 'sklearn' in sys.modules}}))
+"""
+
+try:
+    import flask  # noqa: F401
+    FLASK_AVAILABLE = True
+except ImportError:
+    FLASK_AVAILABLE = False
+
+
+@unittest.skipUnless(FLASK_AVAILABLE, "Flask 尚未安裝")
+class TestAppStartup(unittest.TestCase):
+    """
+    整合測試：API 啟動時不匯入 TensorFlow / scikit-learn
+    """
+
+    def run_startup(self, preload=False, wait=''):
+        with tempfile.TemporaryDirectory() as workspace:
+            result = subprocess.run(
+                [sys.executable, '-c', STARTUP_SCRIPT.format(root=ROOT_DIR, preload=preload, wait=wait)],
+                cwd=workspace, capture_output=True, text=True, timeout=300
+            )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout.strip().splitlines()[-1])
+
+    def test_startup_does_not_import_ml_modules(self):
+        """
+        測試建立應用程式並回應 /api/status 時尚未匯入 TensorFlow 與 scikit-learn。
+        """
+        result = self.run_startup()
+        self.assertEqual(result['status']['status'], 'running')
+        self.assertFalse(result['status']['ml_loaded'])
+        self.assertFalse(result['tensorflow'])
+        self.assertFalse(result['sklearn'])
+
+    def test_background_preload_imports_ml_modules(self):
+        """
+        測試啟用背景預先匯入時，伺服器先回應請求，之後才載入 ML 模組。
+        """
+        wait = ("import threading\n"
+                "[t.join() for t in threading.enumerate() if t.name == 'ml-preload']")
+        result = self.run_startup(preload=True, wait=wait)
+        self.assertFalse(result['status']['ml_loaded'])
+        self.assertTrue(result['tensorflow'])
+        self.assertTrue(result['sklearn'])
+
+
+if __name__ == '__main__':
+    unittest.main()
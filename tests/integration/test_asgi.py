@@ -0,0 +1,170 @@
+import unittest
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from asgi import AsyncApi
+    from data.synthetic import SyntheticMarketGenerator
+    ASGI_AVAILABLE = True
+except ImportError:
+    ASGI_AVAILABLE = False
+
+try:
+    import uvicorn
+    UVICORN_AVAILABLE = True
+except ImportError:
+    UVICORN_AVAILABLE = False
+
+
+async def call(app, method, path, query=b'', body=b'', headers=()):
+    """
+    直接呼叫 ASGI 應用程式，返回 (狀態碼, 標頭, 主體)。
+    """
+    scope = {'type': 'http', 'http_version': '1.1', 'method': method, 'scheme': 'http',
+             'path': path, 'raw_path': path.encode(), 'query_string': query, 'root_path': '',
+             'headers': [(b'content-length', str(len(body)).encode())] + list(headers),
+             'server': ('testserver', 80), 'client': ('127.0.0.1', 1234)}
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    response = {'body': b''}
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = {name.decode(): value.decode()
+                                   for name, value in message['headers']}
+        else:
+            response['body'] += message.get('body', b'')
+
+    await app(scope, receive, send)
+    return response['status'], response['headers'], response['body']
+
+
+@unittest.skipUnless(ASGI_AVAILABLE, "ASGI 應用尚未實作")
+class TestAsyncApi(unittest.TestCase):
+    """
+    整合測試：非同步 API 與 Flask API 的回應相同，並以少量執行緒維持大量連線
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.app = AsyncApi(io_threads=2, cpu_threads=1, wsgi_threads=1)
+        self.client = self.app.flask_app.test_client()
+
+        csv_path = SyntheticMarketGenerator(seed=3).write_ticker(
+            os.path.join(self.tmp_dir.name, 'SYN.csv'), 300)
+        self.app.data_service.ingest_csv(csv_path, 'syn')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def test_responses_match_flask_api(self):
+        """
+        測試各端點（非同步處理與交給 Flask 的端點）的狀態碼、主體與標頭皆與 Flask API 相同。
+        """
+        requests = [
+            ('GET', '/api/data/list', b''),
+            ('GET', '/api/data/history', b'dataset_name=syn'),
+            ('GET', '/api/data/history', b'dataset_name=missing'),
+            ('GET', '/api/data/history', b''),
+            ('GET', '/api/model/list', b''),
+            ('GET', '/api/model/list', b'sort=model_name&limit=abc'),
+            ('GET', '/api/model/list', b'sort=unknown'),
+            ('GET', '/api/model/predict', b'model_id=nope&n_days=3'),
+            ('GET', '/api/model/predict', b'model_id=nope&n_days=99'),
+            ('GET', '/api/model/predict', b'model_id=nope'),
+            ('GET', '/api/model/predict', b'model_id=nope&n_days=3&samples=5000'),
+            ('GET', '/api/model/train/bulk/nope', b''),
+        ]
+        for method, path, query in requests:
+            with self.subTest(path=path, query=query):
+                status, headers, body = asyncio.run(call(self.app, method, path, query))
+                expected = self.client.open(path, method=method, query_string=query.decode())
+                self.assertEqual(status, expected.status_code)
+                self.assertEqual(body, expected.data)
+                self.assertEqual(headers.get('x-total-count'),
+                                 expected.headers.get('X-Total-Count'))
+
+        body = b'{"n_days": 3}'
+        status, _, data = asyncio.run(call(self.app, 'POST', '/api/model/train', body=body,
+                                           headers=[(b'content-type', b'application/json')]))
+        expected = self.client.post('/api/model/train', data=body, content_type='application/json')
+        self.assertEqual((status, data), (expected.status_code, expected.data))
+
+        _, headers, _ = asyncio.run(call(self.app, 'GET', '/api/status',
+                                         headers=[(b'origin', b'http://localhost:8050')]))
+        self.assertEqual(headers['access-control-allow-origin'], 'http://localhost:8050')
+
+    async def start_uvicorn(self):
+        """
+        在目前的事件迴圈中以 uvicorn 啟動應用程式，返回 (伺服器, 埠號, 執行中的任務)。
+        """
+        server = uvicorn.Server(uvicorn.Config(self.app, host='127.0.0.1', port=0, lifespan='off',
+                                               log_level='warning'))
+        task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        return server, server.servers[0].sockets[0].getsockname()[1], task
+
+    @unittest.skipUnless(UVICORN_AVAILABLE, "未安裝 uvicorn")
+    def test_idle_clients_do_not_hold_threads(self):
+        """
+        測試數百個尚未送完請求的連線不佔用執行緒，其他請求仍可即時處理。
+        """
+        async def scenario():
+            server, port, task = await self.start_uvicorn()
+            idle = []
+            for _ in range(300):
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(b'GET /api/status HTTP/1.1\r\nHost: test\r\n')
+                idle.append(writer)
+
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /api/data/history?dataset_name=syn HTTP/1.1\r\n'
+                         b'Host: test\r\nConnection: close\r\n\r\n')
+            response = await asyncio.wait_for(reader.read(), 30)
+            threads = threading.active_count()
+
+            for connection in idle + [writer]:
+                connection.close()
+            server.should_exit = True
+            await task
+            return response, threads
+
+        response, threads = asyncio.run(scenario())
+        self.assertTrue(response.startswith(b'HTTP/1.1 200 OK'))
+        self.assertIn(b'"close":', response)
+        self.assertLess(threads, 50)
+
+    @unittest.skipUnless(UVICORN_AVAILABLE, "未安裝 uvicorn")
+    def test_malformed_content_length_rejected(self):
+        """
+        測試 Content-Length 不是數字的請求回應 400，而不是中斷連線。
+        """
+        async def scenario():
+            server, port, task = await self.start_uvicorn()
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'POST /api/model/train HTTP/1.1\r\n'
+                         b'Host: test\r\nContent-Length: abc\r\n\r\n')
+            response = await asyncio.wait_for(reader.read(), 30)
+            writer.close()
+            server.should_exit = True
+            await task
+            return response
+
+        self.assertTrue(asyncio.run(scenario()).startswith(b'HTTP/1.1 400'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import unittest
+import sys
+import os
+import re
+import signal
+import subprocess
+import tempfile
+import time
+import urllib.request
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+
+# 回應工作程序 PID 的最小 WSGI 應用；旗標檔存在時視為有進行中的背景任務
+PID_SERVER = '''
+import os, sys
+from src.serve import PreforkServer
+
+def app(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [str(os.getpid()).encode()]
+
+flag = sys.argv[1]
+server = PreforkServer(app, '127.0.0.1', 0, workers=1, threads=2, max_requests=1, max_requests_jitter=0,
+                       graceful_timeout=10, background_busy=lambda: os.path.exists(flag))
+print(server.port, flush=True)
+server.run()
+'''
+
+try:
+    import flask  # noqa: F401
+    FLASK_AVAILABLE = True
+except ImportError:
+    FLASK_AVAILABLE = False
+
+
+@unittest.skipUnless(FLASK_AVAILABLE and hasattr(os, 'fork'), "需要 Flask 與 fork")
+class TestPreforkServer(unittest.TestCase):
+    """
+    整合測試：多工作程序的生產環境服務
+    """
+
+    def test_workers_recycle_and_stop_gracefully(self):
+        """
+        測試工作程序處理 max_requests 個請求後由新的工作程序接手、請求不中斷，SIGTERM 後正常結束。
+        """
+        env = dict(os.environ, SECRET_KEY='test', PYTHONPATH=ROOT_DIR)
+        with tempfile.TemporaryDirectory() as workspace:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'src.serve', '--host', '127.0.0.1', '--port', '0', '--workers', '2',
+                 '--max-requests', '3', '--max-requests-jitter', '0', '--graceful-timeout', '10'],
+                cwd=workspace, env=env, stderr=subprocess.PIPE, text=True
+            )
+            try:
+                port = None
+                for line in process.stderr:
+                    match = re.search(r':(\d+) 啟動', line)
+                    if match:
+                        port = int(match.group(1))
+                        break
+                self.assertIsNotNone(port, "伺服器未啟動")
+
+                for _ in range(20):
+                    with urllib.request.urlopen(f'http://127.0.0.1:{port}/api/status', timeout=30) as response:
+                        self.assertEqual(response.status, 200)
+
+                process.send_signal(signal.SIGTERM)
+                _, stderr = process.communicate(timeout=60)
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                    process.communicate()
+
+        self.assertEqual(process.returncode, 0, stderr)
+        self.assertIn('重新建立', stderr)
+        self.assertIn('伺服器已停止', stderr)
+
+    def test_background_jobs_defer_worker_replacement(self):
+        """
+        測試有背景任務時工作程序達到請求上限也不重新建立；SIGHUP 後舊的工作程序停止接受連線，
+        等背景任務完成才結束。
+        """
+        env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+        with tempfile.TemporaryDirectory() as workspace:
+            flag = os.path.join(workspace, 'busy')
+            open(flag, 'w').close()
+            process = subprocess.Popen([sys.executable, '-c', PID_SERVER, flag], cwd=workspace, env=env,
+                                       stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+            def worker_pid():
+                with urllib.request.urlopen(f'http://127.0.0.1:{port}/', timeout=30) as response:
+                    return int(response.read())
+
+            def wait_for(condition):
+                deadline = time.monotonic() + 20
+                while time.monotonic() < deadline:
+                    if condition():
+                        return True
+                    time.sleep(0.1)
+                return False
+
+            def alive(pid):
+                try:
+                    os.kill(pid, 0)
+                    return not open(f'/proc/{pid}/stat').read().split()[2] == 'Z'
+                except (OSError, FileNotFoundError):
+                    return False
+
+            try:
+                port = int(process.stdout.readline())
+                first = worker_pid()
+                self.assertEqual({worker_pid() for _ in range(3)}, {first})
+
+                process.send_signal(signal.SIGHUP)
+                self.assertTrue(wait_for(lambda: worker_pid() != first), "新的工作程序未接手")
+                time.sleep(1.5)
+                self.assertTrue(alive(first), "舊的工作程序在背景任務完成前結束")
+
+                os.remove(flag)
+                self.assertTrue(wait_for(lambda: not alive(first)), "背景任務完成後舊的工作程序未結束")
+
+                process.send_signal(signal.SIGTERM)
+                process.communicate(timeout=60)
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                    process.communicate()
+        self.assertEqual(process.returncode, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import sys
+import os
+import argparse
+import contextlib
+import io
+import tempfile
+
+# 將 benchmarks/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../benchmarks')))
+
+try:
+    from history import (EXIT_REGRESSION, ResultsHistory, bootstrap_ratio, command_compare, compare_reports,
+                         machine_fingerprint)
+except ImportError:
+    ResultsHistory = None
+
+BASELINE_SAMPLES = [1.00, 1.01, 0.99, 1.02, 0.98, 1.00, 1.01]
+
+
+def make_report(samples, commit, timestamp, cpu_model='Test CPU'):
+    """
+    建立與 benchmarks/suite.py 相同格式的結果（只有一個項目）。
+    """
+    samples = sorted(samples)
+    return {
+        'environment': {'cpu_model': cpu_model, 'usable_cpus': 4, 'python': '3.11', 'packages': {},
+                        'timestamp': timestamp, 'git': {'commit': commit, 'dirty': False}},
+        'results': [{'name': 'predict', 'scale': 1, 'group': 'inference',
+                     'median_s': samples[len(samples) // 2], 'samples_s': samples}],
+    }
+
+
+@unittest.skipUnless(ResultsHistory, "benchmarks/history.py 尚未實作")
+class TestBenchmarkHistory(unittest.TestCase):
+    """
+    單元測試：基準測試結果的退化判定
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.history = ResultsHistory(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def compare(self, baseline_samples, candidate_samples):
+        """
+        將兩次執行存入歷史後以 command_compare 比較，返回結束狀態。
+        """
+        self.history.record(make_report(baseline_samples, 'aaaa111', '2025-01-01T00:00:00'))
+        self.history.record(make_report(candidate_samples, 'bbbb222', '2025-01-02T00:00:00'))
+        args = argparse.Namespace(baseline=None, candidate=None, threshold=0.1, confidence=0.95,
+                                  groups=['inference'], allow_cross_machine=False, json_path=None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return command_compare(self.history, args)
+
+    def test_bootstrap_ratio_interval_contains_ratio(self):
+        """
+        測試 bootstrap 的比值為中位數比值，且信賴區間包含該比值。
+        """
+        ratio, low, high = bootstrap_ratio(BASELINE_SAMPLES, [s * 1.5 for s in BASELINE_SAMPLES])
+        self.assertAlmostEqual(ratio, 1.5)
+        self.assertLessEqual(low, ratio)
+        self.assertGreaterEqual(high, ratio)
+        self.assertGreater(low, 1.0)
+
+    def test_slower_samples_exit_with_regression(self):
+        """
+        測試明顯變慢的結果判定為退化並以非零狀態結束。
+        """
+        self.assertEqual(self.compare(BASELINE_SAMPLES, [s * 1.5 for s in BASELINE_SAMPLES]), EXIT_REGRESSION)
+
+    def test_equal_samples_exit_cleanly(self):
+        """
+        測試相同的結果不判定為退化。
+        """
+        self.assertEqual(self.compare(BASELINE_SAMPLES, list(BASELINE_SAMPLES)), 0)
+
+    def test_noisy_overlapping_samples_not_flagged(self):
+        """
+        測試中位數變慢超過門檻、但樣本雜訊大且分布重疊時，不判定為退化。
+        """
+        baseline = [0.6, 1.4, 0.8, 1.2, 1.0]
+        candidate = [0.5, 1.6, 0.9, 1.4, 1.2]
+        rows = compare_reports(make_report(baseline, 'aaaa111', '2025-01-01T00:00:00'),
+                               make_report(candidate, 'bbbb222', '2025-01-02T00:00:00'))
+        self.assertAlmostEqual(rows[0]['ratio'], 1.2)
+        self.assertLess(rows[0]['ci_low'], 1.0)
+        self.assertEqual(rows[0]['status'], 'unchanged')
+        self.assertEqual(self.compare(baseline, candidate), 0)
+
+    def test_insufficient_samples_not_flagged(self):
+        """
+        測試樣本數不足時標記為 insufficient，不判定為退化。
+        """
+        rows = compare_reports(make_report([1.0, 1.0], 'aaaa111', '2025-01-01T00:00:00'),
+                               make_report([2.0, 2.0], 'bbbb222', '2025-01-02T00:00:00'))
+        self.assertEqual(rows[0]['status'], 'insufficient')
+
+    def test_cross_machine_comparison_refused(self):
+        """
+        測試基準與新結果的機器指紋不同時拒絕比較（結束狀態 2），即使新結果明顯變慢。
+        """
+        baseline = make_report(BASELINE_SAMPLES, 'aaaa111', '2025-01-01T00:00:00', cpu_model='Other CPU')
+        candidate = make_report([s * 1.5 for s in BASELINE_SAMPLES], 'bbbb222', '2025-01-02T00:00:00')
+        self.assertNotEqual(machine_fingerprint(baseline['environment']),
+                            machine_fingerprint(candidate['environment']))
+        baseline_path = self.history.record(baseline)
+        self.history.record(candidate)
+
+        args = argparse.Namespace(baseline=baseline_path, candidate=None, threshold=0.1, confidence=0.95,
+                                  groups=['inference'], allow_cross_machine=False, json_path=None)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(command_compare(self.history, args), 2)
+        self.assertIn('--allow-cross-machine', output.getvalue())
+
+        args.allow_cross_machine = True
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(command_compare(self.history, args), EXIT_REGRESSION)
+
+
+if __name__ == '__main__':
+    unittest.main()
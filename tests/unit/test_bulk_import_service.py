@@ -0,0 +1,174 @@
+import unittest
+import sys
+import os
+import tempfile
+import zipfile
+from unittest.mock import patch
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from services.bulk_import_service import BulkImportService, list_csv_files
+    from services.data_service import DataService
+    from utils.data_loader import DataLoader
+except ImportError:
+    BulkImportService = None
+
+
+def make_csv(rows: int = 20, close_offset: int = 100) -> str:
+    return "時間,開盤價,最高價,最低價,收盤價,成交量\n" + "".join(
+        f"2024/1/{day},{close_offset + day},{close_offset + day + 1},{close_offset + day - 1},"
+        f"{close_offset + day},{1000 + day}\n"
+        for day in range(1, rows + 1)
+    )
+
+
+BAD_CSV = "name,value\na,1\n"
+
+
+@unittest.skipUnless(BulkImportService, "BulkImportService 尚未實作")
+class TestBulkImportService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_service = DataService(DataLoader(data_dir=os.path.join(self.tmp_dir.name, 'processed')))
+        self.service = BulkImportService(self.data_service)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_files(self, files: dict) -> str:
+        source = os.path.join(self.tmp_dir.name, 'source')
+        for name, content in files.items():
+            path = os.path.join(source, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        return source
+
+    def test_directory_import_reports_failures_without_aborting(self):
+        """
+        測試目錄匯入：有效檔案寫入資料集，無效檔案記錄失敗原因，不影響其他檔案。
+        """
+        source = self.write_files({'2330.csv': make_csv(20), 'sub/2317.csv': make_csv(15), 'bad.csv': BAD_CSV,
+                                   'notes.txt': 'ignored'})
+        report = self.service.run(source, prefix='tw_', max_workers=1)
+
+        self.assertEqual(report['status'], 'completed')
+        self.assertEqual(report['total_files'], 3)
+        self.assertEqual(report['counts']['completed'], 2)
+        self.assertEqual([failure['file'] for failure in report['failures']], ['bad.csv'])
+        self.assertEqual(len(self.data_service.get_dataset('tw_2330.csv')), 20)
+        self.assertEqual(len(self.data_service.get_dataset('tw_2317.csv')), 15)
+        self.assertEqual(self.data_service.get_dataset_entry('tw_2330.csv')['rows'], 20)
+
+        # 報告寫入磁碟，服務重新建立後仍可查詢
+        restarted = BulkImportService(self.data_service)
+        self.assertEqual(restarted.get_status(report['import_id'])['counts']['failed'], 1)
+
+    def test_zip_import_with_process_pool(self):
+        """
+        測試 zip 匯入以多個工作程序執行，並略過非 CSV 與 __MACOSX 成員。
+        """
+        archive_path = os.path.join(self.tmp_dir.name, 'tickers.zip')
+        with zipfile.ZipFile(archive_path, 'w') as archive:
+            archive.writestr('2330.csv', make_csv(20))
+            archive.writestr('2454.csv', make_csv(25, close_offset=500))
+            archive.writestr('__MACOSX/._2330.csv', 'junk')
+            archive.writestr('readme.txt', 'ignored')
+        self.assertEqual([item['file'] for item in list_csv_files(archive_path)], ['2330.csv', '2454.csv'])
+
+        with patch('services.bulk_import_service.available_cpus', return_value=[0, 1]):
+            report = self.service.run(archive_path, max_workers=2)
+
+        self.assertEqual(report['workers'], 2)
+        self.assertEqual(report['counts']['completed'], 2)
+        self.assertEqual(len(self.data_service.get_dataset('2454.csv')), 25)
+        self.assertIsNotNone(report['files_per_s'])
+
+    def test_duplicate_names_and_skip_existing(self):
+        """
+        測試不同子目錄中的同名檔案只匯入第一個；已存在的資料集預設記錄為失敗，
+        skip_existing 略過，overwrite 取代。
+        """
+        source = self.write_files({'a/2330.csv': make_csv(20), 'b/2330.csv': make_csv(10)})
+        report = self.service.run(source, max_workers=1)
+        self.assertEqual(report['counts'], {'pending': 0, 'running': 0, 'completed': 1, 'failed': 1, 'skipped': 0})
+        self.assertEqual(len(self.data_service.get_dataset('2330.csv')), 20)
+
+        report = self.service.run(source, skip_existing=True, max_workers=1)
+        self.assertEqual(report['counts']['skipped'], 1)
+
+        source = self.write_files({'2330.csv': make_csv(12)})
+        report = self.service.run(source, max_workers=1)
+        self.assertEqual(report['failures'][0]['error'], 'Dataset name already exists')
+        self.assertEqual(len(self.data_service.get_dataset('2330.csv')), 20)
+
+        report = self.service.run(source, overwrite=True, max_workers=1)
+        self.assertEqual(report['counts']['completed'], 1)
+        self.assertEqual(len(self.data_service.get_dataset('2330.csv')), 12)
+
+        with self.assertRaises(ValueError):
+            self.service.run(source, skip_existing=True, overwrite=True)
+
+    def test_prefix_with_path_is_rejected(self):
+        """
+        測試含路徑的前綴被拒絕，不在資料目錄以外寫入檔案。
+        """
+        source = self.write_files({'2330.csv': make_csv(20)})
+        for prefix in ('../../x', 'sub/', '..'):
+            with self.assertRaises(ValueError):
+                self.service.run(source, prefix=prefix, max_workers=1)
+        self.assertFalse(os.path.exists(os.path.join(os.path.dirname(self.tmp_dir.name), 'x2330.csv.parquet')))
+        self.assertFalse(os.path.exists(os.path.join(self.data_service.data_storage_dir, 'sub')))
+
+    def test_queued_files_stay_pending_until_a_worker_starts(self):
+        """
+        測試以程序池匯入時，同時標記為 running 的檔案數不超過工作程序數。
+        """
+        source = self.write_files({f'{ticker}.csv': make_csv(20) for ticker in range(2330, 2336)})
+        running = []
+        snapshot = self.service._snapshot
+
+        def record_running(job):
+            result = snapshot(job)
+            running.append(result['counts']['running'])
+            return result
+
+        with patch('services.bulk_import_service.available_cpus', return_value=[0, 1]), \
+                patch('services.bulk_import_service.REPORT_INTERVAL_S', 0.0), \
+                patch.object(self.service, '_snapshot', side_effect=record_running):
+            report = self.service.run(source, max_workers=2)
+
+        self.assertEqual(report['counts']['completed'], 6)
+        self.assertLessEqual(max(running), 2)
+
+    def test_submitted_job_visible_to_other_processes(self):
+        """
+        測試提交後立即寫入報告（多工作程序服務中由其他工作程序查詢），並回報有進行中的任務。
+        """
+        source = self.write_files({'2330.csv': make_csv(20)})
+        with patch('services.bulk_import_service.threading.Thread'):
+            import_id = self.service.submit(source, max_workers=1)
+
+        self.assertTrue(self.service.has_active_jobs())
+        self.assertEqual(BulkImportService(self.data_service).get_status(import_id)['status'], 'queued')
+
+        self.service._run_job(import_id)
+        self.assertFalse(self.service.has_active_jobs())
+        self.assertEqual(BulkImportService(self.data_service).get_status(import_id)['status'], 'completed')
+
+    def test_rejects_sources_without_csv(self):
+        """
+        測試不是目錄或 zip、或沒有 CSV 的來源被拒絕。
+        """
+        source = self.write_files({'notes.txt': 'ignored'})
+        with self.assertRaises(ValueError):
+            self.service.run(source)
+        with self.assertRaises(ValueError):
+            self.service.run(os.path.join(source, 'notes.txt'))
+
+
+if __name__ == '__main__':
+    unittest.main()
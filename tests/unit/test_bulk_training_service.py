@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock, patch
+import numpy as np
+import pandas as pd
+
+# 為了讓測試能夠找到 src/services/bulk_training_service.py，需要將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from services.bulk_training_service import BulkTrainingService, plan_workers
+    from data.preprocessor import DataPreprocessor
+except ImportError:
+    BulkTrainingService = None
+
+
+@unittest.skipUnless(BulkTrainingService, "BulkTrainingService 尚未實作")
+class TestBulkTrainingService(unittest.TestCase):
+
+    def test_plan_workers_splits_cores(self):
+        """
+        測試工作程序數依核心數與每程序執行緒數決定，且每個程序的核心組互不重疊。
+        """
+        with patch('services.bulk_training_service.available_cpus', return_value=list(range(8))):
+            plan = plan_workers(n_jobs=60, threads_per_worker=2)
+            self.assertEqual(plan['workers'], 4)
+            self.assertEqual(plan['core_sets'], [[0, 1], [2, 3], [4, 5], [6, 7]])
+
+            # 任務數少於可用程序數時不建立多餘的程序
+            self.assertEqual(plan_workers(n_jobs=3, threads_per_worker=2)['workers'], 3)
+            self.assertEqual(plan_workers(n_jobs=60, max_workers=2, threads_per_worker=2)['workers'], 2)
+
+    def test_shared_array_sequences_match_preprocess(self):
+        """
+        測試由共用正規化陣列建立的序列與完整 preprocess 的結果一致。
+        """
+        rng = np.random.default_rng(0)
+        close = 100 + np.cumsum(rng.normal(size=120))
+        df = pd.DataFrame({'date': pd.date_range('2023-01-01', periods=120), 'close': close})
+
+        preprocessor = DataPreprocessor()
+        X_expected, y_expected, _ = preprocessor.preprocess(df, 5, 3, 'close')
+
+        normalized_df, _ = preprocessor.normalize_data(preprocessor.feature_engineering(df.copy()))
+        target_idx = normalized_df.columns.get_loc('close')
+        X, y = preprocessor.create_sequences_from_array(normalized_df.to_numpy(), 5, 3, target_idx)
+
+        np.testing.assert_allclose(X, X_expected)
+        np.testing.assert_allclose(y, y_expected)
+
+    def test_submit_rejects_out_of_range_n_days(self):
+        """
+        測試超出範圍的預測天數在建立任務前即被拒絕。
+        """
+        model_manager = MagicMock()
+        model_manager.model_dir = '/tmp/unused'
+        service = BulkTrainingService(MagicMock(), model_manager, MagicMock())
+        with self.assertRaises(ValueError):
+            service.submit(['a.csv'], [0, 31])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from data.catalog import DatasetCatalog, DatasetStatsAccumulator, compute_entry
+except ImportError:
+    DatasetCatalog = None
+
+
+@unittest.skipUnless(DatasetCatalog, "DatasetCatalog 尚未實作")
+class TestDatasetCatalog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_dir = self.tmp_dir.name
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({
+            'date': pd.date_range('2023-01-01', periods=250).strftime('%Y-%m-%d'),
+            'close': 100 + np.cumsum(rng.normal(size=250)),
+            'volume': rng.integers(1000, 5000, size=250)
+        })
+        self.df.loc[10, 'volume'] = np.nan
+        self.csv_path = os.path.join(self.data_dir, 'stock.csv')
+        self.df.to_csv(self.csv_path, index=False)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_chunked_stats_match_single_pass(self):
+        """
+        測試分塊累積的統計與一次讀入的結果一致。
+        """
+        single = DatasetStatsAccumulator()
+        single.update(pd.read_csv(self.csv_path))
+        expected = single.to_entry('stock.csv')
+
+        entry = compute_entry(self.csv_path, chunksize=32)
+        self.assertEqual(entry['rows'], 250)
+        for key in ('first_date', 'last_date', 'min_close', 'max_close', 'last_close', 'date_column', 'close_column'):
+            self.assertEqual(entry[key], expected[key], key)
+        columns = {col['name']: col for col in entry['columns']}
+        self.assertEqual(columns['volume']['null_count'], 1)
+        self.assertEqual(entry['first_date'], '2023-01-01')
+        self.assertIsNotNone(entry['sha256'])
+
+    def test_entry_marked_stale_after_file_change(self):
+        """
+        測試資料檔變更後目錄項目被標記為過期，backfill 會重建。
+        """
+        catalog = DatasetCatalog(self.data_dir)
+        catalog.build_entry('stock.csv')
+        self.assertFalse(catalog.get_entry('stock.csv')['stale'])
+
+        self.df.iloc[:100].to_csv(self.csv_path, index=False)
+        self.assertTrue(catalog.get_entry('stock.csv')['stale'])
+
+        self.assertEqual(catalog.backfill(['stock.csv']), ['stock.csv'])
+        entry = catalog.get_entry('stock.csv')
+        self.assertFalse(entry['stale'])
+        self.assertEqual(entry['rows'], 100)
+
+    def test_list_entries_reads_only_meta_files(self):
+        """
+        測試列出目錄項目只包含已建立項目的資料集。
+        """
+        catalog = DatasetCatalog(self.data_dir)
+        self.df.to_csv(os.path.join(self.data_dir, 'other.csv'), index=False)
+        catalog.build_entry('stock.csv')
+        self.assertEqual([entry['dataset_name'] for entry in catalog.list_entries()], ['stock.csv'])
+        self.assertIsNone(catalog.get_entry('other.csv'))
+
+
+if __name__ == '__main__':
+    unittest.main()
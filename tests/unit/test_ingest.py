@@ -0,0 +1,109 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+import numpy as np
+import pandas as pd
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from data.ingest import CsvIngestor, IngestError
+except ImportError:
+    CsvIngestor = None
+
+
+def make_csv(rows: int = 300) -> str:
+    """
+    產生與內附資料相同格式的 CSV：中文欄位、YYYY/M/D 日期、前段為 N/A 後段為文字的欄位、結尾多一個逗號。
+    """
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2020-01-01', periods=rows)
+    close = 100 + np.cumsum(rng.normal(size=rows))
+    lines = ['時間,開盤價,最高價,最低價,收盤價,成交量,買賣超(元),']
+    for i, (date, price) in enumerate(zip(dates, close)):
+        net_buy = 'N/A' if i < rows // 2 else f"{i - rows // 2}億"
+        lines.append(f"{date.year}/{date.month}/{date.day},{price:.2f},{price + 1:.2f},"
+                     f"{price - 1:.2f},{price:.2f},{1000 + i},{net_buy},")
+    return '\n'.join(lines) + '\n'
+
+
+@unittest.skipUnless(CsvIngestor, "CsvIngestor 尚未實作")
+class TestCsvIngestor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.tmp_dir.name, 'stock.csv.parquet')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def ingest(self, content: str, chunksize: int = 64):
+        return CsvIngestor(chunksize).ingest(io.BytesIO(content.encode('utf-8')), self.output_path,
+                                             'stock.csv')
+
+    def test_chunked_ingest_matches_full_read(self):
+        """
+        測試分塊匯入的結果與一次讀入相同，且欄位型別不因區塊而改變。
+        """
+        content = make_csv()
+        result = self.ingest(content)
+
+        expected = pd.read_csv(io.StringIO(content)).drop(columns=['Unnamed: 7'])
+        stored = pd.read_parquet(self.output_path)
+
+        self.assertEqual(result['rows'], 300)
+        self.assertEqual(result['date_format'], '%Y/%m/%d')
+        self.assertEqual(list(stored.columns),
+                         ['date', 'open', 'high', 'low', 'close', 'volume', '買賣超(元)'])
+        np.testing.assert_allclose(stored['close'], expected['收盤價'])
+        self.assertEqual(stored['date'].iloc[-1], pd.Timestamp('2020-10-26'))
+        # 第一個區塊全為缺失值的欄位以字串保存後續區塊的原始內容
+        self.assertTrue(stored['買賣超(元)'].iloc[:150].isna().all())
+        self.assertEqual(stored['買賣超(元)'].iloc[-1], '149億')
+
+        self.assertEqual(result['catalog']['rows'], 300)
+        self.assertEqual(result['catalog']['first_date'], '2020-01-01')
+
+    def test_rejects_duplicate_and_out_of_order_dates(self):
+        """
+        測試重複日期與日期倒序（含跨區塊邊界）被拒絕，且不產生輸出檔案。
+        """
+        lines = make_csv(200).splitlines()
+        duplicated = lines[:65] + [lines[64]] + lines[65:]
+        with self.assertRaisesRegex(IngestError, 'Duplicate date at line\\(s\\) 66'):
+            self.ingest('\n'.join(duplicated) + '\n')
+
+        swapped = lines[:]
+        swapped[65], swapped[66] = swapped[66], swapped[65]
+        with self.assertRaisesRegex(IngestError, 'ascending order'):
+            self.ingest('\n'.join(swapped) + '\n')
+        self.assertFalse(os.path.exists(self.output_path))
+
+    def test_rejects_non_positive_prices_and_bad_dates(self):
+        """
+        測試非正價格與無法以固定格式解析的日期被拒絕。
+        """
+        lines = make_csv(100).splitlines()
+        fields = lines[80].split(',')
+        fields[4] = '0'
+        bad_price = lines[:80] + [','.join(fields)] + lines[81:]
+        with self.assertRaisesRegex(IngestError, "Non-positive 'close' price at line\\(s\\) 81"):
+            self.ingest('\n'.join(bad_price) + '\n')
+
+        bad_date = lines[:90] + ['2020-03-31' + lines[90][lines[90].index(','):]] + lines[91:]
+        with self.assertRaisesRegex(IngestError, 'Invalid date'):
+            self.ingest('\n'.join(bad_date) + '\n')
+
+    def test_rejects_missing_columns(self):
+        """
+        測試缺少日期或收盤價欄位時由第一個區塊拒絕。
+        """
+        with self.assertRaisesRegex(IngestError, 'missing required columns: close/收盤價'):
+            self.ingest("date,open\n2020-01-01,1\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import json
+import logging
+import queue
+import tempfile
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from src.utils.logger import (NonBlockingQueueHandler, RateLimitFilter, SamplingFilter, flush_logs,
+                                  setup_logger)
+    from src.utils.metrics import REGISTRY
+except ImportError:
+    setup_logger = None
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_record(level=logging.INFO, msg='訊息'):
+    return logging.LogRecord('test', level, __file__, 0, msg, (), None)
+
+
+@unittest.skipUnless(setup_logger, "logger 尚未實作")
+class TestQueuedLogger(unittest.TestCase):
+
+    def test_queued_json_file_output(self):
+        """
+        測試紀錄經由佇列寫入檔案，每行一筆 JSON，包含 extra 欄位與例外內容。
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, 'app.log')
+            logger = setup_logger('test_logger.queued', log_file)
+            logger.propagate = False
+            self.assertIsInstance(logger.handlers[0], NonBlockingQueueHandler)
+
+            logger.info("模型 '%s' 已載入", 'm1', extra={'model_id': 'm1'})
+            try:
+                raise ValueError('壞掉了')
+            except ValueError:
+                logger.error('載入失敗', exc_info=True)
+            flush_logs()
+
+            with open(log_file, encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+            for handler in list(logger.handlers):
+                logger.removeHandler(handler)
+
+        self.assertEqual(records[0]['message'], "模型 'm1' 已載入")
+        self.assertEqual(records[0]['level'], 'INFO')
+        self.assertEqual(records[0]['model_id'], 'm1')
+        self.assertEqual(records[0]['logger'], 'test_logger.queued')
+        self.assertIn('ValueError: 壞掉了', records[1]['exception'])
+
+    def test_full_queue_drops_without_blocking(self):
+        """
+        測試佇列已滿時丟棄紀錄並計數，不阻塞呼叫端。
+        """
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+        before = REGISTRY.counter('log_records_dropped_total', '').get()
+        for _ in range(3):
+            handler.handle(make_record())
+        self.assertEqual(REGISTRY.counter('log_records_dropped_total', '').get() - before, 2)
+
+    def test_rate_limit_and_sampling(self):
+        """
+        測試速率限制超過上限時略過並於下一筆紀錄附上略過筆數；抽樣只保留部分 INFO，WARNING 一律保留。
+        """
+        clock = FakeClock()
+        rate_limit = RateLimitFilter(rate=1, burst=2, clock=clock)
+        passed = [rate_limit.filter(make_record()) for _ in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+
+        clock.now = 1.0
+        record = make_record()
+        self.assertTrue(rate_limit.filter(record))
+        self.assertEqual(record.suppressed, 3)
+
+        sampling = SamplingFilter(0.25)
+        kept = [record for record in (make_record() for _ in range(8)) if sampling.filter(record)]
+        self.assertEqual(len(kept), 2)
+        self.assertEqual(kept[0].sample_rate, 0.25)
+        self.assertTrue(all(sampling.filter(make_record(logging.WARNING)) for _ in range(4)))
+
+
+if __name__ == '__main__':
+    unittest.main()
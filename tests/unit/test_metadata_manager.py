@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import multiprocessing
+
+# 為了讓測試能夠找到 src/utils/metadata_manager.py，需要將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from utils.metadata_manager import MetadataManager
+except ImportError:
+    MetadataManager = None
+
+
+def _make_metadata(model_id, dataset_name='a.csv', n_days=1, training_date='2025-01-01T00:00:00', **extra):
+    return dict({'model_id': model_id, 'model_name': f"Model_{model_id}", 'dataset_name': dataset_name,
+                 'n_days': n_days, 'training_date': training_date}, **extra)
+
+
+def _add_many(metadata_dir, worker, count):
+    manager = MetadataManager(metadata_dir=metadata_dir)
+    for i in range(count):
+        manager.add_metadata(_make_metadata(f"w{worker}-{i}"))
+        manager.update_metadata(f"w{worker}-{i}", {'performance_metrics': {'loss': i}})
+
+
+@unittest.skipUnless(MetadataManager, "MetadataManager 尚未實作")
+class TestMetadataManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.metadata_dir = self.tmp_dir.name
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_migrates_legacy_json_once(self):
+        """
+        測試舊版 metadata.json 匯入註冊表後更名為 .bak，且不會重複匯入。
+        """
+        legacy = [_make_metadata('m1'), _make_metadata('m2', dataset_name='b.csv')]
+        with open(os.path.join(self.metadata_dir, 'metadata.json'), 'w', encoding='utf-8') as f:
+            json.dump(legacy, f)
+
+        manager = MetadataManager(metadata_dir=self.metadata_dir)
+        self.assertEqual([m['model_id'] for m in manager.get_all_metadata()], ['m1', 'm2'])
+        self.assertFalse(os.path.exists(os.path.join(self.metadata_dir, 'metadata.json')))
+        self.assertTrue(os.path.exists(os.path.join(self.metadata_dir, 'metadata.json.bak')))
+
+        manager = MetadataManager(metadata_dir=self.metadata_dir)
+        self.assertEqual(len(manager.get_all_metadata()), 2)
+        self.assertEqual(manager.get_metadata_by_id('m2')['dataset_name'], 'b.csv')
+
+    def test_query_filters_sorting_and_pagination(self):
+        """
+        測試依資料集（含面板模型）與預測天數過濾、排序與分頁。
+        """
+        manager = MetadataManager(metadata_dir=self.metadata_dir)
+        for day in range(1, 6):
+            manager.add_metadata(_make_metadata(f"a{day}", n_days=day, training_date=f"2025-01-0{day}"))
+        manager.add_metadata(_make_metadata('b1', dataset_name='b.csv'))
+        manager.add_metadata(_make_metadata('p1', dataset_name='panel(2)', training_date='2025-02-01',
+                                            dataset_names=['a.csv', 'b.csv']))
+
+        page = manager.query_metadata(dataset_name='a.csv', limit=2, offset=1)
+        self.assertEqual([m['model_id'] for m in page], ['a5', 'a4'])
+        self.assertEqual(manager.count_metadata(dataset_name='a.csv'), 6)
+        self.assertEqual([m['model_id'] for m in manager.query_metadata(n_days=3)], ['a3'])
+
+        ascending = manager.query_metadata(dataset_name='b.csv', descending=False)
+        self.assertEqual([m['model_id'] for m in ascending], ['b1', 'p1'])
+        with self.assertRaises(ValueError):
+            manager.query_metadata(sort_by='metadata; DROP TABLE models')
+
+    def test_update_and_delete(self):
+        """
+        測試更新與刪除元資料。
+        """
+        manager = MetadataManager(metadata_dir=self.metadata_dir)
+        manager.add_metadata(_make_metadata('m1'))
+        self.assertTrue(manager.update_metadata('m1', {'performance_metrics': {'loss': 0.1}}))
+        self.assertEqual(manager.get_metadata_by_id('m1')['performance_metrics'], {'loss': 0.1})
+        self.assertFalse(manager.update_metadata('missing', {}))
+        self.assertTrue(manager.delete_metadata('m1'))
+        self.assertIsNone(manager.get_metadata_by_id('m1'))
+        self.assertEqual(manager.count_metadata(dataset_name='a.csv'), 0)
+
+    def test_concurrent_writers_across_processes(self):
+        """
+        測試多個程序同時寫入時不會遺失任何元資料。
+        """
+        MetadataManager(metadata_dir=self.metadata_dir)
+        context = multiprocessing.get_context('spawn')
+        processes = [context.Process(target=_add_many, args=(self.metadata_dir, worker, 20))
+                     for worker in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=120)
+            self.assertEqual(process.exitcode, 0)
+
+        manager = MetadataManager(metadata_dir=self.metadata_dir)
+        self.assertEqual(manager.count_metadata(), 80)
+        self.assertEqual(manager.get_metadata_by_id('w3-19')['performance_metrics'], {'loss': 19})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+import pandas as pd
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from utils.metrics import MetricsRegistry
+    from utils.lru_cache import LRUCache
+    from services.data_service import DataService
+    from utils.data_loader import DataLoader
+except ImportError:
+    MetricsRegistry = None
+
+
+@unittest.skipUnless(MetricsRegistry, "metrics 尚未實作")
+class TestMetrics(unittest.TestCase):
+
+    def test_render_prometheus_text_format(self):
+        """
+        測試計數器、量測值與直方圖的 Prometheus 文字格式輸出（累計的 bucket、_sum、_count）。
+        """
+        registry = MetricsRegistry()
+        requests = registry.counter('requests_total', 'Requests.', ['route'])
+        requests.labels('/api/model/predict').inc()
+        requests.labels(route='/api/model/predict').inc(2)
+        registry.gauge('queue_depth', 'Queue depth.').set_function(lambda: 7)
+        latency = registry.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            latency.observe(value)
+
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE requests_total counter', lines)
+        self.assertIn('requests_total{route="/api/model/predict"} 3', lines)
+        self.assertIn('queue_depth 7', lines)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 2', lines)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn('latency_seconds_sum 5.55', lines)
+        self.assertIn('latency_seconds_count 3', lines)
+
+        # 以相同名稱重複註冊時沿用既有指標，不同型別則拒絕
+        self.assertIs(registry.counter('requests_total', 'Requests.', ['route']), requests)
+        with self.assertRaises(ValueError):
+            registry.gauge('requests_total', 'Requests.')
+
+    def test_lru_cache_hits_misses_and_evictions(self):
+        """
+        測試 LRU 快取的命中、淘汰最久未使用的項目，以及簽章改變時重新載入。
+        """
+        cache = LRUCache('test', maxsize=2)
+        loads = []
+
+        def loader(key):
+            return lambda: loads.append(key) or key.upper()
+
+        self.assertEqual(cache.get('a', loader('a')), 'A')
+        self.assertEqual(cache.get('a', loader('a')), 'A')
+        cache.get('b', loader('b'))
+        cache.get('a', loader('a'))
+        cache.get('c', loader('c'))  # 淘汰最久未使用的 b
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertEqual(loads, ['a', 'b', 'c'])
+
+        cache.get('a', loader('a'), signature=1)
+        self.assertEqual(loads, ['a', 'b', 'c', 'a'])
+
+    def test_dataset_cache_reloads_updated_files(self):
+        """
+        測試資料集快取：重複讀取不重新載入，檔案更新後讀到新內容，呼叫端修改欄位不影響快取。
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_service = DataService(DataLoader(data_dir=tmp_dir))
+            path = os.path.join(tmp_dir, 'stock.parquet')
+            pd.DataFrame({'close': [1.0, 2.0]}).to_parquet(path)
+
+            df = data_service.get_dataset('stock')
+            df['close'] = 0.0
+            self.assertEqual(data_service.get_dataset('stock')['close'].tolist(), [1.0, 2.0])
+            self.assertEqual(len(data_service.cache), 1)
+
+            time.sleep(0.01)
+            pd.DataFrame({'close': [3.0, 4.0, 5.0]}).to_parquet(path)
+            self.assertEqual(data_service.get_dataset('stock')['close'].tolist(), [3.0, 4.0, 5.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
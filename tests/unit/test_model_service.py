@@ -89,14 +89,15 @@ class TestModelService(unittest.TestCase):
         """
         mock_model_instance = MagicMock()
         mock_model_instance.predict.return_value = [0.6, 0.7]
-        self.mock_model_manager.load_model.return_value = mock_model_instance
+        self.mock_model_manager.load_inference_model.return_value = mock_model_instance
 
         model_id = "test_model_id"
         input_data = MagicMock()
 
         predictions = self.model_service.predict(model_id, input_data)
         self.assertEqual(predictions, [0.6, 0.7])
-        self.mock_model_manager.load_model.assert_called_once_with(model_id)
+        # 推論走 NumPy 匯出權重（沒有匯出檔時由 ModelManager 退回 Keras）
+        self.mock_model_manager.load_inference_model.assert_called_once_with(model_id)
         mock_model_instance.predict.assert_called_once_with(input_data)
 
     def test_update_model_performance(self):
@@ -108,5 +109,43 @@ class TestModelService(unittest.TestCase):
         self.model_service.update_model_performance(model_id, metrics)
         self.mock_metadata_manager.update_metadata.assert_called_once_with(model_id, {"performance_metrics": metrics})
 
+    def test_fine_tune_model_creates_linked_version(self):
+        """
+        測試微調以父模型為起點，並儲存為連結父模型的新版本。
+        """
+        parent_metadata = {
+            "model_id": "parent_id",
+            "model_name": "Model_20250101_100000",
+            "dataset_name": "test_dataset",
+            "n_days": 5,
+            "version": 1,
+            "hyperparameters": {"learning_rate": 0.001, "batch_size": 32},
+            "model_config": {"look_back": 5, "n_days": 5, "target_column": "close",
+                             "input_shape": [5, 3], "output_units": 5,
+                             "feature_columns": ["close", "SMA_7", "EMA_7"]}
+        }
+        self.mock_metadata_manager.get_metadata_by_id.return_value = parent_metadata
+        mock_model = MagicMock()
+        mock_model.fit.return_value = MagicMock(history={'loss': [0.1]}, epoch=[0])
+        mock_model.evaluate.return_value = [0.01, 0.02]
+        self.mock_model_manager.load_model.return_value = mock_model
+        self.mock_model_manager.save_model.return_value = "/path/to/new.keras"
+        mock_scaler = MagicMock()
+        self.mock_model_manager.load_scaler.return_value = mock_scaler
+
+        training_data = (MagicMock(), MagicMock(), MagicMock(), MagicMock())
+        model_id = self.model_service.fine_tune_model("parent_id", training_data, epochs=3)
+
+        self.assertNotEqual(model_id, "parent_id")
+        self.mock_model_manager.load_model.assert_called_once_with("parent_id")
+        self.assertEqual(mock_model.fit.call_args[1]['epochs'], 3)
+        self.mock_model_manager.save_scaler.assert_called_once_with(mock_scaler, model_id)
+
+        added_metadata = self.mock_metadata_manager.add_metadata.call_args[0][0]
+        self.assertEqual(added_metadata['parent_model_id'], "parent_id")
+        self.assertEqual(added_metadata['root_model_id'], "parent_id")
+        self.assertEqual(added_metadata['version'], 2)
+        self.assertEqual(added_metadata['model_config']['feature_columns'], ["close", "SMA_7", "EMA_7"])
+
 if __name__ == '__main__':
     unittest.main()
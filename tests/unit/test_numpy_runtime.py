@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# 為了讓測試能夠找到 src/models/numpy_runtime.py，需要將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from models.numpy_runtime import NumpyLSTMModel, export_model
+    from models.trainer import ModelTrainer
+    from utils.model_manager import ModelManager
+except ImportError:
+    NumpyLSTMModel = None
+
+
+@unittest.skipUnless(NumpyLSTMModel, "NumpyLSTMModel 尚未實作")
+class TestNumpyRuntime(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.hyperparameters = {'lstm_units': 16, 'dropout_rate': 0.2, 'learning_rate': 0.001}
+        rng = np.random.default_rng(0)
+        self.X = rng.normal(size=(32, 10, 6)).astype(np.float32)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_matches_keras_output(self):
+        """
+        測試匯出後的 NumPy 前向傳播與 Keras 輸出在容許誤差內一致。
+        """
+        model = ModelTrainer().build_model((10, 6), 3, self.hyperparameters)
+        export_path = export_model(model, os.path.join(self.tmp_dir.name, 'model.npz'))
+        numpy_model = NumpyLSTMModel.load(export_path)
+
+        expected = model.predict(self.X, verbose=0)
+        np.testing.assert_allclose(numpy_model.predict(self.X), expected, atol=1e-5)
+
+    def test_matches_keras_panel_output(self):
+        """
+        測試含 ticker embedding 的面板模型輸出一致。
+        """
+        model = ModelTrainer().build_panel_model((10, 6), 3, n_tickers=4,
+                                                 hyperparameters=self.hyperparameters)
+        export_path = export_model(model, os.path.join(self.tmp_dir.name, 'panel.npz'))
+        numpy_model = NumpyLSTMModel.load(export_path)
+
+        tickers = (np.arange(len(self.X)) % 4).reshape(-1, 1).astype(np.int32)
+        expected = model.predict([self.X, tickers], verbose=0)
+        np.testing.assert_allclose(numpy_model.predict([self.X, tickers]), expected, atol=1e-5)
+
+    def test_monte_carlo_samples(self):
+        """
+        測試 Monte Carlo dropout 取樣：匯出檔記錄 dropout 比例，取樣平均接近確定性預測，比例為 0 時每組取樣相同。
+        """
+        model = ModelTrainer().build_model((10, 6), 3, self.hyperparameters)
+        numpy_model = NumpyLSTMModel.load(export_model(model, os.path.join(self.tmp_dir.name, 'model.npz')))
+        self.assertAlmostEqual(numpy_model.dropout_rate, 0.2)
+
+        X = self.X[:2]
+        samples = numpy_model.predict_samples(X, 4000, seed=0)
+        self.assertEqual(samples.shape, (4000, 2, 3))
+        self.assertGreater(samples.std(axis=0).min(), 0)
+        np.testing.assert_allclose(samples.mean(axis=0), numpy_model.predict(X), atol=0.02)
+
+        deterministic = numpy_model.predict_samples(X, 5, dropout_rate=0.0)
+        np.testing.assert_allclose(deterministic, np.broadcast_to(numpy_model.predict(X), (5, 2, 3)), atol=1e-6)
+
+    def test_model_manager_prefers_exported_weights(self):
+        """
+        測試儲存模型時自動匯出，推論時優先載入 NumPy 模型。
+        """
+        model_manager = ModelManager(model_dir=self.tmp_dir.name)
+        model = ModelTrainer().build_model((10, 6), 3, self.hyperparameters)
+        model_manager.save_model(model, 'm1')
+
+        self.assertTrue(os.path.exists(model_manager.get_export_path('m1')))
+        # ModelManager 以 src.models 匯入，這裡比較類別名稱而非類別物件
+        self.assertEqual(type(model_manager.load_inference_model('m1')).__name__, 'NumpyLSTMModel')
+
+        # 沒有匯出檔的舊模型退回載入 Keras 模型
+        os.remove(model_manager.get_export_path('m1'))
+        self.assertNotEqual(type(model_manager.load_inference_model('m1')).__name__, 'NumpyLSTMModel')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import sys
+import os
+import tempfile
+import pandas as pd
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from data.parser_profiles import (CsvParserProfile, DEFAULT_PROFILE, TW_MARKET_PROFILE, detect_profile,
+                                      get_profile, read_csv)
+    from utils.data_loader import DataLoader
+except ImportError:
+    CsvParserProfile = None
+
+# 與內附匯出檔相同的格式：BOM、中文欄位、YYYY/M/D 日期、N/A、帶單位的金額與列尾逗號
+TW_CSV = (
+    "﻿時間,開盤價,最高價,最低價,收盤價,成交量,\"K(9,3)\",買賣超(元),\n"
+    "1994/5/13,6004.38,6061.95,5992.4,6061.95,601.89,0.8019,N/A,\n"
+    "1994/5/14,6061.95,6116.36,6061.95,6092.02,619.46,0.8291,N/A,\n"
+    "1998/6/6,7527.15,7636.73,7472.45,7636.73,1064.3,0.1814,-4.38億,\n"
+)
+
+
+@unittest.skipUnless(CsvParserProfile, "parser_profiles 尚未實作")
+class TestParserProfiles(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, name: str, content: str) -> str:
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(content)
+        return path
+
+    def test_tw_market_profile_types_and_dates(self):
+        """
+        測試台灣市場格式：自動辨識、刪除列尾空欄位、固定格式解析日期、N/A 為缺失值，且兩種引擎結果一致。
+        """
+        path = self.write('tw.csv', TW_CSV)
+        self.assertIs(detect_profile(path), TW_MARKET_PROFILE)
+
+        df = read_csv(path)
+        self.assertEqual(list(df.columns), ['時間', '開盤價', '最高價', '最低價', '收盤價', '成交量', 'K(9,3)', '買賣超(元)'])
+        self.assertEqual(df['時間'].dtype, 'datetime64[ns]')
+        self.assertEqual(df['時間'].iloc[2], pd.Timestamp('1998-06-06'))
+        self.assertEqual(df['收盤價'].dtype, 'float64')
+        self.assertTrue(pd.isna(df['買賣超(元)'].iloc[0]))
+        self.assertEqual(df['買賣超(元)'].iloc[2], '-4.38億')
+
+        for engine in ('c', 'pyarrow'):
+            profile = CsvParserProfile('test', date_columns=('時間',), date_format='%Y/%m/%d',
+                                       float_columns=TW_MARKET_PROFILE.float_columns,
+                                       string_columns=TW_MARKET_PROFILE.string_columns,
+                                       na_values=('N/A', ''), engine=engine)
+            pd.testing.assert_frame_equal(profile.read(path), df)
+
+    def test_unknown_format_uses_pandas_defaults(self):
+        """
+        測試無法辨識的格式與 pd.read_csv 預設行為相同，未知的設定檔名稱被拒絕。
+        """
+        path = self.write('generic.csv', "date,close\n2024-01-01,1.5\n2024-01-02,2.5\n")
+        self.assertIs(detect_profile(path), DEFAULT_PROFILE)
+        pd.testing.assert_frame_equal(read_csv(path), pd.read_csv(path))
+        with self.assertRaises(ValueError):
+            get_profile('missing')
+
+    def test_date_format_mismatch_is_reported(self):
+        """
+        測試指定設定檔但日期格式不符時拋出 ValueError。
+        """
+        path = self.write('iso.csv', TW_CSV.replace('1994/5/13', '1994-05-13'))
+        with self.assertRaises(ValueError):
+            read_csv(path, 'tw_market')
+
+    def test_data_loader_uses_profile(self):
+        """
+        測試 DataLoader.load_dataframe 以解析設定檔讀取 CSV 資料集。
+        """
+        self.write('tw.csv', TW_CSV)
+        df = DataLoader(data_dir=self.tmp_dir.name).load_dataframe('tw.csv', dtype='float32')
+        self.assertEqual(df['收盤價'].dtype, 'float32')
+        self.assertEqual(df['時間'].dtype, 'datetime64[ns]')
+        self.assertNotIn('Unnamed: 8', df.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock
+import numpy as np
+import pandas as pd
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from sklearn.preprocessing import MinMaxScaler
+    from services.prediction_service import PredictionService
+except ImportError:
+    PredictionService = None
+
+
+@unittest.skipUnless(PredictionService, "PredictionService 尚未實作")
+class TestPredictionService(unittest.TestCase):
+
+    def test_summarize_samples(self):
+        """
+        測試由取樣計算上漲機率、平均漲跌幅與分位數（以 scaler 還原為價格後計算）。
+        """
+        scaler = MinMaxScaler().fit(np.array([[100.0], [200.0]]))
+        reference = float(scaler.transform([[150.0]])[0, 0])
+        prices = np.array([[120.0, 165.0], [150.0, 180.0], [165.0, 195.0], [180.0, 150.0]])
+        samples = (prices - 100.0) / 100.0
+
+        results = PredictionService.summarize_samples(samples, reference, scaler, 0,
+                                                      pd.Timestamp('2024-01-31'), 2)
+
+        self.assertEqual([r['target_date'] for r in results], ['2024-02-01', '2024-02-02'])
+        self.assertAlmostEqual(results[0]['up_down_probability'], 0.5)
+        self.assertAlmostEqual(results[1]['up_down_probability'], 0.75)
+        self.assertAlmostEqual(results[0]['change_magnitude'], np.mean(prices[:, 0] / 150.0 - 1.0))
+        self.assertEqual(list(results[0]['change_quantiles']), ['p5', 'p50', 'p95'])
+        self.assertAlmostEqual(results[1]['change_quantiles']['p50'], np.median(prices[:, 1] / 150.0 - 1.0))
+
+    def test_predict_with_samples(self):
+        """
+        測試指定 samples 時以 predict_samples 取樣，比較基準為模型輸入最後一天的目標值；
+        目標欄位的位置取自模型元資料或本次擬合的 scaler，不使用共用預處理器上的欄位。
+        """
+        df = pd.DataFrame({
+            'date': pd.date_range('2024-01-01', periods=40),
+            'close': np.linspace(1.0, 2.0, 40),
+        })
+        data_service = MagicMock()
+        data_service.get_dataset.return_value = df
+        model_service = MagicMock()
+        metadata = {
+            'dataset_name': 'stock',
+            'hyperparameters': {'dropout_rate': 0.3},
+            'model_config': {'look_back': 5, 'target_column': 'close', 'feature_columns': ['volume', 'close']},
+        }
+        model_service.get_model_metadata.return_value = metadata
+        model_service.load_scaler.return_value = None
+        model_service.predict_samples.return_value = np.array([[[0.6, 0.4]], [[0.7, 0.4]], [[0.4, 0.6]]])
+        scaler = MinMaxScaler().fit(pd.DataFrame({'volume': [0.0, 1.0], 'close': [0.0, 10.0]}))
+        X = np.stack([np.zeros((3, 5)), np.full((3, 5), 0.5)], axis=-1)
+        preprocessor = MagicMock()
+        # 共用的預處理器可能剛處理過其他模型的請求
+        preprocessor.feature_columns = ['close', 'volume']
+        preprocessor.preprocess.return_value = (X, None, scaler)
+
+        service = PredictionService(data_service, model_service, preprocessor)
+        results = service.predict('model-1', 2, samples=3)
+
+        model_service.predict.assert_not_called()
+        args, kwargs = model_service.predict_samples.call_args
+        self.assertEqual((args[0], args[2], kwargs['dropout_rate']), ('model-1', 3, 0.3))
+        self.assertAlmostEqual(results[0]['up_down_probability'], 2 / 3)
+        self.assertAlmostEqual(results[1]['up_down_probability'], 1 / 3)
+        self.assertAlmostEqual(results[0]['change_magnitude'], (0.2 + 0.4 - 0.2) / 3)
+
+        # 沒有記錄特徵順序的舊模型使用本次擬合的 scaler 的欄位
+        del metadata['model_config']['feature_columns']
+        fallback = service.predict('model-1', 2, samples=3)
+        self.assertEqual(fallback, results)
+
+if __name__ == '__main__':
+    unittest.main()
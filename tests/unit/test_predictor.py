@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import MagicMock
+import numpy as np
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from models.predictor import ModelPredictor
+    from models.numpy_runtime import NumpyLSTMModel, export_model
+    from models.trainer import ModelTrainer
+except ImportError:
+    ModelPredictor = None
+
+
+def reference_rollout(model, window, n_days, target_idx):
+    """
+    逐步呼叫 predict 的遞迴預測，作為比較基準。
+    """
+    window = window.copy()
+    predictions = []
+    while len(predictions) < n_days:
+        prediction = np.asarray(model.predict(window, verbose=0))[0]
+        predictions.extend(prediction)
+        for value in prediction:
+            new_row = window[:, -1:, :].copy()
+            new_row[:, :, target_idx] = value
+            window = np.concatenate([window[:, 1:], new_row], axis=1)
+    return np.array(predictions[:n_days])
+
+
+@unittest.skipUnless(ModelPredictor, "ModelPredictor 尚未實作")
+class TestModelPredictor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.hyperparameters = {'lstm_units': 8, 'dropout_rate': 0.2, 'learning_rate': 0.001}
+        self.X = np.random.default_rng(0).random((1, 5, 3), dtype=np.float32)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_multi_horizon_model_uses_single_pass(self):
+        """
+        測試輸出單元數涵蓋 n_days 的模型只呼叫一次 predict。
+        """
+        model = MagicMock(spec=['predict', 'output_shape'])
+        model.output_shape = (None, 5)
+        model.predict.return_value = np.arange(5, dtype=np.float32).reshape(1, 5)
+
+        predictions = ModelPredictor(model).predict_next_n_days(self.X, 3)
+
+        model.predict.assert_called_once()
+        np.testing.assert_array_equal(predictions, [[0, 1, 2]])
+        with self.assertRaises(ValueError):
+            ModelPredictor(model).predict_next_n_days(self.X, 0)
+
+    def test_recursive_rollout(self):
+        """
+        測試單步輸出的模型以遞迴方式預測（Keras 的編譯迴圈與 NumPy 模型），結果與逐步呼叫 predict 一致。
+        """
+        keras_model = ModelTrainer().build_model((5, 3), 2, self.hyperparameters)
+        numpy_model = NumpyLSTMModel.load(export_model(keras_model, os.path.join(self.tmp_dir.name, 'm.npz')))
+        expected = reference_rollout(numpy_model, self.X, 7, target_idx=1)
+
+        with self.assertRaises(ValueError):
+            ModelPredictor(keras_model).predict_next_n_days(self.X, 7)
+        keras_predictor = ModelPredictor(keras_model)
+        np.testing.assert_allclose(keras_predictor.predict_next_n_days(self.X, 7, target_idx=1)[0],
+                                   expected, atol=1e-5)
+        np.testing.assert_allclose(keras_predictor.predict_next_n_days(self.X, 4, target_idx=1)[0],
+                                   expected[:4], atol=1e-5)
+        np.testing.assert_allclose(ModelPredictor(numpy_model).predict_next_n_days(self.X, 7, target_idx=1)[0],
+                                   expected, atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 import pandas as pd
+import numpy as np
 from pandas.testing import assert_frame_equal
 import sys
 import os
@@ -94,5 +95,87 @@ class TestDataPreprocessor(unittest.TestCase):
         self.assertEqual(X.shape[1], look_back)
         self.assertEqual(y.shape[1], forecast_horizon)
 
+    def _make_long_data(self, periods=60):
+        """建立足以通過移動平均計算的模擬資料"""
+        rng = np.random.default_rng(0)
+        close = 100 + np.cumsum(rng.normal(0, 1, periods))
+        return pd.DataFrame({
+            'Date': pd.date_range(start='2023-01-01', periods=periods),
+            'Open': close - 0.5,
+            'High': close + 1.0,
+            'Low': close - 1.0,
+            'Close': close,
+            'Volume': rng.integers(1000, 2000, periods)
+        })
+
+    def test_default_pipeline_dtype_is_float32(self):
+        """
+        測試預設管線輸出 float32 的序列與目標值。
+        """
+        X, y, _ = self.preprocessor.preprocess(self._make_long_data(), 5, 3, 'Close')
+
+        self.assertEqual(X.dtype, np.float32)
+        self.assertEqual(y.dtype, np.float32)
+
+    def test_create_sequences_matches_window_definition(self):
+        """
+        測試向量化的序列創建與逐列切片的定義一致，並遵循指定的型別。
+        """
+        preprocessor = DataPreprocessor(dtype='float64')
+        df_features = preprocessor.feature_engineering(self._make_long_data())
+        normalized_df, _ = preprocessor.normalize_data(df_features)
+        look_back, horizon = 4, 3
+        target_idx = normalized_df.columns.get_loc('Close')
+
+        X, y = preprocessor.create_sequences(normalized_df, look_back, horizon, 'Close')
+
+        self.assertEqual(X.dtype, np.float64)
+        self.assertEqual(len(X), len(normalized_df) - look_back - horizon + 1)
+        for i in (0, len(X) - 1):
+            np.testing.assert_array_equal(X[i], normalized_df.iloc[i:i + look_back].values)
+            np.testing.assert_array_equal(
+                y[i], normalized_df.iloc[i + look_back:i + look_back + horizon, target_idx].values
+            )
+
+    def test_preprocess_reuses_scaler_and_recent_windows(self):
+        """
+        測試沿用既有 scaler 與特徵順序，並只產生最近的序列。
+        """
+        df = self._make_long_data(periods=200)
+        X_full, y_full, scaler = self.preprocessor.preprocess(df, 5, 3, 'Close')
+        feature_columns = list(self.preprocessor.feature_columns)
+
+        # 新資料的欄位順序不同時，仍依 feature_columns 排列
+        preprocessor = DataPreprocessor()
+        X_recent, y_recent, reused = preprocessor.preprocess(
+            df[list(reversed(df.columns))], 5, 3, 'Close', scaler=scaler,
+            feature_columns=feature_columns, recent_windows=10
+        )
+
+        self.assertIs(reused, scaler)
+        self.assertEqual(X_recent.shape, (10, 5, len(feature_columns)))
+        np.testing.assert_allclose(X_recent, X_full[-10:], atol=1e-5)
+        np.testing.assert_allclose(y_recent, y_full[-10:], atol=1e-5)
+
+    def test_preprocess_panel_interleaves_tickers(self):
+        """
+        測試面板預處理為每檔建立獨立 scaler，並將各檔序列交錯成單一資料流。
+        """
+        datasets = {
+            'a.csv': self._make_long_data(periods=80),
+            'b.csv': self._make_long_data(periods=120).assign(Close=lambda df: df['Close'] * 10)
+        }
+
+        panel = self.preprocessor.preprocess_panel(datasets, 5, 2, 'Close', validation_split=0.2)
+
+        self.assertEqual(panel['tickers'], ['a.csv', 'b.csv'])
+        self.assertEqual(set(panel['scalers']), {'a.csv', 'b.csv'})
+        self.assertEqual(len(panel['X_train']), len(panel['ticker_train']))
+        self.assertEqual(set(panel['ticker_val']), {0, 1})
+        # 交錯後前幾組序列應同時包含兩檔股票
+        self.assertEqual(set(panel['ticker_train'][:4]), {0, 1})
+        # 每檔各自正規化，數值都落在 0 到 1 之間
+        self.assertLessEqual(panel['X_train'].max(), 1.0 + 1e-5)
+
 if __name__ == '__main__':
     unittest.main()
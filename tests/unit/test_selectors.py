@@ -1,6 +1,8 @@
 import unittest
 import sys
 import os
+import json
+import tempfile
 from unittest.mock import MagicMock, patch
 
 # 將 src/ 加入 Python 路徑
@@ -109,5 +111,96 @@ class TestModelSelector(unittest.TestCase):
         self.assertIn('Test Model', display_info)
 
 
+@unittest.skipUnless(DATA_SELECTOR_AVAILABLE, "Selector 元件尚未實作")
+class TestModelSelectorCatalog(unittest.TestCase):
+    """
+    測試模型選擇器的記憶體目錄只重新讀取有變動的元資料
+    """
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.metadata_dir = self.tmp_dir.name
+        self.model_selector = ModelSelector(metadata_dir=self.metadata_dir, refresh_interval=0)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_model(self, model_id, training_date='2025-01-01', **extra):
+        metadata = dict({'model_id': model_id, 'model_name': model_id, 'dataset_name': 'a.csv',
+                         'training_date': training_date}, **extra)
+        with open(os.path.join(self.metadata_dir, f"{model_id}.json"), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f)
+
+    def test_only_changed_files_are_reparsed(self):
+        """
+        測試未變動的檔案不會重新解析，變動與刪除的檔案會反映在清單中
+        """
+        self.write_model('m1', '2025-01-01')
+        self.write_model('m2', '2025-01-02')
+        self.assertEqual([m['model_id'] for m in self.model_selector.get_model_list()], ['m2', 'm1'])
+
+        with patch('ui.components.model_selector.json.load', wraps=json.load) as mock_load:
+            self.model_selector.get_dropdown_options()
+            mock_load.assert_not_called()
+
+            self.write_model('m1', '2025-01-03', performance_metrics={'loss': 0.5})
+            self.assertEqual(self.model_selector.get_model_list()[0]['model_id'], 'm1')
+            self.assertEqual(mock_load.call_count, 1)
+
+        os.remove(os.path.join(self.metadata_dir, 'm2.json'))
+        self.assertIsNone(self.model_selector.get_model_metadata('m2'))
+        self.assertEqual(self.model_selector.get_model_count(), 1)
+
+    def test_registry_models_are_indexed_by_dataset(self):
+        """
+        測試註冊表中的模型（含面板模型）可依 ID 與資料集查詢
+        """
+        from utils.metadata_manager import MetadataManager
+
+        self.write_model('json-model')
+        registry = MetadataManager(metadata_dir=self.metadata_dir)
+        registry.add_metadata({'model_id': 'p1', 'model_name': 'Panel', 'dataset_name': 'panel(2)',
+                               'dataset_names': ['a.csv', 'b.csv'], 'training_date': '2025-02-01'})
+        self.assertEqual(self.model_selector.get_model_metadata('p1')['model_name'], 'Panel')
+        self.assertEqual([m['model_id'] for m in self.model_selector.filter_models_by_dataset('a.csv')],
+                         ['p1', 'json-model'])
+
+        registry.add_metadata({'model_id': 'b2', 'dataset_name': 'b.csv', 'training_date': '2025-03-01'})
+        self.assertEqual([m['model_id'] for m in self.model_selector.filter_models_by_dataset('b.csv')],
+                         ['b2', 'p1'])
+
+        registry.delete_metadata('p1')
+        self.assertIsNone(self.model_selector.get_model_metadata('p1'))
+        self.assertEqual(self.model_selector.get_model_count(), 2)
+
+    def test_update_committed_after_registry_query_is_not_skipped(self):
+        """
+        測試在增量查詢之後才提交的更新不會被游標略過，下次檢查時仍會讀到
+        """
+        from utils.metadata_manager import MetadataManager
+
+        registry = MetadataManager(metadata_dir=self.metadata_dir)
+        registry.add_metadata({'model_id': 'r1', 'dataset_name': 'a.csv', 'training_date': '2025-01-01'})
+        registry.add_metadata({'model_id': 'r2', 'dataset_name': 'a.csv', 'training_date': '2025-01-02'})
+        self.assertEqual(self.model_selector.get_model_count(), 2)
+
+        registry.update_metadata('r1', {'model_name': 'first'})
+        selector_registry = self.model_selector._get_registry()
+        query_updated = selector_registry.query_updated
+
+        def query_then_concurrent_update(**kwargs):
+            result = query_updated(**kwargs)
+            # 模擬另一個程序在查詢之後提交更新（模型數量不變）
+            registry.update_metadata('r2', {'model_name': 'second'})
+            return result
+
+        with patch.object(selector_registry, 'query_updated', side_effect=query_then_concurrent_update):
+            self.model_selector.refresh(force=True)
+        self.assertEqual(self.model_selector.get_model_metadata('r1')['model_name'], 'first')
+
+        self.model_selector.refresh(force=True)
+        self.assertEqual(self.model_selector.get_model_metadata('r2')['model_name'], 'second')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock
+import numpy as np
+import pandas as pd
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from utils.stage_timer import StageTimer, stage, parse_server_timing
+    from services.prediction_service import ModelNotFoundError, PredictionService
+    # prediction_service 以 src.utils.stage_timer 標記階段，計時器必須來自同一個模組
+    from src.utils.stage_timer import StageTimer as ServiceStageTimer
+except ImportError:
+    StageTimer = None
+
+
+@unittest.skipUnless(StageTimer, "stage_timer 尚未實作")
+class TestStageTimer(unittest.TestCase):
+
+    def test_stages_recorded_only_when_active(self):
+        """
+        測試 stage() 只在計時器啟用時記錄，同名階段累加，Server-Timing 可解析回相同的階段。
+        """
+        timer = StageTimer()
+        with stage('ignored'):
+            pass
+        with timer.activate():
+            with stage('dataset'):
+                pass
+            with stage('forward'):
+                pass
+            with stage('forward'):
+                pass
+        with stage('after'):
+            pass
+
+        timings = timer.to_dict()
+        self.assertEqual(list(timings), ['dataset', 'forward', 'total'])
+        self.assertGreaterEqual(timings['total'], timings['forward'])
+
+        parsed = parse_server_timing(timer.server_timing())
+        self.assertEqual(list(parsed), ['dataset', 'forward', 'total'])
+        self.assertAlmostEqual(parsed['forward'], timings['forward'], places=3)
+        self.assertEqual(parse_server_timing('cache;desc="hit", db;dur=53'), {'db': 53.0})
+
+    def test_prediction_service_marks_stages(self):
+        """
+        測試 PredictionService 標記讀取資料集、預處理、前向傳播與格式化各階段，模型不存在時拋出 ModelNotFoundError。
+        """
+        df = pd.DataFrame({
+            'date': pd.date_range('2024-01-01', periods=40),
+            'close': np.linspace(1.0, 2.0, 40),
+        })
+        data_service = MagicMock()
+        data_service.get_dataset.return_value = df
+        model_service = MagicMock()
+        model_service.get_model_metadata.return_value = {
+            'dataset_name': 'stock',
+            'model_config': {'look_back': 5, 'target_column': 'close'},
+        }
+        model_service.load_scaler.return_value = None
+        model_service.predict.return_value = np.array([[1.0, -1.0]])
+        preprocessor = MagicMock()
+        preprocessor.preprocess.return_value = (np.zeros((3, 5, 1)), None, None)
+
+        service = PredictionService(data_service, model_service, preprocessor)
+        timer = ServiceStageTimer()
+        with timer.activate():
+            results = service.predict('model-1', 2)
+
+        self.assertEqual([r['target_date'] for r in results], ['2024-02-10', '2024-02-11'])
+        self.assertEqual(list(timer.to_dict(total=False)), ['metadata', 'dataset', 'scaler_load', 'format'])
+        data_service.get_dataset.assert_called_once_with('stock', dtype=preprocessor.dtype)
+
+        model_service.get_model_metadata.return_value = None
+        with self.assertRaises(ModelNotFoundError):
+            service.predict('missing', 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from data.synthetic import SyntheticMarketGenerator, write_universe
+    from data.parser_profiles import TW_MARKET_PROFILE, detect_profile, read_header
+    from services.data_service import DataService
+    from utils.data_loader import DataLoader
+except ImportError:
+    SyntheticMarketGenerator = None
+
+BUNDLED_CSV = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../19940513-20251111.csv'))
+
+
+@unittest.skipUnless(SyntheticMarketGenerator, "synthetic 尚未實作")
+class TestSyntheticMarketGenerator(unittest.TestCase):
+
+    def test_csv_matches_bundled_layout(self):
+        """
+        測試合成 CSV 與內附檔案的標頭相同、可由台灣市場解析設定檔讀取並通過匯入驗證，且開頭的買賣超為 N/A。
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            generator = SyntheticMarketGenerator(seed=1)
+            path = generator.write_ticker(os.path.join(tmp_dir, 'SYN.csv'), 500)
+
+            self.assertEqual(read_header(path), read_header(BUNDLED_CSV))
+            self.assertIs(detect_profile(path), TW_MARKET_PROFILE)
+            df = TW_MARKET_PROFILE.read(path)
+            self.assertEqual(len(df), 500)
+            self.assertTrue(df['買賣超(元)'].iloc[:50].isna().all())
+            self.assertTrue(df['買賣超(元)'].dropna().str.endswith(('億', '萬')).all())
+            self.assertTrue((df['最高價'] >= df[['開盤價', '收盤價']].max(axis=1)).all())
+            self.assertTrue((df['最低價'] <= df[['開盤價', '收盤價']].min(axis=1)).all())
+
+            data_service = DataService(DataLoader(data_dir=tmp_dir))
+            self.assertEqual(data_service.ingest_csv(path, 'syn')['rows'], 500)
+
+    def test_deterministic_per_ticker_and_minute_bars(self):
+        """
+        測試相同 seed 與 ticker 編號產生相同資料（與產生的檔數無關），分 K 落在 09:01-13:30 的交易時段。
+        """
+        generator = SyntheticMarketGenerator(seed=7)
+        first = generator.generate(300, ticker=2)
+        self.assertTrue(first.equals(SyntheticMarketGenerator(seed=7).generate(300, ticker=2)))
+        self.assertFalse(np.allclose(first['收盤價'], generator.generate(300, ticker=3)['收盤價']))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            paths = write_universe(tmp_dir, 3, 300, generator)
+            self.assertEqual([os.path.basename(path) for path in paths], ['SYN00000.csv', 'SYN00001.csv', 'SYN00002.csv'])
+            with open(paths[2], 'rb') as f, tempfile.NamedTemporaryFile(suffix='.csv') as single:
+                generator.write_ticker(single.name, 300, ticker=2)
+                self.assertEqual(f.read(), single.read())
+
+        minute = SyntheticMarketGenerator(frequency='minute').generate(600)
+        times = minute['時間']
+        self.assertEqual(str(times.iloc[0]), '1994-05-13 09:01:00')
+        self.assertEqual(str(times.iloc[269]), '1994-05-13 13:30:00')
+        self.assertEqual(str(times.iloc[270]), '1994-05-16 09:01:00')
+        self.assertTrue(times.is_monotonic_increasing)
+
+    def test_minute_bars_round_trip_through_data_loader(self):
+        """
+        測試分 K 的 CSV（1994/5/13 09:01:00）可由 DataLoader 以台灣市場設定檔讀回相同的時間。
+        """
+        generator = SyntheticMarketGenerator(seed=5, frequency='minute')
+        expected = generator.generate(600)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = generator.write_ticker(os.path.join(tmp_dir, 'SYN.csv'), 600)
+            self.assertIs(detect_profile(path), TW_MARKET_PROFILE)
+
+            df = DataLoader(data_dir=tmp_dir).load_dataframe('SYN.csv')
+            self.assertEqual(df['時間'].dtype, 'datetime64[ns]')
+            self.assertTrue(df['時間'].equals(expected['時間']))
+            self.assertTrue(np.allclose(df['收盤價'], expected['收盤價']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,9 @@
 import unittest
 import sys
 import os
+import tempfile
 from unittest.mock import MagicMock, patch
+import numpy as np
 
 # 為了讓測試能夠找到 src/models/trainer.py，需要將 src/ 加入 Python 路徑
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
@@ -101,5 +103,44 @@ class TestModelTrainer(unittest.TestCase):
         self.assertEqual(metrics['loss'], 0.05)
         self.assertEqual(metrics['accuracy'], 0.95)
 
+@unittest.skipUnless(ModelTrainer, "ModelTrainer 尚未實作")
+class TestModelTrainerCheckpoint(unittest.TestCase):
+    """
+    以小型真實模型測試檢查點寫入與續訓
+    """
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = rng.random((64, 5, 3), dtype=np.float32)
+        self.y = rng.random((64, 2), dtype=np.float32)
+        self.hyperparameters = {'lstm_units': 4, 'epochs': 2, 'batch_size': 16,
+                                'early_stopping_patience': 100, 'checkpoint_interval': 1}
+        self.checkpoint_dir = tempfile.mkdtemp()
+
+    def _train(self, epochs):
+        trainer = ModelTrainer()
+        trainer.build_model((5, 3), 2, self.hyperparameters)
+        hyperparameters = dict(self.hyperparameters, epochs=epochs)
+        return trainer.train_model(self.X, self.y, self.X, self.y, hyperparameters,
+                                   checkpoint_dir=self.checkpoint_dir)
+
+    def test_checkpoint_written_atomically(self):
+        """
+        測試每個 epoch 寫入檢查點且不留下暫存檔
+        """
+        self._train(epochs=2)
+
+        files = sorted(os.listdir(self.checkpoint_dir))
+        self.assertEqual(files, ['best_weights.npz', 'last.keras', 'state.json'])
+
+    def test_resume_from_checkpoint(self):
+        """
+        測試重新建立訓練器後從上次完成的 epoch 繼續訓練
+        """
+        self._train(epochs=2)
+        history = self._train(epochs=4)
+
+        self.assertEqual(history.epoch, [2, 3])
+
 if __name__ == '__main__':
     unittest.main()
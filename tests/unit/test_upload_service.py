@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import io
+import tempfile
+
+# 將 src/ 加入 Python 路徑
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+try:
+    from services.upload_service import ChunkedUploadService, UploadOffsetError
+    from services.data_service import DataService
+    # upload_service 以 src.services.data_service 檢查名稱，例外類別必須來自同一個模組
+    from src.services.data_service import InvalidDatasetNameError
+    from utils.data_loader import DataLoader
+except ImportError:
+    ChunkedUploadService = None
+
+CSV_CONTENT = ("時間,開盤價,最高價,最低價,收盤價,成交量\n" + "".join(
+    f"2024/1/{day},{100 + day},{101 + day},{99 + day},{100 + day},{1000 + day}\n" for day in range(1, 29)
+)).encode('utf-8')
+
+
+@unittest.skipUnless(ChunkedUploadService, "ChunkedUploadService 尚未實作")
+class TestChunkedUploadService(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.upload_dir = os.path.join(self.tmp_dir.name, 'uploads')
+        self.data_service = DataService(DataLoader(data_dir=os.path.join(self.tmp_dir.name, 'processed')))
+        self.service = ChunkedUploadService(self.upload_dir, chunk_size=200)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def send(self, service, upload_id, offset, content=CSV_CONTENT, chunk_size=200):
+        chunk = content[offset:offset + chunk_size]
+        return service.write_chunk(upload_id, offset, io.BytesIO(chunk), len(chunk))
+
+    def test_chunks_are_assembled_and_ingested(self):
+        """
+        測試依序上傳所有區塊後匯入為資料集，並清除暫存檔。
+        """
+        session = self.service.create_session('stock.csv', None, len(CSV_CONTENT))
+        offset = 0
+        while offset < len(CSV_CONTENT):
+            offset = self.send(self.service, session['upload_id'], offset)['received']
+
+        result = self.service.complete(session['upload_id'], self.data_service)
+        self.assertEqual(result['dataset_name'], 'stock.csv')
+        self.assertEqual(result['rows'], 28)
+        self.assertEqual(len(self.data_service.get_dataset('stock.csv')), 28)
+        self.assertEqual(os.listdir(self.upload_dir), [])
+
+    def test_resume_after_restart_and_offset_mismatch(self):
+        """
+        測試伺服器重新啟動後可從已接收的位移續傳，位移不符時回報伺服器的位移。
+        """
+        session = self.service.create_session('stock.csv', 'resumed', len(CSV_CONTENT))
+        upload_id = session['upload_id']
+        self.send(self.service, upload_id, 0)
+
+        restarted = ChunkedUploadService(self.upload_dir, chunk_size=200)
+        self.assertEqual(restarted.get_session(upload_id)['received'], 200)
+
+        # 重送已接收的區塊（例如回應遺失）
+        with self.assertRaises(UploadOffsetError) as context:
+            self.send(restarted, upload_id, 0)
+        self.assertEqual(context.exception.received, 200)
+
+        # 區塊在傳送途中中斷時不計入已接收的位元組
+        with self.assertRaises(UploadOffsetError):
+            restarted.write_chunk(upload_id, 200, io.BytesIO(CSV_CONTENT[200:250]), 200)
+        self.assertEqual(restarted.get_session(upload_id)['received'], 200)
+
+        with self.assertRaises(UploadOffsetError):
+            restarted.complete(upload_id, self.data_service)
+
+        offset = 200
+        while offset < len(CSV_CONTENT):
+            offset = self.send(restarted, upload_id, offset)['received']
+        self.assertEqual(restarted.complete(upload_id, self.data_service)['rows'], 28)
+
+    def test_header_is_validated_on_first_chunk(self):
+        """
+        測試第一個區塊的標頭缺少必要欄位時立即拒絕並刪除工作階段。
+        """
+        content = b"name,value\n" + b"a,1\n" * 100
+        session = self.service.create_session('bad.csv', None, len(content))
+        with self.assertRaises(ValueError):
+            self.send(self.service, session['upload_id'], 0, content)
+        with self.assertRaises(FileNotFoundError):
+            self.service.get_session(session['upload_id'])
+
+    def test_rejects_invalid_sessions(self):
+        """
+        測試非 CSV 檔案、含路徑的資料集名稱與不合法的 upload_id 被拒絕。
+        """
+        with self.assertRaises(ValueError):
+            self.service.create_session('data.txt', None, 10)
+        with self.assertRaises(FileNotFoundError):
+            self.service.get_session('../../etc/passwd')
+        for filename, dataset_name in (('stock.csv', '../../escaped'), ('../stock.csv', None)):
+            with self.assertRaises(InvalidDatasetNameError):
+                self.service.create_session(filename, dataset_name, 10)
+        self.assertEqual([name for name in os.listdir(self.upload_dir) if name.endswith('.json')], [])
+
+
+if __name__ == '__main__':
+    unittest.main()